@@ -0,0 +1,301 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, List, Callable
+from uuid import uuid4
+
+from bson.objectid import ObjectId
+from django.conf import settings
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from core.db_connect import get_collection
+from core.user_stats import bulk_increment_user_stats, FOLLOWERS_COUNT, FOLLOWING_COUNT
+from image_gen.utils import delete_s3_prefixes
+
+logger = logging.getLogger(__name__)
+
+
+class CascadeDeleteService:
+    """
+    Delete madlibs, comments and users together with everything that
+    depends on them: likes, comments on deleted posts, S3 images and their
+    image_events, follows and following feed inbox entries.
+
+    Dependents are removed with delete_many on indexed keys, a batch of
+    parents at a time, and always before their parents. An interrupted
+    cascade therefore leaves the parent in place and running it again
+    picks up where it stopped.
+
+    Large user deletions run as background jobs recorded in cascade_jobs.
+    A job is 'active' while pending or running, and at most one active job
+    exists per user. A job whose updated_at is older than
+    CASCADE_JOB_STALE_SECONDS lost its worker and is resumed by the next
+    deletion request for that user or by the resume_cascade_jobs command.
+    """
+
+    def __init__(self):
+        self.users = get_collection('users')
+        self.madlibs = get_collection('filled_madlibs')
+        self.comments = get_collection('comments')
+        self.likes = get_collection('likes')
+        self.follows = get_collection('follows')
+        self.inbox = get_collection('feed_inbox')
+        self.image_events = get_collection('image_events')
+        self.jobs = get_collection('cascade_jobs')
+        self.batch_size = settings.CASCADE_DELETE_BATCH_SIZE
+        self._create_indexes()
+
+    def _create_indexes(self):
+        # One active (pending or running) job per target; finished jobs drop the flag
+        self.jobs.create_index([('target_id', 1)], unique=True, name='uniq_active_target',
+                               partialFilterExpression={'active': True})
+
+    @staticmethod
+    def _new_stats() -> Dict[str, int]:
+        return {'madlibs': 0, 'comments': 0, 'likes': 0, 's3_objects': 0}
+
+    # ------------------------------------------------------------------
+    # Madlibs and comments
+    # ------------------------------------------------------------------
+    def _delete_madlib_batch(self, madlib_ids: List[ObjectId], stats: Dict[str, int]):
+        """Delete a batch of filled madlibs, their comments, likes and images."""
+        owners = list(self.madlibs.find({'_id': {'$in': madlib_ids}}, {'creator_id': 1, 'likes_count': 1}))
+        comment_ids = [c['_id'] for c in self.comments.find({'post_id': {'$in': madlib_ids}}, {'_id': 1})]
+
+        stats['likes'] += self.likes.delete_many({'post_id': {'$in': madlib_ids}}).deleted_count
+        if comment_ids:
+            stats['likes'] += self.likes.delete_many({'comment_id': {'$in': comment_ids}}).deleted_count
+        stats['comments'] += self.comments.delete_many({'post_id': {'$in': madlib_ids}}).deleted_count
+        stats['s3_objects'] += delete_s3_prefixes([f"madlibs/{madlib_id}/" for madlib_id in madlib_ids])
+        self.inbox.delete_many({'madlib_id': {'$in': madlib_ids}})
+        self.image_events.delete_many({'madlib_id': {'$in': madlib_ids}})
+        stats['madlibs'] += self.madlibs.delete_many({'_id': {'$in': madlib_ids}}).deleted_count
+        bulk_increment_user_stats(self.users, [
+            (doc.get('creator_id'), -1, -doc.get('likes_count', 0)) for doc in owners
+        ])
+
+    def delete_madlib(self, madlib_id: str) -> Optional[Dict[str, int]]:
+        """
+        Delete a filled madlib with its likes, comments, comment likes and images.
+
+        Args:
+            madlib_id: String representation of the filled madlib ObjectId
+
+        Returns:
+            Counts of deleted documents/objects, or None if the madlib does not exist
+        """
+        madlib_oid = ObjectId(madlib_id)
+        if self.madlibs.find_one({'_id': madlib_oid}, {'_id': 1}) is None:
+            logger.info("Filled madlib not found: %s", madlib_id)
+            return None
+
+        stats = self._new_stats()
+        self._delete_madlib_batch([madlib_oid], stats)
+        logger.info("Filled madlib deleted with dependents: %s %s", madlib_id, stats)
+        return stats
+
+    def delete_comment(self, comment_id: str) -> Optional[Dict[str, int]]:
+        """
+        Delete a comment and the likes on it.
+
+        Args:
+            comment_id: String representation of the comment ObjectId
+
+        Returns:
+            Counts of deleted documents, or None if the comment does not exist
+        """
+        comment_oid = ObjectId(comment_id)
+        stats = self._new_stats()
+        stats['likes'] = self.likes.delete_many({'comment_id': comment_oid}).deleted_count
+        stats['comments'] = self.comments.delete_one({'_id': comment_oid}).deleted_count
+        if not stats['comments']:
+            logger.info("Comment not found: %s", comment_id)
+            return None
+        return stats
+
+    # ------------------------------------------------------------------
+    # Users
+    # ------------------------------------------------------------------
+    def count_user_madlibs(self, user_id: str) -> int:
+        """Number of filled madlibs created by a user (decides sync vs background deletion)"""
+        return self.madlibs.count_documents({'creator_id': ObjectId(user_id)})
+
+    def delete_user(self, user_id: str,
+                    progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Optional[Dict[str, int]]:
+        """
+        Delete a user and all of their content, in batches.
+
+        Removes the user's madlibs (with their comments, likes and images), the
+        user's comments on other posts (with their likes) and the user's likes,
+        decrementing the likes_count of the posts and comments they liked (and
+        the likes_received of those posts' creators). Then the user's follows
+        both ways, adjusting the other side's follow counters, and their feed
+        inbox. The user document is deleted last.
+
+        Args:
+            user_id: User ObjectId as string
+            progress: Optional callback invoked with the running counts after each batch
+
+        Returns:
+            Counts of deleted documents/objects, or None if the user does not exist
+        """
+        user_oid = ObjectId(user_id)
+        if self.users.find_one({'_id': user_oid}, {'_id': 1}) is None:
+            logger.info("User not found: %s", user_id)
+            return None
+
+        stats = self._new_stats()
+
+        def report():
+            if progress:
+                progress(dict(stats))
+
+        # The user's own madlibs and everything hanging off them
+        while True:
+            ids = [d['_id'] for d in self.madlibs.find({'creator_id': user_oid}, {'_id': 1}).limit(self.batch_size)]
+            if not ids:
+                break
+            self._delete_madlib_batch(ids, stats)
+            report()
+
+        # The user's comments on other people's posts
+        while True:
+            ids = [d['_id'] for d in self.comments.find({'user_id': user_oid}, {'_id': 1}).limit(self.batch_size)]
+            if not ids:
+                break
+            stats['likes'] += self.likes.delete_many({'comment_id': {'$in': ids}}).deleted_count
+            stats['comments'] += self.comments.delete_many({'_id': {'$in': ids}}).deleted_count
+            report()
+
+        # The user's likes; each target holds at most one like per user
+        while True:
+            likes = list(self.likes.find({'user_id': user_oid}, {'post_id': 1, 'comment_id': 1}).limit(self.batch_size))
+            if not likes:
+                break
+            post_ops = [UpdateOne({'_id': like['post_id'], 'likes_count': {'$gt': 0}}, {'$inc': {'likes_count': -1}})
+                        for like in likes if like.get('post_id') is not None]
+            comment_ops = [UpdateOne({'_id': like['comment_id'], 'likes_count': {'$gt': 0}}, {'$inc': {'likes_count': -1}})
+                           for like in likes if like.get('comment_id') is not None]
+            if post_ops:
+                self.madlibs.bulk_write(post_ops, ordered=False)
+                liked_posts = [like['post_id'] for like in likes if like.get('post_id') is not None]
+                bulk_increment_user_stats(self.users, [
+                    (doc.get('creator_id'), 0, -1)
+                    for doc in self.madlibs.find({'_id': {'$in': liked_posts}}, {'creator_id': 1})
+                ])
+            if comment_ops:
+                self.comments.bulk_write(comment_ops, ordered=False)
+            stats['likes'] += self.likes.delete_many({'_id': {'$in': [like['_id'] for like in likes]}}).deleted_count
+            report()
+
+        # Follows both ways: (user's side of the follow, other side, other side's counter)
+        for own, other, counter in (('follower_id', 'followee_id', FOLLOWERS_COUNT),
+                                    ('followee_id', 'follower_id', FOLLOWING_COUNT)):
+            while True:
+                follows = list(self.follows.find({own: user_oid}, {other: 1}).limit(self.batch_size))
+                if not follows:
+                    break
+                self.users.bulk_write([
+                    UpdateOne({'_id': follow[other], counter: {'$gt': 0}}, {'$inc': {counter: -1}})
+                    for follow in follows
+                ], ordered=False)
+                self.follows.delete_many({'_id': {'$in': [follow['_id'] for follow in follows]}})
+        self.inbox.delete_many({'owner_id': user_oid})
+
+        self.users.delete_one({'_id': user_oid})
+        logger.info("User deleted with dependents: %s %s", user_id, stats)
+        return stats
+
+    # ------------------------------------------------------------------
+    # Background jobs
+    # ------------------------------------------------------------------
+    def start_user_deletion(self, user_id: str, requested_by: str) -> Optional[str]:
+        """
+        Delete a user in a background thread, recording progress in cascade_jobs.
+        A stale job for the same user is resumed instead of starting a new one.
+
+        Args:
+            user_id: User ObjectId as string
+            requested_by: Email of the account that requested the deletion
+
+        Returns:
+            Job ID to poll with get_job, or None if a live job is already
+            deleting this user
+        """
+        job = self._claim_stale_job({'target_id': user_id})
+        if job is not None:
+            job_id = job['_id']
+            logger.info("Resuming stale background deletion of user %s: job %s", user_id, job_id)
+        else:
+            job_id = uuid4().hex
+            now = datetime.now(timezone.utc)
+            try:
+                self.jobs.insert_one({
+                    '_id': job_id,
+                    'kind': 'user',
+                    'target_id': user_id,
+                    'requested_by': requested_by,
+                    'status': 'pending',
+                    'active': True,
+                    'total_madlibs': self.count_user_madlibs(user_id),
+                    'progress': self._new_stats(),
+                    'created_at': now,
+                    'updated_at': now,
+                })
+            except DuplicateKeyError:
+                logger.info("Background deletion of user %s already in progress", user_id)
+                return None
+            logger.info("Started background deletion of user %s: job %s", user_id, job_id)
+
+        thread = threading.Thread(target=self._run_user_job, args=(job_id, user_id),
+                                  name=f"cascade-delete-{job_id}", daemon=True)
+        thread.start()
+        return job_id
+
+    def resume_stale_jobs(self) -> int:
+        """
+        Run every stale user deletion job to completion in this process.
+
+        Returns:
+            Number of jobs resumed
+        """
+        resumed = 0
+        while True:
+            job = self._claim_stale_job({'kind': 'user'})
+            if job is None:
+                return resumed
+            logger.info("Resuming stale background deletion of user %s: job %s", job['target_id'], job['_id'])
+            self._run_user_job(job['_id'], job['target_id'])
+            resumed += 1
+
+    def _claim_stale_job(self, query: Dict) -> Optional[Dict]:
+        """Take over one active job matching query whose worker stopped updating it"""
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=settings.CASCADE_JOB_STALE_SECONDS)
+        return self.jobs.find_one_and_update(
+            dict(query, active=True, updated_at={'$lt': cutoff}),
+            {'$set': {'status': 'running', 'updated_at': now}, '$inc': {'resumed': 1}}
+        )
+
+    def _run_user_job(self, job_id: str, user_id: str):
+        def update(fields, unset=None):
+            fields['updated_at'] = datetime.now(timezone.utc)
+            change = {'$set': fields}
+            if unset:
+                change['$unset'] = unset
+            self.jobs.update_one({'_id': job_id}, change)
+
+        # delete_user redoes nothing already deleted, so a resumed job just runs it again
+        update({'status': 'running'})
+        try:
+            stats = self.delete_user(user_id, progress=lambda s: update({'progress': s}))
+            update({'status': 'done', 'progress': stats or self._new_stats(),
+                    'finished_at': datetime.now(timezone.utc)}, unset={'active': ''})
+        except Exception as e:
+            logger.error("Background deletion of user %s failed (job %s): %s", user_id, job_id, e)
+            update({'status': 'failed', 'error': str(e), 'finished_at': datetime.now(timezone.utc)},
+                   unset={'active': ''})
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Retrieve a cascade job document by ID"""
+        return self.jobs.find_one({'_id': job_id})
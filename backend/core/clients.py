@@ -0,0 +1,50 @@
+import threading
+
+from django.conf import settings
+
+# name -> client, created on first use and shared by every thread in the process
+_clients = {}
+_lock = threading.Lock()
+
+
+def _get(name: str, create):
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = create()
+    return client
+
+
+def get_genai_client():
+    """
+    The process-wide Gemini client. google.genai takes most of a second to
+    import, so nothing imports it until an image is first generated.
+    """
+    def create():
+        from google import genai
+        return genai.Client(api_key=settings.GEMINI_API_KEY)
+    return _get('genai', create)
+
+
+def get_s3_client():
+    """
+    The process-wide S3 client; boto3 is imported on first use. Low-level
+    boto3 clients are safe to share between threads once created.
+    """
+    def create():
+        import boto3
+        return boto3.client(
+            's3',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION
+        )
+    return _get('s3', create)
+
+
+def reset_clients():
+    """Forget the clients, e.g. after credentials change; the next call creates new ones"""
+    with _lock:
+        _clients.clear()
@@ -1,4 +1,9 @@
 from django.conf import settings
+from core.instrumentation import MongoTimingListener
+from core.metrics import MongoMetricsListener, MongoPoolMetricsListener
+from core.query_audit import QueryShapeRecorder
+from core.services import services
+from core.slow_queries import SlowQueryListener
 import pymongo
 
 class MongoDBConnection:
@@ -11,7 +16,12 @@ class MongoDBConnection:
     @classmethod
     def get_client(cls):
         if cls._client is None:
-            cls._client = pymongo.MongoClient(settings.MONGODB_URI)
+            listeners = [MongoTimingListener(), MongoMetricsListener(), MongoPoolMetricsListener()]
+            if settings.SLOW_QUERY_ENABLED:
+                listeners.append(SlowQueryListener())
+            if settings.QUERY_AUDIT_FILE:
+                listeners.append(QueryShapeRecorder(settings.QUERY_AUDIT_FILE))
+            cls._client = pymongo.MongoClient(settings.MONGODB_URI, event_listeners=listeners)
         return cls._client
 
     @classmethod
@@ -20,12 +30,22 @@ class MongoDBConnection:
             cls._db = cls.get_client()[settings.MONGODB_NAME]
         return cls._db
 
+    @classmethod
+    def use(cls, client, db_name):
+        """Point every service at another client and database (load tests, local tools)"""
+        cls.close()
+        cls._client = client
+        cls._db = client[db_name]
+        services.reset()
+
     @classmethod
     def close(cls):
         if cls._client:
             cls._client.close()
             cls._client = None
             cls._db = None
+            # Cached services hold collections from the closed client
+            services.reset()
 
 def get_collection(collection_name):
     """Helper function to get a collection"""
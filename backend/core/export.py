@@ -0,0 +1,94 @@
+import json
+import zlib
+from datetime import datetime
+from typing import Optional, Dict, Iterable, Iterator
+
+from bson import ObjectId
+from django.conf import settings
+
+# Export name -> MongoDB collection
+EXPORT_COLLECTIONS = {
+    'madlibs': 'filled_madlibs',
+    'likes': 'likes',
+    'comments': 'comments',
+}
+
+# Lines are joined into writes of about this size before being sent
+WRITE_BUFFER_BYTES = 64 * 1024
+
+
+def json_default(value):
+    """Serialize ObjectIds as hex strings and datetimes as ISO 8601"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def iter_documents(collection, after: Optional[ObjectId] = None,
+                   batch_size: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Iterate a whole collection in _id order with a server-side cursor.
+
+    Only one batch is held in memory at a time. Because the order is _id
+    ascending, the _id of the last document received is a checkpoint: pass
+    it back as after to resume an interrupted export.
+
+    Args:
+        collection: Collection to export
+        after: Only export documents with a greater _id
+        batch_size: Documents per cursor batch (default settings.EXPORT_BATCH_SIZE)
+    """
+    query = {'_id': {'$gt': after}} if after is not None else {}
+    cursor = collection.find(query, sort=[('_id', 1)])
+    cursor = cursor.batch_size(batch_size or settings.EXPORT_BATCH_SIZE)
+    try:
+        yield from cursor
+    finally:
+        cursor.close()
+
+
+def ndjson_lines(docs: Iterable[Dict]) -> Iterator[bytes]:
+    """One compact JSON line per document"""
+    for doc in docs:
+        yield json.dumps(doc, default=json_default, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def coalesce(chunks: Iterable[bytes], size: int = WRITE_BUFFER_BYTES) -> Iterator[bytes]:
+    """Join small chunks into pieces of at least size bytes (except the last)"""
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield b''.join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a byte stream incrementally into one gzip member"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(collection, after: Optional[ObjectId] = None, gzip: bool = False,
+                  batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    NDJSON export of a collection as a stream of byte chunks, optionally gzipped.
+
+    Args:
+        collection: Collection to export
+        after: Resume after this _id
+        gzip: Compress the output
+        batch_size: Documents per cursor batch
+    """
+    chunks = coalesce(ndjson_lines(iter_documents(collection, after=after, batch_size=batch_size)))
+    return gzip_chunks(chunks) if gzip else chunks
@@ -0,0 +1,107 @@
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from bson.objectid import ObjectId
+from django.conf import settings
+from pymongo.errors import BulkWriteError
+from core.user_stats import FOLLOWERS_COUNT
+
+logger = logging.getLogger(__name__)
+
+# Set on a user document once the user has too many followers for fan-out on
+# write; from then on their posts are pulled into followers' feeds when read
+PULL_AUTHOR = 'fanout_on_read'
+
+
+def create_inbox_indexes(inbox):
+    """
+    Indexes of feed_inbox, one document per (owner, post) with the post's
+    created_at, so an owner's following feed is one index range scan.
+    """
+    # Feed pages newest first; unique so repeated fan-out of a post is a no-op
+    inbox.create_index([('owner_id', 1), ('created_at', -1), ('madlib_id', -1)],
+                       unique=True, name='idx_owner_created_madlib')
+    # Unfollow removes one author's posts from one inbox
+    inbox.create_index([('owner_id', 1), ('author_id', 1)], name='idx_owner_author')
+    # Deleting a post removes it from every inbox
+    inbox.create_index([('madlib_id', 1)], name='idx_madlib')
+    if settings.FEED_INBOX_TTL_DAYS:
+        inbox.create_index([('created_at', 1)], name='idx_created_ttl',
+                           expireAfterSeconds=settings.FEED_INBOX_TTL_DAYS * 86400)
+
+
+def is_pull_author(user: Dict) -> bool:
+    """Whether a user's posts are pulled at read time instead of fanned out"""
+    return user.get(PULL_AUTHOR) is True or user.get(FOLLOWERS_COUNT, 0) > settings.FEED_FANOUT_MAX_FOLLOWERS
+
+
+def inbox_entry(owner_id: ObjectId, post: Dict) -> Dict:
+    return {'owner_id': owner_id, 'madlib_id': post['_id'], 'author_id': post['creator_id'],
+            'created_at': post['created_at']}
+
+
+def _insert_entries(inbox, entries: List[Dict]) -> int:
+    """insert_many, ignoring entries already in the inbox; returns how many were added"""
+    try:
+        return len(inbox.insert_many(entries, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        return e.details.get('nInserted', 0)
+
+
+def fan_out_posts(users, follows, inbox, posts: Iterable[Dict]) -> int:
+    """
+    Copy new public posts into the inbox of every follower of their authors,
+    FEED_FANOUT_BATCH_SIZE entries per insert. Authors past the follower
+    threshold are skipped; FeedService.get_following pulls their posts.
+
+    Args:
+        users: users collection
+        follows: follows collection
+        inbox: feed_inbox collection
+        posts: Filled madlib documents with _id, creator_id and created_at
+
+    Returns:
+        Number of inbox entries written
+    """
+    by_author = defaultdict(list)
+    for post in posts:
+        if post.get('public', True) and post.get('creator_id') is not None:
+            by_author[post['creator_id']].append(post)
+
+    written = 0
+    for author_id, author_posts in by_author.items():
+        author = users.find_one({'_id': author_id}, {FOLLOWERS_COUNT: 1, PULL_AUTHOR: 1}) or {}
+        if is_pull_author(author):
+            continue
+        batch = []
+        for follow in follows.find({'followee_id': author_id}, {'follower_id': 1}):
+            batch.extend(inbox_entry(follow['follower_id'], post) for post in author_posts)
+            if len(batch) >= settings.FEED_FANOUT_BATCH_SIZE:
+                written += _insert_entries(inbox, batch)
+                batch = []
+        if batch:
+            written += _insert_entries(inbox, batch)
+    if written:
+        logger.debug("Fanned out %s inbox entries for %s authors", written, len(by_author))
+    return written
+
+
+def backfill_inbox(madlibs, inbox, owner_id: ObjectId, author_id: ObjectId) -> int:
+    """Copy an author's latest FEED_FOLLOW_BACKFILL public posts into a new follower's inbox"""
+    if settings.FEED_FOLLOW_BACKFILL <= 0:
+        return 0
+    posts = list(madlibs.find(
+        {'creator_id': author_id, 'public': True},
+        {'creator_id': 1, 'created_at': 1},
+        sort=[('created_at', -1), ('_id', -1)],
+        limit=settings.FEED_FOLLOW_BACKFILL
+    ))
+    if not posts:
+        return 0
+    return _insert_entries(inbox, [inbox_entry(owner_id, post) for post in posts])
+
+
+def remove_author_from_inbox(inbox, owner_id: ObjectId, author_id: ObjectId) -> int:
+    """Drop an author's posts from one inbox (on unfollow)"""
+    return inbox.delete_many({'owner_id': owner_id, 'author_id': author_id}).deleted_count
@@ -0,0 +1,203 @@
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional, Dict
+
+import bson
+from django.conf import settings
+from pymongo import monitoring
+
+# Timings of the request being handled by the current thread, if any.
+# Background threads (e.g. the like write buffer) have none and are not measured.
+_current: ContextVar[Optional['RequestTimings']] = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Everything measured while handling one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total_ms = 0.0
+        self.db_ms = 0.0
+        self.db_commands = 0
+        self.db_reply_bytes = 0
+        self.response_bytes = 0
+        # command name -> [count, total ms, max ms]
+        self.commands: Dict[str, list] = defaultdict(lambda: [0, 0.0, 0.0])
+        # external service ('s3', 'imagen') -> total ms
+        self.external: Dict[str, float] = defaultdict(float)
+
+    def add_command(self, name: str, duration_ms: float, reply_bytes: int = 0):
+        self.db_commands += 1
+        self.db_ms += duration_ms
+        self.db_reply_bytes += reply_bytes
+        entry = self.commands[name]
+        entry[0] += 1
+        entry[1] += duration_ms
+        entry[2] = max(entry[2], duration_ms)
+
+    def finish(self, response_bytes: int = 0):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+        self.response_bytes = response_bytes
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value, e.g.
+        total;dur=41.2, db;dur=12.0;desc="6 commands", db-find;dur=8.1;desc="4x", s3;dur=20.3
+        """
+        parts = [f"total;dur={self.total_ms:.1f}",
+                 f'db;dur={self.db_ms:.1f};desc="{self.db_commands} commands"']
+        for name, (count, total, _) in sorted(self.commands.items(), key=lambda item: -item[1][1]):
+            parts.append(f'db-{name};dur={total:.1f};desc="{count}x"')
+        for service, total in self.external.items():
+            parts.append(f"{service};dur={total:.1f}")
+        return ', '.join(parts)
+
+
+def start_request() -> object:
+    """Begin measuring the current request; returns a token for end_request"""
+    return _current.set(RequestTimings())
+
+
+def end_request(token) -> Optional[RequestTimings]:
+    """Stop measuring and return what was recorded"""
+    timings = _current.get()
+    _current.reset(token)
+    return timings
+
+
+@contextmanager
+def timed(service: str):
+    """
+    Attribute the time spent in the block to an external service of the
+    current request (a no-op outside a request).
+
+        with timed('s3'):
+            s3.upload_file(...)
+    """
+    timings = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.external[service] += (time.perf_counter() - started) * 1000
+
+
+class MongoTimingListener(monitoring.CommandListener):
+    """
+    Adds every MongoDB command's server round trip to the current request.
+
+    pymongo publishes command events synchronously on the thread that ran the
+    command, so the request context variable is visible here.
+    """
+
+    def started(self, event):
+        pass
+
+    def _record(self, event, reply_bytes: int = 0):
+        timings = _current.get()
+        if timings is not None:
+            timings.add_command(event.command_name, event.duration_micros / 1000, reply_bytes)
+
+    def succeeded(self, event):
+        if _current.get() is None:
+            return
+        # Re-encoding the reply costs about as much as decoding it did, so it is opt-in
+        reply_bytes = len(bson.encode(event.reply)) if settings.REQUEST_TIMING_REPLY_BYTES else 0
+        self._record(event, reply_bytes)
+
+    def failed(self, event):
+        self._record(event)
+
+
+class TimingStats:
+    """
+    Per-route aggregates of request timings for this process.
+
+    Each route keeps running totals plus the latencies of its last
+    sample_size requests, from which percentiles are computed on demand.
+    """
+
+    def __init__(self, sample_size: int = 500):
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.since = datetime.now(timezone.utc)
+            self._routes: Dict[str, Dict] = {}
+
+    def record(self, route: str, status_code: int, timings: RequestTimings):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'db_ms': 0.0, 'db_commands': 0, 'db_reply_bytes': 0, 'response_bytes': 0,
+                    'commands': defaultdict(lambda: [0, 0.0, 0.0]),
+                    'external': defaultdict(float),
+                    'samples': deque(maxlen=self.sample_size),
+                }
+            stats['count'] += 1
+            stats['errors'] += status_code >= 500
+            stats['total_ms'] += timings.total_ms
+            stats['max_ms'] = max(stats['max_ms'], timings.total_ms)
+            stats['db_ms'] += timings.db_ms
+            stats['db_commands'] += timings.db_commands
+            stats['db_reply_bytes'] += timings.db_reply_bytes
+            stats['response_bytes'] += timings.response_bytes
+            stats['samples'].append(timings.total_ms)
+            for name, (count, total, longest) in timings.commands.items():
+                entry = stats['commands'][name]
+                entry[0] += count
+                entry[1] += total
+                entry[2] = max(entry[2], longest)
+            for service, total in timings.external.items():
+                stats['external'][service] += total
+
+    @staticmethod
+    def _percentile(ordered, fraction: float) -> float:
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+    def snapshot(self) -> Dict:
+        """
+        Returns:
+            {'pid', 'since', 'routes': {route: summary}}, routes slowest (by total time) first
+        """
+        with self._lock:
+            routes = {route: dict(stats, samples=sorted(stats['samples']),
+                                  commands=dict(stats['commands']), external=dict(stats['external']))
+                      for route, stats in self._routes.items()}
+            since = self.since
+
+        summaries = {}
+        for route, stats in sorted(routes.items(), key=lambda item: -item[1]['total_ms']):
+            count = stats['count']
+            samples = stats['samples']
+            summaries[route] = {
+                'count': count,
+                'errors': stats['errors'],
+                'avg_ms': round(stats['total_ms'] / count, 2),
+                'p50_ms': round(self._percentile(samples, 0.5), 2),
+                'p95_ms': round(self._percentile(samples, 0.95), 2),
+                'max_ms': round(stats['max_ms'], 2),
+                'avg_db_ms': round(stats['db_ms'] / count, 2),
+                'avg_db_commands': round(stats['db_commands'] / count, 2),
+                'avg_db_reply_bytes': round(stats['db_reply_bytes'] / count),
+                'avg_response_bytes': round(stats['response_bytes'] / count),
+                'commands': {
+                    name: {'count': n, 'total_ms': round(total, 2), 'max_ms': round(longest, 2)}
+                    for name, (n, total, longest) in stats['commands'].items()
+                },
+                'external_ms': {service: round(total, 2) for service, total in stats['external'].items()},
+            }
+        return {'pid': os.getpid(), 'since': since, 'routes': summaries}
+
+
+timing_stats = TimingStats()
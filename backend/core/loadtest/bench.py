@@ -0,0 +1,293 @@
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+from .seed import WORDS
+
+# name -> setup(context) returning the zero-argument callable that is timed
+BENCHMARKS: Dict[str, Callable[['BenchContext'], Callable[[], object]]] = {}
+
+# Calibration never times more than this many calls per sample
+MAX_NUMBER = 10_000
+
+
+def benchmark(name: str):
+    """Register a benchmark setup function under `name`"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+class BenchContext:
+    """
+    What benchmark setups share: the seeded dataset ids, a seeded random
+    generator for picking arguments, one instance per service (constructed,
+    and so indexed, outside the timed code) and cleanups to run afterwards.
+    """
+
+    def __init__(self, data: Dict, seed: int = 42):
+        self.data = data
+        self.rng = random.Random(seed)
+        self._services = {}
+        self._teardowns = []
+
+    def service(self, cls):
+        if cls not in self._services:
+            self._services[cls] = cls()
+        return self._services[cls]
+
+    def user_id(self) -> str:
+        return str(self.rng.choice(self.data['users'])['_id'])
+
+    def madlib_id(self) -> str:
+        return str(self.rng.choice(self.data['madlibs']))
+
+    def on_teardown(self, cleanup: Callable[[], None]):
+        self._teardowns.append(cleanup)
+
+    def teardown(self):
+        while self._teardowns:
+            self._teardowns.pop()()
+
+
+@benchmark('feed.get_most_recent')
+def _feed_most_recent(ctx):
+    from feed.models import FeedService
+    service = ctx.service(FeedService)
+    return lambda: service.get_most_recent(limit=20)
+
+
+@benchmark('feed.get_top_by_likes')
+def _feed_top_by_likes(ctx):
+    from feed.models import FeedService
+    service = ctx.service(FeedService)
+    return lambda: service.get_top_by_likes(limit=20, time_filter='week')
+
+
+@benchmark('feed.get_most_discussed')
+def _feed_most_discussed(ctx):
+    from feed.models import FeedService
+    service = ctx.service(FeedService)
+    return lambda: service.get_most_discussed(limit=20)
+
+
+@benchmark('madlibs.get_all')
+def _madlibs_get_all(ctx):
+    from madlibs.models import UserFilledMadlibs
+    service = ctx.service(UserFilledMadlibs)
+    return lambda: service.get_all(limit=20)
+
+
+@benchmark('madlibs.get_by_creator')
+def _madlibs_get_by_creator(ctx):
+    from madlibs.models import UserFilledMadlibs
+    service = ctx.service(UserFilledMadlibs)
+    return lambda: service.get_by_creator(ctx.user_id(), limit=20)
+
+
+@benchmark('likes.get_post_likes_count')
+def _likes_count(ctx):
+    from social.models import LikeModel
+    service = ctx.service(LikeModel)
+    return lambda: service.get_post_likes_count(ctx.madlib_id())
+
+
+@benchmark('likes.user_liked_post')
+def _likes_user_liked(ctx):
+    from social.models import LikeModel
+    service = ctx.service(LikeModel)
+    return lambda: service.user_liked_post(ctx.user_id(), ctx.madlib_id())
+
+
+@benchmark('comments.get_post_comments')
+def _comments_for_post(ctx):
+    from social.models import CommentModel
+    service = ctx.service(CommentModel)
+    return lambda: service.get_post_comments(ctx.madlib_id())
+
+
+@benchmark('templates.search_by_title')
+def _templates_search_by_title(ctx):
+    from madlibs.models import MadLibTemplate
+    service = ctx.service(MadLibTemplate)
+    return lambda: service.search_by_title(ctx.rng.choice(WORDS))
+
+
+def _sessions(ctx, count: int = 50) -> List[str]:
+    """Session keys of `count` logged-in looking sessions, deleted at teardown"""
+    from core.sessions import SessionStore
+    keys = []
+    for i in range(count):
+        store = SessionStore()
+        store.update({'_auth_user_id': str(i), '_auth_user_backend': 'django.contrib.auth.backends.ModelBackend',
+                      '_auth_user_hash': 'x' * 64})
+        store.create()
+        keys.append(store.session_key)
+    ctx.on_teardown(lambda: SessionStore().collection.delete_many({'session_key': {'$in': keys}}))
+    return keys
+
+
+@benchmark('sessions.load')
+def _sessions_load(ctx):
+    from core.sessions import SessionStore
+    keys = _sessions(ctx)
+    return lambda: SessionStore(ctx.rng.choice(keys)).load()
+
+
+@benchmark('sessions.save')
+def _sessions_save(ctx):
+    from core.sessions import SessionStore
+    keys = _sessions(ctx)
+
+    def save():
+        store = SessionStore(ctx.rng.choice(keys))
+        store['last_seen'] = time.time()
+        store.save()
+    return save
+
+
+@benchmark('viewsets.construct')
+def _viewsets_construct(ctx):
+    from feed.views import FeedViewSet
+    from madlibs.views import UserFilledMadlibsViewSet
+    from social.views import LikeViewSet, CommentViewSet
+    from users.views import UserViewSet
+    viewsets = (FeedViewSet, UserFilledMadlibsViewSet, LikeViewSet, CommentViewSet, UserViewSet)
+
+    def construct():
+        # What DRF does for every request before the action runs
+        for cls in viewsets:
+            cls()
+    return construct
+
+
+def select(patterns: Optional[List[str]] = None) -> List[str]:
+    """
+    Benchmark names starting with any of the patterns (e.g. "feed." or
+    "likes.user_liked_post"), or all of them.
+
+    Raises:
+        ValueError: If a pattern matches nothing
+    """
+    if not patterns:
+        return list(BENCHMARKS)
+    names = []
+    for pattern in patterns:
+        matched = [name for name in BENCHMARKS if name.startswith(pattern)]
+        if not matched:
+            raise ValueError(f"No benchmark matches '{pattern}'; choose from: {', '.join(BENCHMARKS)}")
+        names.extend(name for name in matched if name not in names)
+    return names
+
+
+def _time(fn: Callable[[], object], number: int) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - started
+
+
+def measure(fn: Callable[[], object], repeat: int = 7, min_sample_time: float = 0.05, warmup: int = 3) -> Dict:
+    """
+    Time fn the way asv and timeit do: calibrate how many calls make up a
+    sample of at least min_sample_time, then take `repeat` samples and
+    report per-call statistics in milliseconds.
+    """
+    for _ in range(warmup):
+        fn()
+    number = 1
+    while number < MAX_NUMBER:
+        elapsed = _time(fn, number)
+        if elapsed >= min_sample_time:
+            break
+        # Aim a little over the target so the next round usually settles it
+        number = min(MAX_NUMBER, max(number * 2, int(number * 1.2 * min_sample_time / max(elapsed, 1e-9))))
+
+    samples = sorted(_time(fn, number) / number * 1000 for _ in range(max(repeat, 1)))
+    quartiles = statistics.quantiles(samples, n=4) if len(samples) > 1 else [samples[0]] * 3
+    return {
+        'min_ms': round(samples[0], 4),
+        'median_ms': round(statistics.median(samples), 4),
+        'mean_ms': round(statistics.fmean(samples), 4),
+        'stddev_ms': round(statistics.stdev(samples), 4) if len(samples) > 1 else 0.0,
+        'iqr_ms': round(quartiles[2] - quartiles[0], 4),
+        'repeat': len(samples),
+        'number': number,
+    }
+
+
+def run_benchmarks(ctx: BenchContext, names: List[str], repeat: int = 7, min_sample_time: float = 0.05,
+                   warmup: int = 3, progress: Optional[Callable[[str, Dict], None]] = None) -> Dict[str, Dict]:
+    """Set up and measure each named benchmark, tearing everything down afterwards"""
+    results = {}
+    try:
+        for name in names:
+            fn = BENCHMARKS[name](ctx)
+            results[name] = measure(fn, repeat=repeat, min_sample_time=min_sample_time, warmup=warmup)
+            if progress:
+                progress(name, results[name])
+    finally:
+        ctx.teardown()
+    return results
+
+
+def compare(baseline: Dict[str, Dict], current: Dict[str, Dict], threshold: float = 0.10) -> List[Dict]:
+    """
+    Compare two runs' results benchmark by benchmark.
+
+    A benchmark regressed when both its median and its minimum got slower by
+    more than `threshold` (0.10 = 10%); requiring both keeps one noisy sample
+    from flagging it. Improvements are the mirror image.
+
+    Returns:
+        One row per benchmark: name, baseline and current median, ratio
+        (current / baseline) and status: regression, improvement,
+        unchanged, new or missing
+    """
+    rows = []
+    for name in list(baseline) + [name for name in current if name not in baseline]:
+        before, after = baseline.get(name), current.get(name)
+        row = {'name': name, 'baseline_ms': before and before['median_ms'],
+               'current_ms': after and after['median_ms'], 'ratio': None}
+        if before is None:
+            row['status'] = 'new'
+        elif after is None:
+            row['status'] = 'missing'
+        else:
+            median_ratio = after['median_ms'] / before['median_ms'] if before['median_ms'] else 1.0
+            min_ratio = after['min_ms'] / before['min_ms'] if before['min_ms'] else 1.0
+            row['ratio'] = round(median_ratio, 3)
+            if median_ratio > 1 + threshold and min_ratio > 1 + threshold:
+                row['status'] = 'regression'
+            elif median_ratio < 1 / (1 + threshold) and min_ratio < 1 / (1 + threshold):
+                row['status'] = 'improvement'
+            else:
+                row['status'] = 'unchanged'
+        rows.append(row)
+    return rows
+
+
+def format_results(results: Dict[str, Dict]) -> str:
+    """Fixed-width table of run_benchmarks() results"""
+    header = f"{'benchmark':<30}{'median':>10}{'min':>10}{'iqr':>10}{'calls':>8}"
+    lines = [header, '-' * len(header)]
+    for name, row in results.items():
+        lines.append(f"{name:<30}{row['median_ms']:>10.3f}{row['min_ms']:>10.3f}{row['iqr_ms']:>10.3f}"
+                     f"{row['number'] * row['repeat']:>8}")
+    lines.append("times in ms per call")
+    return '\n'.join(lines)
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    """Fixed-width table of compare() rows"""
+    header = f"{'benchmark':<30}{'before':>10}{'after':>10}{'ratio':>8}  status"
+    lines = [header, '-' * len(header)]
+    for row in rows:
+        before = f"{row['baseline_ms']:.3f}" if row['baseline_ms'] is not None else '-'
+        after = f"{row['current_ms']:.3f}" if row['current_ms'] is not None else '-'
+        ratio = f"{row['ratio']:.2f}x" if row['ratio'] is not None else '-'
+        marker = ' <<' if row['status'] == 'regression' else ''
+        lines.append(f"{row['name']:<30}{before:>10}{after:>10}{ratio:>8}  {row['status']}{marker}")
+    return '\n'.join(lines)
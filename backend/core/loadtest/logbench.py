@@ -0,0 +1,147 @@
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from core.logging_queue import QueuedHandler
+from .bench import measure
+
+# (name, logger level, handler) the request's log calls are timed under
+PROFILES = (
+    ('development', logging.DEBUG, 'sync'),
+    ('development+queue', logging.DEBUG, 'queue'),
+    ('production', logging.WARNING, 'queue'),
+)
+
+VERBOSE_FORMAT = '[{levelname}] {asctime} {name} {funcName}:{lineno} - {message}'
+
+
+def _request(session_key: str = 'k' * 32):
+    """Arguments for the log calls one authenticated madlib view makes"""
+    now = datetime.now(timezone.utc)
+    return {
+        'session_key': session_key,
+        'now': now,
+        'expire_date': now + timedelta(days=14),
+        'session': {'_auth_user_id': '65f0c0ffee0000000000beef', '_session_init_timestamp_': 1700000000,
+                    '_auth_user_backend': 'django.contrib.auth.backends.ModelBackend', '_auth_user_hash': 'x' * 64},
+        'user_id': '65f0c0ffee0000000000beef',
+        'username': 'player_one',
+        'madlib_id': '65f0c0ffee0000000000cafe',
+        'result': {'matched': 1, 'modified': 1, 'upserted': None},
+    }
+
+
+def eager_request(log: logging.Logger, req: Dict):
+    """
+    The log calls of SessionStore.load, UserOperations.get_by_id,
+    UserFilledMadlibs.get_by_id and SessionStore.save as they were written
+    before: f-strings built whether or not the level is enabled, and a copy
+    of the session dict on save.
+    """
+    key = req['session_key']
+    log.debug(f"Loading session: key={key}")
+    log.debug(f"Session document found: {True}")
+    log.debug(f"Expire date: {req['expire_date']}, Current time: {req['now']}")
+    log.info(f"Session loaded successfully: key={key}, data_keys={list(req['session'].keys())}")
+    log.debug(f"Retrieving user by ID: {req['user_id']}")
+    log.info(f"User found: {req['user_id']} ({req['username']})")
+    log.debug(f"Retrieving filled madlib by ID: {req['madlib_id']}")
+    log.info(f"Filled madlib found: {req['madlib_id']}")
+    session_dict = dict(req['session'].items())
+    log.debug(f"Saving session: key={key}")
+    log.debug(f"Session data keys: {list(session_dict.keys())}")
+    log.debug(f"Must create: {False}")
+    result = req['result']
+    log.info(f"Session saved: key={key}, matched={result['matched']}, modified={result['modified']}, "
+             f"upserted={result['upserted']}")
+
+
+def lazy_request(log: logging.Logger, req: Dict):
+    """The same calls as eager_request, written the way the models now log"""
+    key = req['session_key']
+    log.debug("Loading session: key=%s", key)
+    log.debug("Session document found: %s", True)
+    log.debug("Expire date: %s, Current time: %s", req['expire_date'], req['now'])
+    if log.isEnabledFor(logging.INFO):
+        log.info("Session loaded successfully: key=%s, data_keys=%s", key, list(req['session']))
+    log.debug("Retrieving user by ID: %s", req['user_id'])
+    log.info("User found: %s (%s)", req['user_id'], req['username'])
+    log.debug("Retrieving filled madlib by ID: %s", req['madlib_id'])
+    log.info("Filled madlib found: %s", req['madlib_id'])
+    session_dict = req['session']
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Saving session: key=%s, data_keys=%s, must_create=%s", key, list(session_dict), False)
+    result = req['result']
+    log.info("Session saved: key=%s, matched=%s, modified=%s, upserted=%s",
+             key, result['matched'], result['modified'], result['upserted'])
+
+
+STYLES: Dict[str, Callable[[logging.Logger, Dict], None]] = {'eager': eager_request, 'lazy': lazy_request}
+
+
+def _logger(level: int, handler: logging.Handler) -> logging.Logger:
+    log = logging.getLogger('crowdlib.logbench')
+    log.handlers[:] = [handler]
+    log.setLevel(level)
+    log.propagate = False
+    return log
+
+
+def _handler(kind: str) -> logging.Handler:
+    """Handlers write to os.devnull so only the logging machinery is timed"""
+    # Unbounded so no record is dropped and the comparison stays fair
+    handler = QueuedHandler(filename=os.devnull, maxsize=0) if kind == 'queue' else logging.FileHandler(os.devnull)
+    handler.setFormatter(logging.Formatter(VERBOSE_FORMAT, style='{', datefmt='%Y-%m-%d %H:%M:%S'))
+    return handler
+
+
+def run_logging_benchmarks(repeat: int = 7, min_sample_time: float = 0.05, warmup: int = 3,
+                           progress: Optional[Callable[[str, Dict], None]] = None) -> Dict[str, Dict]:
+    """
+    Time one request's worth of hot-path log calls in each style under each
+    profile; results are keyed "profile/style" like run_benchmarks().
+
+    With the queue, only the request thread's share is timed: writing
+    happens on the listener thread.
+    """
+    req = _request()
+    results = {}
+    for profile, level, kind in PROFILES:
+        for style, fn in STYLES.items():
+            handler = _handler(kind)
+            log = _logger(level, handler)
+            try:
+                results[f"{profile}/{style}"] = measure(lambda: fn(log, req), repeat=repeat,
+                                                        min_sample_time=min_sample_time, warmup=warmup)
+            finally:
+                log.handlers[:] = []
+                handler.close()
+            if progress:
+                progress(f"{profile}/{style}", results[f"{profile}/{style}"])
+    return results
+
+
+def overhead(results: Dict[str, Dict]) -> List[Dict]:
+    """Per-request time each profile saves by logging lazily, in microseconds"""
+    rows = []
+    for profile, _, _ in PROFILES:
+        eager, lazy = results.get(f"{profile}/eager"), results.get(f"{profile}/lazy")
+        if eager and lazy:
+            rows.append({
+                'profile': profile,
+                'eager_us': round(eager['median_ms'] * 1000, 2),
+                'lazy_us': round(lazy['median_ms'] * 1000, 2),
+                'saved_us': round((eager['median_ms'] - lazy['median_ms']) * 1000, 2),
+            })
+    return rows
+
+
+def format_overhead(rows: List[Dict]) -> str:
+    """Fixed-width table of overhead() rows"""
+    header = f"{'profile':<22}{'eager':>10}{'lazy':>10}{'saved':>10}"
+    lines = [header, '-' * len(header)]
+    for row in rows:
+        lines.append(f"{row['profile']:<22}{row['eager_us']:>10.2f}{row['lazy_us']:>10.2f}{row['saved_us']:>10.2f}")
+    lines.append("times in us of logging per request")
+    return '\n'.join(lines)
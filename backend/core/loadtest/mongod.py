@@ -0,0 +1,152 @@
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+import pymongo
+from pymongo.errors import PyMongoError
+
+
+class MongoUnavailable(RuntimeError):
+    """No MongoDB could be started or connected to for a load test or benchmark"""
+
+
+def free_port() -> int:
+    """A localhost TCP port nothing is listening on right now"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class LocalMongod:
+    """
+    A throwaway mongod on a free localhost port with a temporary data
+    directory, removed again on stop().
+
+        with LocalMongod() as mongod:
+            client = pymongo.MongoClient(mongod.uri)
+    """
+
+    def __init__(self, binary: Optional[str] = None, port: Optional[int] = None,
+                 startup_timeout: float = 30.0):
+        """
+        Args:
+            binary: Path to mongod (default: the one on PATH)
+            port: Port to listen on (default: any free port)
+            startup_timeout: Seconds to wait for mongod to accept connections
+
+        Raises:
+            MongoUnavailable: If no mongod binary can be found
+        """
+        self.binary = shutil.which(binary or 'mongod')
+        if not self.binary:
+            raise MongoUnavailable(f"{binary} is not an executable mongod" if binary
+                                   else "mongod not found on PATH; install MongoDB or pass its path")
+        self.port = port or free_port()
+        self.startup_timeout = startup_timeout
+        self.dbpath = None
+        self.process = None
+
+    @property
+    def uri(self) -> str:
+        return f"mongodb://127.0.0.1:{self.port}/"
+
+    def start(self):
+        """
+        Start mongod and wait until it answers a ping.
+
+        Raises:
+            MongoUnavailable: If mongod exits or does not answer in time
+        """
+        self.dbpath = tempfile.mkdtemp(prefix='crowdlib-mongod-')
+        self._log_path = os.path.join(self.dbpath, 'mongod.log')
+        self.process = subprocess.Popen(
+            [self.binary, '--dbpath', self.dbpath, '--port', str(self.port), '--bind_ip', '127.0.0.1',
+             '--logpath', self._log_path, '--setParameter', 'diagnosticDataCollectionEnabled=false'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT
+        )
+
+        deadline = time.monotonic() + self.startup_timeout
+        client = pymongo.MongoClient(self.uri, serverSelectionTimeoutMS=500)
+        try:
+            while True:
+                if self.process.poll() is not None:
+                    raise MongoUnavailable(f"mongod exited with code {self.process.returncode}:\n{self._log_tail()}")
+                try:
+                    client.admin.command('ping')
+                    return self
+                except PyMongoError:
+                    if time.monotonic() > deadline:
+                        self.stop()
+                        raise MongoUnavailable(f"mongod did not start within {self.startup_timeout}s")
+                    time.sleep(0.2)
+        finally:
+            client.close()
+
+    def stop(self):
+        """Shut mongod down and delete its data directory"""
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+        if self.dbpath:
+            shutil.rmtree(self.dbpath, ignore_errors=True)
+            self.dbpath = None
+
+    def _log_tail(self, lines: int = 20) -> str:
+        try:
+            with open(self._log_path, encoding='utf-8', errors='replace') as f:
+                return ''.join(f.readlines()[-lines:])
+        except OSError:
+            return ''
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+@contextmanager
+def mongo_target(mongo_uri: Optional[str] = None, mongod_binary: Optional[str] = None, stand_in: bool = False,
+                 notify: Optional[Callable[[str], None]] = None, event_listeners: Optional[List] = None):
+    """
+    Yield a MongoClient for a load test or benchmark: mongomock when
+    stand_in is set, the server at mongo_uri when given, and otherwise a
+    LocalMongod that is stopped again afterwards. event_listeners are
+    registered on real clients (mongomock publishes no command events).
+
+    Raises:
+        MongoUnavailable: If mongomock is missing or mongod cannot be started
+    """
+    mongod = None
+    if stand_in:
+        try:
+            import mongomock
+        except ImportError:
+            raise MongoUnavailable("the stand-in needs the mongomock package")
+        client = mongomock.MongoClient()
+        if notify:
+            notify("Using mongomock: timings are not representative")
+    elif mongo_uri:
+        client = pymongo.MongoClient(mongo_uri, event_listeners=event_listeners or [])
+    else:
+        mongod = LocalMongod(binary=mongod_binary).start()
+        if notify:
+            notify(f"Started mongod at {mongod.uri}")
+        client = pymongo.MongoClient(mongod.uri, event_listeners=event_listeners or [])
+    try:
+        yield client
+    finally:
+        client.close()
+        if mongod is not None:
+            mongod.stop()
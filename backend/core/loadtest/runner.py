@@ -0,0 +1,280 @@
+import json
+import math
+import random
+import string
+import threading
+import time
+from bisect import bisect
+from collections import defaultdict, Counter
+from itertools import accumulate
+from typing import Optional, Dict, List, Callable, Tuple
+
+from .seed import WORDS
+
+# name -> (method, builder). A builder gets the worker's random generator,
+# the seeded dataset and the worker's user, and returns (path, JSON body).
+Scenario = Tuple[str, Callable]
+
+
+def _madlib(rng, data):
+    return rng.choice(data['madlibs'])
+
+
+def _new_madlib(rng, data, user):
+    template = rng.choice(data['templates'])
+    return '/api/madlibs/', {
+        'template_id': str(template['_id']),
+        'creator_id': str(user['_id']),
+        'inputted_blanks': [{'id': blank_id, 'input': rng.choice(WORDS)} for blank_id in template['blank_ids']],
+    }
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    'feed_recent': ('GET', lambda rng, data, user: ('/api/feed/recent/?limit=20', None)),
+    'feed_top_liked': ('GET', lambda rng, data, user: ('/api/feed/top-liked/?limit=20&time_filter=week', None)),
+    'feed_discussed': ('GET', lambda rng, data, user: ('/api/feed/discussed/?limit=20', None)),
+    'madlibs_list': ('GET', lambda rng, data, user: ('/api/madlibs/?limit=20&expand=template,creator', None)),
+    'madlib_detail': ('GET', lambda rng, data, user: (f"/api/madlibs/{_madlib(rng, data)}/?render=1", None)),
+    'by_creator': ('GET', lambda rng, data, user: (
+        f"/api/madlibs/by_creator/?creator_id={rng.choice(data['users'])['_id']}", None)),
+    'post_comments': ('GET', lambda rng, data, user: (f"/api/comments/{_madlib(rng, data)}/comments/?limit=20", None)),
+    'likes_count': ('GET', lambda rng, data, user: (f"/api/likes/{_madlib(rng, data)}/count/", None)),
+    'template_search': ('GET', lambda rng, data, user: (f"/api/templates/search/?q={rng.choice(WORDS)}", None)),
+    'template_autocomplete': ('GET', lambda rng, data, user: (
+        f"/api/templates/autocomplete/?q={rng.choice(WORDS)[:3]}", None)),
+    'like': ('POST', lambda rng, data, user: (f"/api/likes/{_madlib(rng, data)}/like/", None)),
+    'unlike': ('POST', lambda rng, data, user: (f"/api/likes/{_madlib(rng, data)}/unlike/", None)),
+    'comment': ('POST', lambda rng, data, user: (
+        f"/api/comments/{_madlib(rng, data)}/comment/", {'text': ' '.join(rng.choices(WORDS, k=6))})),
+    'create_madlib': ('POST', _new_madlib),
+}
+
+# Mostly feed and detail reads, as on the site today
+DEFAULT_MIX = ('feed_recent=20,feed_top_liked=15,feed_discussed=5,madlibs_list=5,madlib_detail=20,'
+               'by_creator=5,post_comments=8,likes_count=4,template_search=3,template_autocomplete=3,'
+               'like=5,unlike=3,comment=2,create_madlib=2')
+
+
+def parse_mix(raw: str) -> Dict[str, float]:
+    """
+    Parse a traffic mix like "feed_recent=50,like=10" into scenario weights.
+
+    Raises:
+        ValueError: On unknown scenarios or non-positive weights
+    """
+    mix = {}
+    for part in raw.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}'; choose from: {', '.join(SCENARIOS)}")
+        weight = float(weight) if weight else 1.0
+        if weight <= 0:
+            raise ValueError(f"Weight for {name} must be positive")
+        mix[name] = weight
+    if not mix:
+        raise ValueError('Traffic mix is empty')
+    return mix
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(latencies: Dict[str, List[float]], statuses: Dict[str, Counter], elapsed: float) -> Dict:
+    """
+    Per-scenario and overall latency percentiles (ms) and throughput.
+
+    A request counts as an error when it raised or returned a status of 500 or
+    above, and as rejected on a 4xx answer (e.g. liking an already liked post).
+    """
+    def describe(values: List[float], status_counts: Counter) -> Dict:
+        ordered = sorted(values)
+        errors = sum(n for code, n in status_counts.items() if code == 'error' or int(code) >= 500)
+        rejected = sum(n for code, n in status_counts.items() if code != 'error' and 400 <= int(code) < 500)
+        return {
+            'requests': len(ordered),
+            'errors': errors,
+            'rejected': rejected,
+            'throughput_rps': round(len(ordered) / elapsed, 2) if elapsed > 0 else 0,
+            'mean_ms': round(sum(ordered) / len(ordered), 2) if ordered else 0,
+            'p50_ms': round(percentile(ordered, 0.50), 2),
+            'p95_ms': round(percentile(ordered, 0.95), 2),
+            'p99_ms': round(percentile(ordered, 0.99), 2),
+            'max_ms': round(ordered[-1], 2) if ordered else 0,
+            'statuses': {str(code): n for code, n in sorted(status_counts.items(), key=lambda i: str(i[0]))},
+        }
+
+    report = {name: describe(latencies[name], statuses[name]) for name in sorted(latencies)}
+    everything = [value for values in latencies.values() for value in values]
+    total_statuses = sum(statuses.values(), Counter())
+    return {'elapsed_s': round(elapsed, 2), 'scenarios': report, 'total': describe(everything, total_statuses)}
+
+
+# Django accounts created for seeded users start with this
+DJANGO_USER_PREFIX = 'loadtest_user_'
+
+
+def django_users(seeded_users: List[Dict]) -> List:
+    """Django accounts matching the seeded users' emails, so the views find their MongoDB user"""
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+    users = []
+    for seeded in seeded_users:
+        username = seeded['email'].split('@')[0]
+        user, _ = User.objects.get_or_create(username=username, defaults={'email': seeded['email']})
+        users.append(user)
+    return users
+
+
+def delete_django_users():
+    from django.contrib.auth import get_user_model
+    get_user_model().objects.filter(username__startswith=DJANGO_USER_PREFIX).delete()
+
+
+def random_csrf_token(rng: random.Random) -> str:
+    return ''.join(rng.choices(string.ascii_letters + string.digits, k=32))
+
+
+class InProcessTransport:
+    """
+    Sends requests through Django's test client: the full URL routing,
+    middleware and views run in this process, without a network hop.
+    """
+
+    def __init__(self, django_user):
+        from django.conf import settings
+        from django.test import Client
+        # The test client's default host, testserver, is not in ALLOWED_HOSTS outside tests
+        hosts = [host for host in settings.ALLOWED_HOSTS if host and '*' not in host and not host.startswith('.')]
+        self.client = Client(HTTP_HOST=hosts[0] if hosts else 'localhost')
+        self.client.force_login(django_user)
+
+    def request(self, method: str, path: str, body: Optional[Dict]) -> int:
+        if method == 'GET':
+            return self.client.get(path).status_code
+        return self.client.post(path, data=json.dumps(body or {}), content_type='application/json').status_code
+
+
+class HttpTransport:
+    """
+    Sends requests to a running server. The session is created directly in
+    the session store the server reads (so both must share a database), and
+    a self-issued CSRF token pair satisfies DRF's session authentication.
+    """
+
+    def __init__(self, base_url: str, django_user, rng: random.Random):
+        import requests
+        from django.conf import settings
+        from django.test import Client
+        client = Client()
+        client.force_login(django_user)
+
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        token = random_csrf_token(rng)
+        self.session.cookies.set(settings.SESSION_COOKIE_NAME, client.cookies[settings.SESSION_COOKIE_NAME].value)
+        self.session.cookies.set(settings.CSRF_COOKIE_NAME, token)
+        self.session.headers.update({'X-CSRFToken': token, 'Referer': self.base_url + '/'})
+
+    def request(self, method: str, path: str, body: Optional[Dict]) -> int:
+        return self.session.request(method, self.base_url + path, json=body, timeout=60).status_code
+
+
+def run_load(transports: List, data: Dict, mix: Dict[str, float], duration: Optional[float] = None,
+             total_requests: Optional[int] = None, warmup: float = 0.0, seed: int = 42,
+             progress: Optional[Callable[[str], None]] = None) -> Dict:
+    """
+    Drive the app from one thread per transport until the duration has passed
+    or total_requests were sent, then summarize.
+
+    Each worker picks scenarios by weight with its own seeded random
+    generator, so a run with the same seed, dataset and concurrency sends
+    the same sequence of requests. Requests finishing during the warmup
+    period are not recorded.
+
+    Args:
+        transports: One transport per concurrent worker
+        data: Seeded dataset (see seed_dataset); workers act as data['users'][i]
+        mix: Scenario weights
+        duration: Seconds to run
+        total_requests: Requests to send across all workers (instead of or on top of duration)
+        warmup: Seconds at the start whose requests are discarded
+        seed: Base random seed
+        progress: Optional callback for status lines
+    """
+    names = list(mix)
+    cumulative = list(accumulate(mix[name] for name in names))
+    started = time.perf_counter()
+    warm_at = started + warmup
+    deadline = warm_at + duration if duration else None
+    budget = [total_requests] if total_requests else None
+    budget_lock = threading.Lock()
+    results = []
+
+    def take_request() -> bool:
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        if budget is None:
+            return True
+        with budget_lock:
+            if budget[0] <= 0:
+                return False
+            budget[0] -= 1
+            return True
+
+    def worker(index: int, transport):
+        rng = random.Random(seed * 1000 + index)
+        user = data['users'][index % len(data['users'])]
+        latencies = defaultdict(list)
+        statuses = defaultdict(Counter)
+        while take_request():
+            name = names[bisect(cumulative, rng.random() * cumulative[-1])]
+            method, build = SCENARIOS[name]
+            path, body = build(rng, data, user)
+            begin = time.perf_counter()
+            try:
+                code = transport.request(method, path, body)
+            except Exception:
+                code = 'error'
+            end = time.perf_counter()
+            if end >= warm_at:
+                latencies[name].append((end - begin) * 1000)
+                statuses[name][code] += 1
+        results.append((latencies, statuses))
+
+    threads = [threading.Thread(target=worker, args=(i, t), daemon=True) for i, t in enumerate(transports)]
+    for thread in threads:
+        thread.start()
+    if progress and warmup:
+        progress(f"Warming up for {warmup:.0f}s")
+    for thread in threads:
+        thread.join()
+    elapsed = max(time.perf_counter() - warm_at, 0.0)
+
+    latencies, statuses = defaultdict(list), defaultdict(Counter)
+    for worker_latencies, worker_statuses in results:
+        for name, values in worker_latencies.items():
+            latencies[name].extend(values)
+        for name, counts in worker_statuses.items():
+            statuses[name].update(counts)
+    return summarize(latencies, statuses, elapsed)
+
+
+def format_report(report: Dict) -> str:
+    """Fixed-width table of a summarize() report"""
+    header = f"{'scenario':<22}{'reqs':>8}{'err':>6}{'4xx':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+    lines = [header, '-' * len(header)]
+    rows = list(report['scenarios'].items()) + [('TOTAL', report['total'])]
+    for name, row in rows:
+        lines.append(f"{name:<22}{row['requests']:>8}{row['errors']:>6}{row['rejected']:>6}{row['throughput_rps']:>9.1f}"
+                     f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}")
+    lines.append(f"latencies in ms over {report['elapsed_s']}s")
+    return '\n'.join(lines)
@@ -0,0 +1,283 @@
+import math
+import random
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .seed import WORDS, BLANK_TYPES, HISTORY_DAYS, DatasetSpec, _Ids, _chunks
+
+# Likes mostly arrive soon after a post is published; delays are exponential with this mean
+LIKE_DELAY_MEAN = timedelta(hours=6)
+# Comments arrive in threads: a burst of replies a few minutes apart
+COMMENT_GAP_MEAN = timedelta(minutes=4)
+# Viral threads are cut off at this many comments
+MAX_THREAD = 1000
+# Draws per rng.choices call, so the popularity draws never hold millions of ints at once
+DRAW_CHUNK = 100_000
+
+
+class ScaleSpec(DatasetSpec):
+    """
+    Sizes and skew of a production-scale dataset.
+
+    like_exponent and creator_exponent are Zipf exponents: the n-th most
+    popular post gets likes in proportion to 1 / n ** like_exponent, and the
+    n-th most prolific user creates madlibs in proportion to
+    1 / n ** creator_exponent. Comment threads have Pareto-distributed sizes
+    averaging roughly comments_per_thread, and templates have between 4 and
+    max_blanks blanks, most of them few.
+    """
+
+    def __init__(self, users: int = 5_000, templates: int = 300, madlibs: int = 50_000,
+                 likes: int = 500_000, comments: int = 100_000, seed: int = 42,
+                 like_exponent: float = 1.0, creator_exponent: float = 1.1,
+                 comments_per_thread: float = 8.0, max_blanks: int = 60):
+        super().__init__(users=users, templates=templates, madlibs=madlibs,
+                         likes=likes, comments=comments, seed=seed)
+        self.like_exponent = like_exponent
+        self.creator_exponent = creator_exponent
+        self.comments_per_thread = comments_per_thread
+        self.max_blanks = max_blanks
+
+
+PRESETS: Dict[str, Dict[str, int]] = {
+    'tiny': {'users': 500, 'templates': 50, 'madlibs': 5_000, 'likes': 50_000, 'comments': 10_000},
+    'small': {'users': 5_000, 'templates': 300, 'madlibs': 50_000, 'likes': 500_000, 'comments': 100_000},
+    'medium': {'users': 50_000, 'templates': 2_000, 'madlibs': 500_000, 'likes': 5_000_000,
+               'comments': 1_000_000},
+    'large': {'users': 200_000, 'templates': 5_000, 'madlibs': 2_000_000, 'likes': 20_000_000,
+              'comments': 4_000_000},
+}
+
+
+def zipf_cum_weights(size: int, exponent: float, rng: random.Random) -> List[float]:
+    """
+    Cumulative Zipf weights for `size` items in shuffled order, so that
+    popularity does not line up with creation order.
+    """
+    ranks = list(range(1, size + 1))
+    rng.shuffle(ranks)
+    return list(accumulate(1.0 / rank ** exponent for rank in ranks))
+
+
+class ParallelInserter:
+    """
+    insert_many in batches from a thread pool. At most two batches per worker
+    are in flight, so documents can be generated lazily without piling up in
+    memory while the database catches up.
+    """
+
+    def __init__(self, db, workers: int = 4, batch_size: int = 5000,
+                 progress: Optional[Callable[[str, int], None]] = None):
+        self.db = db
+        self.workers = max(workers, 1)
+        self.batch_size = batch_size
+        self.progress = progress
+
+    def insert(self, name: str, docs: Iterable[Dict]) -> int:
+        """Insert every document into collection `name` and return how many were written"""
+        collection = self.db[name]
+        inserted = 0
+        pending = deque()
+
+        def finish_oldest():
+            nonlocal inserted
+            inserted += pending.popleft().result()
+            if self.progress:
+                self.progress(name, inserted)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for chunk in _chunks(docs, self.batch_size):
+                if len(pending) >= self.workers * 2:
+                    finish_oldest()
+                pending.append(pool.submit(self._insert_chunk, collection, chunk))
+            while pending:
+                finish_oldest()
+        return inserted
+
+    @staticmethod
+    def _insert_chunk(collection, chunk: List[Dict]) -> int:
+        collection.insert_many(chunk, ordered=False)
+        return len(chunk)
+
+
+def seed_scale(db, spec: ScaleSpec, inserter: Optional[ParallelInserter] = None,
+               as_of: Optional[datetime] = None) -> Dict:
+    """
+    Fill an empty database with a large, skewed dataset shaped like the one
+    the app writes: Zipf-distributed likes per post, power-law creators,
+    bursty comment threads and templates with up to spec.max_blanks blanks.
+    The denormalized likes_count and per-user counters match the likes and
+    madlibs inserted, and users follow seed_dataset's loadtest_user_<n>
+    naming so `loadtest --no-seed` can drive the result.
+
+    Everything is drawn from one generator seeded with spec.seed before it is
+    handed to the inserter, so the same spec and as_of always produce the
+    same documents and ids regardless of how many insert workers run.
+
+    Args:
+        db: pymongo Database to fill
+        spec: Dataset sizes, skew and random seed
+        inserter: Writes the documents (default: ParallelInserter(db))
+        as_of: The dataset's "now"; timestamps span HISTORY_DAYS before it (default: current time)
+
+    Returns:
+        {'counts': documents inserted per collection, 'stats': skew summary}
+
+    Raises:
+        ValueError: If the spec has no users, templates or madlibs
+    """
+    if not (spec.users and spec.templates and spec.madlibs):
+        raise ValueError("A scale dataset needs at least one user, template and madlib")
+    rng = random.Random(spec.seed)
+    ids = _Ids()
+    inserter = inserter or ParallelInserter(db)
+    now = as_of or datetime.now(timezone.utc)
+    history_start = now - timedelta(days=HISTORY_DAYS)
+    history = (now - history_start).total_seconds()
+
+    def moment_between(start: datetime, end: datetime = now) -> datetime:
+        return start + (end - start) * rng.random()
+
+    def later(start: datetime, delay_seconds: float) -> datetime:
+        # Wrap around instead of clamping, so nothing piles up exactly at `now`
+        span = (now - start).total_seconds()
+        return start + timedelta(seconds=delay_seconds % span) if span > 0 else start
+
+    user_created = [history_start + timedelta(seconds=history * rng.random()) for _ in range(spec.users)]
+    madlibs_count = [0] * spec.users
+    likes_received = [0] * spec.users
+
+    templates = []
+    for i in range(spec.templates):
+        created = moment_between(history_start)
+        # Most templates are short; a long tail has dozens of blanks
+        blank_count = min(spec.max_blanks, 2 + int(rng.paretovariate(1.2) * 2))
+        words = rng.sample(WORDS, 3)
+        story = ' '.join(f"The {rng.choice(WORDS)} [{b}]" for b in range(1, blank_count + 1)) + '.'
+        templates.append({
+            '_id': ids.at(created),
+            'title': f"{words[0].title()} {words[1]} {words[2]} {i}",
+            'description': f"A {words[1]} story about a {words[2]}",
+            'story': story,
+            'blanks': [{'id': str(b), 'type': rng.choice(BLANK_TYPES)} for b in range(1, blank_count + 1)],
+            'version': 1,
+            'created_at': created,
+        })
+
+    # Madlib skeletons: template, creator and publish time, kept compact until insert
+    creator_weights = zipf_cum_weights(spec.users, spec.creator_exponent, rng)
+    madlib_template, madlib_creator, madlib_created, madlib_ids = [], [], [], []
+    for offset in range(0, spec.madlibs, DRAW_CHUNK):
+        size = min(DRAW_CHUNK, spec.madlibs - offset)
+        for creator in rng.choices(range(spec.users), cum_weights=creator_weights, k=size):
+            template = rng.randrange(spec.templates)
+            created = moment_between(max(templates[template]['created_at'], user_created[creator]))
+            madlib_template.append(template)
+            madlib_creator.append(creator)
+            madlib_created.append(created)
+            madlib_ids.append(ids.at(created))
+            madlibs_count[creator] += 1
+
+    # Likes per post by popularity; a post cannot get more likes than there are users
+    popularity = zipf_cum_weights(spec.madlibs, spec.like_exponent, rng)
+    like_counts = [0] * spec.madlibs
+    remaining = spec.likes
+    while remaining:
+        for post in rng.choices(range(spec.madlibs), cum_weights=popularity, k=min(remaining, DRAW_CHUNK)):
+            if like_counts[post] < spec.users:
+                like_counts[post] += 1
+                remaining -= 1
+    for post, count in enumerate(like_counts):
+        likes_received[madlib_creator[post]] += count
+
+    def users():
+        for i, created in enumerate(user_created):
+            yield {
+                '_id': ids.at(created),
+                'username': f"loadtest_user_{i}",
+                'email': f"loadtest_user_{i}@example.com",
+                'oauth_provider': 'google',
+                'oauth_id': f"loadtest-{i}",
+                'profile_picture': None,
+                'bio': None,
+                'created_at': created,
+                'updated_at': created,
+                'public': True,
+                'banned': False,
+                'followers_count': 0,
+                'following_count': 0,
+                'madlibs_count': madlibs_count[i],
+                'likes_received': likes_received[i],
+            }
+
+    user_docs = list(users())
+    user_ids = [user['_id'] for user in user_docs]
+
+    def madlibs():
+        for post, madlib_id in enumerate(madlib_ids):
+            template = templates[madlib_template[post]]
+            yield {
+                '_id': madlib_id,
+                'template_id': template['_id'],
+                'creator_id': user_ids[madlib_creator[post]],
+                'created_at': madlib_created[post],
+                'updated_at': madlib_created[post],
+                'public': rng.random() < 0.9,
+                'content': [{'id': blank['id'], 'input': rng.choice(WORDS)} for blank in template['blanks']],
+                'likes_count': like_counts[post],
+            }
+
+    def likes():
+        delay_rate = 1 / LIKE_DELAY_MEAN.total_seconds()
+        for post, count in enumerate(like_counts):
+            for liker in rng.sample(range(spec.users), count):
+                created = later(madlib_created[post], rng.expovariate(delay_rate))
+                yield {'_id': ids.at(created), 'user_id': user_ids[liker], 'post_id': madlib_ids[post],
+                       'comment_id': None, 'created_at': created}
+
+    thread_sizes = []
+
+    def comments():
+        # Discussion follows popularity: threads land on posts drawn with the like weights
+        gap_rate = 1 / COMMENT_GAP_MEAN.total_seconds()
+        pareto_shape = spec.comments_per_thread / max(spec.comments_per_thread - 1, 0.01)
+        written = 0
+        while written < spec.comments:
+            post = rng.choices(range(spec.madlibs), cum_weights=popularity)[0]
+            size = min(int(rng.paretovariate(pareto_shape)), MAX_THREAD, spec.comments - written)
+            participants = rng.sample(range(spec.users), min(spec.users, 2 + int(math.sqrt(size))))
+            created = moment_between(madlib_created[post])
+            for _ in range(size):
+                yield {'_id': ids.at(created), 'user_id': user_ids[rng.choice(participants)],
+                       'post_id': madlib_ids[post], 'text': ' '.join(rng.choices(WORDS, k=rng.randint(3, 15))),
+                       'created_at': created, 'likes_count': 0}
+                created = later(created, rng.expovariate(gap_rate))
+            thread_sizes.append(size)
+            written += size
+
+    counts = {
+        'users': inserter.insert('users', user_docs),
+        'story_templates': inserter.insert('story_templates', templates),
+        'filled_madlibs': inserter.insert('filled_madlibs', madlibs()),
+        'likes': inserter.insert('likes', likes()),
+        'comments': inserter.insert('comments', comments()),
+    }
+
+    ordered_likes = sorted(like_counts, reverse=True)
+    blank_counts = [len(t['blanks']) for t in templates]
+    stats = {
+        'top_post_likes': ordered_likes[0] if ordered_likes else 0,
+        'top_1pct_posts_like_share': (round(sum(ordered_likes[:max(len(ordered_likes) // 100, 1)]) / spec.likes, 3)
+                                      if spec.likes else 0),
+        'posts_without_likes': like_counts.count(0),
+        'top_creator_madlibs': max(madlibs_count, default=0),
+        'users_without_madlibs': madlibs_count.count(0),
+        'largest_thread': max(thread_sizes, default=0),
+        'comment_threads': len(thread_sizes),
+        'max_template_blanks': max(blank_counts, default=0),
+        'mean_template_blanks': round(sum(blank_counts) / len(blank_counts), 1) if blank_counts else 0,
+    }
+    return {'counts': counts, 'stats': stats}
@@ -0,0 +1,211 @@
+import random
+from datetime import datetime, timedelta, timezone
+from itertools import count
+from typing import Dict, List, Iterable, Iterator
+
+from bson import ObjectId
+
+WORDS = [
+    'space', 'dragon', 'pirate', 'castle', 'robot', 'forest', 'wizard', 'ocean', 'jungle', 'desert',
+    'mystery', 'adventure', 'holiday', 'school', 'monster', 'kitchen', 'circus', 'galaxy', 'island', 'train',
+    'banana', 'purple', 'sleepy', 'giant', 'tiny', 'brave', 'silly', 'ancient', 'golden', 'noisy',
+]
+BLANK_TYPES = ['noun', 'verb', 'adjective', 'adverb', 'place', 'person', 'animal', 'number']
+
+# Seeded documents are spread over this many days before now
+HISTORY_DAYS = 60
+
+
+class DatasetSpec:
+    """Sizes of a seeded dataset. The same spec always produces the same documents."""
+
+    def __init__(self, users: int = 200, templates: int = 50, madlibs: int = 2000,
+                 likes: int = 10000, comments: int = 3000, seed: int = 42):
+        self.users = users
+        self.templates = templates
+        self.madlibs = madlibs
+        self.likes = min(likes, users * madlibs)
+        self.comments = comments
+        self.seed = seed
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+class _Ids:
+    """Deterministic ObjectIds: the document's timestamp followed by a sequence number"""
+
+    def __init__(self):
+        self._sequence = count()
+
+    def at(self, moment: datetime) -> ObjectId:
+        return ObjectId(int(moment.timestamp()).to_bytes(4, 'big') + next(self._sequence).to_bytes(8, 'big'))
+
+
+def _chunks(docs: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for doc in docs:
+        chunk.append(doc)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(collection, docs: Iterable[Dict], batch_size: int) -> int:
+    inserted = 0
+    for chunk in _chunks(docs, batch_size):
+        collection.insert_many(chunk, ordered=False)
+        inserted += len(chunk)
+    return inserted
+
+
+def seed_dataset(db, spec: DatasetSpec, batch_size: int = 1000) -> Dict[str, List]:
+    """
+    Fill an empty database with users, templates, filled madlibs, likes and
+    comments shaped like the ones the app writes, including the denormalized
+    likes_count and per-user counters.
+
+    Args:
+        db: pymongo Database to fill
+        spec: Dataset sizes and random seed
+        batch_size: Documents per insert_many
+
+    Returns:
+        What a load test needs to build requests: {'users': [{'_id', 'email'}],
+        'templates': [{'_id', 'blank_ids', 'title'}], 'madlibs': [ObjectId], 'comments': [ObjectId]}
+    """
+    rng = random.Random(spec.seed)
+    ids = _Ids()
+    now = datetime.now(timezone.utc)
+
+    def moment_after(start: datetime) -> datetime:
+        return start + (now - start) * rng.random()
+
+    history_start = now - timedelta(days=HISTORY_DAYS)
+
+    users = []
+    for i in range(spec.users):
+        created = moment_after(history_start)
+        users.append({
+            '_id': ids.at(created),
+            'username': f"loadtest_user_{i}",
+            'email': f"loadtest_user_{i}@example.com",
+            'oauth_provider': 'google',
+            'oauth_id': f"loadtest-{i}",
+            'profile_picture': None,
+            'bio': None,
+            'created_at': created,
+            'updated_at': created,
+            'public': True,
+            'banned': False,
+            'followers_count': 0,
+            'following_count': 0,
+            'madlibs_count': 0,
+            'likes_received': 0,
+        })
+
+    templates = []
+    for i in range(spec.templates):
+        created = moment_after(history_start)
+        blank_count = rng.randint(3, 12)
+        words = rng.sample(WORDS, 3)
+        story = ' '.join(f"The {rng.choice(WORDS)} [{b}]" for b in range(1, blank_count + 1)) + '.'
+        templates.append({
+            '_id': ids.at(created),
+            'title': f"{words[0].title()} {words[1]} {words[2]} {i}",
+            'description': f"A {words[1]} story about a {words[2]}",
+            'story': story,
+            'blanks': [{'id': str(b), 'type': rng.choice(BLANK_TYPES)} for b in range(1, blank_count + 1)],
+            'version': 1,
+            'created_at': created,
+        })
+
+    users_by_id = {user['_id']: user for user in users}
+    madlibs = []
+    for _ in range(spec.madlibs):
+        template = rng.choice(templates)
+        creator = rng.choice(users)
+        created = moment_after(max(template['created_at'], creator['created_at']))
+        madlibs.append({
+            '_id': ids.at(created),
+            'template_id': template['_id'],
+            'creator_id': creator['_id'],
+            'created_at': created,
+            'updated_at': created,
+            'public': rng.random() < 0.9,
+            'content': [{'id': blank['id'], 'input': rng.choice(WORDS)} for blank in template['blanks']],
+            'likes_count': 0,
+        })
+        creator['madlibs_count'] += 1
+
+    def likes():
+        seen = set()
+        while len(seen) < spec.likes:
+            user, madlib = rng.choice(users), rng.choice(madlibs)
+            if (user['_id'], madlib['_id']) in seen:
+                continue
+            seen.add((user['_id'], madlib['_id']))
+            madlib['likes_count'] += 1
+            users_by_id[madlib['creator_id']]['likes_received'] += 1
+            created = moment_after(madlib['created_at'])
+            yield {'_id': ids.at(created), 'user_id': user['_id'], 'post_id': madlib['_id'],
+                   'comment_id': None, 'created_at': created}
+
+    def comments():
+        for _ in range(spec.comments):
+            madlib = rng.choice(madlibs)
+            created = moment_after(madlib['created_at'])
+            yield {'_id': ids.at(created), 'user_id': rng.choice(users)['_id'], 'post_id': madlib['_id'],
+                   'text': ' '.join(rng.choices(WORDS, k=rng.randint(3, 15))),
+                   'created_at': created, 'likes_count': 0}
+
+    # Likes first: they update the madlib and user counters inserted after them
+    like_docs = list(likes())
+    comment_docs = list(comments())
+    _insert(db['likes'], like_docs, batch_size)
+    _insert(db['comments'], comment_docs, batch_size)
+    _insert(db['users'], users, batch_size)
+    _insert(db['story_templates'], templates, batch_size)
+    _insert(db['filled_madlibs'], madlibs, batch_size)
+
+    return {
+        'users': [{'_id': user['_id'], 'email': user['email']} for user in users],
+        'templates': [{'_id': t['_id'], 'blank_ids': [b['id'] for b in t['blanks']], 'title': t['title']}
+                      for t in templates],
+        'madlibs': [madlib['_id'] for madlib in madlibs],
+        'comments': [comment['_id'] for comment in comment_docs],
+    }
+
+
+def load_dataset(db) -> Dict[str, List]:
+    """
+    Read back the ids a load test needs from an already seeded database, in
+    the same shape seed_dataset returns.
+    """
+    users = list(db['users'].find({}, {'email': 1}, sort=[('_id', 1)]))
+    templates = [
+        {'_id': t['_id'], 'blank_ids': [b['id'] for b in t.get('blanks', [])], 'title': t.get('title')}
+        for t in db['story_templates'].find({}, {'blanks.id': 1, 'title': 1}, sort=[('_id', 1)])
+    ]
+    return {
+        'users': [{'_id': user['_id'], 'email': user['email']} for user in users],
+        'templates': templates,
+        'madlibs': [doc['_id'] for doc in db['filled_madlibs'].find({}, {'_id': 1}, sort=[('_id', 1)])],
+        'comments': [doc['_id'] for doc in db['comments'].find({}, {'_id': 1}, sort=[('_id', 1)])],
+    }
+
+
+def ensure_indexes():
+    """
+    Create the app's indexes in the database MongoDBConnection points at; the
+    services create them on construction.
+    """
+    from feed.models import FeedService
+    from madlibs.models import MadLibTemplate, UserFilledMadlibs
+    from social.models import LikeModel, CommentModel
+    from users.models import UserOperations
+
+    for service in (UserOperations, MadLibTemplate, UserFilledMadlibs, LikeModel, CommentModel, FeedService):
+        service()
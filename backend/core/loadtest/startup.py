@@ -0,0 +1,99 @@
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+# What a worker imports before serving its first request
+DEFAULT_TARGETS = ('core.urls',)
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(text: str) -> List[Dict]:
+    """
+    Rows of `python -X importtime` output: module, depth, self_us and
+    cumulative_us (microseconds). Lines that are not import rows are skipped.
+    """
+    rows = []
+    for line in text.splitlines():
+        match = _LINE.match(line)
+        if match:
+            rows.append({'module': match.group(4), 'depth': len(match.group(3)) // 2,
+                         'self_us': int(match.group(1)), 'cumulative_us': int(match.group(2))})
+    return rows
+
+
+def by_package(rows: List[Dict]) -> Dict[str, int]:
+    """Self time summed per top-level package, in microseconds"""
+    totals = defaultdict(int)
+    for row in rows:
+        totals[row['module'].split('.')[0]] += row['self_us']
+    return dict(totals)
+
+
+def measure_startup(targets=DEFAULT_TARGETS, settings_module: Optional[str] = None, repeat: int = 3) -> Dict:
+    """
+    Start a fresh interpreter `repeat` times that sets Django up and imports
+    the targets under -X importtime, and keep the fastest run.
+
+    Returns:
+        {'targets', 'wall_ms', 'import_ms', 'packages': {package: ms}, 'modules': slowest 50 by self time}
+
+    Raises:
+        RuntimeError: If the interpreter fails to import the targets
+    """
+    code = 'import django; django.setup()' + ''.join(f'; import {target}' for target in targets)
+    env = dict(os.environ)
+    if settings_module:
+        env['DJANGO_SETTINGS_MODULE'] = settings_module
+    best = None
+    for _ in range(max(repeat, 1)):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True,
+                              env=env, timeout=300)
+        wall_ms = (time.perf_counter() - started) * 1000
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'import failed')
+        rows = parse_importtime(proc.stderr)
+        if best is None or wall_ms < best[0]:
+            best = (wall_ms, rows)
+
+    wall_ms, rows = best
+    packages = sorted(by_package(rows).items(), key=lambda item: -item[1])
+    return {
+        'targets': list(targets),
+        'wall_ms': round(wall_ms, 1),
+        'import_ms': round(sum(row['self_us'] for row in rows) / 1000, 1),
+        'packages': {name: round(us / 1000, 1) for name, us in packages},
+        'modules': [{'module': row['module'], 'self_ms': round(row['self_us'] / 1000, 1),
+                     'cumulative_ms': round(row['cumulative_us'] / 1000, 1)}
+                    for row in sorted(rows, key=lambda row: -row['self_us'])[:50]],
+    }
+
+
+def format_startup(report: Dict, top: int = 15, baseline: Optional[Dict] = None) -> str:
+    """Totals and the slowest packages, next to a baseline report when given"""
+    def total(name, key):
+        line = f"{name:<24}{report[key]:>10.1f}"
+        if baseline:
+            line += f"{baseline[key]:>10.1f}{report[key] - baseline[key]:>+10.1f}"
+        return line
+
+    header = f"{'':<24}{'now':>10}" + (f"{'before':>10}{'change':>10}" if baseline else '')
+    lines = [header, '-' * len(header), total('process start', 'wall_ms'), total('imports', 'import_ms'), '',
+             f"{'package':<24}{'now':>10}" + (f"{'before':>10}{'change':>10}" if baseline else '')]
+    names = list(report['packages'])[:top]
+    if baseline:
+        names += [name for name in list(baseline['packages'])[:top] if name not in names]
+    for name in names:
+        now = report['packages'].get(name, 0.0)
+        line = f"{name:<24}{now:>10.1f}"
+        if baseline:
+            before = baseline['packages'].get(name, 0.0)
+            line += f"{before:>10.1f}{now - before:>+10.1f}"
+        lines.append(line)
+    lines.append("times in ms; packages by self time of their modules")
+    return '\n'.join(lines)
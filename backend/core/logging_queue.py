@@ -0,0 +1,78 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from typing import Optional
+
+
+class QueuedHandler(logging.handlers.QueueHandler):
+    """
+    Logging handler that never blocks the request thread on I/O.
+
+    Records go onto a bounded queue and a QueueListener thread writes them to
+    the console (or to `filename`) with this handler's formatter. The calling
+    thread only merges the message arguments; timestamps, the verbose format
+    and the write all happen on the listener thread. When the queue is full
+    records are dropped and counted rather than waited on.
+
+    The listener starts on the first record, so importing settings starts no
+    threads, and is started again in a forked worker (the thread does not
+    survive a fork). It is stopped, and the queue flushed, at exit.
+    """
+
+    def __init__(self, filename: Optional[str] = None, maxsize: int = 10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.FileHandler(filename) if filename else logging.StreamHandler()
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self.dropped = 0
+        self._pid = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def setFormatter(self, fmt):
+        # dictConfig sets the formatter here; the writing happens in the target
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def _ensure_listener(self):
+        with self._start_lock:
+            if self.listener is not None and self._pid == os.getpid():
+                return
+            self.listener = logging.handlers.QueueListener(self.queue, self.target)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        """
+        Merge the arguments now, since they may change once the caller moves
+        on, but leave formatting to the listener.
+        """
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self.listener is None or self._pid != os.getpid():
+            self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Write out everything queued and stop the listener thread"""
+        with self._start_lock:
+            if self.listener is not None and self._pid == os.getpid():
+                self.listener.stop()
+            self.listener = None
+
+    def close(self):
+        self.stop()
+        self.target.close()
+        super().close()
@@ -0,0 +1,166 @@
+import json
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.db_connect import MongoDBConnection
+from core.loadtest.bench import BENCHMARKS, BenchContext
+from core.loadtest.mongod import MongoUnavailable, mongo_target
+from core.loadtest.runner import SCENARIOS, run_load, InProcessTransport, django_users, delete_django_users
+from core.loadtest.seed import DatasetSpec, seed_dataset, load_dataset, ensure_indexes
+from core.query_audit import QueryShapeRecorder, AuditThresholds, load_shapes, audit, format_audit
+from madlibs.cache import template_cache
+
+
+class Command(BaseCommand):
+    """
+    Explain every query shape the app issues and fail on collection scans,
+    blocking sorts or too many documents examined per document returned.
+
+    Shapes come from one of two places:
+
+    - By default the command seeds a database, builds the app's indexes and
+      captures shapes itself by calling every API scenario from `loadtest`
+      and every model benchmark a few times.
+    - --shapes FILE audits shapes recorded elsewhere. Run anything, e.g. the
+      integration tests, with QUERY_AUDIT_FILE=FILE and every new shape the
+      app sends is appended there. The shapes are explained against the
+      seeded --db-name, so they are judged on representative data.
+
+    Explain needs a real MongoDB: a throwaway mongod is started unless
+    --mongo-uri is given.
+
+    python manage.py audit_queries
+    QUERY_AUDIT_FILE=/tmp/shapes.jsonl SKIP_INTEGRATION_TESTS=false python manage.py test
+    python manage.py audit_queries --shapes /tmp/shapes.jsonl --json audit.json
+    python manage.py audit_queries --allow-blocking-sort --ignore sessions --max-ratio 50
+    """
+    help = "Explain captured query shapes and flag collection scans and blocking sorts"
+
+    def add_arguments(self, parser):
+        target = parser.add_argument_group('database')
+        target.add_argument('--mongo-uri', default=None,
+                            help="Use this MongoDB instead of starting a local mongod")
+        target.add_argument('--mongod-binary', default=None, help="mongod to start (default: from PATH)")
+        target.add_argument('--db-name', default='crowdlib_loadtest',
+                            help="Database to seed and explain against; it is dropped first")
+        target.add_argument('--no-seed', action='store_true',
+                            help="Reuse the data already in --db-name instead of seeding")
+
+        data = parser.add_argument_group('dataset')
+        data.add_argument('--users', type=int, default=200)
+        data.add_argument('--templates', type=int, default=50)
+        data.add_argument('--madlibs', type=int, default=2000)
+        data.add_argument('--likes', type=int, default=10000)
+        data.add_argument('--comments', type=int, default=3000)
+        data.add_argument('--seed', type=int, default=42)
+
+        shapes = parser.add_argument_group('shapes')
+        shapes.add_argument('--shapes', action='append', default=None,
+                            help="Audit shapes recorded with QUERY_AUDIT_FILE (repeatable) instead of capturing")
+        shapes.add_argument('--calls', type=int, default=3,
+                            help="Times each scenario and benchmark is called while capturing")
+
+        limits = parser.add_argument_group('thresholds')
+        limits.add_argument('--max-ratio', type=float, default=settings.QUERY_AUDIT_MAX_EXAMINED_RATIO,
+                            help="Most documents examined per document returned")
+        limits.add_argument('--min-docs', type=int, default=settings.QUERY_AUDIT_MIN_DOCS_EXAMINED,
+                            help="Only check the ratio once this many documents were examined")
+        limits.add_argument('--allow-collscan', action='store_true', help="Do not flag collection scans")
+        limits.add_argument('--allow-blocking-sort', action='store_true', help="Do not flag in-memory SORT stages")
+        limits.add_argument('--flag-pipeline-sort', action='store_true',
+                            help="Also flag aggregation $sort stages that could not use an index")
+        limits.add_argument('--ignore', action='append', default=None,
+                            help="Skip a collection or collection.command (repeatable; default: QUERY_AUDIT_IGNORE)")
+        limits.add_argument('--report-only', action='store_true', help="Report problems without failing")
+        limits.add_argument('--json', dest='json_path', default=None, help="Write the audit to this file")
+
+    def handle(self, *args, **options):
+        if options['mongo_uri'] and 'loadtest' not in options['db_name'] and not options['no_seed']:
+            raise CommandError("Seeding drops --db-name; use a name containing 'loadtest' for an external MongoDB")
+        try:
+            recorded = load_shapes(options['shapes']) if options['shapes'] else None
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Cannot read recorded shapes: {e}")
+        thresholds = AuditThresholds(
+            allow_collscan=options['allow_collscan'], allow_blocking_sort=options['allow_blocking_sort'],
+            allow_pipeline_sort=not options['flag_pipeline_sort'], max_examined_ratio=options['max_ratio'],
+            min_docs_examined=options['min_docs'],
+            ignore=options['ignore'] if options['ignore'] is not None else settings.QUERY_AUDIT_IGNORE,
+        )
+
+        recorder = QueryShapeRecorder()
+        notify = lambda message: self.stdout.write(self.style.WARNING(message))
+        try:
+            with mongo_target(options['mongo_uri'], options['mongod_binary'], notify=notify,
+                              event_listeners=[recorder]) as client:
+                MongoDBConnection.use(client, options['db_name'])
+                try:
+                    recorder.enabled = False
+                    self._prepare(client, options)
+                    if recorded is None:
+                        self._capture(recorder, options)
+                    shapes = recorded if recorded is not None else dict(recorder.shapes)
+                    self.stdout.write(f"Explaining {len(shapes)} query shapes")
+                    rows = audit(client, shapes, thresholds, db_name=options['db_name'])
+                finally:
+                    MongoDBConnection.close()
+        except MongoUnavailable as e:
+            raise CommandError(f"{e} (or use --mongo-uri)")
+
+        self.stdout.write(format_audit(rows))
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(rows, f, indent=2, default=str)
+            self.stdout.write(f"Audit written to {options['json_path']}")
+
+        flagged = [row for row in rows if row['problems']]
+        failed = [row for row in rows if row['error']]
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{len(failed)} shapes could not be explained"))
+        if not flagged:
+            self.stdout.write(self.style.SUCCESS(f"All {len(rows)} query shapes are within the thresholds"))
+        elif options['report_only']:
+            self.stdout.write(self.style.WARNING(f"{len(flagged)} of {len(rows)} query shapes have problems"))
+        else:
+            raise CommandError(f"{len(flagged)} of {len(rows)} query shapes have problems")
+
+    def _prepare(self, client, options):
+        """Seed (unless --no-seed) and build the app's indexes so plans are realistic"""
+        if not options['no_seed']:
+            spec = DatasetSpec(users=options['users'], templates=options['templates'], madlibs=options['madlibs'],
+                               likes=options['likes'], comments=options['comments'], seed=options['seed'])
+            self.stdout.write(f"Seeding {spec.as_dict()}")
+            client.drop_database(options['db_name'])
+            seed_dataset(client[options['db_name']], spec)
+        template_cache.clear()
+        ensure_indexes()
+
+    def _capture(self, recorder, options):
+        """Call every API scenario and model benchmark so the app's queries are recorded"""
+        data = load_dataset(MongoDBConnection.get_db())
+        if not data['users'] or not data['madlibs'] or not data['templates']:
+            raise CommandError("The dataset needs at least one user, template and madlib")
+        calls = max(options['calls'], 1)
+        data = dict(data, users=data['users'][:1])
+
+        logging.disable(logging.INFO)
+        context = BenchContext(data, seed=options['seed'])
+        transport = InProcessTransport(django_users(data['users'])[0])
+        try:
+            for setup in BENCHMARKS.values():
+                # Setups insert fixtures (e.g. sessions); only the timed calls are the app's queries
+                fn = setup(context)
+                recorder.enabled = True
+                for _ in range(calls):
+                    fn()
+                recorder.enabled = False
+            for name in SCENARIOS:
+                recorder.enabled = True
+                run_load([transport], data, {name: 1.0}, total_requests=calls, seed=options['seed'])
+                recorder.enabled = False
+        finally:
+            recorder.enabled = False
+            context.teardown()
+            delete_django_users()
+            logging.disable(logging.NOTSET)
@@ -0,0 +1,45 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.loadtest.bench import format_results
+from core.loadtest.logbench import run_logging_benchmarks, overhead, format_overhead
+
+
+class Command(BaseCommand):
+    """
+    Measure what the hot-path log calls of one request cost: the f-string
+    style the models used to log in against the lazy %-style with
+    isEnabledFor guards, under the development profile (DEBUG, written
+    synchronously), development with the queue handler, and the production
+    profile (WARNING, queued). No database is needed.
+
+    The queue does not make a record cheaper to produce: the listener's
+    formatting still takes CPU (and the GIL) in the same process. What it
+    removes is the request waiting on a slow console, pipe or disk.
+
+    python manage.py benchmark_logging
+    python manage.py benchmark_logging --repeat 15 --json logging.json
+    """
+    help = "Benchmark per-request logging overhead, eager vs lazy, per logging profile"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=7, help="Samples per case")
+        parser.add_argument('--min-time', type=float, default=0.05, help="Minimum seconds per sample")
+        parser.add_argument('--warmup', type=int, default=3, help="Untimed calls before sampling")
+        parser.add_argument('--json', dest='json_path', default=None, help="Write the results to this file")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Current profile: LOG_PROFILE={settings.LOG_PROFILE}, LOG_LEVEL={settings.LOG_LEVEL}, "
+                          f"LOG_QUEUE={settings.LOG_QUEUE}")
+        results = run_logging_benchmarks(
+            repeat=options['repeat'], min_sample_time=options['min_time'], warmup=options['warmup'],
+            progress=lambda name, row: self.stdout.write(f"  {name}: {row['median_ms'] * 1000:.2f} us"),
+        )
+        rows = overhead(results)
+        self.stdout.write(format_results(results))
+        self.stdout.write(format_overhead(rows))
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump({'results': results, 'overhead': rows}, f, indent=2)
+            self.stdout.write(f"Results written to {options['json_path']}")
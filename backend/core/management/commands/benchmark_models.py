@@ -0,0 +1,180 @@
+import json
+import logging
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+import pymongo
+from django.core.management.base import BaseCommand, CommandError
+from core.db_connect import MongoDBConnection
+from core.loadtest.bench import (
+    BENCHMARKS, BenchContext, select, run_benchmarks, compare, format_results, format_comparison,
+)
+from core.loadtest.mongod import MongoUnavailable, mongo_target
+from core.loadtest.seed import DatasetSpec, seed_dataset, load_dataset
+from madlibs.cache import template_cache
+
+
+class Command(BaseCommand):
+    """
+    Micro-benchmark the model-layer hot paths (feeds, madlib listings, like
+    counts, comments, sessions, template search) against seeded data, save
+    the results as JSON and compare them with an earlier run.
+
+    The database options match `loadtest`: by default a throwaway mongod is
+    started and seeded. Pass --mongo-uri and --no-seed to benchmark a
+    dataset from `seed_scale`.
+
+    python manage.py benchmark_models --json before.json
+    python manage.py benchmark_models --json after.json --baseline before.json --fail-on-regression
+    python manage.py benchmark_models --bench feed. --bench sessions.load --repeat 15
+    python manage.py benchmark_models --diff before.json after.json
+    """
+    help = "Benchmark model-layer hot paths and flag regressions against a baseline"
+
+    def add_arguments(self, parser):
+        target = parser.add_argument_group('database')
+        target.add_argument('--mongo-uri', default=None,
+                            help="Use this MongoDB instead of starting a local mongod")
+        target.add_argument('--mongod-binary', default=None, help="mongod to start (default: from PATH)")
+        target.add_argument('--stand-in', action='store_true',
+                            help="Use in-memory mongomock instead of a real MongoDB (harness smoke test only)")
+        target.add_argument('--db-name', default='crowdlib_loadtest',
+                            help="Database to seed and benchmark; it is dropped first")
+        target.add_argument('--no-seed', action='store_true',
+                            help="Reuse the data already in --db-name instead of seeding")
+
+        data = parser.add_argument_group('dataset')
+        data.add_argument('--users', type=int, default=200)
+        data.add_argument('--templates', type=int, default=50)
+        data.add_argument('--madlibs', type=int, default=2000)
+        data.add_argument('--likes', type=int, default=10000)
+        data.add_argument('--comments', type=int, default=3000)
+        data.add_argument('--seed', type=int, default=42, help="Random seed for data and arguments")
+
+        bench = parser.add_argument_group('benchmarks')
+        bench.add_argument('--bench', action='append', default=None,
+                           help=f"Run benchmarks whose name starts with this (repeatable). Available: {', '.join(BENCHMARKS)}")
+        bench.add_argument('--repeat', type=int, default=7, help="Samples per benchmark")
+        bench.add_argument('--min-time', type=float, default=0.05, help="Minimum seconds per sample")
+        bench.add_argument('--warmup', type=int, default=3, help="Untimed calls before sampling")
+        bench.add_argument('--json', dest='json_path', default=None, help="Write the results to this file")
+        bench.add_argument('--baseline', default=None, help="Compare with the results in this file")
+        bench.add_argument('--diff', nargs=2, metavar=('BASELINE', 'CURRENT'), default=None,
+                           help="Only compare two saved result files")
+        bench.add_argument('--threshold', type=float, default=0.10,
+                           help="Slowdown that counts as a regression (0.10 = 10%%)")
+        bench.add_argument('--fail-on-regression', action='store_true',
+                           help="Exit with an error when any benchmark regressed")
+        bench.add_argument('--verbose-logging', action='store_true',
+                           help="Keep app INFO/DEBUG logging on (it is part of the timed code when on)")
+
+    def handle(self, *args, **options):
+        if options['diff']:
+            baseline, current = (self._read(path) for path in options['diff'])
+            self._compare(baseline, current, options)
+            return
+
+        try:
+            names = select(options['bench'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['mongo_uri'] and 'loadtest' not in options['db_name'] and not options['no_seed']:
+            raise CommandError("Seeding drops --db-name; use a name containing 'loadtest' for an external MongoDB")
+        baseline = self._read(options['baseline']) if options['baseline'] else None
+
+        notify = lambda message: self.stdout.write(self.style.WARNING(message))
+        try:
+            with mongo_target(options['mongo_uri'], options['mongod_binary'], options['stand_in'], notify) as client:
+                MongoDBConnection.use(client, options['db_name'])
+                try:
+                    run = self._run(client, names, options)
+                finally:
+                    MongoDBConnection.close()
+        except MongoUnavailable as e:
+            raise CommandError(f"{e} (or use --mongo-uri / --stand-in)")
+
+        self.stdout.write(format_results(run['results']))
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(run, f, indent=2)
+            self.stdout.write(f"Results written to {options['json_path']}")
+        if baseline:
+            self._compare(baseline, run, options)
+
+    def _run(self, client, names, options):
+        spec = DatasetSpec(users=options['users'], templates=options['templates'], madlibs=options['madlibs'],
+                           likes=options['likes'], comments=options['comments'], seed=options['seed'])
+        db = client[options['db_name']]
+        if options['no_seed']:
+            data = load_dataset(db)
+            dataset = {'reused': options['db_name'], 'users': len(data['users']), 'madlibs': len(data['madlibs'])}
+        else:
+            self.stdout.write(f"Seeding {spec.as_dict()}")
+            client.drop_database(options['db_name'])
+            data = seed_dataset(db, spec)
+            dataset = spec.as_dict()
+        if not data['users'] or not data['madlibs']:
+            raise CommandError("The dataset needs at least one user and madlib")
+        # Cached templates from another database would skew the numbers
+        template_cache.clear()
+
+        if not options['verbose_logging']:
+            logging.disable(logging.INFO)
+        try:
+            results = run_benchmarks(
+                BenchContext(data, seed=options['seed']), names, repeat=options['repeat'],
+                min_sample_time=options['min_time'], warmup=options['warmup'],
+                progress=lambda name, row: self.stdout.write(f"  {name}: {row['median_ms']:.3f} ms"),
+            )
+        finally:
+            logging.disable(logging.NOTSET)
+
+        return {
+            'meta': {
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'commit': self._git_commit(),
+                'python': platform.python_version(),
+                'pymongo': pymongo.version,
+                'stand_in': options['stand_in'],
+                'dataset': dataset,
+                'repeat': options['repeat'],
+                'min_time': options['min_time'],
+            },
+            'results': results,
+        }
+
+    def _compare(self, baseline, current, options):
+        rows = compare(baseline['results'], current['results'], threshold=options['threshold'])
+        self.stdout.write(f"Compared with {baseline['meta'].get('commit') or 'baseline'} "
+                          f"({baseline['meta'].get('created_at')}), threshold {options['threshold']:.0%}")
+        self.stdout.write(format_comparison(rows))
+        if baseline['meta'].get('dataset') != current['meta'].get('dataset'):
+            self.stdout.write(self.style.WARNING("The runs used different datasets; ratios may mislead"))
+
+        regressions = [row['name'] for row in rows if row['status'] == 'regression']
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("No regressions"))
+        elif options['fail_on_regression']:
+            raise CommandError(f"{len(regressions)} benchmarks regressed: {', '.join(regressions)}")
+        else:
+            self.stdout.write(self.style.WARNING(f"{len(regressions)} benchmarks regressed: {', '.join(regressions)}"))
+
+    def _read(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                run = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read benchmark results from {path}: {e}")
+        if 'results' not in run:
+            raise CommandError(f"{path} is not a benchmark_models results file")
+        run.setdefault('meta', {})
+        return run
+
+    @staticmethod
+    def _git_commit():
+        try:
+            return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                  timeout=5).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
@@ -0,0 +1,150 @@
+import json
+import logging
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from core.db_connect import MongoDBConnection
+from core.loadtest.mongod import MongoUnavailable, mongo_target
+from core.loadtest.runner import (
+    SCENARIOS, DEFAULT_MIX, parse_mix, run_load, format_report, InProcessTransport, HttpTransport,
+    django_users, delete_django_users,
+)
+from core.loadtest.seed import DatasetSpec, seed_dataset, load_dataset
+from madlibs.cache import template_cache
+from madlibs.search import template_search_index
+
+
+class Command(BaseCommand):
+    """
+    Seed a reproducible dataset and drive the real API endpoints with a
+    weighted traffic mix, reporting p50/p95/p99 latency and throughput per
+    endpoint. Run it before and after a performance change and compare the
+    --json reports.
+
+    By default a throwaway mongod is started on a free port (mongod must be
+    installed) and requests go through Django's test client in this process,
+    one thread per concurrent client. With --url the same traffic is sent over
+    HTTP to a running server (e.g. gunicorn), which must use the same
+    MongoDB database (--mongo-uri/--db-name) and Django database.
+
+    --stand-in uses mongomock instead of mongod to smoke test the harness
+    itself. Its numbers say nothing about MongoDB performance, and it lacks
+    features some endpoints use ($text, $lookup with let).
+
+    python manage.py loadtest --duration 30 --concurrency 8 --json before.json
+    python manage.py loadtest --mix feed_recent=3,like=1 --madlibs 20000 --likes 200000
+    python manage.py loadtest --mongo-uri mongodb://127.0.0.1:27017 --url http://127.0.0.1:8000
+    """
+    help = "Load test the API against a seeded local MongoDB"
+
+    def add_arguments(self, parser):
+        target = parser.add_argument_group('database')
+        target.add_argument('--mongo-uri', default=None,
+                            help="Use this MongoDB instead of starting a local mongod")
+        target.add_argument('--mongod-binary', default=None, help="mongod to start (default: from PATH)")
+        target.add_argument('--stand-in', action='store_true',
+                            help="Use in-memory mongomock instead of a real MongoDB (harness smoke test only)")
+        target.add_argument('--db-name', default='crowdlib_loadtest',
+                            help="Database to seed and test; it is dropped first")
+        target.add_argument('--no-seed', action='store_true',
+                            help="Reuse the data already in --db-name instead of seeding")
+
+        data = parser.add_argument_group('dataset')
+        data.add_argument('--users', type=int, default=200)
+        data.add_argument('--templates', type=int, default=50)
+        data.add_argument('--madlibs', type=int, default=2000)
+        data.add_argument('--likes', type=int, default=10000)
+        data.add_argument('--comments', type=int, default=3000)
+        data.add_argument('--seed', type=int, default=42, help="Random seed for data and traffic")
+
+        load = parser.add_argument_group('load')
+        load.add_argument('--url', default=None, help="Send HTTP requests to this server instead of in-process")
+        load.add_argument('--concurrency', type=int, default=8, help="Concurrent clients")
+        load.add_argument('--duration', type=float, default=30.0, help="Seconds to measure")
+        load.add_argument('--requests', type=int, default=None,
+                          help="Stop after this many requests instead of after --duration")
+        load.add_argument('--warmup', type=float, default=2.0, help="Seconds of traffic discarded first")
+        load.add_argument('--mix', default=DEFAULT_MIX,
+                          help=f"Scenario weights, name=weight,... Scenarios: {', '.join(SCENARIOS)}")
+        load.add_argument('--json', dest='json_path', default=None, help="Write the report to this file")
+        load.add_argument('--verbose-logging', action='store_true',
+                          help="Keep app INFO/DEBUG logging on (it dominates latencies in development settings)")
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['url'] and (options['stand_in'] or not options['mongo_uri']):
+            raise CommandError("--url needs --mongo-uri pointing at the database the server uses")
+        if options['mongo_uri'] and 'loadtest' not in options['db_name'] and not options['no_seed']:
+            raise CommandError("Seeding drops --db-name; use a name containing 'loadtest' for an external MongoDB")
+
+        notify = lambda message: self.stdout.write(self.style.WARNING(message))
+        try:
+            with mongo_target(options['mongo_uri'], options['mongod_binary'], options['stand_in'], notify) as client:
+                MongoDBConnection.use(client, options['db_name'])
+                try:
+                    self._run(client, mix, options)
+                finally:
+                    MongoDBConnection.close()
+        except MongoUnavailable as e:
+            raise CommandError(f"{e} (or use --mongo-uri / --stand-in)")
+
+    def _run(self, client, mix, options):
+        spec = DatasetSpec(users=options['users'], templates=options['templates'], madlibs=options['madlibs'],
+                           likes=options['likes'], comments=options['comments'], seed=options['seed'])
+        db = client[options['db_name']]
+        if options['no_seed']:
+            data = load_dataset(db)
+            self.stdout.write(f"Reusing {len(data['users'])} users and {len(data['madlibs'])} madlibs")
+        else:
+            self.stdout.write(f"Seeding {spec.as_dict()}")
+            client.drop_database(options['db_name'])
+            data = seed_dataset(db, spec)
+        if not data['users'] or not data['madlibs'] or not data['templates']:
+            raise CommandError("The dataset needs at least one user, template and madlib")
+        # Caches may hold documents from another database
+        template_cache.clear()
+        template_search_index.rebuild(db['story_templates'])
+
+        concurrency = options['concurrency']
+        if concurrency < 1:
+            raise CommandError("--concurrency must be at least 1")
+        users = django_users(data['users'][:concurrency])
+        rng = random.Random(options['seed'])
+        if options['url']:
+            transports = [HttpTransport(options['url'], user, rng) for user in users]
+        else:
+            transports = [InProcessTransport(user) for user in users]
+        # Workers act as the first `concurrency` seeded users, matching their Django logins
+        data = dict(data, users=data['users'][:concurrency])
+
+        if not options['verbose_logging']:
+            logging.disable(logging.INFO)
+        target = options['url'] or 'in-process'
+        length = f"{options['requests']} requests" if options['requests'] else f"{options['duration']:.0f}s"
+        self.stdout.write(f"Running {target} with {concurrency} clients for {length} ...")
+        try:
+            report = run_load(
+                transports, data, mix,
+                duration=None if options['requests'] else options['duration'],
+                total_requests=options['requests'], warmup=options['warmup'], seed=options['seed'],
+            )
+        finally:
+            logging.disable(logging.NOTSET)
+            delete_django_users()
+
+        report['config'] = {
+            'target': target, 'concurrency': concurrency, 'mix': mix, 'dataset': spec.as_dict(),
+            'warmup_s': options['warmup'], 'stand_in': options['stand_in'],
+        }
+        self.stdout.write(format_report(report))
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Report written to {options['json_path']}")
+        if report['total']['errors']:
+            self.stdout.write(self.style.WARNING(f"{report['total']['errors']} requests failed"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Load test finished without server errors"))
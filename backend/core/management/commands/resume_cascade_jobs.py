@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from core.cascade import CascadeDeleteService
+
+
+class Command(BaseCommand):
+    """
+    Finish background user deletions whose worker died (killed or recycled)
+    before the job completed. A job counts as stale once it has not been
+    updated for CASCADE_JOB_STALE_SECONDS; each one is run to completion
+    here. Safe to run from cron: a job still making progress is left alone.
+
+    python manage.py resume_cascade_jobs
+    """
+    help = "Resume stale background cascade delete jobs"
+
+    def handle(self, *args, **options):
+        resumed = CascadeDeleteService().resume_stale_jobs()
+        self.stdout.write(self.style.SUCCESS(f"Resumed {resumed} cascade job(s)"))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from core.rollups import RollupService
+
+
+class Command(BaseCommand):
+    """
+    Fold madlibs, likes, comments and images created since the last run into
+    the hourly and daily template/creator rollups. Meant to run from cron,
+    e.g. every five minutes; overlapping runs skip instead of double counting.
+
+    python manage.py rollup_stats
+    python manage.py rollup_stats --reset   # rebuild every bucket from the raw events
+    """
+    help = "Update the engagement rollups with events since the last run"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Events read per query (default: ROLLUP_BATCH_SIZE)")
+        parser.add_argument('--reset', action='store_true',
+                            help="Drop all buckets and watermarks first and recount everything")
+
+    def handle(self, *args, **options):
+        service = RollupService()
+        if options['reset']:
+            if not service.reset():
+                raise CommandError("Cannot reset: a rollup run is in progress")
+            self.stdout.write("Dropped existing rollups")
+
+        started = time.monotonic()
+        processed = service.run(batch_size=options['batch_size'])
+        if processed is None:
+            raise CommandError("Another rollup run is in progress")
+
+        elapsed = time.monotonic() - started
+        summary = ", ".join(f"{count} {source}" for source, count in processed.items())
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {summary} in {elapsed:.2f}s"))
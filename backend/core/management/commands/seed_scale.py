@@ -0,0 +1,117 @@
+import json
+import time
+from datetime import datetime, timezone
+
+import pymongo
+from django.core.management.base import BaseCommand, CommandError
+from core.db_connect import MongoDBConnection
+from core.loadtest.scale import PRESETS, ScaleSpec, ParallelInserter, seed_scale
+from core.loadtest.seed import ensure_indexes
+
+
+class Command(BaseCommand):
+    """
+    Generate a production-scale, skewed dataset: Zipf-distributed likes per
+    post, power-law creators, bursty comment threads and templates with many
+    blanks. Documents are written with insert_many from parallel workers, and
+    the same preset, seed and --as-of always produce the same data.
+
+    The target database is dropped first, and the app's indexes are built
+    once the data is in, which is much faster than maintaining them during
+    the load. Drive the result with `loadtest --no-seed`.
+
+    python manage.py seed_scale --mongo-uri mongodb://127.0.0.1:27017 --preset medium
+    python manage.py seed_scale --mongo-uri mongodb://127.0.0.1:27017 --preset small --likes 2000000 --workers 8
+    python manage.py loadtest --mongo-uri mongodb://127.0.0.1:27017 --no-seed
+    """
+    help = "Seed a large, skewed synthetic dataset for scale testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mongo-uri', required=True, help="MongoDB to fill")
+        parser.add_argument('--db-name', default='crowdlib_loadtest',
+                            help="Database to fill; it is dropped first and its name must contain 'loadtest'")
+        parser.add_argument('--preset', choices=list(PRESETS), default='small',
+                            help=' | '.join(f"{name}: {sizes['madlibs']:,} madlibs, {sizes['likes']:,} likes"
+                                            for name, sizes in PRESETS.items()))
+        for size in ('users', 'templates', 'madlibs', 'likes', 'comments'):
+            parser.add_argument(f'--{size}', type=int, default=None, help=f"Override the preset's {size}")
+        parser.add_argument('--like-exponent', type=float, default=1.0, help="Zipf exponent of likes per post")
+        parser.add_argument('--creator-exponent', type=float, default=1.1, help="Zipf exponent of madlibs per user")
+        parser.add_argument('--comments-per-thread', type=float, default=8.0, help="Mean comment burst size")
+        parser.add_argument('--max-blanks', type=int, default=60, help="Most blanks a template can have")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed")
+        parser.add_argument('--as-of', default=None,
+                            help="ISO timestamp the data ends at (default: now); fix it for identical reruns")
+        parser.add_argument('--workers', type=int, default=4, help="Parallel insert_many workers")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Documents per insert_many")
+        parser.add_argument('--no-indexes', action='store_true', help="Skip building the app's indexes")
+        parser.add_argument('--json', dest='json_path', default=None, help="Write the summary to this file")
+
+    def handle(self, *args, **options):
+        if 'loadtest' not in options['db_name']:
+            raise CommandError("--db-name is dropped first; use a name containing 'loadtest'")
+        as_of = None
+        if options['as_of']:
+            try:
+                as_of = datetime.fromisoformat(options['as_of'])
+            except ValueError:
+                raise CommandError(f"Invalid --as-of: {options['as_of']}")
+            if as_of.tzinfo is None:
+                as_of = as_of.replace(tzinfo=timezone.utc)
+
+        sizes = dict(PRESETS[options['preset']])
+        sizes.update({name: options[name] for name in sizes if options[name] is not None})
+        spec = ScaleSpec(**sizes, seed=options['seed'], like_exponent=options['like_exponent'],
+                         creator_exponent=options['creator_exponent'],
+                         comments_per_thread=options['comments_per_thread'], max_blanks=options['max_blanks'])
+
+        client = pymongo.MongoClient(options['mongo_uri'])
+        try:
+            db = client[options['db_name']]
+            client.drop_database(options['db_name'])
+            self.stdout.write(f"Seeding {options['db_name']} with {spec.as_dict()}")
+
+            last_report = {}
+
+            def progress(name, inserted):
+                # Roughly every ten batches per collection
+                if inserted - last_report.get(name, 0) >= options['batch_size'] * 10:
+                    last_report[name] = inserted
+                    self.stdout.write(f"  {name}: {inserted:,}")
+
+            inserter = ParallelInserter(db, workers=options['workers'], batch_size=options['batch_size'],
+                                        progress=progress)
+            started = time.monotonic()
+            try:
+                summary = seed_scale(db, spec, inserter=inserter, as_of=as_of)
+            except ValueError as e:
+                raise CommandError(str(e))
+            elapsed = time.monotonic() - started
+            total = sum(summary['counts'].values())
+            self.stdout.write(f"Inserted {total:,} documents in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f}/s)")
+
+            if not options['no_indexes']:
+                started = time.monotonic()
+                self._build_indexes(options['mongo_uri'], options['db_name'])
+                self.stdout.write(f"Built indexes in {time.monotonic() - started:.1f}s")
+        finally:
+            client.close()
+
+        for name, count in summary['counts'].items():
+            self.stdout.write(f"  {name:<16}{count:>12,}")
+        for name, value in summary['stats'].items():
+            self.stdout.write(f"  {name:<28}{value}")
+        if options['json_path']:
+            summary['config'] = dict(spec.as_dict(), preset=options['preset'],
+                                     as_of=as_of.isoformat() if as_of else None)
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+            self.stdout.write(f"Summary written to {options['json_path']}")
+        self.stdout.write(self.style.SUCCESS("Scale dataset ready"))
+
+    def _build_indexes(self, mongo_uri, db_name):
+        MongoDBConnection.use(pymongo.MongoClient(mongo_uri), db_name)
+        try:
+            ensure_indexes()
+        finally:
+            MongoDBConnection.close()
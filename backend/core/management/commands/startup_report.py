@@ -0,0 +1,49 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from core.loadtest.startup import DEFAULT_TARGETS, measure_startup, format_startup
+
+
+class Command(BaseCommand):
+    """
+    Report how long a fresh process takes to set Django up and import the
+    URLconf (everything a worker loads before its first request), using
+    `python -X importtime`, broken down by package. Save a report with
+    --json and pass it as --baseline after a change to see the difference.
+
+    python manage.py startup_report --json before.json
+    python manage.py startup_report --baseline before.json
+    python manage.py startup_report --target image_gen.views --top 30
+    """
+    help = "Measure process startup and import time per package"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', default=None,
+                            help=f"Module to import after django.setup() (repeatable; default: {', '.join(DEFAULT_TARGETS)})")
+        parser.add_argument('--repeat', type=int, default=3, help="Fresh processes to start; the fastest is kept")
+        parser.add_argument('--top', type=int, default=15, help="Packages to list")
+        parser.add_argument('--json', dest='json_path', default=None, help="Write the report to this file")
+        parser.add_argument('--baseline', default=None, help="Compare with the report in this file")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read startup report from {options['baseline']}: {e}")
+
+        targets = options['target'] or DEFAULT_TARGETS
+        try:
+            report = measure_startup(targets, settings_module=os.environ.get('DJANGO_SETTINGS_MODULE'),
+                                     repeat=options['repeat'])
+        except RuntimeError as e:
+            raise CommandError(f"Importing {', '.join(targets)} failed: {e}")
+
+        self.stdout.write(format_startup(report, top=options['top'], baseline=baseline))
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Report written to {options['json_path']}")
@@ -0,0 +1,187 @@
+import os
+import time
+
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+    generate_latest, CONTENT_TYPE_LATEST, multiprocess,
+)
+from pymongo import monitoring
+from pymongo.common import MAX_POOL_SIZE
+
+# Prometheus metrics for GET /metrics.
+#
+# Under gunicorn, set PROMETHEUS_MULTIPROC_DIR to an empty directory before
+# the server starts (prometheus_client reads it at import). Every worker then
+# writes its samples to files there, and whichever worker serves /metrics
+# reports the sum over all of them. Gauges say how to combine workers
+# (multiprocess_mode). Clear the directory on each deploy and add a
+# gunicorn child_exit hook so dead workers' live gauges are dropped:
+#
+#     def child_exit(server, worker):
+#         from prometheus_client import multiprocess
+#         multiprocess.mark_process_dead(worker.pid)
+
+# Request latencies range from cached reads to Imagen calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+HTTP_REQUESTS = Counter(
+    'crowdlib_http_requests_total', 'HTTP requests by view, DRF action, method and status',
+    ['view', 'action', 'method', 'status']
+)
+HTTP_LATENCY = Histogram(
+    'crowdlib_http_request_duration_seconds', 'HTTP request latency by view and DRF action',
+    ['view', 'action', 'method'], buckets=LATENCY_BUCKETS
+)
+HTTP_IN_PROGRESS = Gauge(
+    'crowdlib_http_requests_in_progress', 'Requests being handled', multiprocess_mode='livesum'
+)
+
+MONGO_COMMAND_LATENCY = Histogram(
+    'crowdlib_mongo_command_duration_seconds', 'MongoDB command round trips by command name',
+    ['command', 'outcome'], buckets=DB_BUCKETS
+)
+MONGO_POOL_CONNECTIONS = Gauge(
+    'crowdlib_mongo_pool_connections', 'Open MongoDB connections', multiprocess_mode='livesum'
+)
+MONGO_POOL_IN_USE = Gauge(
+    'crowdlib_mongo_pool_connections_in_use', 'MongoDB connections checked out', multiprocess_mode='livesum'
+)
+MONGO_POOL_MAX_SIZE = Gauge(
+    'crowdlib_mongo_pool_max_size', 'MongoDB connection pool capacity', multiprocess_mode='livesum'
+)
+MONGO_POOL_WAIT = Histogram(
+    'crowdlib_mongo_pool_checkout_seconds', 'Time spent waiting for a pooled connection',
+    buckets=DB_BUCKETS
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    'crowdlib_mongo_pool_checkout_failures_total', 'Failed connection checkouts', ['reason']
+)
+
+CACHE_REQUESTS = Counter(
+    'crowdlib_cache_requests_total', 'Cache lookups by cache and result (hit or miss)',
+    ['cache', 'result']
+)
+
+IMAGE_GENERATIONS_IN_PROGRESS = Gauge(
+    'crowdlib_image_generations_in_progress', 'Image generations waiting on Imagen',
+    multiprocess_mode='livesum'
+)
+IMAGE_GENERATIONS = Counter(
+    'crowdlib_image_generations_total', 'Image generations by result', ['result']
+)
+IMAGE_GENERATION_LATENCY = Histogram(
+    'crowdlib_image_generation_duration_seconds', 'Imagen call latency', buckets=LATENCY_BUCKETS
+)
+
+SESSION_OPERATIONS = Histogram(
+    'crowdlib_session_operation_duration_seconds', 'Session store operations by type',
+    ['operation'], buckets=DB_BUCKETS
+)
+
+
+def cache_counters(cache: str):
+    """(hit, miss) counter children for one cache, resolved once rather than per lookup"""
+    return CACHE_REQUESTS.labels(cache, 'hit'), CACHE_REQUESTS.labels(cache, 'miss')
+
+
+def observe_request(view: str, action: str, method: str, status: int, seconds: float):
+    HTTP_REQUESTS.labels(view, action, method, str(status)).inc()
+    HTTP_LATENCY.labels(view, action, method).observe(seconds)
+
+
+def render_latest():
+    """
+    Current metrics in the Prometheus text format, summed over all workers
+    when PROMETHEUS_MULTIPROC_DIR is set.
+
+    Returns:
+        (body bytes, content type)
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MongoMetricsListener(monitoring.CommandListener):
+    """Command latency histogram, fed by pymongo's command events"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_LATENCY.labels(event.command_name, 'ok').observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMAND_LATENCY.labels(event.command_name, 'error').observe(event.duration_micros / 1e6)
+
+
+class MongoPoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Connection pool size, utilisation and checkout waits, fed by pymongo's pool events"""
+
+    def __init__(self):
+        # Pool address -> capacity, so a closed pool removes what it added
+        self._capacity = {}
+
+    def pool_created(self, event):
+        # options lists only non-default settings
+        capacity = event.options.get('maxPoolSize', MAX_POOL_SIZE)
+        self._capacity[event.address] = capacity
+        MONGO_POOL_MAX_SIZE.inc(capacity)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        MONGO_POOL_MAX_SIZE.dec(self._capacity.pop(event.address, 0))
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS.inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_FAILURES.labels(str(event.reason)).inc()
+
+    def connection_checked_out(self, event):
+        MONGO_POOL_IN_USE.inc()
+        MONGO_POOL_WAIT.observe(event.duration)
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_IN_USE.dec()
+
+
+class ImageGenerationTracker:
+    """
+    Context manager around one Imagen call: counts it as in progress (the
+    generation queue depth), times it, and records whether it produced an
+    image. Call succeeded() inside the block once an image came back.
+    """
+
+    def __enter__(self):
+        self.ok = False
+        self.started = time.perf_counter()
+        IMAGE_GENERATIONS_IN_PROGRESS.inc()
+        return self
+
+    def succeeded(self):
+        self.ok = True
+
+    def __exit__(self, exc_type, exc, tb):
+        IMAGE_GENERATIONS_IN_PROGRESS.dec()
+        IMAGE_GENERATION_LATENCY.observe(time.perf_counter() - self.started)
+        IMAGE_GENERATIONS.labels('success' if self.ok and exc_type is None else 'failure').inc()
+        return False
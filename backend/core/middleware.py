@@ -0,0 +1,120 @@
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from core.instrumentation import start_request, end_request, timing_stats
+from core.metrics import HTTP_IN_PROGRESS, observe_request
+from core.read_routing import LAST_WRITE_SESSION_KEY, WRITE_METHODS, pin_primary, unpin
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimingMiddleware:
+    """
+    Measures each request: total latency, MongoDB commands (count, time and
+    time per command name, via MongoTimingListener), S3 and Imagen time, and
+    response size. The numbers are added to the per-route stats served by
+    /api/timings/ and, when REQUEST_TIMING_HEADER is on, sent back in a
+    Server-Timing header that browser dev tools display.
+
+    Listed first in MIDDLEWARE so that session loading and saving count too.
+    For streaming responses only the time to the first byte is measured.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            timings = end_request(token)
+
+        size = 0 if response.streaming else len(response.content)
+        timings.finish(response_bytes=size)
+
+        match = request.resolver_match
+        route = f"{request.method} /{match.route}" if match else f"{request.method} <unmatched>"
+        timing_stats.record(route, response.status_code, timings)
+
+        if settings.REQUEST_TIMING_HEADER:
+            response['Server-Timing'] = timings.server_timing()
+        if timings.total_ms >= settings.REQUEST_TIMING_LOG_MS:
+            logger.warning("Slow request %s: %.0fms, %s db commands in %.0fms",
+                           route, timings.total_ms, timings.db_commands, timings.db_ms)
+        return response
+
+
+def view_labels(request):
+    """
+    (view, action) labels for a request: the ViewSet class and DRF action
+    (e.g. FeedViewSet, top_liked), or the URL name for plain Django views.
+    """
+    match = request.resolver_match
+    if match is None:
+        return 'unmatched', ''
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is not None:
+        actions = getattr(match.func, 'actions', None) or {}
+        return view_class.__name__, actions.get(request.method.lower(), '')
+    return match.url_name or match.func.__name__, ''
+
+
+class PrometheusMetricsMiddleware:
+    """
+    Counts requests and observes their latency per view and DRF action for
+    the /metrics endpoint.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        HTTP_IN_PROGRESS.inc()
+        try:
+            response = self.get_response(request)
+        finally:
+            HTTP_IN_PROGRESS.dec()
+        view, action = view_labels(request)
+        observe_request(view, action, request.method, response.status_code, time.perf_counter() - started)
+        return response
+
+
+class ReadYourWritesMiddleware:
+    """
+    Keeps a session's reads on the primary for READ_YOUR_WRITES_SECONDS
+    after it changed something, so users see their own likes, comments and
+    edits while other reads go to secondaries (core/read_routing.py). A
+    write request is pinned for its whole duration too.
+
+    Listed after SessionMiddleware: it reads and stamps request.session.
+    """
+
+    def __init__(self, get_response):
+        if not settings.READ_ROUTING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        session = getattr(request, 'session', None)
+        writing = request.method in WRITE_METHODS
+        last_write = session.get(LAST_WRITE_SESSION_KEY) if session is not None else None
+        pinned = writing or (last_write is not None and time.time() - last_write < settings.READ_YOUR_WRITES_SECONDS)
+
+        token = pin_primary(pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            unpin(token)
+
+        user = getattr(request, 'user', None)
+        if writing and session is not None and response.status_code < 400 and user is not None \
+                and user.is_authenticated:
+            session[LAST_WRITE_SESSION_KEY] = time.time()
+        return response
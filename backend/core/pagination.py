@@ -0,0 +1,89 @@
+import base64
+from datetime import datetime
+from typing import Optional, Tuple, Dict
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+def encode_cursor(sort_value: datetime, doc_id) -> str:
+    """
+    Encode the sort key of the last document on a page into an opaque cursor.
+
+    Args:
+        sort_value: Value of the sort field (e.g. created_at) of the last document
+        doc_id: _id of the last document (tie breaker for equal sort values)
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = f"{sort_value.isoformat()}|{doc_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor string from a previous page
+
+    Returns:
+        Tuple of (sort_value, ObjectId)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        sort_part, id_part = raw.split('|', 1)
+        return datetime.fromisoformat(sort_part), ObjectId(id_part)
+    except (ValueError, InvalidId, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def build_cursor_filter(cursor: Optional[str], sort_field: str = 'created_at', id_field: str = '_id') -> Dict:
+    """
+    Build the query clause selecting documents after a cursor, for a
+    descending (sort_field, id_field) ordering.
+
+    Args:
+        cursor: Cursor string from a previous page, or None for the first page
+        sort_field: Field the page is sorted on
+        id_field: Field holding the tie breaker id (e.g. a referenced document's id)
+
+    Returns:
+        Filter dictionary to merge into the base query (empty for the first page)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if not cursor:
+        return {}
+
+    sort_value, last_id = decode_cursor(cursor)
+    return {'$or': [
+        {sort_field: {'$lt': sort_value}},
+        {sort_field: sort_value, id_field: {'$lt': last_id}},
+    ]}
+
+
+def parse_limit_param(raw, default: int = 20, maximum: int = 100) -> int:
+    """
+    Parse a page size query parameter, falling back to the default on bad input.
+
+    Args:
+        raw: Raw query parameter value
+        default: Page size used when raw is missing or invalid
+        maximum: Upper bound on the page size
+
+    Returns:
+        Page size between 1 and maximum
+    """
+    try:
+        limit = int(raw)
+        if limit <= 0:
+            limit = default
+    except (TypeError, ValueError):
+        limit = default
+    return min(limit, maximum)
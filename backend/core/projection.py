@@ -0,0 +1,76 @@
+import re
+from typing import Optional, List, Dict
+
+# Dotted field paths only; rejects operators ($...) and empty segments
+FIELD_NAME_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$')
+
+
+def parse_fields_param(raw: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma separated ``fields=`` query parameter.
+
+    Args:
+        raw: Raw query parameter value, e.g. "title,created_at,creator_id"
+
+    Returns:
+        List of field names (deduplicated, order preserved), or None if the
+        parameter was absent or empty
+
+    Raises:
+        ValueError: If any field name is not a valid document path
+    """
+    if raw is None:
+        return None
+
+    fields = []
+    for name in raw.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if not FIELD_NAME_RE.match(name):
+            raise ValueError(f"Invalid field name: '{name}'")
+        if name not in fields:
+            fields.append(name)
+
+    return fields or None
+
+
+def parse_expand_param(raw: Optional[str], allowed) -> List[str]:
+    """
+    Parse a comma separated ``expand=`` query parameter.
+
+    Args:
+        raw: Raw query parameter value, e.g. "template,creator"
+        allowed: Names of the relations that may be expanded
+
+    Returns:
+        List of relation names (deduplicated, order preserved), empty if absent
+
+    Raises:
+        ValueError: If a name is not one of allowed
+    """
+    names = []
+    for name in (raw or '').split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in allowed:
+            raise ValueError(f"Cannot expand '{name}'; expected one of: {', '.join(allowed)}")
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def build_projection(fields: Optional[List[str]]) -> Optional[Dict]:
+    """
+    Build a MongoDB inclusion projection from a list of field names.
+
+    Args:
+        fields: Field names to include, or None for the whole document
+
+    Returns:
+        Projection dictionary, or None so pymongo returns every field
+    """
+    if not fields:
+        return None
+    return {field: 1 for field in fields}
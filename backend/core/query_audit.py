@@ -0,0 +1,304 @@
+import json
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bson import json_util
+from pymongo import monitoring
+from pymongo.errors import PyMongoError
+
+EXPLAINABLE_COMMANDS = {'find', 'aggregate', 'count', 'distinct', 'update', 'delete', 'findAndModify'}
+SYSTEM_DATABASES = {'admin', 'config', 'local'}
+
+# Session, transaction and driver fields that are not part of a query's shape
+# and that explain rejects
+META_FIELDS = {
+    'lsid', '$db', '$clusterTime', 'txnNumber', 'autocommit', 'startTransaction', '$readPreference',
+    'readConcern', 'writeConcern', 'apiVersion', 'apiStrict', 'apiDeprecationErrors', 'comment',
+    'maxTimeMS', 'bypassDocumentValidation', 'ordered', 'cursor',
+}
+# Values under these keys name fields, collections or directions, so they stay literal in a shape
+LITERAL_KEYS = {
+    'sort', '$sort', 'projection', '$project', 'hint', 'key', 'from', 'localField', 'foreignField', 'as',
+    '$unwind', 'path', '$count', '$group',
+}
+
+
+def _shape(value, literal: bool = False):
+    """The value with query constants replaced by '?' (field references like "$likes" are kept)"""
+    if isinstance(value, dict):
+        return {key: _shape(item, literal or key in LITERAL_KEYS) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            shaped = _shape(item, literal)
+            if shaped not in shapes:
+                shapes.append(shaped)
+        return shapes
+    if literal or (isinstance(value, str) and value.startswith('$')):
+        return value if isinstance(value, (str, int, float, bool)) or value is None else '?'
+    return '?'
+
+
+def split_command(command_name: str, command: Dict) -> List[Tuple[str, Dict]]:
+    """
+    Turn one command into (shape key, explainable command) pairs. Updates
+    and deletes carry several statements and become one pair per statement.
+    """
+    command = {key: value for key, value in command.items() if key not in META_FIELDS}
+    if command_name == 'update':
+        commands = [dict(command, updates=[statement]) for statement in command.get('updates', [])]
+    elif command_name == 'delete':
+        commands = [dict(command, deletes=[statement]) for statement in command.get('deletes', [])]
+    else:
+        commands = [command]
+
+    pairs = []
+    for single in commands:
+        rest = {key: value for key, value in single.items() if key != command_name}
+        if command_name == 'update':
+            # Replacement and update documents only matter for their operators
+            rest['updates'] = [{key: value for key, value in statement.items() if key != 'u'}
+                               for statement in rest['updates']]
+        shape = {'command': command_name, 'collection': single.get(command_name), 'shape': _shape(rest)}
+        pairs.append((json.dumps(shape, default=str), single))
+    return pairs
+
+
+class QueryShapeRecorder(monitoring.CommandListener):
+    """
+    Captures query shapes for audit(), which explains them later.
+
+    Remembers the first example of every distinct query shape, with how many
+    times each shape was sent. With a path, each new shape is also appended
+    to that file as a JSON line, so shapes from several processes (e.g. a
+    parallel test run) can be audited together.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.shapes: Dict[str, Dict] = {}
+        # Switched off around a tool's own queries so only the app's are audited
+        self.enabled = True
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if (not self.enabled or event.command_name not in EXPLAINABLE_COMMANDS
+                or event.database_name in SYSTEM_DATABASES):
+            return
+        try:
+            pairs = split_command(event.command_name, event.command)
+        except Exception:
+            # Recording must never break the command being sent
+            return
+        for key, command in pairs:
+            if str(command.get(event.command_name, '')).startswith('system.'):
+                continue
+            with self._lock:
+                if key in self.shapes:
+                    self.shapes[key]['calls'] += 1
+                    continue
+                entry = {'key': key, 'database': event.database_name, 'command_name': event.command_name,
+                         'collection': command.get(event.command_name), 'command': command, 'calls': 1}
+                self.shapes[key] = entry
+                if self.path:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write(json_util.dumps(entry) + '\n')
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def load_shapes(paths: Iterable[str]) -> Dict[str, Dict]:
+    """Shapes recorded to JSON lines files, deduplicated by shape"""
+    shapes = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json_util.loads(line)
+                if entry['key'] in shapes:
+                    shapes[entry['key']]['calls'] += entry.get('calls', 1)
+                else:
+                    shapes[entry['key']] = entry
+    return shapes
+
+
+def _plan_stages(plan) -> List[Dict]:
+    """Stages of a winning plan tree, root first (classic and slot-based plans)"""
+    stages = []
+
+    def visit(node):
+        if not isinstance(node, dict):
+            return
+        if 'queryPlan' in node:
+            visit(node['queryPlan'])
+            return
+        if isinstance(node.get('stage'), str):
+            stages.append(node)
+        for key in ('inputStage', 'outerStage', 'innerStage', 'thenStage', 'elseStage'):
+            visit(node.get(key))
+        for child in node.get('inputStages', []):
+            visit(child)
+
+    visit(plan)
+    return stages
+
+
+def summarize_explain(explain: Dict) -> Dict:
+    """
+    The facts the audit checks, from an explain("executionStats") reply for
+    find, count, distinct, update, delete, findAndModify or aggregate.
+
+    Aggregations report their query part either at the top level or in a
+    leading $cursor stage, followed by the stages that ran in the pipeline;
+    $lookup stages report their own collection scans.
+    """
+    planners, stats = [], []
+
+    def collect(node):
+        if 'queryPlanner' in node:
+            planners.append(node['queryPlanner'])
+        if 'executionStats' in node:
+            stats.append(node['executionStats'])
+        for stage in node.get('stages', []):
+            if '$cursor' in stage:
+                collect(stage['$cursor'])
+        for shard in (node.get('shards') or {}).values():
+            if isinstance(shard, dict):
+                collect(shard)
+
+    collect(explain)
+    stages = [stage for planner in planners for stage in _plan_stages(planner.get('winningPlan', {}))]
+    names = [stage['stage'] for stage in stages]
+    lookup_scans = sum(1 for stage in stages
+                       if stage['stage'] == 'EQ_LOOKUP' and stage.get('strategy') == 'NestedLoopJoin')
+
+    docs_examined = sum(s.get('totalDocsExamined', 0) for s in stats)
+    keys_examined = sum(s.get('totalKeysExamined', 0) for s in stats)
+    returned = stats[0].get('nReturned', 0) if stats else 0
+    pipeline_sort = False
+    for stage in explain.get('stages', []):
+        if '$lookup' in stage:
+            lookup_scans += stage.get('collectionScans', 0)
+            docs_examined += stage.get('totalDocsExamined', 0)
+            keys_examined += stage.get('totalKeysExamined', 0)
+        if '$sort' in stage:
+            pipeline_sort = True
+        if 'nReturned' in stage:
+            returned = stage['nReturned']
+
+    return {
+        'stages': names,
+        'indexes': sorted({stage['indexName'] for stage in stages if 'indexName' in stage}
+                          | ({'_id_'} if 'IDHACK' in names else set())),
+        'collscan': 'COLLSCAN' in names,
+        'blocking_sort': 'SORT' in names,
+        'pipeline_sort': pipeline_sort,
+        'lookup_collscans': lookup_scans,
+        'docs_examined': docs_examined,
+        'keys_examined': keys_examined,
+        'returned': returned,
+    }
+
+
+class AuditThresholds:
+    """
+    What makes an explained query shape a problem.
+
+    Collection scans and blocking sorts are structural, so they are flagged
+    however small the test data is. The examined/returned ratio is only
+    checked once at least min_docs_examined documents were read.
+    """
+
+    def __init__(self, allow_collscan: bool = False, allow_blocking_sort: bool = False,
+                 allow_pipeline_sort: bool = True, max_examined_ratio: float = 10.0,
+                 min_docs_examined: int = 100, ignore: Iterable[str] = ()):
+        self.allow_collscan = allow_collscan
+        self.allow_blocking_sort = allow_blocking_sort
+        self.allow_pipeline_sort = allow_pipeline_sort
+        self.max_examined_ratio = max_examined_ratio
+        self.min_docs_examined = min_docs_examined
+        # "collection" or "collection.command" names to skip
+        self.ignore = set(ignore)
+
+    def ignores(self, entry: Dict) -> bool:
+        return (entry['collection'] in self.ignore
+                or f"{entry['collection']}.{entry['command_name']}" in self.ignore)
+
+    def problems(self, summary: Dict) -> List[str]:
+        found = []
+        if summary['collscan'] and not self.allow_collscan:
+            found.append('COLLSCAN')
+        if summary['lookup_collscans'] and not self.allow_collscan:
+            found.append(f"COLLSCAN in $lookup x{summary['lookup_collscans']}")
+        if summary['blocking_sort'] and not self.allow_blocking_sort:
+            found.append('blocking SORT')
+        if summary['pipeline_sort'] and not self.allow_pipeline_sort:
+            found.append('pipeline $sort')
+        ratio = summary['docs_examined'] / max(summary['returned'], 1)
+        if summary['docs_examined'] >= self.min_docs_examined and ratio > self.max_examined_ratio:
+            found.append(f"examined {summary['docs_examined']} docs for {summary['returned']} returned")
+        return found
+
+
+def audit(client, shapes: Dict[str, Dict], thresholds: AuditThresholds, db_name: Optional[str] = None) -> List[Dict]:
+    """
+    Explain every recorded shape and check it against the thresholds.
+
+    Args:
+        client: MongoClient for the database holding representative data and the app's indexes
+        shapes: Recorded shapes (QueryShapeRecorder.shapes or load_shapes())
+        thresholds: What counts as a problem
+        db_name: Explain against this database instead of the one each shape was recorded in
+
+    Returns:
+        One row per shape, worst first: collection, command, calls, the
+        explain summary, problems, and error when explain failed
+    """
+    rows = []
+    for entry in shapes.values():
+        row = {'collection': entry['collection'], 'command': entry['command_name'], 'calls': entry.get('calls', 1),
+               'shape': json.loads(entry['key'])['shape'], 'problems': [], 'error': None, 'summary': None}
+        if thresholds.ignores(entry):
+            row['ignored'] = True
+            rows.append(row)
+            continue
+        try:
+            explain = client[db_name or entry['database']].command(
+                'explain', entry['command'], verbosity='executionStats')
+        except PyMongoError as e:
+            row['error'] = str(e)
+            rows.append(row)
+            continue
+        row['summary'] = summarize_explain(explain)
+        row['problems'] = thresholds.problems(row['summary'])
+        rows.append(row)
+    rows.sort(key=lambda r: (-len(r['problems']), -(r['summary'] or {}).get('docs_examined', 0)))
+    return rows
+
+
+def format_audit(rows: List[Dict]) -> str:
+    """Fixed-width table of audit() rows"""
+    header = f"{'collection':<18}{'command':<10}{'calls':>6}{'examined':>10}{'returned':>10}  {'plan':<28}problems"
+    lines = [header, '-' * (len(header) + 10)]
+    for row in rows:
+        summary = row['summary'] or {}
+        if row.get('ignored'):
+            plan, problems = '-', 'ignored'
+        elif row['error']:
+            plan, problems = '-', f"explain failed: {row['error'][:60]}"
+        else:
+            plan = ' > '.join(summary['stages'][:4]) or '-'
+            if summary['indexes']:
+                plan += f" [{', '.join(summary['indexes'])}]"
+            problems = ', '.join(row['problems']) or 'ok'
+        lines.append(f"{str(row['collection']):<18}{row['command']:<10}{row['calls']:>6}"
+                     f"{summary.get('docs_examined', '-'):>10}{summary.get('returned', '-'):>10}  "
+                     f"{plan[:27]:<28}{problems}")
+        if row['problems']:
+            lines.append(f"    {json.dumps(row['shape'], default=str)[:160]}")
+    return '\n'.join(lines)
@@ -0,0 +1,62 @@
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from pymongo.read_preferences import SecondaryPreferred
+
+# Kinds of reads that can be slightly stale, as named by the models:
+# feed aggregations, like counts, comment lists, template fetches and rollups
+OPERATIONS = ('feed', 'counts', 'comments', 'templates', 'analytics')
+
+# Session key holding when the session last changed something (epoch seconds)
+LAST_WRITE_SESSION_KEY = '_last_write_at'
+WRITE_METHODS = frozenset({'POST', 'PUT', 'PATCH', 'DELETE'})
+
+# True while serving a request whose session wrote recently, or which writes
+_primary_pinned: ContextVar[bool] = ContextVar('primary_pinned', default=False)
+
+# (id(collection), operation) -> (collection, routed collection); with_options builds a new object each call
+_routed: Dict[Tuple[int, str], Tuple[object, object]] = {}
+
+
+def pin_primary(pinned: bool = True):
+    """Send every read on this request to the primary; returns a token for unpin()"""
+    return _primary_pinned.set(pinned)
+
+
+def unpin(token):
+    _primary_pinned.reset(token)
+
+
+def primary_pinned() -> bool:
+    return _primary_pinned.get()
+
+
+def read_preference(operation: str) -> Optional[SecondaryPreferred]:
+    """
+    The read preference for one kind of read, or None for the primary.
+
+    secondaryPreferred with maxStalenessSeconds: a secondary is used only if
+    it is at most READ_MAX_STALENESS_SECONDS behind, otherwise the primary.
+    """
+    if (not settings.READ_ROUTING_ENABLED or operation not in settings.READ_ROUTING_SECONDARY
+            or _primary_pinned.get()):
+        return None
+    return SecondaryPreferred(max_staleness=settings.READ_MAX_STALENESS_SECONDS)
+
+
+def for_read(collection, operation: str):
+    """
+    The collection to run a read of kind `operation` on: the collection
+    itself for the primary, or a copy carrying the secondary read preference.
+    """
+    preference = read_preference(operation)
+    if preference is None:
+        return collection
+    key = (id(collection), operation)
+    cached = _routed.get(key)
+    if cached is not None and cached[0] is collection and cached[1].read_preference == preference:
+        return cached[1]
+    routed = collection.with_options(read_preference=preference)
+    _routed[key] = (collection, routed)
+    return routed
@@ -0,0 +1,301 @@
+import logging
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, List, Iterable, Tuple
+
+from bson import ObjectId
+from django.conf import settings
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from core.db_connect import get_collection
+from core.read_routing import for_read
+
+logger = logging.getLogger(__name__)
+
+HOUR = 'hour'
+DAY = 'day'
+GRANULARITIES = (HOUR, DAY)
+
+# Rollup dimension -> field of the filled madlib that identifies it
+DIMENSIONS = {
+    'template': 'template_id',
+    'creator': 'creator_id',
+}
+METRICS = ('fills', 'likes', 'comments', 'images')
+
+# Event collection -> (metric it counts, field holding the filled madlib's
+# id, or None when the event is the filled madlib itself)
+SOURCES = {
+    'filled_madlibs': ('fills', None),
+    'likes': ('likes', 'post_id'),
+    'comments': ('comments', 'post_id'),
+    'image_events': ('images', 'madlib_id'),
+}
+
+LEASE_ID = 'lease'
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """
+    Start of the hour or day containing moment, as a naive UTC datetime
+    (how pymongo stores and returns dates).
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    if granularity == DAY:
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class RollupService:
+    """
+    Hourly and daily engagement counters per template and per creator.
+
+    Each bucket document holds the fills, likes, comments and images counted
+    for one (dimension, key, granularity, bucket start). run() folds in only
+    the events created since the previous run: every source collection is
+    read in _id order from a stored watermark, so a run costs the number of
+    new events rather than a scan of the raw collections. Reports read the
+    buckets alone.
+
+    Events are bucketed by their _id timestamp. The newest ROLLUP_LAG_SECONDS
+    of events are left for the next run so that ids allocated slightly out of
+    order by different app servers are not skipped. Counts are of events
+    seen: a like that is later removed is still counted. The watermark is
+    saved after each batch, so a run that dies mid-batch may count that one
+    batch again on the next run.
+
+    Only one run works at a time: it holds a lease for ROLLUP_LEASE_SECONDS
+    and renews it before every batch. A run whose lease expired and was
+    taken over stops without applying the batch.
+    """
+
+    def __init__(self):
+        self.collection = get_collection('rollups')
+        self.state = get_collection('rollup_state')
+        self.madlibs = get_collection('filled_madlibs')
+        self.sources = {name: get_collection(name) for name in SOURCES}
+        self._create_indexes()
+
+    def _create_indexes(self):
+        self.collection.create_index(
+            [('dimension', 1), ('key', 1), ('granularity', 1), ('bucket', 1)],
+            unique=True, name='idx_rollup_bucket'
+        )
+        self.collection.create_index(
+            [('dimension', 1), ('granularity', 1), ('bucket', 1)],
+            name='idx_rollup_range'
+        )
+        # Only hourly buckets carry expires_at; daily ones are kept
+        self.collection.create_index('expires_at', expireAfterSeconds=0, name='idx_rollup_ttl')
+
+    def _acquire_lease(self, token: str, seconds: int) -> bool:
+        """Claim the single-runner lease unless another live run holds it"""
+        now = datetime.now(timezone.utc)
+        try:
+            self.state.update_one(
+                {'_id': LEASE_ID, 'expires_at': {'$lt': now}},
+                {'$set': {'owner': token, 'expires_at': now + timedelta(seconds=seconds)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def _renew_lease(self, token: str, seconds: int) -> bool:
+        """Extend the lease if this run still holds it; False once another run has taken it over"""
+        result = self.state.update_one(
+            {'_id': LEASE_ID, 'owner': token},
+            {'$set': {'expires_at': datetime.now(timezone.utc) + timedelta(seconds=seconds)}}
+        )
+        return bool(result.matched_count)
+
+    def _release_lease(self, token: str):
+        self.state.delete_one({'_id': LEASE_ID, 'owner': token})
+
+    def _watermark(self, source: str) -> Optional[ObjectId]:
+        doc = self.state.find_one({'_id': f"watermark:{source}"})
+        return doc['last_id'] if doc else None
+
+    def _save_watermark(self, source: str, last_id: ObjectId):
+        self.state.update_one(
+            {'_id': f"watermark:{source}"},
+            {'$set': {'last_id': last_id, 'updated_at': datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+    def _resolve(self, docs: List[Dict], ref_field: Optional[str]) -> List[Tuple[datetime, Dict]]:
+        """
+        Pair each event with the filled madlib it belongs to.
+
+        Events on madlibs that no longer exist, and likes on comments, are dropped.
+
+        Returns:
+            (event time, madlib with template_id and creator_id) tuples
+        """
+        if ref_field is None:
+            return [(doc['_id'].generation_time, doc) for doc in docs]
+
+        ids = {doc[ref_field] for doc in docs if doc.get(ref_field) is not None}
+        madlibs = {}
+        if ids:
+            cursor = self.madlibs.find({'_id': {'$in': list(ids)}}, {'template_id': 1, 'creator_id': 1})
+            madlibs = {madlib['_id']: madlib for madlib in cursor}
+        return [
+            (doc['_id'].generation_time, madlibs[doc[ref_field]])
+            for doc in docs if doc.get(ref_field) in madlibs
+        ]
+
+    def _apply(self, metric: str, events: Iterable[Tuple[datetime, Dict]]) -> int:
+        """
+        Add one batch of events to their buckets with a single bulk write.
+
+        Returns:
+            Number of bucket documents touched
+        """
+        counts = Counter()
+        for moment, madlib in events:
+            for dimension, field in DIMENSIONS.items():
+                key = madlib.get(field)
+                if key is None:
+                    continue
+                for granularity in GRANULARITIES:
+                    counts[(dimension, key, granularity, bucket_start(moment, granularity))] += 1
+
+        retention = timedelta(days=settings.ROLLUP_HOURLY_RETENTION_DAYS)
+        ops = []
+        for (dimension, key, granularity, bucket), count in counts.items():
+            update = {'$inc': {metric: count}}
+            if granularity == HOUR:
+                update['$setOnInsert'] = {'expires_at': bucket + retention}
+            ops.append(UpdateOne(
+                {'dimension': dimension, 'key': key, 'granularity': granularity, 'bucket': bucket},
+                update, upsert=True
+            ))
+        if ops:
+            self.collection.bulk_write(ops, ordered=False)
+        return len(ops)
+
+    def run(self, batch_size: Optional[int] = None) -> Optional[Dict[str, int]]:
+        """
+        Fold every event created since the last run into the buckets.
+
+        Args:
+            batch_size: Events read per query (default settings.ROLLUP_BATCH_SIZE)
+
+        Returns:
+            Events processed per source (up to where it stopped if its lease
+            was taken over), or None if another run holds the lease
+        """
+        batch_size = batch_size or settings.ROLLUP_BATCH_SIZE
+        token = uuid.uuid4().hex
+        if not self._acquire_lease(token, settings.ROLLUP_LEASE_SECONDS):
+            logger.info("Rollup run skipped: another run is in progress")
+            return None
+
+        cutoff = ObjectId.from_datetime(
+            datetime.now(timezone.utc) - timedelta(seconds=settings.ROLLUP_LAG_SECONDS)
+        )
+        processed = {}
+        lost_lease = False
+        try:
+            for source, (metric, ref_field) in SOURCES.items():
+                projection = {'template_id': 1, 'creator_id': 1} if ref_field is None else {ref_field: 1}
+                last_id = self._watermark(source)
+                processed[source] = 0
+                while True:
+                    id_range = {'$lt': cutoff}
+                    if last_id is not None:
+                        id_range['$gt'] = last_id
+                    docs = list(self.sources[source].find(
+                        {'_id': id_range}, projection, sort=[('_id', 1)], limit=batch_size
+                    ))
+                    if not docs:
+                        break
+                    # Another run that took over an expired lease would count this batch too
+                    if not self._renew_lease(token, settings.ROLLUP_LEASE_SECONDS):
+                        lost_lease = True
+                        break
+                    self._apply(metric, self._resolve(docs, ref_field))
+                    last_id = docs[-1]['_id']
+                    self._save_watermark(source, last_id)
+                    processed[source] += len(docs)
+                    if len(docs) < batch_size:
+                        break
+                if lost_lease:
+                    break
+        finally:
+            self._release_lease(token)
+
+        if lost_lease:
+            logger.warning("Rollup run stopped: its lease was taken over by another run after %s", processed)
+        else:
+            logger.info("Rollup run processed %s", processed)
+        return processed
+
+    def reset(self) -> bool:
+        """
+        Drop every bucket and watermark so the next run rebuilds from scratch.
+
+        Holds the lease while doing so: a run in progress would otherwise save
+        watermarks past events whose counts were just dropped.
+
+        Returns:
+            True once dropped, False if a run holds the lease
+        """
+        token = uuid.uuid4().hex
+        if not self._acquire_lease(token, settings.ROLLUP_LEASE_SECONDS):
+            logger.info("Rollup reset skipped: a run is in progress")
+            return False
+        try:
+            self.collection.delete_many({})
+            self.state.delete_many({'_id': {'$ne': LEASE_ID}})
+        finally:
+            self._release_lease(token)
+        return True
+
+    def top(self, dimension: str, metric: str, granularity: str, start: datetime, end: datetime,
+            limit: int = 20) -> List[Dict]:
+        """
+        Keys with the highest total of one metric over [start, end).
+
+        Returns:
+            [{'key', 'fills', 'likes', 'comments', 'images'}], best first
+        """
+        pipeline = [
+            {'$match': {
+                'dimension': dimension,
+                'granularity': granularity,
+                'bucket': {'$gte': bucket_start(start, granularity), '$lt': end},
+            }},
+            {'$group': dict({'_id': '$key'}, **{m: {'$sum': f"${m}"} for m in METRICS})},
+            {'$sort': {metric: -1, '_id': 1}},
+            {'$limit': limit},
+        ]
+        results = []
+        for row in for_read(self.collection, 'analytics').aggregate(pipeline):
+            row['key'] = str(row.pop('_id'))
+            results.append(row)
+        return results
+
+    def series(self, dimension: str, key: ObjectId, granularity: str, start: datetime,
+               end: datetime) -> List[Dict]:
+        """
+        Per-bucket counters of one template or creator over [start, end).
+        Buckets with no activity are absent.
+
+        Returns:
+            [{'bucket', 'fills', 'likes', 'comments', 'images'}] in time order
+        """
+        cursor = for_read(self.collection, 'analytics').find(
+            {
+                'dimension': dimension,
+                'key': key,
+                'granularity': granularity,
+                'bucket': {'$gte': bucket_start(start, granularity), '$lt': end},
+            },
+            {'_id': 0, 'bucket': 1, **{m: 1 for m in METRICS}},
+            sort=[('bucket', 1)]
+        )
+        return [dict({m: 0 for m in METRICS}, **doc) for doc in cursor]
@@ -0,0 +1,62 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+
+class ServiceContainer:
+    """
+    Builds each model service (UserOperations, LikeModel, FeedService, ...)
+    once per process and hands the same instance to every request, so a
+    viewset's constructor only does dictionary lookups instead of fetching
+    collections and creating indexes.
+
+    Services are keyed by class and built with no arguments. They must keep
+    no per-request state; the model services only hold collection handles.
+    The container is emptied when MongoDBConnection switches databases, since
+    the cached services hold collections from the old one.
+
+    Tests can swap in a fake for one class with override().
+    """
+
+    def __init__(self):
+        self._instances: Dict[type, object] = {}
+        self._overrides: Dict[type, object] = {}
+        # Reentrant: a service's constructor may ask for another service
+        self._lock = threading.RLock()
+
+    def get(self, cls):
+        """The shared instance of cls (or its override), built on first use"""
+        if self._overrides:
+            override = self._overrides.get(cls)
+            if override is not None:
+                return override
+        instance = self._instances.get(cls)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(cls)
+                if instance is None:
+                    instance = self._instances[cls] = cls()
+        return instance
+
+    @contextmanager
+    def override(self, cls, fake):
+        """Hand out `fake` for cls inside the with block"""
+        with self._lock:
+            previous = self._overrides.get(cls)
+            self._overrides[cls] = fake
+        try:
+            yield fake
+        finally:
+            with self._lock:
+                if previous is None:
+                    self._overrides.pop(cls, None)
+                else:
+                    self._overrides[cls] = previous
+
+    def reset(self):
+        """Forget every built instance; the next get() builds a fresh one"""
+        with self._lock:
+            self._instances.clear()
+
+
+services = ServiceContainer()
@@ -1,6 +1,7 @@
 from django.contrib.sessions.backends.base import SessionBase, CreateError
 from django.utils import timezone
 from datetime import datetime
+from core.metrics import SESSION_OPERATIONS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,24 +24,25 @@ class SessionStore(SessionBase):
             self.modified = True
             return
 
+    @SESSION_OPERATIONS.labels('save').time()
     def save(self, must_create=False):
         """Save the current session data to MongoDB"""
         if self.session_key is None:
             return self.create()
 
-        # Encode session data as Django expects
-        # Access session data through dict() to get all current session data
-        session_dict = dict(self.items())
+        # Encode session data as Django expects; the cache is encoded as is,
+        # without a copy, and not reloaded for a session being created
+        session_dict = self._get_session(no_load=must_create)
         encoded_data = self.encode(session_dict)
 
-        logger.debug(f"Saving session: key={self.session_key}")
-        logger.debug(f"Session data keys: {list(session_dict.keys())}")
-        logger.debug(f"Must create: {must_create}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Saving session: key=%s, data_keys=%s, must_create=%s",
+                         self.session_key, list(session_dict), must_create)
 
         if must_create:
             # Check if session already exists
             if self.exists(self.session_key):
-                logger.error(f"Session already exists: {self.session_key}")
+                logger.error("Session already exists: %s", self.session_key)
                 raise CreateError
 
         session_data = {
@@ -52,7 +54,7 @@ class SessionStore(SessionBase):
         if must_create:
             # Insert new session
             result = self.collection.insert_one(session_data)
-            logger.info(f"Session created: key={self.session_key}, inserted_id={result.inserted_id}")
+            logger.info("Session created: key=%s, inserted_id=%s", self.session_key, result.inserted_id)
         else:
             # Update existing or create new session
             result = self.collection.update_one(
@@ -60,22 +62,25 @@ class SessionStore(SessionBase):
                 {'$set': session_data},
                 upsert=True
             )
-            logger.info(f"Session saved: key={self.session_key}, matched={result.matched_count}, modified={result.modified_count}, upserted={result.upserted_id}")
+            logger.info("Session saved: key=%s, matched=%s, modified=%s, upserted=%s",
+                        self.session_key, result.matched_count, result.modified_count, result.upserted_id)
 
+    @SESSION_OPERATIONS.labels('exists').time()
     def exists(self, session_key):
         """Check if a session exists in the database"""
         return self.collection.find_one({'session_key': session_key}) is not None
 
+    @SESSION_OPERATIONS.labels('load').time()
     def load(self):
         """Load session data from MongoDB"""
-        logger.debug(f"Loading session: key={self.session_key}")
+        logger.debug("Loading session: key=%s", self.session_key)
 
         if self.session_key is None:
             logger.debug("No session key provided, returning empty dict")
             return {}
 
         session_doc = self.collection.find_one({'session_key': self.session_key})
-        logger.debug(f"Session document found: {session_doc is not None}")
+        logger.debug("Session document found: %s", session_doc is not None)
 
         if session_doc:
             expire_date = session_doc.get('expire_date')
@@ -86,26 +91,29 @@ class SessionStore(SessionBase):
                     expire_date = timezone.make_aware(expire_date)
 
                 now = timezone.now()
-                logger.debug(f"Expire date: {expire_date}, Current time: {now}")
+                logger.debug("Expire date: %s, Current time: %s", expire_date, now)
 
                 if expire_date > now:
                     encoded_data = session_doc.get('session_data', '')
                     try:
                         decoded = self.decode(encoded_data)
-                        logger.info(f"Session loaded successfully: key={self.session_key}, data_keys={list(decoded.keys())}")
+                        if logger.isEnabledFor(logging.INFO):
+                            logger.info("Session loaded successfully: key=%s, data_keys=%s",
+                                        self.session_key, list(decoded))
                         return decoded
                     except Exception as e:
                         # If decoding fails, return empty dict
-                        logger.error(f"Failed to decode session: key={self.session_key}, error={e}")
+                        logger.error("Failed to decode session: key=%s, error=%s", self.session_key, e)
                         return {}
                 else:
-                    logger.info(f"Session expired: key={self.session_key}, expiry={expire_date}")
+                    logger.info("Session expired: key=%s, expiry=%s", self.session_key, expire_date)
 
         # Session doesn't exist or is expired
         self._session_key = None
-        logger.debug(f"Session not found or expired: key={self.session_key}")
+        logger.debug("Session not found or expired: key=%s", self.session_key)
         return {}
 
+    @SESSION_OPERATIONS.labels('delete').time()
     def delete(self, session_key=None):
         """Delete a session from the database"""
         key = session_key or self.session_key
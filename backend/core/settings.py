@@ -1,7 +1,6 @@
 from pathlib import Path
 from dotenv import load_dotenv
 import os
-import boto3
 
 load_dotenv()
 
@@ -30,9 +29,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PrometheusMetricsMiddleware',
+    'core.middleware.RequestTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.ReadYourWritesMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -126,7 +128,103 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 DB_USER = os.environ['MONGODB_CLIENT_USERNAME']
 DB_PASSWORD = os.environ['MONGODB_CLIENT_PASSWORD']
 MONGODB_NAME = os.environ['MONGODB_DB_NAME']
-MONGODB_URI = f'mongodb+srv://{DB_USER}:{DB_PASSWORD}@{MONGODB_NAME}.2h0tvpx.mongodb.net/?retryWrites=true&ssl=true&w=majority&appName={MONGODB_NAME}'
+# MONGODB_URI overrides the Atlas cluster, e.g. for a local mongod
+MONGODB_URI = os.getenv('MONGODB_URI') or f'mongodb+srv://{DB_USER}:{DB_PASSWORD}@{MONGODB_NAME}.2h0tvpx.mongodb.net/?retryWrites=true&ssl=true&w=majority&appName={MONGODB_NAME}'
+
+# Like/unlike write coalescing (social/write_buffer.py), off by default.
+# Toggles are acknowledged once buffered; up to FLUSH_INTERVAL seconds (or
+# MAX_PENDING entries) of them can be lost if the process dies.
+LIKE_WRITE_BUFFER_ENABLED = os.getenv('LIKE_WRITE_BUFFER_ENABLED', 'false').lower() == 'true'
+LIKE_WRITE_BUFFER_FLUSH_INTERVAL = float(os.getenv('LIKE_WRITE_BUFFER_FLUSH_INTERVAL', '0.5'))
+LIKE_WRITE_BUFFER_MAX_PENDING = int(os.getenv('LIKE_WRITE_BUFFER_MAX_PENDING', '5000'))
+LIKE_WRITE_BUFFER_WRITE_CONCERN = os.getenv('LIKE_WRITE_BUFFER_WRITE_CONCERN', 'majority')
+
+# Cascade deletes (core/cascade.py): parents processed per batch, and users
+# with more madlibs than the threshold are deleted by a background job
+CASCADE_DELETE_BATCH_SIZE = int(os.getenv('CASCADE_DELETE_BATCH_SIZE', '500'))
+CASCADE_DELETE_BACKGROUND_THRESHOLD = int(os.getenv('CASCADE_DELETE_BACKGROUND_THRESHOLD', '200'))
+# A background job not updated for this long lost its worker and is resumed
+CASCADE_JOB_STALE_SECONDS = int(os.getenv('CASCADE_JOB_STALE_SECONDS', '300'))
+
+# Process-local story template cache (madlibs/cache.py); size 0 disables it.
+# Changes made by other processes are picked up within the poll interval.
+TEMPLATE_CACHE_SIZE = int(os.getenv('TEMPLATE_CACHE_SIZE', '1024'))
+TEMPLATE_CACHE_POLL_INTERVAL = float(os.getenv('TEMPLATE_CACHE_POLL_INTERVAL', '5'))
+# Full rebuild interval of the in-memory title autocomplete index (madlibs/search.py)
+TEMPLATE_SEARCH_REFRESH_INTERVAL = float(os.getenv('TEMPLATE_SEARCH_REFRESH_INTERVAL', '300'))
+
+# Bulk create (madlibs/bulk.py): documents per insert_many, and the most items
+# one HTTP request may carry (the bulk_import command has no limit)
+BULK_CREATE_CHUNK_SIZE = int(os.getenv('BULK_CREATE_CHUNK_SIZE', '500'))
+BULK_CREATE_MAX_ITEMS = int(os.getenv('BULK_CREATE_MAX_ITEMS', '5000'))
+
+# NDJSON exports (core/export.py): documents fetched per cursor batch
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+
+# Engagement rollups (core/rollups.py): events read per query, how long the
+# newest events wait before being counted, how long a run may hold the
+# single-runner lease, and how many days hourly buckets are kept
+ROLLUP_BATCH_SIZE = int(os.getenv('ROLLUP_BATCH_SIZE', '1000'))
+ROLLUP_LAG_SECONDS = int(os.getenv('ROLLUP_LAG_SECONDS', '60'))
+ROLLUP_LEASE_SECONDS = int(os.getenv('ROLLUP_LEASE_SECONDS', '900'))
+ROLLUP_HOURLY_RETENTION_DAYS = int(os.getenv('ROLLUP_HOURLY_RETENTION_DAYS', '90'))
+
+# Request timing (core/middleware.py): whether to measure requests, send the
+# Server-Timing header, measure MongoDB reply sizes (re-encodes each reply),
+# and the latency above which a request is logged as slow
+REQUEST_TIMING_ENABLED = os.getenv('REQUEST_TIMING_ENABLED', 'true').lower() == 'true'
+REQUEST_TIMING_HEADER = os.getenv('REQUEST_TIMING_HEADER', 'true').lower() == 'true'
+REQUEST_TIMING_REPLY_BYTES = os.getenv('REQUEST_TIMING_REPLY_BYTES', 'false').lower() == 'true'
+REQUEST_TIMING_LOG_MS = float(os.getenv('REQUEST_TIMING_LOG_MS', '1000'))
+
+# Prometheus metrics (core/metrics.py): whether requests are counted, and the
+# bearer token GET /metrics requires. Without a token /metrics is served only
+# when DEBUG is on. Set PROMETHEUS_MULTIPROC_DIR when running several gunicorn
+# workers.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Query auditing (core/query_audit.py): with QUERY_AUDIT_FILE set, every new
+# query shape the app sends is appended there (e.g. during the test suite)
+# for `manage.py audit_queries --shapes` to explain. The other settings are
+# that command's default thresholds.
+QUERY_AUDIT_FILE = os.getenv('QUERY_AUDIT_FILE', '')
+QUERY_AUDIT_MAX_EXAMINED_RATIO = float(os.getenv('QUERY_AUDIT_MAX_EXAMINED_RATIO', '10'))
+QUERY_AUDIT_MIN_DOCS_EXAMINED = int(os.getenv('QUERY_AUDIT_MIN_DOCS_EXAMINED', '100'))
+QUERY_AUDIT_IGNORE = [name.strip() for name in os.getenv('QUERY_AUDIT_IGNORE', '').split(',') if name.strip()]
+
+# Slow query sampling (core/slow_queries.py): MongoDB commands slower than
+# SLOW_QUERY_MS are grouped by query shape and calling method over a rolling
+# window for GET /api/slow-queries/; a SLOW_QUERY_LOG_SAMPLE fraction of them
+# is also logged.
+SLOW_QUERY_ENABLED = os.getenv('SLOW_QUERY_ENABLED', 'true').lower() == 'true'
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '100'))
+SLOW_QUERY_LOG_SAMPLE = float(os.getenv('SLOW_QUERY_LOG_SAMPLE', '0.1'))
+SLOW_QUERY_MAX_SHAPES = int(os.getenv('SLOW_QUERY_MAX_SHAPES', '200'))
+SLOW_QUERY_WINDOW_SECONDS = int(os.getenv('SLOW_QUERY_WINDOW_SECONDS', '3600'))
+
+# Read routing (core/read_routing.py): when enabled, reads that tolerate slight
+# staleness (feed, counts, comments, templates, analytics) go to replica set
+# secondaries at most READ_MAX_STALENESS_SECONDS behind (MongoDB's minimum is
+# 90). A session that wrote in the last READ_YOUR_WRITES_SECONDS reads
+# everything from the primary. Standalone servers ignore read preferences.
+READ_ROUTING_ENABLED = os.getenv('READ_ROUTING_ENABLED', 'false').lower() == 'true'
+READ_ROUTING_SECONDARY = {name.strip() for name in
+                          os.getenv('READ_ROUTING_SECONDARY', 'feed,counts,comments,templates,analytics').split(',')
+                          if name.strip()}
+READ_MAX_STALENESS_SECONDS = int(os.getenv('READ_MAX_STALENESS_SECONDS', '90'))
+READ_YOUR_WRITES_SECONDS = int(os.getenv('READ_YOUR_WRITES_SECONDS', '120'))
+
+# Following feed (core/fanout.py): a new post is copied into the feed_inbox of
+# each follower of authors with at most FEED_FANOUT_MAX_FOLLOWERS followers,
+# FEED_FANOUT_BATCH_SIZE entries per insert. Posts of bigger authors are
+# pulled when the feed is read. A new follow copies the author's latest
+# FEED_FOLLOW_BACKFILL posts; inbox entries expire FEED_INBOX_TTL_DAYS after
+# the post was created (0 keeps them).
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv('FEED_FANOUT_MAX_FOLLOWERS', '1000'))
+FEED_FANOUT_BATCH_SIZE = int(os.getenv('FEED_FANOUT_BATCH_SIZE', '1000'))
+FEED_FOLLOW_BACKFILL = int(os.getenv('FEED_FOLLOW_BACKFILL', '20'))
+FEED_INBOX_TTL_DAYS = int(os.getenv('FEED_INBOX_TTL_DAYS', '30'))
 
 #google OAuth2
 AUTHENTICATION_BACKENDS = (
@@ -170,6 +268,15 @@ SOCIAL_AUTH_GOOGLE_OAUTH2_USE_UNIQUE_USER_ID = True  # Use Google ID, not email
 SOCIAL_AUTH_UNIQUE_USER_EMAIL = True  # Don't allow multiple accounts with same email
 SOCIAL_AUTH_PROTECTED_USER_FIELDS = ['email', 'username']
 
+# Logging profile: production raises the app loggers to LOG_LEVEL (default
+# WARNING) and writes through a background queue (core/logging_queue.py) so
+# requests never block on log I/O; development keeps DEBUG on the console.
+LOG_PROFILE = os.getenv('LOG_PROFILE', 'development')
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'WARNING' if LOG_PROFILE == 'production' else 'DEBUG').upper()
+LOG_QUEUE = os.getenv('LOG_QUEUE', str(LOG_PROFILE == 'production')).lower() == 'true'
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+LOG_HANDLER = 'queue' if LOG_QUEUE else 'console'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -189,6 +296,11 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
+        'queue': {
+            'class': 'core.logging_queue.QueuedHandler',
+            'formatter': 'verbose',
+            'maxsize': LOG_QUEUE_SIZE,
+        },
         'file': {
             'class': 'logging.FileHandler',
             'filename': 'debug.log',
@@ -196,51 +308,20 @@ LOGGING = {
         },
     },
     'loggers': {
-        'core': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': False,
+        **{
+            name: {
+                'handlers': [LOG_HANDLER],
+                'level': LOG_LEVEL,
+                'propagate': False,
+            }
+            for name in ('core', 'core.sessions', 'madlibs', 'madlibs.models', 'madlibs.views',
+                         'users', 'users.models', 'users.views', 'feed', 'social', 'image_gen')
         },
         'core.settings': {
-            'handlers': ['console'],
+            'handlers': [LOG_HANDLER],
             'level': 'INFO',
             'propagate': False,
         },
-        'core.sessions': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': False,
-        },
-        'madlibs': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': False,
-        },
-        'madlibs.models': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': False,
-        },
-        'madlibs.views': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': False,
-        },
-        'users': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': False,
-        },
-        'users.models': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': False,
-        },
-        'users.views': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': False,
-        },
     },
 }
 
@@ -251,13 +332,6 @@ AWS_STORAGE_BUCKET_NAME = os.getenv("AWS_STORAGE_BUCKET_NAME")
 AWS_REGION = os.getenv("AWS_REGION")
 AWS_S3_URL = os.getenv("AWS_S3_URL")
 
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION
-)
-
 #Gemini
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 IMAGE_GENERATION_SYS_PROMPT = """
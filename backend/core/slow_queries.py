@@ -0,0 +1,237 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from pymongo import monitoring
+
+from core.query_audit import split_command
+
+logger = logging.getLogger(__name__)
+
+# The first frame in one of these packages is reported as the caller...
+CALLER_PACKAGES = ('feed', 'madlibs', 'social', 'users', 'image_gen', 'core')
+# ...unless it is monitoring or connection plumbing
+PLUMBING_MODULES = ('core.slow_queries', 'core.db_connect', 'core.instrumentation', 'core.metrics',
+                    'core.query_audit')
+# Frames inspected before giving up; pymongo adds a dozen or two below the caller
+MAX_CALLER_DEPTH = 60
+
+ORDERINGS = ('total_ms', 'count', 'max_ms', 'mean_ms')
+
+
+def fingerprint(command_name: str, command: Dict) -> Tuple[str, Dict]:
+    """
+    A short stable ID for the command's query shape (literals stripped, see
+    query_audit.split_command) and the shape itself. Multi-statement updates
+    and deletes are fingerprinted by their first statement.
+    """
+    if command_name == 'getMore':
+        # The cursor ID differs every time; the collection is what matters
+        shape = {'command': 'getMore', 'collection': command.get('collection'), 'shape': {}}
+    else:
+        pairs = split_command(command_name, command)
+        shape = json.loads(pairs[0][0]) if pairs else {'command': command_name, 'collection': None, 'shape': {}}
+    key = json.dumps(shape, sort_keys=True, default=str)
+    return hashlib.sha1(key.encode()).hexdigest()[:12], shape
+
+
+def calling_method() -> str:
+    """
+    Qualified name of the innermost app function on the current stack, e.g.
+    FeedService.get_top_by_likes. pymongo publishes command events on the
+    thread that ran the command before returning to it, so the caller is
+    still on the stack while a listener runs.
+    """
+    frame = sys._getframe(1)
+    depth = 0
+    while frame is not None and depth < MAX_CALLER_DEPTH:
+        module = frame.f_globals.get('__name__', '')
+        if module.split('.')[0] in CALLER_PACKAGES and not module.startswith(PLUMBING_MODULES):
+            return getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)
+        frame = frame.f_back
+        depth += 1
+    return 'unknown'
+
+
+class SlowQueryLog:
+    """
+    Rolling per-shape aggregates of slow MongoDB commands for this process.
+
+    Each shape keeps per-bucket counters covering the last window_seconds,
+    so the table reflects recent load rather than everything since start.
+    At most max_shapes shapes are tracked; when full, shapes with nothing in
+    the window go first, then the one with the least total time.
+    """
+
+    BUCKETS_PER_WINDOW = 60
+
+    def __init__(self, max_shapes: int = 200, window_seconds: int = 3600):
+        self.max_shapes = max_shapes
+        self.window_seconds = window_seconds
+        self.bucket_seconds = max(window_seconds / self.BUCKETS_PER_WINDOW, 1)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.since = datetime.now(timezone.utc)
+            self._shapes: Dict[str, Dict] = {}
+
+    def record(self, command_name: str, command: Dict, database: str, duration_ms: float, caller: str,
+               now: Optional[float] = None) -> str:
+        """Add one slow command; returns its fingerprint"""
+        key, shape = fingerprint(command_name, command)
+        now = time.time() if now is None else now
+        bucket_start = now - now % self.bucket_seconds
+        with self._lock:
+            entry = self._shapes.get(key)
+            if entry is None:
+                if len(self._shapes) >= self.max_shapes:
+                    self._evict(now)
+                entry = self._shapes[key] = {
+                    'command': command_name, 'collection': shape['collection'], 'database': database,
+                    'shape': shape['shape'], 'callers': Counter(), 'buckets': deque(), 'first_seen': now,
+                }
+            buckets = entry['buckets']
+            if buckets and buckets[-1][0] == bucket_start:
+                bucket = buckets[-1]
+                bucket[1] += 1
+                bucket[2] += duration_ms
+                bucket[3] = max(bucket[3], duration_ms)
+            else:
+                buckets.append([bucket_start, 1, duration_ms, duration_ms])
+            entry['callers'][caller] += 1
+            entry['last_seen'] = now
+        return key
+
+    def _prune(self, entry: Dict, cutoff: float):
+        buckets = entry['buckets']
+        while buckets and buckets[0][0] + self.bucket_seconds <= cutoff:
+            buckets.popleft()
+
+    def _evict(self, now: float):
+        cutoff = now - self.window_seconds
+        for key, entry in list(self._shapes.items()):
+            self._prune(entry, cutoff)
+            if not entry['buckets']:
+                del self._shapes[key]
+        if len(self._shapes) >= self.max_shapes:
+            smallest = min(self._shapes, key=lambda k: sum(b[2] for b in self._shapes[k]['buckets']))
+            del self._shapes[smallest]
+
+    def top(self, limit: int = 20, order_by: str = 'total_ms', now: Optional[float] = None) -> List[Dict]:
+        """
+        The slowest shapes over the window, worst first.
+
+        Args:
+            limit: Number of shapes
+            order_by: total_ms, count, max_ms or mean_ms
+
+        Raises:
+            ValueError: On an unknown order_by
+        """
+        if order_by not in ORDERINGS:
+            raise ValueError(f"order_by must be one of: {', '.join(ORDERINGS)}")
+        now = time.time() if now is None else now
+        cutoff = now - self.window_seconds
+        rows = []
+        with self._lock:
+            for key, entry in self._shapes.items():
+                self._prune(entry, cutoff)
+                if not entry['buckets']:
+                    continue
+                count = sum(b[1] for b in entry['buckets'])
+                total = sum(b[2] for b in entry['buckets'])
+                rows.append({
+                    'fingerprint': key,
+                    'command': entry['command'],
+                    'collection': entry['collection'],
+                    'database': entry['database'],
+                    'count': count,
+                    'total_ms': round(total, 2),
+                    'mean_ms': round(total / count, 2),
+                    'max_ms': round(max(b[3] for b in entry['buckets']), 2),
+                    'callers': [{'caller': caller, 'count': n} for caller, n in entry['callers'].most_common(5)],
+                    'shape': entry['shape'],
+                    'first_seen': datetime.fromtimestamp(entry['first_seen'], timezone.utc),
+                    'last_seen': datetime.fromtimestamp(entry['last_seen'], timezone.utc),
+                })
+        rows.sort(key=lambda row: -row[order_by])
+        return rows[:limit]
+
+    def snapshot(self, limit: int = 20, order_by: str = 'total_ms') -> Dict:
+        """
+        Returns:
+            {'pid', 'since', 'threshold_ms', 'window_seconds', 'shapes': top(limit, order_by)}
+        """
+        return {
+            'pid': os.getpid(),
+            'since': self.since,
+            'threshold_ms': settings.SLOW_QUERY_MS,
+            'window_seconds': self.window_seconds,
+            'shapes': self.top(limit, order_by),
+        }
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """
+    Records MongoDB commands slower than SLOW_QUERY_MS in slow_query_log,
+    and logs a SLOW_QUERY_LOG_SAMPLE fraction of them.
+
+    Only the command reference is kept between the started and finished
+    events; fingerprinting and the stack walk happen for slow commands only.
+    """
+
+    def __init__(self, log: Optional[SlowQueryLog] = None):
+        self.log = log or slow_query_log
+        # request_id -> (command, database) per thread; events for one command arrive on one thread
+        self._pending = threading.local()
+
+    def _pending_commands(self) -> Dict:
+        pending = getattr(self._pending, 'commands', None)
+        if pending is None:
+            pending = self._pending.commands = {}
+        return pending
+
+    def started(self, event):
+        pending = self._pending_commands()
+        if len(pending) > 100:
+            # Events whose completion never arrived (e.g. interpreter shutdown)
+            pending.clear()
+        pending[event.request_id] = (event.command, event.database_name)
+
+    def _finish(self, event):
+        started = self._pending_commands().pop(event.request_id, None)
+        if started is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < settings.SLOW_QUERY_MS:
+            return
+        command, database = started
+        caller = calling_method()
+        try:
+            key = self.log.record(event.command_name, command, database, duration_ms, caller)
+        except Exception as e:
+            logger.error("Could not record slow %s: %s", event.command_name, e)
+            return
+        if logger.isEnabledFor(logging.WARNING) and random.random() < settings.SLOW_QUERY_LOG_SAMPLE:
+            logger.warning("Slow MongoDB %s (%.0f ms) from %s [%s]", event.command_name, duration_ms, caller, key)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+
+slow_query_log = SlowQueryLog(max_shapes=settings.SLOW_QUERY_MAX_SHAPES,
+                              window_seconds=settings.SLOW_QUERY_WINDOW_SECONDS)
@@ -0,0 +1,1259 @@
+from unittest import skipUnless
+from django.test import TestCase
+from unittest.mock import patch, Mock, ANY
+from datetime import datetime
+from bson import ObjectId
+from core.projection import parse_fields_param, parse_expand_param, build_projection
+from core.pagination import encode_cursor, decode_cursor, build_cursor_filter, parse_limit_param
+
+try:
+    import mongomock
+except ImportError:  # test-only dependency, see requirements-dev.txt
+    mongomock = None
+
+
+class ProjectionHelpersTest(TestCase):
+    """Unit tests for the sparse fieldset helpers."""
+
+    def test_parse_fields_absent(self):
+        """Test that a missing parameter means 'all fields'."""
+        self.assertIsNone(parse_fields_param(None))
+        self.assertIsNone(parse_fields_param(''))
+        self.assertIsNone(parse_fields_param(' , '))
+
+    def test_parse_fields_strips_and_dedupes(self):
+        """Test whitespace stripping and duplicate removal."""
+        result = parse_fields_param(' title, created_at,title,content.id ')
+        self.assertEqual(result, ['title', 'created_at', 'content.id'])
+
+    def test_parse_fields_rejects_operators(self):
+        """Test that operator-like or malformed names are rejected."""
+        for raw in ['$where', 'title,$ne', 'a..b', 'story templates']:
+            with self.assertRaises(ValueError, msg=raw):
+                parse_fields_param(raw)
+
+    def test_build_projection(self):
+        """Test projection dictionary construction."""
+        self.assertIsNone(build_projection(None))
+        self.assertIsNone(build_projection([]))
+        self.assertEqual(build_projection(['title', 'story']), {'title': 1, 'story': 1})
+
+    def test_parse_expand_param(self):
+        """Test that expand names are validated and deduplicated."""
+        allowed = ('template', 'creator')
+        self.assertEqual(parse_expand_param(None, allowed), [])
+        self.assertEqual(parse_expand_param('creator, template,creator', allowed), ['creator', 'template'])
+        with self.assertRaises(ValueError):
+            parse_expand_param('template,password', allowed)
+
+
+class PaginationHelpersTest(TestCase):
+    """Unit tests for keyset cursor helpers."""
+
+    def test_cursor_round_trip(self):
+        """Test that a cursor decodes back to its sort key."""
+        created_at = datetime(2025, 3, 4, 5, 6, 7, 123000)
+        doc_id = ObjectId()
+        cursor = encode_cursor(created_at, doc_id)
+        self.assertEqual(decode_cursor(cursor), (created_at, doc_id))
+
+    def test_decode_invalid_cursor(self):
+        """Test that tampered cursors raise ValueError."""
+        for cursor in ['not-a-cursor', encode_cursor(datetime(2025, 1, 1), 'bad-id')]:
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+    def test_build_cursor_filter(self):
+        """Test the filter for the first and subsequent pages."""
+        self.assertEqual(build_cursor_filter(None), {})
+
+        created_at, doc_id = datetime(2025, 1, 1), ObjectId()
+        query = build_cursor_filter(encode_cursor(created_at, doc_id))
+        self.assertEqual(query, {'$or': [
+            {'created_at': {'$lt': created_at}},
+            {'created_at': created_at, '_id': {'$lt': doc_id}},
+        ]})
+
+    def test_parse_limit_param(self):
+        """Test page size parsing and clamping."""
+        self.assertEqual(parse_limit_param(None), 20)
+        self.assertEqual(parse_limit_param('abc'), 20)
+        self.assertEqual(parse_limit_param('-1'), 20)
+        self.assertEqual(parse_limit_param('7'), 7)
+        self.assertEqual(parse_limit_param('500', maximum=100), 100)
+
+
+class CascadeDeleteServiceTest(TestCase):
+    """Unit tests for cascade deletes with mocked collections."""
+
+    def setUp(self):
+        from core.cascade import CascadeDeleteService
+        with patch('core.cascade.get_collection', side_effect=lambda name: Mock(name=name)):
+            self.service = CascadeDeleteService()
+        s3_patcher = patch('core.cascade.delete_s3_prefixes', return_value=2)
+        self.mock_s3 = s3_patcher.start()
+        self.addCleanup(s3_patcher.stop)
+
+    def test_delete_madlib_removes_dependents(self):
+        """Test that likes, comments, comment likes and images go with the madlib."""
+        madlib_id = ObjectId()
+        comment_id = ObjectId()
+        creator_id = ObjectId()
+        self.service.madlibs.find_one.return_value = {'_id': madlib_id}
+        self.service.madlibs.find.return_value = [{'_id': madlib_id, 'creator_id': creator_id, 'likes_count': 5}]
+        self.service.comments.find.return_value = [{'_id': comment_id}]
+        self.service.likes.delete_many.return_value = Mock(deleted_count=3)
+        self.service.comments.delete_many.return_value = Mock(deleted_count=1)
+        self.service.madlibs.delete_many.return_value = Mock(deleted_count=1)
+
+        stats = self.service.delete_madlib(str(madlib_id))
+
+        self.assertEqual(stats, {'madlibs': 1, 'comments': 1, 'likes': 6, 's3_objects': 2})
+        self.service.likes.delete_many.assert_any_call({'post_id': {'$in': [madlib_id]}})
+        self.service.likes.delete_many.assert_any_call({'comment_id': {'$in': [comment_id]}})
+        self.service.comments.delete_many.assert_called_once_with({'post_id': {'$in': [madlib_id]}})
+        self.mock_s3.assert_called_once_with([f"madlibs/{madlib_id}/"])
+        self.service.image_events.delete_many.assert_called_once_with({'madlib_id': {'$in': [madlib_id]}})
+        creator_op = self.service.users.bulk_write.call_args[0][0][0]
+        self.assertEqual(creator_op._filter, {'_id': creator_id})
+        self.assertEqual(creator_op._doc, {'$inc': {'madlibs_count': -1, 'likes_received': -5}})
+
+    def test_delete_madlib_not_found(self):
+        """Test that a missing madlib deletes nothing."""
+        self.service.madlibs.find_one.return_value = None
+
+        self.assertIsNone(self.service.delete_madlib(str(ObjectId())))
+        self.service.likes.delete_many.assert_not_called()
+        self.mock_s3.assert_not_called()
+
+    def test_delete_comment_removes_likes(self):
+        """Test that likes on a comment are removed with it."""
+        comment_id = ObjectId()
+        self.service.likes.delete_many.return_value = Mock(deleted_count=4)
+        self.service.comments.delete_one.return_value = Mock(deleted_count=1)
+
+        stats = self.service.delete_comment(str(comment_id))
+
+        self.assertEqual(stats['likes'], 4)
+        self.service.likes.delete_many.assert_called_once_with({'comment_id': comment_id})
+
+    def test_delete_user_batches_and_decrements_counters(self):
+        """Test that a user's madlibs, comments and likes are removed in batches."""
+        user_id = ObjectId()
+        madlib_ids = [ObjectId(), ObjectId()]
+        liked_post, liked_comment = ObjectId(), ObjectId()
+        self.service.users.find_one.return_value = {'_id': user_id}
+
+        def finder(results):
+            cursor = Mock()
+            cursor.limit.side_effect = [results, []]
+            return cursor
+        liked_post_creator = ObjectId()
+        own_madlibs = finder([{'_id': i} for i in madlib_ids])
+
+        def find_madlibs(query, projection):
+            if 'creator_id' in query:
+                return own_madlibs
+            if query['_id']['$in'] == [liked_post]:
+                return [{'_id': liked_post, 'creator_id': liked_post_creator}]
+            return [{'_id': i, 'creator_id': user_id} for i in madlib_ids]
+        self.service.madlibs.find.side_effect = find_madlibs
+        own_comments = finder([{'_id': ObjectId()}])
+        self.service.comments.find.side_effect = lambda query, projection: (
+            own_comments if 'user_id' in query else [])
+        self.service.likes.find.return_value = finder([
+            {'_id': ObjectId(), 'post_id': liked_post, 'comment_id': None},
+            {'_id': ObjectId(), 'post_id': None, 'comment_id': liked_comment},
+        ])
+        self.service.follows.find.return_value = finder([])
+        for coll in (self.service.likes, self.service.comments, self.service.madlibs):
+            coll.delete_many.return_value = Mock(deleted_count=1)
+        progress = Mock()
+
+        self.service.delete_user(str(user_id), progress=progress)
+
+        self.service.madlibs.delete_many.assert_called_once_with({'_id': {'$in': madlib_ids}})
+        post_ops = self.service.madlibs.bulk_write.call_args[0][0]
+        self.assertEqual(post_ops[0]._filter, {'_id': liked_post, 'likes_count': {'$gt': 0}})
+        self.assertEqual(post_ops[0]._doc, {'$inc': {'likes_count': -1}})
+        self.service.comments.bulk_write.assert_called_once()
+        liker_op = self.service.users.bulk_write.call_args[0][0][0]
+        self.assertEqual(liker_op._filter, {'_id': liked_post_creator})
+        self.assertEqual(liker_op._doc, {'$inc': {'likes_received': -1}})
+        self.service.users.delete_one.assert_called_once_with({'_id': user_id})
+        self.assertEqual(progress.call_count, 3)
+
+    def test_delete_user_removes_follows_both_ways(self):
+        """Test that a deleted user's follows go, with the other side's counters decremented."""
+        user_id, followee, follower = ObjectId(), ObjectId(), ObjectId()
+        self.service.users.find_one.return_value = {'_id': user_id}
+        empty = Mock()
+        empty.limit.return_value = []
+        self.service.madlibs.find.return_value = empty
+        self.service.comments.find.return_value = empty
+        self.service.likes.find.return_value = empty
+        following, followed_by = Mock(), Mock()
+        following.limit.side_effect = [[{'_id': 'f1', 'followee_id': followee}], []]
+        followed_by.limit.side_effect = [[{'_id': 'f2', 'follower_id': follower}], []]
+        self.service.follows.find.side_effect = lambda query, projection: (
+            following if 'follower_id' in query else followed_by)
+
+        self.service.delete_user(str(user_id))
+
+        ops = [call[0][0][0] for call in self.service.users.bulk_write.call_args_list]
+        self.assertEqual([(op._filter, op._doc) for op in ops], [
+            ({'_id': followee, 'followers_count': {'$gt': 0}}, {'$inc': {'followers_count': -1}}),
+            ({'_id': follower, 'following_count': {'$gt': 0}}, {'$inc': {'following_count': -1}}),
+        ])
+        self.service.follows.delete_many.assert_any_call({'_id': {'$in': ['f1']}})
+        self.service.follows.delete_many.assert_any_call({'_id': {'$in': ['f2']}})
+        self.service.inbox.delete_many.assert_called_once_with({'owner_id': user_id})
+
+    @patch('core.cascade.threading.Thread')
+    def test_start_user_deletion_records_job(self, MockThread):
+        """Test that a background deletion creates a job and starts a thread."""
+        self.service.madlibs.count_documents.return_value = 1000
+        self.service.jobs.find_one_and_update.return_value = None
+
+        job_id = self.service.start_user_deletion(str(ObjectId()), 'owner@example.com')
+
+        job = self.service.jobs.insert_one.call_args[0][0]
+        self.assertEqual(job['_id'], job_id)
+        self.assertEqual(job['status'], 'pending')
+        self.assertTrue(job['active'])
+        self.assertEqual(job['total_madlibs'], 1000)
+        MockThread.return_value.start.assert_called_once()
+
+    @patch('core.cascade.threading.Thread')
+    def test_start_user_deletion_rejects_second_job(self, MockThread):
+        """Test that a live job for the same user blocks a new one."""
+        from pymongo.errors import DuplicateKeyError
+        self.service.jobs.find_one_and_update.return_value = None
+        self.service.jobs.insert_one.side_effect = DuplicateKeyError('uniq_active_target')
+
+        self.assertIsNone(self.service.start_user_deletion(str(ObjectId()), 'owner@example.com'))
+        MockThread.assert_not_called()
+
+    @patch('core.cascade.threading.Thread')
+    def test_start_user_deletion_resumes_stale_job(self, MockThread):
+        """Test that a job whose worker died is taken over instead of duplicated."""
+        user_id = str(ObjectId())
+        self.service.jobs.find_one_and_update.return_value = {'_id': 'old-job', 'target_id': user_id}
+
+        self.assertEqual(self.service.start_user_deletion(user_id, 'owner@example.com'), 'old-job')
+
+        query, change = self.service.jobs.find_one_and_update.call_args[0]
+        self.assertEqual(query['target_id'], user_id)
+        self.assertTrue(query['active'])
+        self.assertIn('$lt', query['updated_at'])
+        self.assertEqual(change['$set']['status'], 'running')
+        self.service.jobs.insert_one.assert_not_called()
+        self.assertEqual(MockThread.call_args.kwargs['args'], ('old-job', user_id))
+
+    def test_resume_stale_jobs_runs_each_and_clears_active(self):
+        """Test that resumed jobs run to completion and drop their active flag."""
+        self.service.jobs.find_one_and_update.side_effect = [
+            {'_id': 'j1', 'target_id': str(ObjectId())}, None]
+        self.service.users.find_one.return_value = None
+
+        self.assertEqual(self.service.resume_stale_jobs(), 1)
+
+        final = self.service.jobs.update_one.call_args[0][1]
+        self.assertEqual(final['$set']['status'], 'done')
+        self.assertEqual(final['$unset'], {'active': ''})
+
+
+class ExportTest(TestCase):
+    """Unit tests for the NDJSON export stream and command."""
+
+    def _collection(self, docs):
+        collection = Mock()
+
+        def find(query, sort=None):
+            after = query.get('_id', {}).get('$gt')
+            cursor = Mock()
+            cursor.batch_size.return_value = cursor
+            cursor.__iter__ = lambda _: iter([d for d in docs if after is None or d['_id'] > after])
+            return cursor
+        collection.find.side_effect = find
+        return collection
+
+    def _docs(self, count):
+        return [{'_id': ObjectId(), 'content': [{'id': '1', 'input': f"word {i}"}],
+                 'created_at': datetime(2024, 1, 1)} for i in range(count)]
+
+    def test_export_stream_ndjson(self):
+        """Test one compact JSON line per document with ObjectIds and dates as strings."""
+        import json
+        from core.export import export_stream
+        docs = self._docs(3)
+
+        body = b''.join(export_stream(self._collection(docs)))
+
+        lines = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([line['_id'] for line in lines], [str(d['_id']) for d in docs])
+        self.assertEqual(lines[0]['created_at'], '2024-01-01T00:00:00')
+
+    def test_export_stream_gzip_and_after(self):
+        """Test that gzipped output round trips and after skips earlier documents."""
+        import gzip
+        from core.export import export_stream
+        docs = self._docs(5)
+
+        body = gzip.decompress(b''.join(export_stream(self._collection(docs), after=docs[1]['_id'], gzip=True)))
+
+        self.assertEqual(len(body.splitlines()), 3)
+        self.assertIn(str(docs[2]['_id']).encode(), body.splitlines()[0])
+
+    def test_export_command_resumes_from_checkpoint(self):
+        """Test that a rerun drops output past the checkpoint and continues after it."""
+        import gzip
+        import json
+        import os
+        import tempfile
+        from django.core.management import call_command
+        from core.management.commands.export_ndjson import read_checkpoint
+        docs = self._docs(5)
+        tmp = tempfile.mkdtemp()
+        out, checkpoint = os.path.join(tmp, 'madlibs.ndjson.gz'), os.path.join(tmp, 'madlibs.ckpt')
+
+        with patch('core.management.commands.export_ndjson.get_collection', return_value=self._collection(docs[:3])):
+            call_command('export_ndjson', 'madlibs', out=out, gzip=True, checkpoint=checkpoint,
+                         batch_size=2, stderr=Mock())
+        self.assertEqual(read_checkpoint(checkpoint)[0], docs[2]['_id'])
+        with open(out, 'ab') as f:
+            f.write(b'torn write after the checkpoint')
+        with patch('core.management.commands.export_ndjson.get_collection', return_value=self._collection(docs)):
+            call_command('export_ndjson', 'madlibs', out=out, gzip=True, checkpoint=checkpoint,
+                         batch_size=2, stderr=Mock())
+
+        with gzip.open(out) as f:
+            lines = f.read().splitlines()
+        self.assertEqual([json.loads(line)['_id'] for line in lines], [str(d['_id']) for d in docs])
+        self.assertEqual(read_checkpoint(checkpoint)[0], docs[4]['_id'])
+
+
+class RollupServiceTest(TestCase):
+    """Unit tests for the engagement rollup job."""
+
+    def setUp(self):
+        from collections import defaultdict
+        self.collections = defaultdict(Mock)
+        patcher = patch('core.rollups.get_collection', side_effect=lambda name: self.collections[name])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        from core.rollups import RollupService
+        self.service = RollupService()
+        self.service.state.find_one.return_value = None
+        for name in ('filled_madlibs', 'likes', 'comments', 'image_events'):
+            self.collections[name].find.return_value = []
+
+    def test_bucket_start(self):
+        """Test hour and day truncation, with aware times converted to naive UTC."""
+        from datetime import timezone, timedelta
+        from core.rollups import bucket_start
+        moment = datetime(2024, 3, 5, 14, 37, 12, tzinfo=timezone(timedelta(hours=2)))
+        self.assertEqual(bucket_start(moment, 'hour'), datetime(2024, 3, 5, 12))
+        self.assertEqual(bucket_start(moment, 'day'), datetime(2024, 3, 5))
+
+    def test_run_counts_new_fills(self):
+        """Test that new madlibs increment hourly and daily buckets and advance the watermark."""
+        template_id, creator_id = ObjectId(), ObjectId()
+        fill_ids = [ObjectId.from_datetime(datetime(2024, 3, 5, 14, minute)) for minute in (1, 2)]
+        self.collections['filled_madlibs'].find.return_value = [
+            {'_id': fill_id, 'template_id': template_id, 'creator_id': creator_id} for fill_id in fill_ids
+        ]
+
+        processed = self.service.run(batch_size=10)
+
+        self.assertEqual(processed['filled_madlibs'], 2)
+        ops = self.service.collection.bulk_write.call_args[0][0]
+        self.assertEqual(len(ops), 4)
+        hourly = next(op for op in ops if op._filter == {
+            'dimension': 'template', 'key': template_id, 'granularity': 'hour', 'bucket': datetime(2024, 3, 5, 14)
+        })
+        self.assertEqual(hourly._doc['$inc'], {'fills': 2})
+        self.assertIn('expires_at', hourly._doc['$setOnInsert'])
+        self.service.state.update_one.assert_any_call(
+            {'_id': 'watermark:filled_madlibs'}, {'$set': {'last_id': fill_ids[1], 'updated_at': ANY}}, upsert=True
+        )
+        self.service.state.delete_one.assert_called_once()
+
+    def test_run_stops_when_lease_taken_over(self):
+        """Test that a run whose lease was taken over applies nothing more."""
+        self.collections['filled_madlibs'].find.return_value = [
+            {'_id': ObjectId(), 'template_id': ObjectId(), 'creator_id': ObjectId()}
+        ]
+        self.service.state.update_one.side_effect = lambda query, update, **kw: Mock(
+            matched_count=0 if query.get('owner') else 1)
+
+        processed = self.service.run(batch_size=10)
+
+        self.assertEqual(processed, {'filled_madlibs': 0})
+        self.service.collection.bulk_write.assert_not_called()
+        renew_query = self.service.state.update_one.call_args_list[1][0][0]
+        self.assertEqual(renew_query, {'_id': 'lease', 'owner': ANY})
+
+    def test_run_resumes_from_watermark(self):
+        """Test that only events after the stored watermark are read."""
+        last_id = ObjectId()
+        self.service.state.find_one.side_effect = lambda q: {'last_id': last_id} if q['_id'] == 'watermark:likes' else None
+
+        self.service.run()
+
+        query = self.collections['likes'].find.call_args[0][0]
+        self.assertEqual(query['_id']['$gt'], last_id)
+        self.assertNotIn('$gt', self.collections['comments'].find.call_args[0][0]['_id'])
+
+    def test_run_attributes_likes_to_post(self):
+        """Test that likes count for the liked madlib's template and creator; others are dropped."""
+        post = {'_id': ObjectId(), 'template_id': ObjectId(), 'creator_id': ObjectId()}
+        self.collections['likes'].find.return_value = [
+            {'_id': ObjectId(), 'post_id': post['_id']},
+            {'_id': ObjectId(), 'post_id': ObjectId()},  # madlib since deleted
+            {'_id': ObjectId()},  # a comment like
+        ]
+        self.service.madlibs.find.return_value = [post]
+
+        processed = self.service.run()
+
+        self.assertEqual(processed['likes'], 3)
+        ops = self.service.collection.bulk_write.call_args[0][0]
+        self.assertEqual({op._filter['key'] for op in ops}, {post['template_id'], post['creator_id']})
+        self.assertTrue(all(op._doc['$inc'] == {'likes': 1} for op in ops))
+
+    def test_run_skips_when_lease_held(self):
+        """Test that a concurrent run does nothing."""
+        from pymongo.errors import DuplicateKeyError
+        self.service.state.update_one.side_effect = DuplicateKeyError('lease')
+
+        self.assertIsNone(self.service.run())
+        self.collections['filled_madlibs'].find.assert_not_called()
+
+    def test_reset_waits_for_the_lease(self):
+        """Test that reset drops nothing while a run holds the lease, and releases it after."""
+        from pymongo.errors import DuplicateKeyError
+        self.service.state.update_one.side_effect = DuplicateKeyError('lease')
+        self.assertFalse(self.service.reset())
+        self.service.collection.delete_many.assert_not_called()
+
+        self.service.state.update_one.side_effect = None
+        self.assertTrue(self.service.reset())
+        self.service.collection.delete_many.assert_called_once_with({})
+        self.assertEqual(self.service.state.delete_one.call_args[0][0]['_id'], 'lease')
+
+
+class InstrumentationTest(TestCase):
+    """Unit tests for per-request timing and the MongoDB command listener."""
+
+    def _event(self, name, micros, reply=None):
+        return Mock(command_name=name, duration_micros=micros, reply=reply or {'ok': 1})
+
+    def test_listener_records_commands_in_request(self):
+        """Test that commands are attributed to the current request and ignored outside one."""
+        from core.instrumentation import MongoTimingListener, start_request, end_request
+        listener = MongoTimingListener()
+        listener.succeeded(self._event('find', 1000))
+
+        token = start_request()
+        listener.succeeded(self._event('find', 2000))
+        listener.succeeded(self._event('find', 4000))
+        listener.failed(self._event('update', 500))
+        timings = end_request(token)
+
+        self.assertEqual(timings.db_commands, 3)
+        self.assertAlmostEqual(timings.db_ms, 6.5)
+        self.assertEqual(timings.commands['find'], [2, 6.0, 4.0])
+
+    def test_timed_and_server_timing(self):
+        """Test external service time and the Server-Timing header value."""
+        from core.instrumentation import RequestTimings, timed, start_request, end_request
+        token = start_request()
+        with timed('s3'):
+            pass
+        timings = end_request(token)
+        timings.add_command('aggregate', 3.0)
+        timings.finish()
+
+        header = timings.server_timing()
+        self.assertTrue(header.startswith('total;dur='))
+        self.assertIn('db;dur=3.0;desc="1 commands"', header)
+        self.assertIn('db-aggregate;dur=3.0;desc="1x"', header)
+        self.assertIn('s3;dur=', header)
+        self.assertEqual(RequestTimings().external, {})
+
+    def test_middleware_sets_header_and_records_route(self):
+        """Test that responses carry Server-Timing and the route shows up in the stats."""
+        from core.instrumentation import timing_stats
+        timing_stats.reset()
+
+        response = self.client.get('/')
+
+        self.assertIn('total;dur=', response['Server-Timing'])
+        route = timing_stats.snapshot()['routes']['GET /']
+        self.assertEqual(route['count'], 1)
+        self.assertEqual(route['avg_response_bytes'], len(response.content))
+
+    def test_stats_percentiles(self):
+        """Test the per-route summary arithmetic."""
+        from core.instrumentation import TimingStats, RequestTimings
+        stats = TimingStats(sample_size=10)
+        for ms in range(1, 21):
+            timings = RequestTimings()
+            timings.total_ms = float(ms)
+            timings.add_command('find', 1.0)
+            stats.record('GET /api/feed/recent/', 500 if ms == 20 else 200, timings)
+
+        route = stats.snapshot()['routes']['GET /api/feed/recent/']
+        self.assertEqual(route['count'], 20)
+        self.assertEqual(route['errors'], 1)
+        self.assertEqual(route['avg_ms'], 10.5)
+        self.assertEqual(route['p50_ms'], 16.0)  # samples hold the last 10 requests
+        self.assertEqual(route['max_ms'], 20.0)
+        self.assertEqual(route['commands']['find'], {'count': 20, 'total_ms': 20.0, 'max_ms': 1.0})
+
+
+class MetricsTest(TestCase):
+    """Tests for the Prometheus metrics endpoint and collectors."""
+
+    def _sample(self, name, labels=None):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+    def test_requests_labelled_by_viewset_action(self):
+        """Test that requests are counted per ViewSet class and DRF action."""
+        labels = {'view': 'TimingStatsViewSet', 'action': 'list', 'method': 'GET', 'status': '403'}
+        before = self._sample('crowdlib_http_requests_total', labels)
+
+        from django.test import override_settings
+        self.client.get('/api/timings/')
+        with override_settings(METRICS_TOKEN='s3cret'):
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'crowdlib_http_request_duration_seconds_bucket', response.content)
+        self.assertEqual(self._sample('crowdlib_http_requests_total', labels), before + 1)
+
+    def test_metrics_token(self):
+        """Test that a configured token is required, and that no token means closed unless DEBUG."""
+        from django.test import override_settings
+        with override_settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+            self.assertEqual(response.status_code, 200)
+        with override_settings(METRICS_TOKEN='', DEBUG=False):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with override_settings(METRICS_TOKEN='', DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_pool_listener(self):
+        """Test pool capacity and utilisation gauges from pool events."""
+        from core.metrics import MongoPoolMetricsListener
+        listener = MongoPoolMetricsListener()
+        capacity = self._sample('crowdlib_mongo_pool_max_size')
+        in_use = self._sample('crowdlib_mongo_pool_connections_in_use')
+
+        listener.pool_created(Mock(address=('db', 27017), options={'maxPoolSize': 50}))
+        listener.connection_checked_out(Mock(duration=0.002))
+        self.assertEqual(self._sample('crowdlib_mongo_pool_max_size'), capacity + 50)
+        self.assertEqual(self._sample('crowdlib_mongo_pool_connections_in_use'), in_use + 1)
+
+        listener.connection_checked_in(Mock())
+        listener.pool_closed(Mock(address=('db', 27017)))
+        self.assertEqual(self._sample('crowdlib_mongo_pool_max_size'), capacity)
+        self.assertEqual(self._sample('crowdlib_mongo_pool_connections_in_use'), in_use)
+
+    def test_template_cache_counters(self):
+        """Test that template cache lookups count as hits and misses."""
+        from madlibs.cache import TemplateCache
+        cache = TemplateCache(max_size=4)
+        hit = {'cache': 'template', 'result': 'hit'}
+        miss = {'cache': 'template', 'result': 'miss'}
+        hits, misses = self._sample('crowdlib_cache_requests_total', hit), self._sample('crowdlib_cache_requests_total', miss)
+
+        cache.get('a')
+        cache.put('a', {'title': 'A'})
+        cache.get('a')
+
+        self.assertEqual(self._sample('crowdlib_cache_requests_total', hit), hits + 1)
+        self.assertEqual(self._sample('crowdlib_cache_requests_total', miss), misses + 1)
+
+
+class LoadTestHarnessTest(TestCase):
+    """Unit tests for the load test seeding, traffic and reporting helpers."""
+
+    def _seed(self, **sizes):
+        from collections import defaultdict
+        from core.loadtest.seed import DatasetSpec, seed_dataset
+        inserted = defaultdict(list)
+        db = Mock()
+        db.__getitem__ = lambda _, name: Mock(insert_many=lambda docs, ordered: inserted[name].extend(docs))
+        data = seed_dataset(db, DatasetSpec(**sizes), batch_size=7)
+        return data, inserted
+
+    def test_seed_dataset_is_consistent_and_deterministic(self):
+        """Test sizes, unique likes, denormalized counters and repeatable ids."""
+        data, inserted = self._seed(users=10, templates=3, madlibs=30, likes=100, comments=20, seed=7)
+        again, _ = self._seed(users=10, templates=3, madlibs=30, likes=100, comments=20, seed=7)
+
+        self.assertEqual(len(inserted['filled_madlibs']), 30)
+        likes = inserted['likes']
+        self.assertEqual(len({(like['user_id'], like['post_id']) for like in likes}), 100)
+        self.assertEqual(sum(m['likes_count'] for m in inserted['filled_madlibs']), 100)
+        self.assertEqual(sum(u['likes_received'] for u in inserted['users']), 100)
+        self.assertEqual(sum(u['madlibs_count'] for u in inserted['users']), 30)
+        template_blanks = {t['_id']: {b['id'] for b in t['blanks']} for t in inserted['story_templates']}
+        for madlib in inserted['filled_madlibs']:
+            self.assertEqual({b['id'] for b in madlib['content']}, template_blanks[madlib['template_id']])
+        self.assertEqual(len(data['madlibs']), len(set(data['madlibs'])))
+        self.assertEqual([u['email'] for u in data['users']], [u['email'] for u in again['users']])
+
+    def test_parse_mix(self):
+        """Test weights, defaults and validation of the traffic mix."""
+        from core.loadtest.runner import parse_mix, DEFAULT_MIX
+        self.assertEqual(parse_mix('feed_recent=3, like'), {'feed_recent': 3.0, 'like': 1.0})
+        self.assertGreater(len(parse_mix(DEFAULT_MIX)), 5)
+        for raw in ('nope=1', 'like=0', ' , '):
+            with self.assertRaises(ValueError, msg=raw):
+                parse_mix(raw)
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        from core.loadtest.runner import percentile
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(percentile(values, 0.5), 50.0)
+        self.assertEqual(percentile(values, 0.95), 95.0)
+        self.assertEqual(percentile(values, 0.99), 99.0)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_run_load_counts_requests_per_scenario(self):
+        """Test that a request budget is honoured and outcomes are classified."""
+        from core.loadtest.runner import run_load
+        data, _ = self._seed(users=4, templates=2, madlibs=10, likes=5, comments=3)
+        sent = []
+
+        class FakeTransport:
+            def request(self, method, path, body):
+                sent.append((method, path))
+                if 'like' in path:
+                    return 409
+                if 'comment/' in path:
+                    raise ConnectionError()
+                return 200
+
+        report = run_load([FakeTransport(), FakeTransport()], data,
+                          {'feed_recent': 2, 'like': 1, 'comment': 1}, total_requests=60, seed=3)
+
+        self.assertEqual(len(sent), 60)
+        self.assertEqual(report['total']['requests'], 60)
+        self.assertEqual(report['scenarios']['like']['rejected'], report['scenarios']['like']['requests'])
+        self.assertEqual(report['scenarios']['comment']['errors'], report['scenarios']['comment']['requests'])
+        self.assertEqual(report['scenarios']['feed_recent']['statuses'], {'200': report['scenarios']['feed_recent']['requests']})
+
+
+class ScaleSeedTest(TestCase):
+    """Unit tests for the skewed scale dataset generator."""
+
+    class RecordingInserter:
+        def __init__(self):
+            self.docs = {}
+
+        def insert(self, name, docs):
+            self.docs[name] = list(docs)
+            return len(self.docs[name])
+
+    def _seed(self, seed=5):
+        from datetime import datetime, timezone
+        from core.loadtest.scale import ScaleSpec, seed_scale
+        inserter = self.RecordingInserter()
+        spec = ScaleSpec(users=100, templates=30, madlibs=1000, likes=8000, comments=1500, seed=seed)
+        summary = seed_scale(None, spec, inserter=inserter, as_of=datetime(2026, 1, 1, tzinfo=timezone.utc))
+        return summary, inserter.docs
+
+    def test_counters_match_inserted_documents(self):
+        """Test sizes, unique likes and the denormalized counters."""
+        from collections import Counter
+        from datetime import timezone
+        summary, docs = self._seed()
+
+        self.assertEqual(summary['counts'], {'users': 100, 'story_templates': 30, 'filled_madlibs': 1000,
+                                             'likes': 8000, 'comments': 1500})
+        self.assertEqual(len({(like['user_id'], like['post_id']) for like in docs['likes']}), 8000)
+        likes_per_post = Counter(like['post_id'] for like in docs['likes'])
+        for madlib in docs['filled_madlibs']:
+            self.assertEqual(madlib['likes_count'], likes_per_post[madlib['_id']])
+            self.assertGreaterEqual(madlib['created_at'], datetime(2025, 11, 1, tzinfo=timezone.utc))
+        self.assertEqual(sum(u['likes_received'] for u in docs['users']), 8000)
+        self.assertEqual(sum(u['madlibs_count'] for u in docs['users']), 1000)
+
+    def test_distributions_are_skewed(self):
+        """Test that a few posts and creators dominate and some templates are long."""
+        summary, docs = self._seed()
+        stats = summary['stats']
+
+        self.assertGreater(stats['top_post_likes'], 10 * 8000 / 1000)
+        self.assertGreater(stats['top_creator_madlibs'], 10 * 1000 / 100)
+        self.assertGreater(stats['largest_thread'], 5)
+        self.assertGreater(stats['max_template_blanks'], 12)
+
+    def test_same_seed_same_documents(self):
+        """Test deterministic generation for a fixed seed and as_of."""
+        _, first = self._seed()
+        _, again = self._seed()
+        _, other = self._seed(seed=6)
+
+        self.assertEqual(first['comments'], again['comments'])
+        self.assertEqual(first['filled_madlibs'], again['filled_madlibs'])
+        self.assertNotEqual([m['_id'] for m in first['filled_madlibs']],
+                            [m['_id'] for m in other['filled_madlibs']])
+
+
+class ModelBenchmarkTest(TestCase):
+    """Unit tests for the model-layer micro-benchmark helpers."""
+
+    def test_select_by_prefix(self):
+        """Test benchmark selection and unknown names."""
+        from core.loadtest.bench import select, BENCHMARKS
+        self.assertEqual(select(None), list(BENCHMARKS))
+        self.assertEqual(select(['feed.']), ['feed.get_most_recent', 'feed.get_top_by_likes',
+                                             'feed.get_most_discussed'])
+        self.assertEqual(select(['likes.', 'likes.user_liked_post']),
+                         ['likes.get_post_likes_count', 'likes.user_liked_post'])
+        with self.assertRaises(ValueError):
+            select(['nope'])
+
+    def test_measure_calibrates_calls_per_sample(self):
+        """Test that fast calls are batched and stats are per call."""
+        from core.loadtest.bench import measure
+        calls = []
+        stats = measure(lambda: calls.append(1), repeat=3, min_sample_time=0.001, warmup=2)
+
+        self.assertGreater(stats['number'], 1)
+        self.assertEqual(stats['repeat'], 3)
+        self.assertLessEqual(stats['min_ms'], stats['median_ms'])
+        self.assertGreaterEqual(len(calls), 2 + 3 * stats['number'])
+
+    def test_compare_flags_regressions(self):
+        """Test regression, improvement, noise, new and missing rows."""
+        from core.loadtest.bench import compare
+
+        def row(median, minimum):
+            return {'median_ms': median, 'min_ms': minimum}
+
+        baseline = {'slower': row(1.0, 0.9), 'faster': row(2.0, 1.9), 'noisy': row(1.0, 0.9), 'gone': row(1.0, 1.0)}
+        current = {'slower': row(1.5, 1.3), 'faster': row(1.0, 0.9), 'noisy': row(1.3, 0.92), 'added': row(1.0, 1.0)}
+        statuses = {r['name']: r['status'] for r in compare(baseline, current, threshold=0.10)}
+
+        self.assertEqual(statuses, {'slower': 'regression', 'faster': 'improvement', 'noisy': 'unchanged',
+                                    'gone': 'missing', 'added': 'new'})
+
+    def test_run_benchmarks_tears_down(self):
+        """Test that setups run once and cleanups run even when one fails."""
+        from core.loadtest import bench
+        cleaned = []
+
+        def ok(ctx):
+            ctx.on_teardown(lambda: cleaned.append('ok'))
+            return lambda: None
+
+        def broken(ctx):
+            raise RuntimeError('boom')
+
+        with patch.dict(bench.BENCHMARKS, {'ok': ok, 'broken': broken}, clear=True):
+            ctx = bench.BenchContext({'users': [], 'madlibs': []})
+            results = bench.run_benchmarks(ctx, ['ok'], repeat=2, min_sample_time=0.0001, warmup=0)
+            with self.assertRaises(RuntimeError):
+                bench.run_benchmarks(ctx, ['ok', 'broken'], repeat=2, min_sample_time=0.0001, warmup=0)
+
+        self.assertEqual(list(results), ['ok'])
+        self.assertEqual(cleaned, ['ok', 'ok'])
+
+
+class QueryAuditTest(TestCase):
+    """Unit tests for query shape capture and explain auditing."""
+
+    def _event(self, command_name, command, database='crowdlib'):
+        return Mock(command_name=command_name, command=command, database_name=database)
+
+    def test_shapes_ignore_constants_but_not_structure(self):
+        """Test that values are abstracted while fields, operators and sorts are kept."""
+        from core.query_audit import split_command
+        first = split_command('find', {'find': 'likes', 'filter': {'post_id': ObjectId(), 'comment_id': None},
+                                       'lsid': {'id': 'x'}, '$db': 'crowdlib'})
+        second = split_command('find', {'find': 'likes', 'filter': {'post_id': ObjectId(), 'comment_id': None}})
+        sorted_ = split_command('find', {'find': 'likes', 'filter': {'post_id': ObjectId(), 'comment_id': None},
+                                         'sort': {'created_at': -1}})
+        in_query = split_command('find', {'find': 'likes', 'filter': {'post_id': {'$in': [ObjectId(), ObjectId()]}}})
+
+        self.assertEqual(first[0][0], second[0][0])
+        self.assertNotEqual(first[0][0], sorted_[0][0])
+        self.assertNotIn('lsid', first[0][1])
+        self.assertNotIn('$db', first[0][1])
+        self.assertIn('"$in": ["?"]', in_query[0][0])
+        self.assertIn('"created_at": -1', sorted_[0][0])
+
+    def test_updates_split_per_statement(self):
+        """Test that each update statement becomes its own explainable command."""
+        from core.query_audit import split_command
+        pairs = split_command('update', {'update': 'users', 'ordered': True, 'updates': [
+            {'q': {'_id': ObjectId()}, 'u': {'$inc': {'likes_received': 1}}},
+            {'q': {'email': 'a@b.c'}, 'u': {'$set': {'bio': 'x'}}, 'upsert': True},
+        ]})
+
+        self.assertEqual(len(pairs), 2)
+        self.assertEqual([len(command['updates']) for _, command in pairs], [1, 1])
+        self.assertNotIn('likes_received', pairs[0][0])
+        self.assertNotIn('ordered', pairs[0][1])
+
+    def test_recorder_counts_and_persists_shapes(self):
+        """Test dedup, skipped commands and the JSON lines round trip."""
+        import os
+        import tempfile
+        from core.query_audit import QueryShapeRecorder, load_shapes
+        path = os.path.join(tempfile.mkdtemp(), 'shapes.jsonl')
+        recorder = QueryShapeRecorder(path)
+        post_id = ObjectId()
+
+        recorder.started(self._event('find', {'find': 'comments', 'filter': {'post_id': post_id}}))
+        recorder.started(self._event('find', {'find': 'comments', 'filter': {'post_id': ObjectId()}}))
+        recorder.started(self._event('insert', {'insert': 'comments', 'documents': [{}]}))
+        recorder.started(self._event('find', {'find': 'users', 'filter': {}}, database='admin'))
+        recorder.enabled = False
+        recorder.started(self._event('find', {'find': 'users', 'filter': {}}))
+
+        self.assertEqual([entry['calls'] for entry in recorder.shapes.values()], [2])
+        loaded = load_shapes([path, path])
+        entry = next(iter(loaded.values()))
+        self.assertEqual(entry['command']['filter']['post_id'], post_id)
+        self.assertEqual(entry['calls'], 2)
+
+    def test_summarize_classic_find_with_collscan_and_sort(self):
+        """Test a classic plan: blocking SORT over a COLLSCAN."""
+        from core.query_audit import summarize_explain
+        summary = summarize_explain({
+            'queryPlanner': {'winningPlan': {'stage': 'SORT', 'inputStage': {'stage': 'COLLSCAN'}},
+                             'rejectedPlans': [{'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN', 'indexName': 'x'}}]},
+            'executionStats': {'nReturned': 20, 'totalDocsExamined': 5000, 'totalKeysExamined': 0},
+        })
+
+        self.assertEqual(summary['stages'], ['SORT', 'COLLSCAN'])
+        self.assertTrue(summary['collscan'])
+        self.assertTrue(summary['blocking_sort'])
+        self.assertEqual(summary['indexes'], [])
+        self.assertEqual((summary['docs_examined'], summary['returned']), (5000, 20))
+
+    def test_summarize_slot_based_plan_and_aggregate(self):
+        """Test SBE queryPlan trees and aggregations with $cursor, $lookup and $sort stages."""
+        from core.query_audit import summarize_explain
+        sbe = summarize_explain({
+            'queryPlanner': {'winningPlan': {'queryPlan': {
+                'stage': 'EQ_LOOKUP', 'strategy': 'NestedLoopJoin',
+                'inputStage': {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN', 'indexName': 'created_at_-1'}}},
+                'slotBasedPlan': {'stages': '...'}}},
+            'executionStats': {'nReturned': 20, 'totalDocsExamined': 20, 'totalKeysExamined': 20},
+        })
+        aggregate = summarize_explain({'stages': [
+            {'$cursor': {'queryPlanner': {'winningPlan': {'stage': 'IDHACK'}},
+                         'executionStats': {'nReturned': 1, 'totalDocsExamined': 1, 'totalKeysExamined': 1}}},
+            {'$lookup': {'from': 'likes'}, 'totalDocsExamined': 900, 'collectionScans': 1, 'nReturned': 1},
+            {'$sort': {'sortKey': {'likes_count': -1}}, 'nReturned': 1},
+        ]})
+
+        self.assertEqual(sbe['indexes'], ['created_at_-1'])
+        self.assertFalse(sbe['collscan'])
+        self.assertEqual(sbe['lookup_collscans'], 1)
+        self.assertEqual(aggregate['indexes'], ['_id_'])
+        self.assertEqual(aggregate['lookup_collscans'], 1)
+        self.assertTrue(aggregate['pipeline_sort'])
+        self.assertFalse(aggregate['blocking_sort'])
+        self.assertEqual(aggregate['docs_examined'], 901)
+
+    def test_thresholds(self):
+        """Test which summaries count as problems."""
+        from core.query_audit import AuditThresholds
+        summary = {'collscan': True, 'lookup_collscans': 0, 'blocking_sort': True, 'pipeline_sort': True,
+                   'docs_examined': 5000, 'returned': 20}
+        strict = AuditThresholds()
+        lenient = AuditThresholds(allow_collscan=True, allow_blocking_sort=True, max_examined_ratio=500)
+
+        self.assertEqual(strict.problems(summary), ['COLLSCAN', 'blocking SORT', 'examined 5000 docs for 20 returned'])
+        self.assertEqual(lenient.problems(summary), [])
+        self.assertEqual(strict.problems(dict(summary, collscan=False, blocking_sort=False, docs_examined=99,
+                                              returned=0)), [])
+        self.assertTrue(AuditThresholds(ignore=['sessions.find']).ignores(
+            {'collection': 'sessions', 'command_name': 'find'}))
+
+    def test_audit_explains_each_shape(self):
+        """Test explain calls, failures, ignored shapes and ordering."""
+        from pymongo.errors import OperationFailure
+        from core.query_audit import QueryShapeRecorder, AuditThresholds, audit
+        recorder = QueryShapeRecorder()
+        for collection in ('likes', 'comments', 'sessions'):
+            recorder.started(self._event('find', {'find': collection, 'filter': {'post_id': ObjectId()}}))
+
+        def explain(name, command, verbosity):
+            if command['find'] == 'comments':
+                raise OperationFailure('bad')
+            return {'queryPlanner': {'winningPlan': {'stage': 'COLLSCAN'}},
+                    'executionStats': {'nReturned': 1, 'totalDocsExamined': 10}}
+
+        from unittest.mock import MagicMock
+        client = MagicMock()
+        client.__getitem__.return_value.command.side_effect = explain
+        rows = audit(client, recorder.shapes, AuditThresholds(ignore=['sessions']), db_name='crowdlib_loadtest')
+
+        self.assertEqual([row['collection'] for row in rows], ['likes', 'comments', 'sessions'])
+        self.assertEqual(rows[0]['problems'], ['COLLSCAN'])
+        self.assertIn('bad', rows[1]['error'])
+        self.assertTrue(rows[2]['ignored'])
+        client.__getitem__.assert_called_with('crowdlib_loadtest')
+
+
+class SlowQueryTest(TestCase):
+    """Unit tests for slow query sampling and the admin endpoint."""
+
+    def _started(self, listener, request_id, command_name, command):
+        listener.started(Mock(request_id=request_id, command_name=command_name, command=command,
+                              database_name='crowdlib'))
+
+    def _finished(self, listener, request_id, command_name, millis):
+        listener.succeeded(Mock(request_id=request_id, command_name=command_name, duration_micros=millis * 1000))
+
+    def test_fingerprint_strips_literals(self):
+        """Test that one query shape gets one fingerprint whatever its values."""
+        from core.slow_queries import fingerprint
+        first, shape = fingerprint('find', {'find': 'likes', 'filter': {'post_id': ObjectId()}, 'lsid': {'id': 1}})
+        second, _ = fingerprint('find', {'find': 'likes', 'filter': {'post_id': ObjectId()}})
+        other, _ = fingerprint('find', {'find': 'likes', 'filter': {'user_id': ObjectId()}})
+        more, more_shape = fingerprint('getMore', {'getMore': 123456789, 'collection': 'likes'})
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(shape['shape'], {'filter': {'post_id': '?'}})
+        self.assertEqual(more, fingerprint('getMore', {'getMore': 987, 'collection': 'likes'})[0])
+        self.assertEqual(more_shape['collection'], 'likes')
+
+    def test_listener_records_slow_commands_with_caller(self):
+        """Test the threshold and that the calling model method is recorded."""
+        from django.test import override_settings
+        from core.slow_queries import SlowQueryListener, SlowQueryLog
+        log = SlowQueryLog()
+        listener = SlowQueryListener(log)
+        self._started(listener, 1, 'aggregate', {'aggregate': 'filled_madlibs', 'pipeline': [{'$limit': 5}]})
+
+        class FeedService:
+            def get_top_by_likes(self):
+                # pymongo publishes the finished event before returning to the caller
+                listener.succeeded(Mock(request_id=1, command_name='aggregate', duration_micros=120000))
+
+        with override_settings(SLOW_QUERY_MS=50, SLOW_QUERY_LOG_SAMPLE=0):
+            FeedService().get_top_by_likes()
+            self._started(listener, 2, 'find', {'find': 'likes', 'filter': {}})
+            self._finished(listener, 2, 'find', 10)
+            self._finished(listener, 3, 'find', 500)
+
+        rows = log.top()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['collection'], 'filled_madlibs')
+        self.assertEqual(rows[0]['count'], 1)
+        self.assertTrue(rows[0]['callers'][0]['caller'].endswith('FeedService.get_top_by_likes'))
+
+    def test_log_rolls_over_window_and_evicts(self):
+        """Test window expiry, ordering and the shape limit."""
+        from core.slow_queries import SlowQueryLog
+        log = SlowQueryLog(max_shapes=2, window_seconds=600)
+        old = {'find': 'users', 'filter': {'email': 'a'}}
+        heavy = {'find': 'likes', 'filter': {'post_id': 'x'}}
+        frequent = {'find': 'comments', 'filter': {'post_id': 'x'}}
+
+        log.record('find', old, 'db', 900.0, 'UserOperations.get_by_email', now=1000)
+        log.record('find', heavy, 'db', 800.0, 'LikeModel.get_post_likes_count', now=1500)
+        log.record('find', frequent, 'db', 200.0, 'CommentModel.get_post_comments', now=1700)
+        log.record('find', frequent, 'db', 200.0, 'CommentModel.get_post_comments', now=1701)
+
+        by_total = log.top(now=1710)
+        self.assertEqual([row['collection'] for row in by_total], ['likes', 'comments'])
+        self.assertEqual([row['collection'] for row in log.top(order_by='count', now=1710)], ['comments', 'likes'])
+        self.assertEqual(by_total[1]['mean_ms'], 200.0)
+        self.assertEqual([row['collection'] for row in log.top(now=2200)], ['comments'])
+        with self.assertRaises(ValueError):
+            log.top(order_by='nope')
+
+    def test_endpoint_is_admin_only(self):
+        """Test the table endpoint, its validation and reset."""
+        from django.contrib.auth.models import User
+        from rest_framework.test import APIClient
+        from core.slow_queries import slow_query_log
+        slow_query_log.reset()
+        slow_query_log.record('find', {'find': 'likes', 'filter': {'post_id': 1}}, 'db', 250.0, 'LikeModel.x')
+        client = APIClient()
+
+        self.assertEqual(client.get('/api/slow-queries/').status_code, 403)
+        client.force_authenticate(user=User.objects.create_user('admin', is_staff=True))
+        response = client.get('/api/slow-queries/?order_by=max_ms&limit=5')
+        bad = client.get('/api/slow-queries/?order_by=nope')
+        reset = client.post('/api/slow-queries/reset/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['shapes'][0]['callers'], [{'caller': 'LikeModel.x', 'count': 1}])
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(reset.status_code, 200)
+        self.assertEqual(slow_query_log.top(), [])
+
+
+class LoggingTest(TestCase):
+    """Unit tests for the queued log handler and the logging benchmark."""
+
+    def test_queued_handler_writes_on_listener_thread(self):
+        """Test that records are written by the listener with their arguments as logged."""
+        import io
+        import logging
+        from core.logging_queue import QueuedHandler
+        handler = QueuedHandler()
+        handler.target.stream = io.StringIO()
+        handler.setFormatter(logging.Formatter('{levelname} {message}', style='{'))
+        log = logging.getLogger('crowdlib.tests.queue')
+        log.addHandler(handler)
+        log.propagate = False
+        log.setLevel(logging.DEBUG)
+        keys = ['a']
+        try:
+            log.info("Session loaded: keys=%s", keys)
+            keys.append('b')
+            handler.stop()
+        finally:
+            log.removeHandler(handler)
+            handler.close()
+
+        self.assertEqual(handler.target.stream.getvalue(), "INFO Session loaded: keys=['a']\n")
+
+    def test_queued_handler_drops_when_full(self):
+        """Test that a full queue drops and counts records instead of blocking."""
+        import logging
+        import os
+        from core.logging_queue import QueuedHandler
+        handler = QueuedHandler(maxsize=1)
+        # A listener that never drains
+        handler.listener, handler._pid = Mock(), os.getpid()
+        record = logging.makeLogRecord({'msg': 'x %s', 'args': (1,)})
+        handler.emit(record)
+        handler.emit(record)
+
+        self.assertEqual(handler.queue.qsize(), 1)
+        self.assertEqual(handler.dropped, 1)
+        self.assertEqual(handler.queue.get_nowait().msg, 'x 1')
+
+    def test_logging_benchmark_covers_every_profile(self):
+        """Test that each profile is timed eagerly and lazily and the savings derived."""
+        from core.loadtest.logbench import PROFILES, run_logging_benchmarks, overhead, format_overhead
+        results = run_logging_benchmarks(repeat=2, min_sample_time=0.001, warmup=1)
+        rows = overhead(results)
+
+        self.assertEqual(len(results), len(PROFILES) * 2)
+        self.assertEqual([row['profile'] for row in rows], [profile for profile, _, _ in PROFILES])
+        self.assertIn('production', format_overhead(rows))
+
+
+class ClientsTest(TestCase):
+    """Unit tests for the lazy client singletons and the startup report."""
+
+    def test_s3_client_is_created_once(self):
+        """Test that every caller shares one client until reset."""
+        from core.clients import get_s3_client, reset_clients
+        reset_clients()
+        try:
+            with patch('boto3.client') as mock_client:
+                first = get_s3_client()
+                second = get_s3_client()
+                reset_clients()
+                get_s3_client()
+
+            self.assertIs(first, second)
+            self.assertEqual(mock_client.call_count, 2)
+        finally:
+            reset_clients()
+
+    def test_urlconf_import_defers_client_libraries(self):
+        """Test that a worker can load every view without importing google.genai or boto3."""
+        import os
+        import subprocess
+        import sys
+        code = ("import sys, django; django.setup(); import core.urls; "
+                "print(','.join(m for m in ('google.genai', 'boto3') if m in sys.modules))")
+        proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=dict(os.environ),
+                              timeout=120)
+
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual(proc.stdout.strip(), '')
+
+    def test_parse_importtime(self):
+        """Test parsing -X importtime output and totalling it per package."""
+        from core.loadtest.startup import parse_importtime, by_package
+        text = ("import time: self [us] | cumulative | imported package\n"
+                "import time:       120 |        120 |     google.genai.types\n"
+                "import time:        30 |        150 |   google.genai\n"
+                "import time:        50 |         50 | boto3\n")
+        rows = parse_importtime(text)
+
+        self.assertEqual([row['module'] for row in rows], ['google.genai.types', 'google.genai', 'boto3'])
+        self.assertEqual(rows[0]['depth'], 2)
+        self.assertEqual(by_package(rows), {'google': 150, 'boto3': 50})
+
+
+class ServiceContainerTest(TestCase):
+    """Unit tests for the process-wide service container."""
+
+    def test_builds_each_service_once_across_threads(self):
+        """Test that concurrent first requests share one instance."""
+        import threading
+        import time
+        from core.services import ServiceContainer
+        built = []
+
+        class SlowService:
+            def __init__(self):
+                time.sleep(0.01)
+                built.append(self)
+
+        container = ServiceContainer()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(container.get(SlowService))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(built), 1)
+        self.assertTrue(all(result is built[0] for result in results))
+
+    @skipUnless(mongomock, "needs mongomock (requirements-dev.txt)")
+    def test_override_and_reset_on_database_switch(self):
+        """Test fakes for one class and that switching databases rebuilds services."""
+        from core.db_connect import MongoDBConnection
+        from core.services import services
+        from feed.models import FeedService
+        client, db = MongoDBConnection._client, MongoDBConnection._db
+        fake = Mock()
+        # Swap in an in-memory client first: use() closes the client it replaces,
+        # and the configured one must go back untouched
+        MongoDBConnection._client = mongomock.MongoClient()
+        MongoDBConnection._db = MongoDBConnection._client['crowdlib_test']
+        services.reset()
+        try:
+            real = services.get(FeedService)
+            with services.override(FeedService, fake):
+                self.assertIs(services.get(FeedService), fake)
+            self.assertIs(services.get(FeedService), real)
+
+            MongoDBConnection.use(mongomock.MongoClient(), 'crowdlib_other')
+            rebuilt = services.get(FeedService)
+            self.assertIsNot(rebuilt, real)
+            self.assertEqual(rebuilt.filled_madlibs_coll.database.name, 'crowdlib_other')
+        finally:
+            MongoDBConnection._client, MongoDBConnection._db = client, db
+            services.reset()
+
+    def test_viewsets_get_the_override(self):
+        """Test that a request is served by the injected fake."""
+        from rest_framework.test import APIClient
+        from core.services import services
+        from feed.models import FeedService
+        fake = Mock()
+        fake.get_most_recent.return_value = []
+        with services.override(FeedService, fake):
+            response = APIClient().get('/api/feed/recent/')
+
+        self.assertEqual(response.status_code, 200)
+        fake.get_most_recent.assert_called_once()
+
+
+class ReadRoutingTest(TestCase):
+    """Unit tests for per-operation read preferences and read-your-writes pinning."""
+
+    @skipUnless(mongomock, "needs mongomock (requirements-dev.txt)")
+    def test_for_read_routes_stale_tolerant_operations(self):
+        """Test secondaryPreferred for listed operations and the primary otherwise."""
+        from django.test import override_settings
+        from pymongo.read_preferences import SecondaryPreferred
+        from core.read_routing import for_read, pin_primary, unpin
+        collection = mongomock.MongoClient()['crowdlib']['filled_madlibs']
+
+        with override_settings(READ_ROUTING_ENABLED=False):
+            self.assertIs(for_read(collection, 'feed'), collection)
+        with override_settings(READ_ROUTING_ENABLED=True, READ_ROUTING_SECONDARY={'feed'},
+                               READ_MAX_STALENESS_SECONDS=120):
+            routed = for_read(collection, 'feed')
+            self.assertEqual(routed.read_preference, SecondaryPreferred(max_staleness=120))
+            self.assertIs(for_read(collection, 'feed'), routed)
+            self.assertIs(for_read(collection, 'counts'), collection)
+            token = pin_primary()
+            try:
+                self.assertIs(for_read(collection, 'feed'), collection)
+            finally:
+                unpin(token)
+
+    def test_middleware_pins_sessions_that_wrote(self):
+        """Test that a write stamps the session and later reads stay on the primary for the window."""
+        import time
+        from django.http import HttpResponse
+        from django.test import RequestFactory, override_settings
+        from core.middleware import ReadYourWritesMiddleware
+        from core.read_routing import LAST_WRITE_SESSION_KEY, primary_pinned
+        seen = []
+
+        def view(request):
+            seen.append(primary_pinned())
+            return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+        def call(method, session):
+            request = getattr(RequestFactory(), method.lower())('/api/feed/recent/')
+            request.session, request.user = session, Mock(is_authenticated=True)
+            middleware(request)
+
+        with override_settings(READ_ROUTING_ENABLED=True, READ_YOUR_WRITES_SECONDS=60):
+            middleware = ReadYourWritesMiddleware(view)
+            session = {}
+            call('GET', session)
+            call('POST', session)
+            call('GET', session)
+            session[LAST_WRITE_SESSION_KEY] = time.time() - 61
+            call('GET', session)
+
+        self.assertEqual(seen, [False, True, True, False])
+        self.assertFalse(primary_pinned())
+
+
+class FanOutTest(TestCase):
+    """Unit tests for copying new posts into followers' feed inboxes."""
+
+    def _post(self, author_id):
+        return {'_id': ObjectId(), 'creator_id': author_id, 'created_at': datetime(2026, 1, 1), 'public': True}
+
+    def test_fan_out_writes_in_batches(self):
+        """Test that each follower gets an entry, FEED_FANOUT_BATCH_SIZE per insert."""
+        from django.test import override_settings
+        from core.fanout import fan_out_posts
+        author_id = ObjectId()
+        users, follows, inbox = Mock(), Mock(), Mock()
+        users.find_one.return_value = {'followers_count': 3}
+        follows.find.return_value = [{'follower_id': ObjectId()} for _ in range(3)]
+        inbox.insert_many.side_effect = lambda entries, ordered: Mock(inserted_ids=entries)
+
+        with override_settings(FEED_FANOUT_BATCH_SIZE=2):
+            written = fan_out_posts(users, follows, inbox, [self._post(author_id)])
+
+        self.assertEqual(written, 3)
+        self.assertEqual([len(call[0][0]) for call in inbox.insert_many.call_args_list], [2, 1])
+        follows.find.assert_called_once_with({'followee_id': author_id}, {'follower_id': 1})
+
+    def test_fan_out_skips_pull_authors_and_private_posts(self):
+        """Test that authors past the threshold and private posts are not fanned out."""
+        from core.fanout import fan_out_posts
+        users, follows, inbox = Mock(), Mock(), Mock()
+        users.find_one.return_value = {'followers_count': 5, 'fanout_on_read': True}
+        private = dict(self._post(ObjectId()), public=False)
+
+        self.assertEqual(fan_out_posts(users, follows, inbox, [self._post(ObjectId()), private]), 0)
+        users.find_one.assert_called_once()
+        follows.find.assert_not_called()
+        inbox.insert_many.assert_not_called()
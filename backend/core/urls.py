@@ -5,10 +5,11 @@ from django.http import JsonResponse
 from django.urls import path, include
 from django.shortcuts import redirect
 from users.views import dashboard, debug_oauth_data, UserViewSet
-from social.views import LikeViewSet, CommentViewSet
+from social.views import LikeViewSet, CommentViewSet, FollowViewSet
 from madlibs.views import MadLibTemplateViewSet, UserFilledMadlibsViewSet
 from image_gen.views import ImageGenerationViewSet
 from feed.views import FeedViewSet
+from core.views import ExportViewSet, RollupViewSet, TimingStatsViewSet, SlowQueryViewSet, metrics_view
 
 
 router = DefaultRouter()
@@ -17,8 +18,13 @@ router.register(r'templates', MadLibTemplateViewSet, basename='template')
 router.register(r'users', UserViewSet, basename='user')
 router.register(r'likes', LikeViewSet, basename='post-likes')
 router.register(r'comments', CommentViewSet, basename='post-comments')
+router.register(r'follows', FollowViewSet, basename='follows')
 router.register(r'image-gen', ImageGenerationViewSet, basename='image-gen')
 router.register(r'feed', FeedViewSet, basename='feed')
+router.register(r'export', ExportViewSet, basename='export')
+router.register(r'rollups', RollupViewSet, basename='rollups')
+router.register(r'timings', TimingStatsViewSet, basename='timings')
+router.register(r'slow-queries', SlowQueryViewSet, basename='slow-queries')
 
 
 
@@ -35,6 +41,7 @@ def home_view(request):
             "/api/feed/top-liked/",
             "/api/feed/recent/",
             "/api/feed/discussed/",
+            "/api/feed/following/",
         ]
     })
 
@@ -45,4 +52,5 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('social_django.urls', namespace='social')),
     path('api/debug/oauth/', debug_oauth_data, name='debug-oauth'),
+    path('metrics', metrics_view, name='metrics'),
 ]
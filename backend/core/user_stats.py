@@ -0,0 +1,63 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+# Denormalized per-user counters kept on the user document, so a profile
+# can show its totals without scanning the user's madlibs
+MADLIBS_COUNT = 'madlibs_count'
+LIKES_RECEIVED = 'likes_received'
+# Maintained by social.models.FollowModel
+FOLLOWERS_COUNT = 'followers_count'
+FOLLOWING_COUNT = 'following_count'
+
+
+def increment_user_stats(users_collection, user_id, madlibs: int = 0, likes: int = 0):
+    """
+    Adjust one user's counters.
+
+    Args:
+        users_collection: users collection
+        user_id: User ObjectId (or its string form)
+        madlibs: Change to madlibs_count
+        likes: Change to likes_received
+    """
+    inc = {field: delta for field, delta in ((MADLIBS_COUNT, madlibs), (LIKES_RECEIVED, likes)) if delta}
+    if inc and user_id is not None:
+        users_collection.update_one({'_id': ObjectId(user_id)}, {'$inc': inc})
+
+
+def bulk_increment_user_stats(users_collection, deltas: Iterable[Tuple[ObjectId, int, int]]):
+    """
+    Adjust the counters of many users in one bulk write.
+
+    Args:
+        users_collection: users collection
+        deltas: (user_id, madlibs delta, likes delta) tuples; repeated users are summed
+    """
+    totals: Dict[ObjectId, Dict[str, int]] = defaultdict(lambda: {MADLIBS_COUNT: 0, LIKES_RECEIVED: 0})
+    for user_id, madlibs, likes in deltas:
+        if user_id is None:
+            continue
+        totals[user_id][MADLIBS_COUNT] += madlibs
+        totals[user_id][LIKES_RECEIVED] += likes
+
+    ops = []
+    for user_id, inc in totals.items():
+        inc = {field: delta for field, delta in inc.items() if delta}
+        if inc:
+            ops.append(UpdateOne({'_id': user_id}, {'$inc': inc}))
+    if ops:
+        users_collection.bulk_write(ops, ordered=False)
+
+
+def get_user_stats(users_collection, user_id) -> Dict[str, int]:
+    """
+    Read a user's counters (zeros for users created before the counters existed).
+
+    Returns:
+        Dictionary with madlibs_count and likes_received
+    """
+    doc = users_collection.find_one({'_id': ObjectId(user_id)}, {MADLIBS_COUNT: 1, LIKES_RECEIVED: 1}) or {}
+    return {MADLIBS_COUNT: doc.get(MADLIBS_COUNT, 0), LIKES_RECEIVED: doc.get(LIKES_RECEIVED, 0)}
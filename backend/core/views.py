@@ -0,0 +1,313 @@
+import hmac
+from datetime import datetime, timedelta, timezone
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import status, viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from bson import ObjectId
+from bson.errors import InvalidId
+from core.db_connect import get_collection
+from core.export import EXPORT_COLLECTIONS, export_stream
+from core.instrumentation import timing_stats
+from core.metrics import render_latest
+from core.pagination import parse_limit_param
+from core.rollups import RollupService, DIMENSIONS, METRICS, GRANULARITIES, DAY
+from core.services import services
+from core.slow_queries import slow_query_log, ORDERINGS
+from madlibs.models import MadLibTemplate
+from users.models import UserOperations
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint (text exposition format). When METRICS_TOKEN
+    is set the scraper must send it as a bearer token. Without a token the
+    endpoint is only served with DEBUG on, since the metrics expose traffic,
+    error rates and MongoDB pool internals.
+
+    GET /metrics
+    """
+    if not settings.METRICS_TOKEN and not settings.DEBUG:
+        return HttpResponse('Forbidden: set METRICS_TOKEN to enable /metrics\n', status=403,
+                            content_type='text/plain')
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied, f"Bearer {settings.METRICS_TOKEN}"):
+            return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    body, content_type = render_latest()
+    return HttpResponse(body, content_type=content_type)
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """
+    Streaming NDJSON exports for analytics (admin only).
+
+    - GET /api/export/madlibs/ : Every filled madlib
+    - GET /api/export/likes/ : Every like
+    - GET /api/export/comments/ : Every comment
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def retrieve(self, request, pk=None):
+        """
+        Stream a whole collection as NDJSON, one document per line in _id
+        order, using constant memory on the server.
+
+        Query Parameters:
+        - after: Resume after this _id (the _id of the last line received)
+        - gzip: true to gzip the stream (default: false)
+        - batch_size: Documents per database round trip (default: EXPORT_BATCH_SIZE)
+
+        GET /api/export/madlibs/?gzip=true
+        GET /api/export/likes/?after=656f1c2e9b1e8a0012345678
+        """
+        collection_name = EXPORT_COLLECTIONS.get(pk)
+        if collection_name is None:
+            return Response(
+                {'error': f"Unknown export '{pk}'; expected one of: {', '.join(EXPORT_COLLECTIONS)}"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            after = request.query_params.get('after')
+            after = ObjectId(after) if after else None
+            batch_size = request.query_params.get('batch_size')
+            batch_size = max(int(batch_size), 1) if batch_size else None
+        except (InvalidId, TypeError, ValueError):
+            return Response(
+                {'error': 'after must be an ObjectId and batch_size an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        gzip = request.query_params.get('gzip', 'false').lower() == 'true'
+
+        logger.info("Starting %s export for %s (after=%s, gzip=%s)", pk, request.user, after, gzip)
+        stream = export_stream(get_collection(collection_name), after=after, gzip=gzip, batch_size=batch_size)
+
+        filename = f"{pk}.ndjson.gz" if gzip else f"{pk}.ndjson"
+        response = StreamingHttpResponse(
+            stream,
+            content_type='application/gzip' if gzip else 'application/x-ndjson'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class RollupViewSet(viewsets.ViewSet):
+    """
+    Template and creator engagement reports read from the rollup buckets
+    (admin only).
+
+    - GET /api/rollups/top/ : Templates or creators ranked by one metric
+    - GET /api/rollups/series/ : Counters of one template or creator over time
+    - POST /api/rollups/run/ : Fold in events created since the last run
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    # Default report window per granularity
+    DEFAULT_WINDOWS = {'hour': timedelta(hours=48), 'day': timedelta(days=30)}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rollups = services.get(RollupService)
+        self.template_service = services.get(MadLibTemplate)
+        self.user_service = services.get(UserOperations)
+
+    def _parse_window(self, request):
+        """
+        Read dimension, granularity, start and end from the query string.
+
+        Raises:
+            ValueError: If a parameter is not one of the allowed values or not an ISO date
+        """
+        params = request.query_params
+        dimension = params.get('dimension', 'template')
+        granularity = params.get('granularity', DAY)
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"dimension must be one of: {', '.join(DIMENSIONS)}")
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+
+        end = params.get('end')
+        end = datetime.fromisoformat(end) if end else datetime.now(timezone.utc)
+        start = params.get('start')
+        start = datetime.fromisoformat(start) if start else end - self.DEFAULT_WINDOWS[granularity]
+        # Naive dates are UTC, like the buckets
+        start, end = (
+            moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment
+            for moment in (start, end)
+        )
+        if start >= end:
+            raise ValueError('start must be before end')
+        return dimension, granularity, start, end
+
+    def _label(self, dimension, rows):
+        """Add each template's title or creator's username to report rows"""
+        keys = [row['key'] for row in rows]
+        if dimension == 'template':
+            templates = self.template_service.get_many(keys)
+            for row in rows:
+                row['title'] = templates.get(row['key'], {}).get('title')
+        else:
+            users = self.user_service.get_many(keys, fields=['username'])
+            for row in rows:
+                row['username'] = users.get(row['key'], {}).get('username')
+        return rows
+
+    @action(detail=False, methods=['get'])
+    def top(self, request):
+        """
+        Rank templates or creators by one metric summed over a window.
+
+        Query Parameters:
+        - dimension: template or creator (default: template)
+        - metric: fills, likes, comments or images (default: fills)
+        - granularity: hour or day buckets to sum (default: day)
+        - start, end: ISO 8601 window, UTC when no offset (default: the last 30 days, or 48 hours)
+        - limit: Number of results (default: 20, max: 100)
+
+        GET /api/rollups/top/?dimension=template&metric=likes&start=2024-06-01
+        """
+        try:
+            dimension, granularity, start, end = self._parse_window(request)
+            metric = request.query_params.get('metric', 'fills')
+            if metric not in METRICS:
+                raise ValueError(f"metric must be one of: {', '.join(METRICS)}")
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = parse_limit_param(request.query_params.get('limit'))
+            rows = self.rollups.top(dimension, metric, granularity, start, end, limit=limit)
+            return Response({
+                'dimension': dimension,
+                'metric': metric,
+                'granularity': granularity,
+                'start': start,
+                'end': end,
+                'results': self._label(dimension, rows),
+            })
+        except Exception as e:
+            logger.error("Error reading %s rollups: %s", dimension, e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['get'])
+    def series(self, request):
+        """
+        Hourly or daily counters of one template or creator. Buckets with no
+        activity are omitted.
+
+        Query Parameters:
+        - dimension: template or creator (default: template)
+        - id: The template or creator ID (required)
+        - granularity: hour or day (default: day)
+        - start, end: ISO 8601 window, UTC when no offset (default: the last 30 days, or 48 hours)
+
+        GET /api/rollups/series/?dimension=creator&id=507f1f77bcf86cd799439011&granularity=hour
+        """
+        try:
+            dimension, granularity, start, end = self._parse_window(request)
+            key = ObjectId(request.query_params.get('id'))
+        except (InvalidId, TypeError, ValueError) as e:
+            return Response({'error': f"Invalid parameters: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return Response({
+                'dimension': dimension,
+                'id': str(key),
+                'granularity': granularity,
+                'start': start,
+                'end': end,
+                'results': self.rollups.series(dimension, key, granularity, start, end),
+            })
+        except Exception as e:
+            logger.error("Error reading rollup series for %s %s: %s", dimension, key, e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['post'])
+    def run(self, request):
+        """
+        Run the rollup job now instead of waiting for the scheduled
+        rollup_stats command.
+
+        POST /api/rollups/run/
+        """
+        try:
+            processed = self.rollups.run()
+            if processed is None:
+                return Response({'error': 'A rollup run is already in progress'}, status=status.HTTP_409_CONFLICT)
+            return Response({'processed': processed})
+        except Exception as e:
+            logger.error("Error running rollups: %s", e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class TimingStatsViewSet(viewsets.ViewSet):
+    """
+    Request timing aggregates collected by RequestTimingMiddleware (admin only).
+    The numbers are for the process that serves the request; with several
+    workers, each keeps its own.
+
+    - GET /api/timings/ : Latency, MongoDB and external service time per route
+    - POST /api/timings/reset/ : Start collecting afresh
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def list(self, request):
+        """
+        Per-route request counts, latency percentiles over the last requests,
+        average MongoDB commands and time (overall and per command name),
+        S3/Imagen time and response size.
+
+        GET /api/timings/
+        """
+        return Response(timing_stats.snapshot())
+
+    @action(detail=False, methods=['post'])
+    def reset(self, request):
+        """
+        POST /api/timings/reset/
+        """
+        timing_stats.reset()
+        return Response({'message': 'Timing stats reset'})
+
+
+class SlowQueryViewSet(viewsets.ViewSet):
+    """
+    MongoDB commands slower than SLOW_QUERY_MS, grouped by query shape
+    (admin only). The table covers the last SLOW_QUERY_WINDOW_SECONDS of the
+    process that serves the request; with several workers, each keeps its own.
+
+    - GET /api/slow-queries/ : Slowest query shapes with their calling methods
+    - POST /api/slow-queries/reset/ : Start collecting afresh
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def list(self, request):
+        """
+        Query shapes (literals replaced by "?") with their count, total, mean
+        and max duration over the window and the model methods that sent them.
+
+        Query Parameters:
+        - order_by: total_ms, count, max_ms or mean_ms (default: total_ms)
+        - limit: Number of shapes (default: 20, max: 100)
+
+        GET /api/slow-queries/?order_by=max_ms
+        """
+        order_by = request.query_params.get('order_by', 'total_ms')
+        if order_by not in ORDERINGS:
+            return Response({'error': f"order_by must be one of: {', '.join(ORDERINGS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        limit = parse_limit_param(request.query_params.get('limit'))
+        return Response(slow_query_log.snapshot(limit=limit, order_by=order_by))
+
+    @action(detail=False, methods=['post'])
+    def reset(self, request):
+        """
+        POST /api/slow-queries/reset/
+        """
+        slow_query_log.reset()
+        return Response({'message': 'Slow query log reset'})
@@ -1,8 +1,12 @@
 from bson import ObjectId
 from bson.errors import InvalidId
 from datetime import datetime, timezone, timedelta
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from core.db_connect import get_collection
+from core.fanout import create_inbox_indexes
+from core.pagination import encode_cursor, build_cursor_filter
+from core.read_routing import for_read
+from core.projection import build_projection
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,7 +21,8 @@ class FeedService:
     - Created date (most recent)
     - Comment count (most discussed)
 
-    All methods support time filtering and pagination.
+    All methods support time filtering and pagination. get_following reads
+    the personalized feed of the users someone follows (core/fanout.py).
     """
 
     def __init__(self):
@@ -26,6 +31,8 @@ class FeedService:
         self.comments_coll = get_collection('comments')
         self.users_coll = get_collection('users')
         self.templates_coll = get_collection('story_templates')
+        self.follows_coll = get_collection('follows')
+        self.inbox_coll = get_collection('feed_inbox')
         self._create_indexes()
 
     def _create_indexes(self):
@@ -39,7 +46,6 @@ class FeedService:
             # filled_madlibs indexes
             self.filled_madlibs_coll.create_index([("created_at", -1)])
             self.filled_madlibs_coll.create_index([("public", 1), ("created_at", -1)])
-            self.filled_madlibs_coll.create_index([("creator_id", 1)])
 
             # likes indexes (ENHANCED - compound for better coverage)
             self.likes_coll.create_index([
@@ -56,9 +62,12 @@ class FeedService:
             # comments indexes
             self.comments_coll.create_index([("post_id", 1), ("created_at", -1)])
 
+            # following feed inbox (pulled authors' posts use idx_creator_created_at)
+            create_inbox_indexes(self.inbox_coll)
+
             logger.info("Feed indexes created successfully")
         except Exception as e:
-            logger.error(f"Error creating feed indexes: {e}")
+            logger.error("Error creating feed indexes: %s", e)
 
     def _build_time_filter(self, time_filter: Optional[str]) -> Dict:
         """
@@ -105,7 +114,81 @@ class FeedService:
                 doc['creator_id'] = str(doc['creator_id'])
         return doc
 
-    def get_top_by_likes(self, limit: int = 50, offset: int = 0, time_filter: Optional[str] = 'all') -> List[Dict]:
+    def _apply_projection(self, pipeline: List[Dict], fields: Optional[List[str]]) -> List[Dict]:
+        """
+        Append a final $project stage so only the requested fields are returned.
+
+        Args:
+            pipeline: Aggregation pipeline to extend in place
+            fields: Field names to keep, or None to keep every field
+
+        Returns:
+            The same pipeline, for chaining
+        """
+        projection = build_projection(fields)
+        if projection:
+            pipeline.append({"$project": projection})
+        return pipeline
+
+    def _enrichment_stages(self) -> List[Dict]:
+        """
+        Pipeline stages adding likes_count, comments_count, creator_username
+        and template_title to each madlib.
+        """
+        return [
+            # Lookup likes count
+            {"$lookup": {
+                "from": "likes",
+                "let": {"madlib_id": "$_id"},
+                "pipeline": [
+                    {"$match": {
+                        "$expr": {"$eq": ["$post_id", "$$madlib_id"]},
+                        "comment_id": None
+                    }},
+                    {"$count": "count"}
+                ],
+                "as": "like_stats"
+            }},
+            # Lookup comments count
+            {"$lookup": {
+                "from": "comments",
+                "let": {"madlib_id": "$_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$post_id", "$$madlib_id"]}}},
+                    {"$count": "count"}
+                ],
+                "as": "comment_stats"
+            }},
+            # Lookup creator info
+            {"$lookup": {
+                "from": "users",
+                "localField": "creator_id",
+                "foreignField": "_id",
+                "as": "creator_info"
+            }},
+            # Lookup template info
+            {"$lookup": {
+                "from": "story_templates",
+                "localField": "template_id",
+                "foreignField": "_id",
+                "as": "template_info"
+            }},
+            {"$addFields": {
+                "likes_count": {"$ifNull": [{"$arrayElemAt": ["$like_stats.count", 0]}, 0]},
+                "comments_count": {"$ifNull": [{"$arrayElemAt": ["$comment_stats.count", 0]}, 0]},
+                "creator_username": {"$arrayElemAt": ["$creator_info.username", 0]},
+                "template_title": {"$arrayElemAt": ["$template_info.title", 0]}
+            }},
+            {"$project": {
+                "like_stats": 0,
+                "comment_stats": 0,
+                "creator_info": 0,
+                "template_info": 0
+            }}
+        ]
+
+    def get_top_by_likes(self, limit: int = 50, offset: int = 0, time_filter: Optional[str] = 'all',
+                         fields: Optional[List[str]] = None) -> List[Dict]:
         """
         Get UserFilledMadlibs sorted by like count (descending).
         Ties broken by created_at (most recent first).
@@ -114,13 +197,14 @@ class FeedService:
             limit: Maximum number of results to return
             offset: Number of results to skip for pagination
             time_filter: Time filter ('day', 'week', 'month', 'year', 'all')
+            fields: Optional list of fields to return (defaults to every field)
 
         Returns:
             List of enriched madlib documents with likes_count, comments_count,
             creator_username, and template_title
         """
         try:
-            logger.debug(f"Getting top liked feed: limit={limit}, offset={offset}, time_filter={time_filter}")
+            logger.debug("Getting top liked feed: limit=%s, offset=%s, time_filter=%s", limit, offset, time_filter)
 
             time_filter_query = self._build_time_filter(time_filter)
             match_query = {"public": True}
@@ -129,74 +213,29 @@ class FeedService:
 
             pipeline = [
                 {"$match": match_query},
-                # Lookup likes count
-                {"$lookup": {
-                    "from": "likes",
-                    "let": {"madlib_id": "$_id"},
-                    "pipeline": [
-                        {"$match": {
-                            "$expr": {"$eq": ["$post_id", "$$madlib_id"]},
-                            "comment_id": None
-                        }},
-                        {"$count": "count"}
-                    ],
-                    "as": "like_stats"
-                }},
-                # Lookup comments count
-                {"$lookup": {
-                    "from": "comments",
-                    "let": {"madlib_id": "$_id"},
-                    "pipeline": [
-                        {"$match": {"$expr": {"$eq": ["$post_id", "$$madlib_id"]}}},
-                        {"$count": "count"}
-                    ],
-                    "as": "comment_stats"
-                }},
-                # Lookup creator info
-                {"$lookup": {
-                    "from": "users",
-                    "localField": "creator_id",
-                    "foreignField": "_id",
-                    "as": "creator_info"
-                }},
-                # Lookup template info
-                {"$lookup": {
-                    "from": "story_templates",
-                    "localField": "template_id",
-                    "foreignField": "_id",
-                    "as": "template_info"
-                }},
-                {"$addFields": {
-                    "likes_count": {"$ifNull": [{"$arrayElemAt": ["$like_stats.count", 0]}, 0]},
-                    "comments_count": {"$ifNull": [{"$arrayElemAt": ["$comment_stats.count", 0]}, 0]},
-                    "creator_username": {"$arrayElemAt": ["$creator_info.username", 0]},
-                    "template_title": {"$arrayElemAt": ["$template_info.title", 0]}
-                }},
-                {"$project": {
-                    "like_stats": 0,
-                    "comment_stats": 0,
-                    "creator_info": 0,
-                    "template_info": 0
-                }},
+                *self._enrichment_stages(),
                 {"$sort": {"likes_count": -1, "created_at": -1}},
                 {"$skip": offset},
                 {"$limit": limit}
             ]
 
-            results = list(self.filled_madlibs_coll.aggregate(pipeline))
+            self._apply_projection(pipeline, fields)
+
+            results = list(for_read(self.filled_madlibs_coll, 'feed').aggregate(pipeline))
 
             # Convert ObjectIds to strings
             for result in results:
                 self._convert_objectids(result)
 
-            logger.info(f"Retrieved {len(results)} top liked madlibs")
+            logger.info("Retrieved %s top liked madlibs", len(results))
             return results
 
         except Exception as e:
-            logger.error(f"Error getting top liked feed: {e}")
+            logger.error("Error getting top liked feed: %s", e)
             return []
 
-    def get_most_recent(self, limit: int = 50, offset: int = 0, time_filter: Optional[str] = 'all') -> List[Dict]:
+    def get_most_recent(self, limit: int = 50, offset: int = 0, time_filter: Optional[str] = 'all',
+                        fields: Optional[List[str]] = None) -> List[Dict]:
         """
         Get UserFilledMadlibs sorted by created_at (descending).
 
@@ -204,13 +243,14 @@ class FeedService:
             limit: Maximum number of results to return
             offset: Number of results to skip for pagination
             time_filter: Time filter ('day', 'week', 'month', 'year', 'all')
+            fields: Optional list of fields to return (defaults to every field)
 
         Returns:
             List of enriched madlib documents with likes_count, comments_count,
             creator_username, and template_title
         """
         try:
-            logger.debug(f"Getting most recent feed: limit={limit}, offset={offset}, time_filter={time_filter}")
+            logger.debug("Getting most recent feed: limit=%s, offset=%s, time_filter=%s", limit, offset, time_filter)
 
             time_filter_query = self._build_time_filter(time_filter)
             match_query = {"public": True}
@@ -222,71 +262,26 @@ class FeedService:
                 {"$sort": {"created_at": -1}},
                 {"$skip": offset},
                 {"$limit": limit},
-                # Lookup likes count
-                {"$lookup": {
-                    "from": "likes",
-                    "let": {"madlib_id": "$_id"},
-                    "pipeline": [
-                        {"$match": {
-                            "$expr": {"$eq": ["$post_id", "$$madlib_id"]},
-                            "comment_id": None
-                        }},
-                        {"$count": "count"}
-                    ],
-                    "as": "like_stats"
-                }},
-                # Lookup comments count
-                {"$lookup": {
-                    "from": "comments",
-                    "let": {"madlib_id": "$_id"},
-                    "pipeline": [
-                        {"$match": {"$expr": {"$eq": ["$post_id", "$$madlib_id"]}}},
-                        {"$count": "count"}
-                    ],
-                    "as": "comment_stats"
-                }},
-                # Lookup creator info
-                {"$lookup": {
-                    "from": "users",
-                    "localField": "creator_id",
-                    "foreignField": "_id",
-                    "as": "creator_info"
-                }},
-                # Lookup template info
-                {"$lookup": {
-                    "from": "story_templates",
-                    "localField": "template_id",
-                    "foreignField": "_id",
-                    "as": "template_info"
-                }},
-                {"$addFields": {
-                    "likes_count": {"$ifNull": [{"$arrayElemAt": ["$like_stats.count", 0]}, 0]},
-                    "comments_count": {"$ifNull": [{"$arrayElemAt": ["$comment_stats.count", 0]}, 0]},
-                    "creator_username": {"$arrayElemAt": ["$creator_info.username", 0]},
-                    "template_title": {"$arrayElemAt": ["$template_info.title", 0]}
-                }},
-                {"$project": {
-                    "like_stats": 0,
-                    "comment_stats": 0,
-                    "creator_info": 0,
-                    "template_info": 0
-                }}
+                *self._enrichment_stages()
             ]
 
-            results = list(self.filled_madlibs_coll.aggregate(pipeline))
+            self._apply_projection(pipeline, fields)
+
+            results = list(for_read(self.filled_madlibs_coll, 'feed').aggregate(pipeline))
 
             # Convert ObjectIds to strings
             for result in results:
                 self._convert_objectids(result)
 
-            logger.info(f"Retrieved {len(results)} most recent madlibs")
+            logger.info("Retrieved %s most recent madlibs", len(results))
             return results
 
         except Exception as e:
-            logger.error(f"Error getting most recent feed: {e}")
+            logger.error("Error getting most recent feed: %s", e)
             return []
 
-    def get_most_discussed(self, limit: int = 50, offset: int = 0, time_filter: Optional[str] = 'all') -> List[Dict]:
+    def get_most_discussed(self, limit: int = 50, offset: int = 0, time_filter: Optional[str] = 'all',
+                           fields: Optional[List[str]] = None) -> List[Dict]:
         """
         Get UserFilledMadlibs sorted by comment count (descending).
         Ties broken by created_at (most recent first).
@@ -295,13 +290,14 @@ class FeedService:
             limit: Maximum number of results to return
             offset: Number of results to skip for pagination
             time_filter: Time filter ('day', 'week', 'month', 'year', 'all')
+            fields: Optional list of fields to return (defaults to every field)
 
         Returns:
             List of enriched madlib documents with likes_count, comments_count,
             creator_username, and template_title
         """
         try:
-            logger.debug(f"Getting most discussed feed: limit={limit}, offset={offset}, time_filter={time_filter}")
+            logger.debug("Getting most discussed feed: limit=%s, offset=%s, time_filter=%s", limit, offset, time_filter)
 
             time_filter_query = self._build_time_filter(time_filter)
             match_query = {"public": True}
@@ -310,69 +306,103 @@ class FeedService:
 
             pipeline = [
                 {"$match": match_query},
-                # Lookup likes count
-                {"$lookup": {
-                    "from": "likes",
-                    "let": {"madlib_id": "$_id"},
-                    "pipeline": [
-                        {"$match": {
-                            "$expr": {"$eq": ["$post_id", "$$madlib_id"]},
-                            "comment_id": None
-                        }},
-                        {"$count": "count"}
-                    ],
-                    "as": "like_stats"
-                }},
-                # Lookup comments count
-                {"$lookup": {
-                    "from": "comments",
-                    "let": {"madlib_id": "$_id"},
-                    "pipeline": [
-                        {"$match": {"$expr": {"$eq": ["$post_id", "$$madlib_id"]}}},
-                        {"$count": "count"}
-                    ],
-                    "as": "comment_stats"
-                }},
-                # Lookup creator info
-                {"$lookup": {
-                    "from": "users",
-                    "localField": "creator_id",
-                    "foreignField": "_id",
-                    "as": "creator_info"
-                }},
-                # Lookup template info
-                {"$lookup": {
-                    "from": "story_templates",
-                    "localField": "template_id",
-                    "foreignField": "_id",
-                    "as": "template_info"
-                }},
-                {"$addFields": {
-                    "likes_count": {"$ifNull": [{"$arrayElemAt": ["$like_stats.count", 0]}, 0]},
-                    "comments_count": {"$ifNull": [{"$arrayElemAt": ["$comment_stats.count", 0]}, 0]},
-                    "creator_username": {"$arrayElemAt": ["$creator_info.username", 0]},
-                    "template_title": {"$arrayElemAt": ["$template_info.title", 0]}
-                }},
-                {"$project": {
-                    "like_stats": 0,
-                    "comment_stats": 0,
-                    "creator_info": 0,
-                    "template_info": 0
-                }},
+                *self._enrichment_stages(),
                 {"$sort": {"comments_count": -1, "created_at": -1}},
                 {"$skip": offset},
                 {"$limit": limit}
             ]
 
-            results = list(self.filled_madlibs_coll.aggregate(pipeline))
+            self._apply_projection(pipeline, fields)
+
+            results = list(for_read(self.filled_madlibs_coll, 'feed').aggregate(pipeline))
 
             # Convert ObjectIds to strings
             for result in results:
                 self._convert_objectids(result)
 
-            logger.info(f"Retrieved {len(results)} most discussed madlibs")
+            logger.info("Retrieved %s most discussed madlibs", len(results))
             return results
 
         except Exception as e:
-            logger.error(f"Error getting most discussed feed: {e}")
+            logger.error("Error getting most discussed feed: %s", e)
             return []
+
+    def get_following(self, user_id, limit: int = 20, cursor: Optional[str] = None,
+                      fields: Optional[List[str]] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Get the newest madlibs of the users someone follows.
+
+        Posts of most authors were copied into the reader's feed_inbox when
+        they were created, so a page is one index range scan of the inbox.
+        Posts of followed authors with too many followers for that (follows
+        marked pull) are read from filled_madlibs with the same cursor and
+        merged in. Only the madlibs on the page are then looked up and
+        enriched, so a read costs O(limit) whatever the size of the graph.
+
+        Args:
+            user_id: The reader's ObjectId (or its string form)
+            limit: Maximum number of results to return
+            cursor: next_cursor of the previous page, or None for the first page
+            fields: Optional list of fields to return (defaults to every field)
+
+        Returns:
+            Tuple of (enriched madlib documents like get_most_recent, next_cursor);
+            next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        owner_id = ObjectId(user_id)
+        inbox_after = build_cursor_filter(cursor, id_field='madlib_id')
+        madlibs_after = build_cursor_filter(cursor)
+        try:
+            logger.debug("Getting following feed: user=%s, limit=%s", user_id, limit)
+
+            inbox_query = {"owner_id": owner_id}
+            inbox_query.update(inbox_after)
+            entries = for_read(self.inbox_coll, 'feed').find(
+                inbox_query,
+                {"madlib_id": 1, "created_at": 1},
+                sort=[("created_at", -1), ("madlib_id", -1)],
+                limit=limit
+            )
+            # (created_at, madlib _id) keys; a post pushed before its author switched to pull appears twice
+            keys = {(entry["created_at"], entry["madlib_id"]) for entry in entries}
+
+            pulled = [follow["followee_id"] for follow in for_read(self.follows_coll, 'feed').find(
+                {"follower_id": owner_id, "pull": True}, {"followee_id": 1}
+            )]
+            if pulled:
+                posts_query = {"creator_id": {"$in": pulled}, "public": True}
+                posts_query.update(madlibs_after)
+                posts = for_read(self.filled_madlibs_coll, 'feed').find(
+                    posts_query,
+                    {"created_at": 1},
+                    sort=[("created_at", -1), ("_id", -1)],
+                    limit=limit
+                )
+                keys.update((post["created_at"], post["_id"]) for post in posts)
+
+            page = sorted(keys, reverse=True)[:limit]
+            if not page:
+                return [], None
+            next_cursor = encode_cursor(*page[-1]) if len(page) == limit else None
+
+            # Madlibs deleted or made private since they were fanned out drop out here
+            pipeline = [
+                {"$match": {"_id": {"$in": [madlib_id for _, madlib_id in page]}, "public": True}},
+                {"$sort": {"created_at": -1, "_id": -1}},
+                *self._enrichment_stages()
+            ]
+            self._apply_projection(pipeline, fields)
+
+            results = list(for_read(self.filled_madlibs_coll, 'feed').aggregate(pipeline))
+            for result in results:
+                self._convert_objectids(result)
+
+            logger.info("Retrieved %s following madlibs for %s (%s pulled authors)", len(results), user_id, len(pulled))
+            return results, next_cursor
+
+        except Exception as e:
+            logger.error("Error getting following feed: %s", e)
+            return [], None
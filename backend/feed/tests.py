@@ -2,7 +2,7 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
-from unittest.mock import patch
+from unittest.mock import patch, Mock
 from bson import ObjectId
 from datetime import datetime, timezone
 
@@ -70,7 +70,8 @@ class FeedViewSetTest(TestCase):
         mock_service.get_top_by_likes.assert_called_once_with(
             limit=50,
             offset=0,
-            time_filter='all'
+            time_filter='all',
+            fields=None
         )
 
     @patch('feed.views.FeedService')
@@ -87,7 +88,8 @@ class FeedViewSetTest(TestCase):
         mock_service.get_most_recent.assert_called_once_with(
             limit=50,
             offset=0,
-            time_filter='all'
+            time_filter='all',
+            fields=None
         )
 
     @patch('feed.views.FeedService')
@@ -104,7 +106,8 @@ class FeedViewSetTest(TestCase):
         mock_service.get_most_discussed.assert_called_once_with(
             limit=50,
             offset=0,
-            time_filter='all'
+            time_filter='all',
+            fields=None
         )
 
     @patch('feed.views.FeedService')
@@ -120,7 +123,8 @@ class FeedViewSetTest(TestCase):
         mock_service.get_most_recent.assert_called_once_with(
             limit=50,
             offset=0,
-            time_filter='day'
+            time_filter='day',
+            fields=None
         )
 
     @patch('feed.views.FeedService')
@@ -136,7 +140,8 @@ class FeedViewSetTest(TestCase):
         mock_service.get_top_by_likes.assert_called_once_with(
             limit=50,
             offset=0,
-            time_filter='week'
+            time_filter='week',
+            fields=None
         )
 
     @patch('feed.views.FeedService')
@@ -154,7 +159,8 @@ class FeedViewSetTest(TestCase):
         mock_service.get_most_recent.assert_called_once_with(
             limit=20,
             offset=10,
-            time_filter='all'
+            time_filter='all',
+            fields=None
         )
 
         # Check pagination URLs are included
@@ -246,7 +252,8 @@ class FeedViewSetTest(TestCase):
         mock_service.get_most_recent.assert_called_once_with(
             limit=100,
             offset=0,
-            time_filter='all'
+            time_filter='all',
+            fields=None
         )
 
     @patch('feed.views.FeedService')
@@ -277,6 +284,27 @@ class FeedViewSetTest(TestCase):
         # Should succeed (not 401/403)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    @patch('feed.views.UserOperations')
+    @patch('feed.views.FeedService')
+    def test_following_requires_auth_and_returns_cursor(self, MockFeedService, MockUserOperations):
+        """Test that the following feed is personal and paged with a cursor."""
+        response = self.client.get('/api/feed/following/')
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+        user_id = str(ObjectId())
+        MockUserOperations.return_value.get_by_email.return_value = {'_id': user_id}
+        MockFeedService.return_value.get_following.return_value = (self.sample_madlibs[:1], 'next-page')
+        self.client.force_authenticate(user=User.objects.create_user(username='reader', email='reader@example.com'))
+
+        response = self.client.get('/api/feed/following/?limit=1&cursor=abc')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['next_cursor'], 'next-page')
+        self.assertEqual(response.data['count'], 1)
+        MockFeedService.return_value.get_following.assert_called_once_with(
+            user_id, limit=1, cursor='abc', fields=None
+        )
+
     @patch('feed.views.FeedService')
     def test_pagination_urls_include_filters(self, MockFeedService):
         """Test that pagination URLs preserve time_filter parameter."""
@@ -293,6 +321,33 @@ class FeedViewSetTest(TestCase):
             self.assertIn('time_filter=week', response.data['next'])
             self.assertIn('limit=2', response.data['next'])
 
+    @patch('feed.views.FeedService')
+    def test_fields_param_passed_to_service(self, MockFeedService):
+        """Test that a sparse fieldset is parsed and forwarded to the service."""
+        mock_service = MockFeedService.return_value
+        mock_service.get_top_by_likes.return_value = self.sample_madlibs
+
+        url = '/api/feed/top-liked/?limit=2&fields=_id, template_title,likes_count'
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_service.get_top_by_likes.assert_called_once_with(
+            limit=2,
+            offset=0,
+            time_filter='all',
+            fields=['_id', 'template_title', 'likes_count']
+        )
+        self.assertIn('fields=_id,template_title,likes_count', response.data['next'])
+
+    @patch('feed.views.FeedService')
+    def test_invalid_fields_param(self, MockFeedService):
+        """Test error handling for field names that are not document paths."""
+        url = '/api/feed/recent/?fields=$where'
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
+
 
 class FeedServiceTest(TestCase):
     """
@@ -377,3 +432,71 @@ class FeedServiceTest(TestCase):
 
         self.assertEqual(result['_id'], 'already-a-string')
         self.assertEqual(result['template_id'], 'also-a-string')
+
+    def test_projection_appended_to_pipeline(self):
+        """Test that requested fields become a final $project stage."""
+        self.service.filled_madlibs_coll.aggregate.return_value = []
+
+        self.service.get_most_recent(limit=10, fields=['_id', 'likes_count'])
+
+        pipeline = self.service.filled_madlibs_coll.aggregate.call_args[0][0]
+        self.assertEqual(pipeline[-1], {"$project": {'_id': 1, 'likes_count': 1}})
+
+    def test_no_projection_without_fields(self):
+        """Test that the pipeline is unchanged when no fields are requested."""
+        self.service.filled_madlibs_coll.aggregate.return_value = []
+
+        self.service.get_top_by_likes(limit=10)
+
+        pipeline = self.service.filled_madlibs_coll.aggregate.call_args[0][0]
+        self.assertEqual(pipeline[-1], {"$limit": 10})
+
+    def test_ranked_feeds_share_enrichment_stages(self):
+        """Test that the likes and comments feeds enrich before sorting on the counts."""
+        self.service.filled_madlibs_coll.aggregate.return_value = []
+        stages = self.service._enrichment_stages()
+
+        for feed, sort_field in ((self.service.get_top_by_likes, 'likes_count'),
+                                 (self.service.get_most_discussed, 'comments_count')):
+            feed(limit=10)
+            pipeline = self.service.filled_madlibs_coll.aggregate.call_args[0][0]
+            self.assertEqual(pipeline[1:1 + len(stages)], stages)
+            self.assertIn(sort_field, pipeline[1 + len(stages)]['$sort'])
+
+    def _following_service(self):
+        """A FeedService with a separate mock per collection."""
+        from feed.models import FeedService
+        with patch('feed.models.get_collection', side_effect=lambda name: Mock(name=name)):
+            return FeedService()
+
+    def test_following_merges_inbox_and_pulled_authors(self):
+        """Test that inbox entries and pulled authors' posts form one page with a cursor."""
+        from core.pagination import encode_cursor
+        service = self._following_service()
+        owner = ObjectId()
+        t1, t2, t3 = (datetime(2026, 1, day) for day in (3, 2, 1))
+        pushed, pulled_post, older = ObjectId(), ObjectId(), ObjectId()
+        service.inbox_coll.find.return_value = [
+            {'madlib_id': pushed, 'created_at': t1}, {'madlib_id': older, 'created_at': t3}
+        ]
+        service.follows_coll.find.return_value = [{'followee_id': ObjectId()}]
+        service.filled_madlibs_coll.find.return_value = [{'_id': pulled_post, 'created_at': t2}]
+        service.filled_madlibs_coll.aggregate.return_value = []
+
+        _, next_cursor = service.get_following(owner, limit=2)
+
+        match = service.filled_madlibs_coll.aggregate.call_args[0][0][0]['$match']
+        self.assertEqual(match, {'_id': {'$in': [pushed, pulled_post]}, 'public': True})
+        self.assertEqual(next_cursor, encode_cursor(t2, pulled_post))
+        inbox_query = service.inbox_coll.find.call_args[0][0]
+        self.assertEqual(inbox_query, {'owner_id': owner})
+
+    def test_following_without_follows_skips_lookups(self):
+        """Test that an empty feed does not run the enrichment pipeline."""
+        service = self._following_service()
+        service.inbox_coll.find.return_value = []
+        service.follows_coll.find.return_value = []
+
+        self.assertEqual(service.get_following(ObjectId()), ([], None))
+        service.filled_madlibs_coll.find.assert_not_called()
+        service.filled_madlibs_coll.aggregate.assert_not_called()
@@ -2,6 +2,10 @@ from rest_framework import status, viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import FeedService
+from users.models import UserOperations
+from core.pagination import parse_limit_param
+from core.projection import parse_fields_param
+from core.services import services
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,18 +19,23 @@ class FeedViewSet(viewsets.ViewSet):
     - GET /api/feed/top-liked/ : UserFilledMadlibs sorted by like count
     - GET /api/feed/recent/ : UserFilledMadlibs sorted by created_at
     - GET /api/feed/discussed/ : UserFilledMadlibs sorted by comment count
+    - GET /api/feed/following/ : Newest UserFilledMadlibs of the users you follow
 
-    All endpoints support pagination and time filtering via query parameters.
+    The first three support pagination and time filtering via query
+    parameters; the following feed is paged with a cursor.
     """
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.feed_service = FeedService()
+        self.feed_service = services.get(FeedService)
+        self.user_service = services.get(UserOperations)
 
     def get_permissions(self):
         """
-        All feed endpoints are public (AllowAny).
+        Feed endpoints are public (AllowAny), except the personal following feed.
         """
+        if self.action == 'following':
+            return [permissions.IsAuthenticated()]
         return [permissions.AllowAny()]
 
     def _validate_and_extract_params(self, request):
@@ -37,7 +46,7 @@ class FeedViewSet(viewsets.ViewSet):
             request: HTTP request object
 
         Returns:
-            Tuple of (limit, offset, time_filter) or Response object if validation fails
+            Tuple of (limit, offset, time_filter, fields) or Response object if validation fails
         """
         try:
             # Extract limit
@@ -81,16 +90,25 @@ class FeedViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            return limit, offset, time_filter
+            # Extract optional sparse fieldset
+            try:
+                fields = parse_fields_param(request.query_params.get('fields'))
+            except ValueError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            return limit, offset, time_filter, fields
 
         except Exception as e:
-            logger.error(f"Error validating parameters: {e}")
+            logger.error("Error validating parameters: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def _build_paginated_response(self, results, limit, offset, time_filter, endpoint_name):
+    def _build_paginated_response(self, results, limit, offset, time_filter, endpoint_name, fields=None):
         """
         Build paginated response with next/previous URLs.
 
@@ -100,19 +118,22 @@ class FeedViewSet(viewsets.ViewSet):
             offset: Current offset
             time_filter: Current time filter
             endpoint_name: Name of the endpoint for URL construction
+            fields: Optional sparse fieldset to carry over to next/previous URLs
 
         Returns:
             Response object with pagination metadata
         """
         # Build next/previous URLs
+        fields_query = f"&fields={','.join(fields)}" if fields else ""
+
         next_url = None
         if len(results) == limit:  # May have more results
-            next_url = f"?limit={limit}&offset={offset + limit}&time_filter={time_filter}"
+            next_url = f"?limit={limit}&offset={offset + limit}&time_filter={time_filter}{fields_query}"
 
         prev_url = None
         if offset > 0:
             prev_offset = max(0, offset - limit)
-            prev_url = f"?limit={limit}&offset={prev_offset}&time_filter={time_filter}"
+            prev_url = f"?limit={limit}&offset={prev_offset}&time_filter={time_filter}{fields_query}"
 
         return Response({
             'count': len(results),
@@ -130,6 +151,7 @@ class FeedViewSet(viewsets.ViewSet):
         - limit (optional, default=50): Number of results per page
         - offset (optional, default=0): Skip N results for pagination
         - time_filter (optional, default='all'): One of 'day', 'week', 'month', 'year', 'all'
+        - fields (optional): Comma separated fields to return, e.g. fields=_id,template_title,likes_count
 
         GET /api/feed/top-liked/?limit=50&offset=0&time_filter=week
 
@@ -143,21 +165,22 @@ class FeedViewSet(viewsets.ViewSet):
             params = self._validate_and_extract_params(request)
             if isinstance(params, Response):
                 return params
-            limit, offset, time_filter = params
+            limit, offset, time_filter, fields = params
 
             # Get results from service
             results = self.feed_service.get_top_by_likes(
                 limit=limit,
                 offset=offset,
-                time_filter=time_filter
+                time_filter=time_filter,
+                fields=fields
             )
 
-            logger.info(f"Retrieved {len(results)} top-liked madlibs (limit={limit}, offset={offset}, filter={time_filter})")
+            logger.info("Retrieved %s top-liked madlibs (limit=%s, offset=%s, filter=%s)", len(results), limit, offset, time_filter)
 
-            return self._build_paginated_response(results, limit, offset, time_filter, 'top-liked')
+            return self._build_paginated_response(results, limit, offset, time_filter, 'top-liked', fields)
 
         except Exception as e:
-            logger.error(f"Error in top_liked endpoint: {e}")
+            logger.error("Error in top_liked endpoint: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -172,6 +195,7 @@ class FeedViewSet(viewsets.ViewSet):
         - limit (optional, default=50): Number of results per page
         - offset (optional, default=0): Skip N results for pagination
         - time_filter (optional, default='all'): One of 'day', 'week', 'month', 'year', 'all'
+        - fields (optional): Comma separated fields to return, e.g. fields=_id,template_title,likes_count
 
         GET /api/feed/recent/?limit=50&offset=0&time_filter=month
 
@@ -185,21 +209,22 @@ class FeedViewSet(viewsets.ViewSet):
             params = self._validate_and_extract_params(request)
             if isinstance(params, Response):
                 return params
-            limit, offset, time_filter = params
+            limit, offset, time_filter, fields = params
 
             # Get results from service
             results = self.feed_service.get_most_recent(
                 limit=limit,
                 offset=offset,
-                time_filter=time_filter
+                time_filter=time_filter,
+                fields=fields
             )
 
-            logger.info(f"Retrieved {len(results)} recent madlibs (limit={limit}, offset={offset}, filter={time_filter})")
+            logger.info("Retrieved %s recent madlibs (limit=%s, offset=%s, filter=%s)", len(results), limit, offset, time_filter)
 
-            return self._build_paginated_response(results, limit, offset, time_filter, 'recent')
+            return self._build_paginated_response(results, limit, offset, time_filter, 'recent', fields)
 
         except Exception as e:
-            logger.error(f"Error in recent endpoint: {e}")
+            logger.error("Error in recent endpoint: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -214,6 +239,7 @@ class FeedViewSet(viewsets.ViewSet):
         - limit (optional, default=50): Number of results per page
         - offset (optional, default=0): Skip N results for pagination
         - time_filter (optional, default='all'): One of 'day', 'week', 'month', 'year', 'all'
+        - fields (optional): Comma separated fields to return, e.g. fields=_id,template_title,likes_count
 
         GET /api/feed/discussed/?limit=50&offset=0&time_filter=all
 
@@ -227,21 +253,69 @@ class FeedViewSet(viewsets.ViewSet):
             params = self._validate_and_extract_params(request)
             if isinstance(params, Response):
                 return params
-            limit, offset, time_filter = params
+            limit, offset, time_filter, fields = params
 
             # Get results from service
             results = self.feed_service.get_most_discussed(
                 limit=limit,
                 offset=offset,
-                time_filter=time_filter
+                time_filter=time_filter,
+                fields=fields
+            )
+
+            logger.info("Retrieved %s most-discussed madlibs (limit=%s, offset=%s, filter=%s)", len(results), limit, offset, time_filter)
+
+            return self._build_paginated_response(results, limit, offset, time_filter, 'discussed', fields)
+
+        except Exception as e:
+            logger.error("Error in discussed endpoint: %s", e)
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['get'], url_path='following')
+    def following(self, request):
+        """
+        Get the newest UserFilledMadlibs of the users the authenticated user follows.
+
+        Query Parameters:
+        - limit (optional, default=20, max=100): Number of results per page
+        - cursor (optional): next_cursor from the previous page
+        - fields (optional): Comma separated fields to return, e.g. fields=_id,template_title,likes_count
+
+        GET /api/feed/following/?limit=20&cursor=<next_cursor>
+
+        Returns:
+            Response with count, next_cursor (None on the last page) and results
+        """
+        try:
+            limit = parse_limit_param(request.query_params.get('limit'), default=20, maximum=100)
+            fields = parse_fields_param(request.query_params.get('fields'))
+
+            mongo_user = self.user_service.get_by_email(request.user.email)
+            if not mongo_user:
+                return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+            results, next_cursor = self.feed_service.get_following(
+                mongo_user['_id'],
+                limit=limit,
+                cursor=request.query_params.get('cursor'),
+                fields=fields
             )
 
-            logger.info(f"Retrieved {len(results)} most-discussed madlibs (limit={limit}, offset={offset}, filter={time_filter})")
+            logger.info("Retrieved %s following madlibs for user %s", len(results), mongo_user['_id'])
 
-            return self._build_paginated_response(results, limit, offset, time_filter, 'discussed')
+            return Response({
+                'count': len(results),
+                'next_cursor': next_cursor,
+                'results': results
+            }, status=status.HTTP_200_OK)
 
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error in discussed endpoint: {e}")
+            logger.error("Error in following endpoint: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1,6 +1,8 @@
 from django.db import models
-from google import genai
-from core.settings import GEMINI_API_KEY, IMAGE_GENERATION_SYS_PROMPT
+from core.clients import get_genai_client
+from core.settings import IMAGE_GENERATION_SYS_PROMPT
+from core.instrumentation import timed
+from core.metrics import ImageGenerationTracker
 import logging
 import tempfile
 from typing import Optional, Dict
@@ -14,8 +16,10 @@ class ImageGenerationModel:
     Model for generating images using Google's Imagen API and uploading them to S3
     """
 
-    def __init__(self):
-        self.client = genai.Client(api_key=GEMINI_API_KEY)
+    @property
+    def client(self):
+        """The shared genai client, created on the first generation rather than per request"""
+        return get_genai_client()
 
     def create_image(
         self,
@@ -45,17 +49,20 @@ class ImageGenerationModel:
         try:
             # Build the full prompt
             full_prompt = self._build_full_prompt(madlib_text, extra_prompt_args)
-            logger.debug(f"Generating image with prompt: '{full_prompt[:100]}...'")
+            logger.debug("Generating image with prompt: '%s...'", full_prompt[:100])
 
             # Configure generation parameters
             config = self._build_generation_config(extra_prompt_args)
 
             # Generate image using Imagen API
-            response = self.client.models.generate_images(
-                model='imagen-4.0-ultra-generate-001',
-                prompt=full_prompt,
-                config=config  # type: ignore[arg-type]
-            )
+            with timed('imagen'), ImageGenerationTracker() as tracker:
+                response = self.client.models.generate_images(
+                    model='imagen-4.0-ultra-generate-001',
+                    prompt=full_prompt,
+                    config=config  # type: ignore[arg-type]
+                )
+                if response.generated_images:
+                    tracker.succeeded()
 
             if not response.generated_images:
                 logger.error("No images were generated by the API")
@@ -64,7 +71,7 @@ class ImageGenerationModel:
             # Get the first generated image
             generated_image = response.generated_images[0]
             if generated_image:
-                logger.info(f"Successfully generated image")
+                logger.info("Successfully generated image")
             else:
                 logger.error("Failed to generate image")
                 
@@ -75,7 +82,7 @@ class ImageGenerationModel:
             image_url = upload_ai_image(temp_file_path, madlib_id)
 
             if image_url:
-                logger.info(f"Successfully uploaded image to: {image_url}")
+                logger.info("Successfully uploaded image to: %s", image_url)
             else:
                 logger.error("Failed to upload image to S3")
 
@@ -83,7 +90,7 @@ class ImageGenerationModel:
             return image_url
 
         except Exception as e:
-            logger.error(f"Error generating image: {e}")
+            logger.error("Error generating image: %s", e)
             return None
 
     def _build_full_prompt(
@@ -162,5 +169,5 @@ class ImageGenerationModel:
         generated_image.image.save(temp_file_path)
         temp_file.close()
 
-        logger.debug(f"Image saved to temporary file: {temp_file_path}")
+        logger.debug("Image saved to temporary file: %s", temp_file_path)
         return temp_file_path
@@ -14,6 +14,7 @@ Note: These tests require:
 
 from django.test import TestCase
 from madlibs.models import UserFilledMadlibs, MadLibTemplate
+from core.cascade import CascadeDeleteService
 from users.models import UserOperations
 from image_gen.models import ImageGenerationModel
 import os
@@ -51,6 +52,7 @@ class ImageGenerationIntegrationTest(TestCase):
 
         self.template_service = MadLibTemplate()
         self.madlib_service = UserFilledMadlibs()
+        self.cascade_service = CascadeDeleteService()
         self.user_service = UserOperations()
 
         # Create test template
@@ -87,7 +89,7 @@ class ImageGenerationIntegrationTest(TestCase):
     def tearDown(self):
         """Clean up test data"""
         if hasattr(self, 'madlib_id') and self.madlib_id:
-            self.madlib_service.delete_filled_madlib(self.madlib_id)
+            self.cascade_service.delete_madlib(self.madlib_id)
         if hasattr(self, 'template_id') and self.template_id:
             self.template_service.delete(self.template_id)
         if hasattr(self, 'creator_id') and self.creator_id:
@@ -200,6 +202,7 @@ class DatabaseIntegrationTest(TestCase):
         """Set up test fixtures"""
         self.template_service = MadLibTemplate()
         self.madlib_service = UserFilledMadlibs()
+        self.cascade_service = CascadeDeleteService()
         self.user_service = UserOperations()
 
         # Create test template
@@ -230,7 +233,7 @@ class DatabaseIntegrationTest(TestCase):
     def tearDown(self):
         """Clean up test data"""
         if hasattr(self, 'madlib_id') and self.madlib_id:
-            self.madlib_service.delete_filled_madlib(self.madlib_id)
+            self.cascade_service.delete_madlib(self.madlib_id)
         if hasattr(self, 'template_id') and self.template_id:
             self.template_service.delete(self.template_id)
         if hasattr(self, 'creator_id') and self.creator_id:
@@ -292,4 +295,4 @@ class DatabaseIntegrationTest(TestCase):
 
         finally:
             # Cleanup
-            self.madlib_service.delete_filled_madlib(madlib_id_2)
+            self.cascade_service.delete_madlib(madlib_id_2)
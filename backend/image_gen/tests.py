@@ -8,9 +8,10 @@ from io import BytesIO
 from PIL import Image
 
 from image_gen.models import ImageGenerationModel
-from image_gen.utils import upload_ai_image
+from image_gen.utils import upload_ai_image, delete_s3_prefixes
 from image_gen.views import ImageGenerationViewSet
 from madlibs.models import UserFilledMadlibs, MadLibTemplate
+from core.cascade import CascadeDeleteService
 
 
 class ImageGenerationModelTest(TestCase):
@@ -23,7 +24,7 @@ class ImageGenerationModelTest(TestCase):
 
     @patch('image_gen.models.tempfile.NamedTemporaryFile')
     @patch('image_gen.models.upload_ai_image')
-    @patch('image_gen.models.genai.Client')
+    @patch('image_gen.models.get_genai_client')
     def test_create_image_success(self, mock_client_class, mock_upload, mock_temp_file):
         """Test successful image generation"""
         # Mock the Gemini API response
@@ -62,7 +63,7 @@ class ImageGenerationModelTest(TestCase):
 
     @patch('image_gen.models.tempfile.NamedTemporaryFile')
     @patch('image_gen.models.upload_ai_image')
-    @patch('image_gen.models.genai.Client')
+    @patch('image_gen.models.get_genai_client')
     def test_create_image_with_style_args(self, mock_client_class, mock_upload, mock_temp_file):
         """Test image generation with extra prompt arguments"""
         mock_image = Mock()
@@ -102,7 +103,7 @@ class ImageGenerationModelTest(TestCase):
         call_kwargs = mock_client.models.generate_images.call_args.kwargs
         self.assertEqual(call_kwargs['config']['aspect_ratio'], '16:9')
 
-    @patch('image_gen.models.genai.Client')
+    @patch('image_gen.models.get_genai_client')
     def test_create_image_no_images_generated(self, mock_client_class):
         """Test when API returns no images"""
         mock_response = Mock()
@@ -121,7 +122,7 @@ class ImageGenerationModelTest(TestCase):
 
         self.assertIsNone(result)
 
-    @patch('image_gen.models.genai.Client')
+    @patch('image_gen.models.get_genai_client')
     def test_create_image_api_exception(self, mock_client_class):
         """Test handling of API exceptions"""
         mock_client = Mock()
@@ -137,7 +138,7 @@ class ImageGenerationModelTest(TestCase):
 
         self.assertIsNone(result)
 
-    @patch('image_gen.models.genai.Client')
+    @patch('image_gen.models.get_genai_client')
     def test_build_generation_config_defaults(self, mock_client_class):
         """Test generation config with default values"""
         mock_client_class.return_value = Mock()
@@ -148,7 +149,7 @@ class ImageGenerationModelTest(TestCase):
         self.assertEqual(config['number_of_images'], 1)
         self.assertEqual(config['aspect_ratio'], '1:1')
 
-    @patch('image_gen.models.genai.Client')
+    @patch('image_gen.models.get_genai_client')
     def test_build_generation_config_custom(self, mock_client_class):
         """Test generation config with custom values"""
         mock_client_class.return_value = Mock()
@@ -161,7 +162,7 @@ class ImageGenerationModelTest(TestCase):
 
         self.assertEqual(config['aspect_ratio'], '4:3')
 
-    @patch('image_gen.models.genai.Client')
+    @patch('image_gen.models.get_genai_client')
     @patch('image_gen.models.IMAGE_GENERATION_SYS_PROMPT', 'System prompt here')
     def test_build_full_prompt_with_system_prompt(self, mock_client_class):
         """Test prompt building with system prompt"""
@@ -178,7 +179,7 @@ class ImageGenerationModelTest(TestCase):
         self.assertIn(self.test_madlib_text, prompt)
         self.assertIn('anime', prompt)
 
-    @patch('image_gen.models.genai.Client')
+    @patch('image_gen.models.get_genai_client')
     def test_build_full_prompt_without_extras(self, mock_client_class):
         """Test prompt building without extra arguments"""
         mock_client_class.return_value = Mock()
@@ -191,7 +192,7 @@ class ImageGenerationModelTest(TestCase):
 class UtilsTest(TestCase):
     """Test suite for utility functions"""
 
-    @patch('image_gen.utils.boto3.client')
+    @patch('image_gen.utils.get_s3_client')
     @patch('image_gen.utils.settings')
     def test_upload_ai_image_success(self, mock_settings, mock_boto_client):
         """Test successful image upload to S3"""
@@ -218,7 +219,7 @@ class UtilsTest(TestCase):
         self.assertIn(test_madlib_id, result)
         mock_s3.upload_file.assert_called_once()
 
-    @patch('image_gen.utils.boto3.client')
+    @patch('image_gen.utils.get_s3_client')
     @patch('image_gen.utils.settings')
     def test_upload_ai_image_failure(self, mock_settings, mock_boto_client):
         """Test S3 upload failure"""
@@ -237,6 +238,38 @@ class UtilsTest(TestCase):
 
         self.assertIsNone(result)
 
+    @patch('image_gen.utils.get_s3_client')
+    @patch('image_gen.utils.settings')
+    def test_delete_s3_prefixes_batches(self, mock_settings, mock_boto_client):
+        """Test that keys under the prefixes are deleted in batches of 1000"""
+        mock_s3 = Mock()
+        mock_boto_client.return_value = mock_s3
+        mock_settings.AWS_STORAGE_BUCKET_NAME = 'test-bucket'
+
+        keys = [{'Key': f"madlibs/abc/{i}.png"} for i in range(1500)]
+        mock_s3.get_paginator.return_value.paginate.return_value = [
+            {'Contents': keys[:1000]}, {'Contents': keys[1000:]}
+        ]
+        mock_s3.delete_objects.return_value = {}
+
+        deleted = delete_s3_prefixes(['madlibs/abc/'])
+
+        self.assertEqual(deleted, 1500)
+        self.assertEqual(mock_s3.delete_objects.call_count, 2)
+        first_batch = mock_s3.delete_objects.call_args_list[0].kwargs['Delete']['Objects']
+        self.assertEqual(len(first_batch), 1000)
+
+    @patch('image_gen.utils.get_s3_client')
+    @patch('image_gen.utils.settings')
+    def test_delete_s3_prefixes_empty(self, mock_settings, mock_boto_client):
+        """Test that nothing is deleted when the prefix holds no objects"""
+        mock_s3 = Mock()
+        mock_boto_client.return_value = mock_s3
+        mock_s3.get_paginator.return_value.paginate.return_value = [{}]
+
+        self.assertEqual(delete_s3_prefixes(['madlibs/abc/']), 0)
+        mock_s3.delete_objects.assert_not_called()
+
 
 class ImageGenerationViewSetTest(APITestCase):
     """Test suite for ImageGenerationViewSet API endpoints"""
@@ -264,6 +297,7 @@ class ImageGenerationViewSetTest(APITestCase):
         assert self.template_id is not None, "Failed to create test template"  # type: ignore[assert-type]
 
         self.madlib_service = UserFilledMadlibs()
+        self.cascade_service = CascadeDeleteService()
         # Create a user first
         from users.models import UserOperations
         user_ops = UserOperations()
@@ -288,7 +322,7 @@ class ImageGenerationViewSetTest(APITestCase):
     def tearDown(self):
         """Clean up test data"""
         if hasattr(self, 'madlib_id') and self.madlib_id:
-            self.madlib_service.delete_filled_madlib(self.madlib_id)
+            self.cascade_service.delete_madlib(self.madlib_id)
         if hasattr(self, 'template_id') and self.template_id:
             self.template_service.delete(self.template_id)
         if hasattr(self, 'creator_id') and self.creator_id:
@@ -316,6 +350,8 @@ class ImageGenerationViewSetTest(APITestCase):
         self.assertEqual(response.data['url'], test_image_url)  # type: ignore[attr-defined]
         self.assertEqual(response.data['madlib_id'], self.madlib_id)  # type: ignore[attr-defined]
         mock_create_image.assert_called_once()
+        # The prompt comes from the stored madlib, not the request body
+        self.assertEqual(mock_create_image.call_args.kwargs['madlib_text'], 'Once upon a time...')
 
         # Verify madlib was updated
         updated_madlib = self.madlib_service.get_by_id(self.madlib_id) # pyright: ignore[reportArgumentType]
@@ -325,8 +361,8 @@ class ImageGenerationViewSetTest(APITestCase):
     def test_generate_image_missing_fields(self):
         """Test image generation with missing required fields"""
         data = {
-            'madlib_id': self.madlib_id
-            # Missing madlib_text
+            'madlib_text': 'Once upon a time there was a happy dog'
+            # Missing madlib_id
         }
 
         response = self.client.post('/api/image-gen/generate/', data, format='json')
@@ -334,17 +370,19 @@ class ImageGenerationViewSetTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('error', response.data)  # type: ignore[attr-defined]
 
-    def test_generate_image_empty_text(self):
-        """Test image generation with empty madlib text"""
+    @patch('image_gen.views.ImageGenerationModel.create_image')
+    def test_generate_image_ignores_client_text(self, mock_create_image):
+        """Test that client supplied madlib_text is not used for the prompt"""
+        mock_create_image.return_value = "https://s3.example.com/test.png"
         data = {
             'madlib_id': self.madlib_id,
-            'madlib_text': '   '  # Empty/whitespace only
+            'madlib_text': 'Something else entirely'
         }
 
         response = self.client.post('/api/image-gen/generate/', data, format='json')
 
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn('error', response.data)  # type: ignore[attr-defined]
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(mock_create_image.call_args.kwargs['madlib_text'], 'Once upon a time...')
 
     @patch('image_gen.views.ImageGenerationModel.create_image')
     def test_generate_image_generation_fails(self, mock_create_image):
@@ -374,10 +412,10 @@ class ImageGenerationViewSetTest(APITestCase):
 
         response = self.client.post('/api/image-gen/generate/', data, format='json')
 
-        # Should succeed in generating but warn about madlib update
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn('warning', response.data)  # type: ignore[attr-defined]
-        self.assertEqual(response.data['url'], test_image_url)  # type: ignore[attr-defined]
+        # Nothing to render, so no image is generated
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIn('error', response.data)  # type: ignore[attr-defined]
+        mock_create_image.assert_not_called()
 
     @patch('image_gen.views.upload_ai_image')
     def test_upload_image_success(self, mock_upload):
@@ -499,6 +537,7 @@ class MadlibModelUpdateImageUrlTest(TestCase):
     def setUp(self):
         """Set up test fixtures"""
         self.madlib_service = UserFilledMadlibs()
+        self.cascade_service = CascadeDeleteService()
         self.template_service = MadLibTemplate()
 
         # Create test template
@@ -531,7 +570,7 @@ class MadlibModelUpdateImageUrlTest(TestCase):
     def tearDown(self):
         """Clean up test data"""
         if hasattr(self, 'madlib_id') and self.madlib_id:
-            self.madlib_service.delete_filled_madlib(self.madlib_id)
+            self.cascade_service.delete_madlib(self.madlib_id)
         if hasattr(self, 'template_id') and self.template_id:
             self.template_service.delete(self.template_id)
         if hasattr(self, 'creator_id') and self.creator_id:
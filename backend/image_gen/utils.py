@@ -1,35 +1,76 @@
-import boto3
 import os
 from uuid import uuid4
 from django.conf import settings
+from core.clients import get_s3_client
+from core.instrumentation import timed
 import logging
 
 logger = logging.getLogger(__name__)
 
+# delete_objects accepts at most 1000 keys per request
+S3_DELETE_BATCH_SIZE = 1000
+
 
 def upload_ai_image(file, madlib_id):
     """
     Upload an AI-generated image to S3 and return its public URL.
     """
-    # Create S3 client
-    s3 = boto3.client(
-        's3',
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        region_name=settings.AWS_REGION
-    )
+    s3 = get_s3_client()
 
     file_key = f"madlibs/{madlib_id}/{uuid4()}.png"
 
     try:
-        s3.upload_file(
-            file,
-            settings.AWS_STORAGE_BUCKET_NAME,
-            file_key,
-            ExtraArgs={'ContentType': 'image/png'}
-        )
+        with timed('s3'):
+            s3.upload_file(
+                file,
+                settings.AWS_STORAGE_BUCKET_NAME,
+                file_key,
+                ExtraArgs={'ContentType': 'image/png'}
+            )
 
         return f"{settings.AWS_S3_URL}/{file_key}"
     except Exception as e:
-        logger.error(f"Error uploading to S3: {e}")
+        logger.error("Error uploading to S3: %s", e)
         return None
+
+
+def delete_s3_prefixes(prefixes):
+    """
+    Delete every S3 object under the given key prefixes (e.g. "madlibs/{id}/").
+
+    Keys are collected with list_objects_v2 and removed with delete_objects in
+    batches of up to 1000, the per-request limit.
+
+    Returns:
+        Number of objects deleted
+    """
+    s3 = get_s3_client()
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    paginator = s3.get_paginator('list_objects_v2')
+
+    deleted = 0
+    batch = []
+
+    def flush():
+        nonlocal deleted
+        response = s3.delete_objects(Bucket=bucket, Delete={'Objects': list(batch), 'Quiet': True})
+        errors = response.get('Errors', [])
+        for error in errors:
+            logger.error("Error deleting S3 object %s: %s", error.get('Key'), error.get('Message'))
+        deleted += len(batch) - len(errors)
+        batch.clear()
+
+    try:
+        with timed('s3'):
+            for prefix in prefixes:
+                for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+                    for obj in page.get('Contents', []):
+                        batch.append({'Key': obj['Key']})
+                        if len(batch) == S3_DELETE_BATCH_SIZE:
+                            flush()
+            if batch:
+                flush()
+    except Exception as e:
+        logger.error("Error deleting S3 objects: %s", e)
+
+    return deleted
@@ -1,9 +1,11 @@
 from rest_framework import status, viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from madlibs.models import UserFilledMadlibs
+from madlibs.models import UserFilledMadlibs, MadLibTemplate
+from madlibs.renderer import StoryRenderer
 from .models import ImageGenerationModel
 from .utils import upload_ai_image
+from core.services import services
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,8 +21,9 @@ class ImageGenerationViewSet(viewsets.ViewSet):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.image_gen_model = ImageGenerationModel()
-        self.madlib_service = UserFilledMadlibs()
+        self.image_gen_model = services.get(ImageGenerationModel)
+        self.madlib_service = services.get(UserFilledMadlibs)
+        self.renderer = StoryRenderer(services.get(MadLibTemplate))
 
     def get_permissions(self):
         """
@@ -51,7 +54,7 @@ class ImageGenerationViewSet(viewsets.ViewSet):
         success = self.madlib_service.update_image_url(madlib_id, image_url)
 
         if not success:
-            logger.warning(f"Image {operation_name} but failed to update image url madlib collection")
+            logger.warning("Image %s but failed to update image url madlib collection", operation_name)
             return Response(
                 {
                     'url': image_url,
@@ -60,7 +63,7 @@ class ImageGenerationViewSet(viewsets.ViewSet):
                 status=status.HTTP_200_OK
             )
 
-        logger.info(f"Successfully {operation_name} and updated image for madlib: {madlib_id}")
+        logger.info("Successfully %s and updated image for madlib: %s", operation_name, madlib_id)
         return Response(
             {
                 'url': image_url,
@@ -75,10 +78,12 @@ class ImageGenerationViewSet(viewsets.ViewSet):
         """
         Generate an AI image for a madlib and update the madlib with the image URL.
 
+        The prompt text is rendered server side from the stored madlib and its
+        template; a client supplied madlib_text is ignored.
+
         Expected JSON:
         {
             "madlib_id": "507f1f77bcf86cd799439011",
-            "madlib_text": "Once upon a time there was a big dog",
             "extra_prompt_args": {
                 "style": "watercolor painting",
                 "aspect_ratio": "16:9",
@@ -91,10 +96,10 @@ class ImageGenerationViewSet(viewsets.ViewSet):
         """
         try:
             data = request.data
-            logger.debug(f"Generating image for madlib: {data.get('madlib_id', 'N/A')}")
+            logger.debug("Generating image for madlib: %s", data.get('madlib_id', 'N/A'))
 
             # Validate required fields
-            required_fields = ['madlib_id', 'madlib_text']
+            required_fields = ['madlib_id']
             if not all(field in data for field in required_fields):
                 logger.warning("Missing required fields in image generation request")
                 return Response(
@@ -103,14 +108,23 @@ class ImageGenerationViewSet(viewsets.ViewSet):
                 )
 
             madlib_id = data['madlib_id']
-            madlib_text = data['madlib_text']
             extra_prompt_args = data.get('extra_prompt_args', None)
 
-            # Validate madlib_text is not empty
-            if not madlib_text.strip():
-                logger.warning("Empty madlib_text in image generation request")
+            madlib = self.madlib_service.get_by_id(str(madlib_id))
+            if not madlib:
+                logger.warning("Image generation requested for unknown madlib: %s", madlib_id)
+                return Response(
+                    {'error': 'Madlib not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+            madlib_text = self.renderer.render_madlib(madlib)
+
+            # Validate the rendered story is not empty
+            if not madlib_text or not madlib_text.strip():
+                logger.warning("Madlib %s rendered to empty text", madlib_id)
                 return Response(
-                    {'error': 'madlib_text cannot be empty'},
+                    {'error': 'Madlib story is empty'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
@@ -122,7 +136,7 @@ class ImageGenerationViewSet(viewsets.ViewSet):
             )
 
             if not image_url:
-                logger.error(f"Failed to generate image for madlib: {madlib_id}")
+                logger.error("Failed to generate image for madlib: %s", madlib_id)
                 return Response(
                     {'error': 'Failed to generate or upload image'},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -132,7 +146,7 @@ class ImageGenerationViewSet(viewsets.ViewSet):
             return self._handle_image_url_update(image_url, madlib_id, 'generated')
 
         except Exception as e:
-            logger.error(f"Error generating image: {e}")
+            logger.error("Error generating image: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -153,7 +167,7 @@ class ImageGenerationViewSet(viewsets.ViewSet):
             madlib_id = request.data.get('madlib_id')
             file = request.FILES.get('image')
 
-            logger.debug(f"Uploading image for madlib: {madlib_id}")
+            logger.debug("Uploading image for madlib: %s", madlib_id)
 
             # Validate required fields
             if not madlib_id:
@@ -174,7 +188,7 @@ class ImageGenerationViewSet(viewsets.ViewSet):
             url = upload_ai_image(file, madlib_id)
 
             if not url:
-                logger.error(f"Failed to upload image for madlib: {madlib_id}")
+                logger.error("Failed to upload image for madlib: %s", madlib_id)
                 return Response(
                     {'error': 'Upload failed'},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -184,7 +198,7 @@ class ImageGenerationViewSet(viewsets.ViewSet):
             return self._handle_image_url_update(url, madlib_id, 'uploaded')
 
         except Exception as e:
-            logger.error(f"Error uploading image: {e}")
+            logger.error("Error uploading image: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
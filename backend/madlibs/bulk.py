@@ -0,0 +1,244 @@
+import json
+import logging
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Optional, List, Dict, Iterable, Iterator, Tuple
+
+from bson import ObjectId
+from django.conf import settings
+from pymongo.errors import BulkWriteError
+from core.user_stats import bulk_increment_user_stats
+from .renderer import compile_template
+from .search import template_search_index
+
+logger = logging.getLogger(__name__)
+
+# (position in the input, parsed item or None, parse error or None)
+BulkItem = Tuple[int, Optional[Dict], Optional[str]]
+
+
+def iter_ndjson(lines: Iterable) -> Iterator[BulkItem]:
+    """
+    Parse newline-delimited JSON one line at a time; blank lines are skipped
+    and a bad line becomes an error for that item only.
+
+    Args:
+        lines: Iterable of str or bytes lines (e.g. an open file)
+    """
+    index = 0
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+            yield (index, item, None) if isinstance(item, dict) else (index, None, 'Item must be a JSON object')
+        except ValueError as e:
+            yield index, None, f"Invalid JSON: {e}"
+        index += 1
+
+
+def iter_json_items(items) -> Iterator[BulkItem]:
+    """
+    Wrap an already parsed JSON array (or {"items": [...]}) as bulk items.
+
+    Raises:
+        ValueError: If the payload is not a list of items
+    """
+    if isinstance(items, dict):
+        items = items.get('items')
+    if not isinstance(items, list):
+        raise ValueError('Expected a JSON array of items or {"items": [...]}')
+    for index, item in enumerate(items):
+        yield (index, item, None) if isinstance(item, dict) else (index, None, 'Item must be a JSON object')
+
+
+def template_blank_ids(template: Dict) -> set:
+    """IDs of the blanks a template's story actually uses"""
+    return {value for is_blank, value in compile_template(template) if is_blank}
+
+
+def validate_template(item: Dict) -> Optional[str]:
+    """Same rules as MadLibTemplateViewSet.create, plus well-formed blanks"""
+    for field in ('title', 'story'):
+        if field not in item:
+            return f"Missing required field: {field}"
+    if not isinstance(item['title'], str) or not item['title'].strip():
+        return 'Title cannot be empty'
+    blanks = item.get('blanks', [])
+    if not isinstance(blanks, list) or not all(isinstance(b, dict) and 'id' in b for b in blanks):
+        return 'blanks must be a list of objects with an id'
+    ids = [str(b['id']) for b in blanks]
+    if len(ids) != len(set(ids)):
+        return 'Duplicate blank ids'
+    return None
+
+
+def validate_filled(item: Dict, templates: Dict[str, Dict]) -> Optional[str]:
+    """
+    Check a filled madlib against its template: every blank the story uses
+    must be filled, and only those.
+
+    Args:
+        item: Filled madlib as submitted (template_id, creator_id, inputted_blanks)
+        templates: Loaded templates by ID string
+    """
+    for field in ('template_id', 'creator_id', 'inputted_blanks'):
+        if field not in item:
+            return f"Missing required field: {field}"
+    if not (ObjectId.is_valid(str(item['template_id'])) and ObjectId.is_valid(str(item['creator_id']))):
+        return 'Invalid template_id or creator_id format'
+    if not isinstance(item['inputted_blanks'], list) or \
+            not all(isinstance(b, dict) and 'id' in b for b in item['inputted_blanks']):
+        return 'inputted_blanks must be a list of objects with an id'
+
+    template = templates.get(str(item['template_id']))
+    if template is None:
+        return f"Template not found: {item['template_id']}"
+    expected = template_blank_ids(template)
+    given = {str(b['id']) for b in item['inputted_blanks']}
+    if given - expected:
+        return f"Unknown blanks: {sorted(given - expected)}"
+    if expected - given:
+        return f"Missing blanks: {sorted(expected - given)}"
+    return None
+
+
+class BulkCreator:
+    """
+    Create templates or filled madlibs in bulk.
+
+    Input is consumed chunk_size items at a time, so a management command can
+    stream a file of any size. Each chunk is validated (filled madlibs against
+    their templates, fetched with one get_many per chunk) and written with a
+    single insert_many(ordered=False): one bad document does not stop the
+    rest of its chunk. Every rejected item gets a result entry with the
+    reason, and (unless record_ids is off) every created one its new id.
+    """
+
+    def __init__(self, template_service, madlibs_service, chunk_size: Optional[int] = None,
+                 record_ids: bool = True):
+        """
+        Args:
+            template_service: MadLibTemplate instance
+            madlibs_service: UserFilledMadlibs instance
+            chunk_size: Documents per insert_many (default settings.BULK_CREATE_CHUNK_SIZE)
+            record_ids: Whether to list created ids in the report (off for very large imports)
+        """
+        self.template_service = template_service
+        self.madlibs_service = madlibs_service
+        self.chunk_size = chunk_size or settings.BULK_CREATE_CHUNK_SIZE
+        self.record_ids = record_ids
+
+    @staticmethod
+    def _new_report() -> Dict:
+        return {'created': 0, 'failed': 0, 'results': []}
+
+    def _chunks(self, items: Iterable[BulkItem]) -> Iterator[List[BulkItem]]:
+        iterator = iter(items)
+        while True:
+            chunk = list(islice(iterator, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    @staticmethod
+    def _fail(report: Dict, index: int, error: str):
+        report['failed'] += 1
+        report['results'].append({'index': index, 'error': error})
+
+    def _insert(self, collection, docs: List[Tuple[int, Dict]], report: Dict) -> List[Dict]:
+        """
+        insert_many one chunk, recording per-document outcomes.
+
+        Returns:
+            The documents that were inserted (with their new _id)
+        """
+        if not docs:
+            return []
+        # Assigned here rather than by the driver so ids are known even when the insert raises
+        for _, doc in docs:
+            doc['_id'] = ObjectId()
+        failed = {}
+        try:
+            collection.insert_many([doc for _, doc in docs], ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get('writeErrors', []):
+                failed[err['index']] = err.get('errmsg', 'Write failed')
+
+        inserted = []
+        for position, (index, doc) in enumerate(docs):
+            if position in failed:
+                self._fail(report, index, failed[position])
+            else:
+                report['created'] += 1
+                if self.record_ids:
+                    report['results'].append({'index': index, 'id': str(doc['_id'])})
+                inserted.append(doc)
+        return inserted
+
+    def create_templates(self, items: Iterable[BulkItem]) -> Dict:
+        """
+        Bulk create story templates.
+
+        Returns:
+            {'created', 'failed', 'results': [{'index', 'id'} | {'index', 'error'}]}
+        """
+        report = self._new_report()
+        for chunk in self._chunks(items):
+            docs = []
+            for index, item, error in chunk:
+                error = error or validate_template(item)
+                if error:
+                    self._fail(report, index, error)
+                    continue
+                doc = {key: value for key, value in item.items() if key != '_id'}
+                doc['version'] = 1
+                docs.append((index, doc))
+
+            for doc in self._insert(self.template_service.collection, docs, report):
+                template_search_index.add(str(doc['_id']), doc.get('title'))
+        report['results'].sort(key=lambda result: result['index'])
+        logger.info("Bulk template create: %s created, %s failed", report['created'], report['failed'])
+        return report
+
+    def create_filled(self, items: Iterable[BulkItem]) -> Dict:
+        """
+        Bulk create filled madlibs, validating blanks against their templates.
+
+        Returns:
+            {'created', 'failed', 'results': [{'index', 'id'} | {'index', 'error'}]}
+        """
+        report = self._new_report()
+        for chunk in self._chunks(items):
+            valid_ids = []
+            for _, item, error in chunk:
+                if not error and ObjectId.is_valid(str(item.get('template_id'))):
+                    valid_ids.append(str(item['template_id']))
+            templates = self.template_service.get_many(valid_ids) if valid_ids else {}
+
+            now = datetime.now(timezone.utc)
+            docs = []
+            for index, item, error in chunk:
+                error = error or validate_filled(item, templates)
+                if error:
+                    self._fail(report, index, error)
+                    continue
+                docs.append((index, {
+                    'template_id': ObjectId(item['template_id']),
+                    'creator_id': ObjectId(item['creator_id']),
+                    'created_at': now,
+                    'updated_at': now,
+                    'public': item.get('public', True) is not False,
+                    'content': item['inputted_blanks'],
+                }))
+
+            inserted = self._insert(self.madlibs_service.collection, docs, report)
+            bulk_increment_user_stats(self.madlibs_service.users_collection,
+                                      [(doc['creator_id'], 1, 0) for doc in inserted])
+            self.madlibs_service.fan_out(*inserted)
+        report['results'].sort(key=lambda result: result['index'])
+        logger.info("Bulk madlib create: %s created, %s failed", report['created'], report['failed'])
+        return report
@@ -0,0 +1,127 @@
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict
+
+from bson import ObjectId
+from django.conf import settings
+from core.metrics import cache_counters
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateCache:
+    """
+    Process-local LRU cache of story templates, keyed by template ID.
+
+    Each entry remembers the template's version field. MadLibTemplate bumps
+    that version on update and evicts the entry locally on update/delete.
+    Other processes notice the change through a version poll: at most once
+    every poll_interval seconds, the next read fetches the current versions
+    of every cached ID in one projected $in query and evicts entries whose
+    version changed or whose template is gone.
+    """
+
+    def __init__(self, max_size: int = 1024, poll_interval: float = 5.0):
+        """
+        Args:
+            max_size: Maximum number of cached templates (0 disables the cache)
+            poll_interval: Seconds between cross-process version polls
+        """
+        self.max_size = max_size
+        self.poll_interval = poll_interval
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_poll = time.monotonic()
+        self._polling = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._hit_counter, self._miss_counter = cache_counters('template')
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, template_id: str, collection=None) -> Optional[Dict]:
+        """
+        Return a copy of a cached template, or None on a miss.
+
+        Args:
+            template_id: Template ID as string
+            collection: story_templates collection, used for the version poll
+        """
+        if not self.enabled:
+            return None
+        if collection is not None:
+            self._maybe_poll(collection)
+
+        with self._lock:
+            doc = self._entries.get(template_id)
+            if doc is None:
+                self.misses += 1
+                self._miss_counter.inc()
+                return None
+            self._entries.move_to_end(template_id)
+            self.hits += 1
+        self._hit_counter.inc()
+        # Callers are free to mutate what they get back
+        return copy.deepcopy(doc)
+
+    def put(self, template_id: str, doc: Dict):
+        """Cache a template document (stored as a copy)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[template_id] = copy.deepcopy(doc)
+            self._entries.move_to_end(template_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, template_id: str):
+        """Drop a template from the cache"""
+        with self._lock:
+            if self._entries.pop(template_id, None) is not None:
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _maybe_poll(self, collection):
+        with self._lock:
+            due = time.monotonic() - self._last_poll >= self.poll_interval
+            if not due or self._polling or not self._entries:
+                return
+            self._polling = True
+            cached = {template_id: doc.get('version', 0) for template_id, doc in self._entries.items()}
+
+        try:
+            current = {
+                str(doc['_id']): doc.get('version', 0)
+                for doc in collection.find(
+                    {'_id': {'$in': [ObjectId(template_id) for template_id in cached]}},
+                    {'version': 1}
+                )
+            }
+            stale = [template_id for template_id, version in cached.items()
+                     if current.get(template_id) != version]
+            for template_id in stale:
+                self.invalidate(template_id)
+            if stale:
+                logger.debug("Template cache poll evicted %s stale templates", len(stale))
+        except Exception as e:
+            logger.error("Template cache version poll failed: %s", e)
+        finally:
+            with self._lock:
+                self._polling = False
+                self._last_poll = time.monotonic()
+
+
+template_cache = TemplateCache(
+    max_size=settings.TEMPLATE_CACHE_SIZE,
+    poll_interval=settings.TEMPLATE_CACHE_POLL_INTERVAL,
+)
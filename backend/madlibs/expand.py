@@ -0,0 +1,66 @@
+import logging
+from typing import List, Dict
+
+logger = logging.getLogger(__name__)
+
+# Relations a filled madlib listing can embed with ?expand=
+EXPANDABLE = ('template', 'creator')
+
+# Reference field each relation is resolved from
+REFERENCE_FIELDS = {'template': 'template_id', 'creator': 'creator_id'}
+
+# Public profile fields embedded for a creator (never email or OAuth details)
+CREATOR_FIELDS = ['username', 'profile_picture']
+
+
+class MadlibExpander:
+    """
+    Embed the templates and creators referenced by a page of filled madlibs.
+
+    Each relation costs at most one $in query per page: templates go through
+    MadLibTemplate.get_many and so are served from the shared template cache
+    where possible; creators are fetched with a projection of public fields.
+    """
+
+    def __init__(self, template_service, user_service):
+        """
+        Args:
+            template_service: MadLibTemplate instance
+            user_service: UserOperations instance
+        """
+        self.template_service = template_service
+        self.user_service = user_service
+
+    def expand(self, madlibs: List[Dict], relations: List[str]) -> List[Dict]:
+        """
+        Add 'template' and/or 'creator' to each madlib, in place.
+
+        Madlibs whose template or creator no longer exists get None.
+
+        Args:
+            madlibs: Filled madlibs with string template_id/creator_id
+            relations: Names from EXPANDABLE
+
+        Returns:
+            The same list, for convenience
+        """
+        if not madlibs or not relations:
+            return madlibs
+
+        if 'template' in relations:
+            templates = self.template_service.get_many(
+                [m['template_id'] for m in madlibs if m.get('template_id')]
+            )
+            for madlib in madlibs:
+                madlib['template'] = templates.get(str(madlib.get('template_id')))
+
+        if 'creator' in relations:
+            creators = self.user_service.get_many(
+                [m['creator_id'] for m in madlibs if m.get('creator_id')],
+                fields=CREATOR_FIELDS
+            )
+            for madlib in madlibs:
+                madlib['creator'] = creators.get(str(madlib.get('creator_id')))
+
+        logger.debug("Expanded %s on %s madlibs", relations, len(madlibs))
+        return madlibs
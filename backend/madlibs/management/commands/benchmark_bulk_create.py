@@ -0,0 +1,68 @@
+import time
+
+from bson import ObjectId
+from django.core.management.base import BaseCommand
+from madlibs.bulk import BulkCreator
+from madlibs.models import MadLibTemplate, UserFilledMadlibs
+
+
+class Command(BaseCommand):
+    """
+    Measure filled madlib insert throughput: one insert_one per madlib (what
+    POST /api/madlibs/ does) against BulkCreator's chunked insert_many.
+
+    Everything is written against a throwaway template and creator ID and
+    deleted afterwards. Run it against a development database only.
+
+    python manage.py benchmark_bulk_create --count 5000 --chunk-size 500
+    """
+    help = "Compare single-document and bulk filled madlib insert throughput"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=2000,
+                            help="Madlibs inserted through the bulk path")
+        parser.add_argument('--single-count', type=int, default=200,
+                            help="Madlibs inserted one at a time (slow; keep it small)")
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help="Documents per insert_many (default: BULK_CREATE_CHUNK_SIZE)")
+
+    def handle(self, *args, **options):
+        template_service = MadLibTemplate()
+        madlibs_service = UserFilledMadlibs()
+
+        template_id = template_service.create({
+            'title': f"bulk benchmark {ObjectId()}",
+            'story': "The [1] [2] went to [3].",
+            'blanks': [{'id': '1', 'type': 'adjective'}, {'id': '2', 'type': 'noun'},
+                       {'id': '3', 'type': 'place'}],
+        })
+        # No user document exists for this ID, so counter updates touch nothing
+        creator_id = str(ObjectId())
+        blanks = [{'id': '1', 'input': 'brave'}, {'id': '2', 'input': 'dragon'}, {'id': '3', 'input': 'Paris'}]
+
+        try:
+            started = time.monotonic()
+            for _ in range(options['single_count']):
+                madlibs_service.new_filled_madlib(template_id, creator_id, blanks)
+            single_elapsed = time.monotonic() - started
+
+            items = ((i, {'template_id': template_id, 'creator_id': creator_id, 'inputted_blanks': blanks}, None)
+                     for i in range(options['count']))
+            creator = BulkCreator(template_service, madlibs_service,
+                                  chunk_size=options['chunk_size'], record_ids=False)
+            started = time.monotonic()
+            report = creator.create_filled(items)
+            bulk_elapsed = time.monotonic() - started
+        finally:
+            deleted = madlibs_service.collection.delete_many({'creator_id': ObjectId(creator_id)}).deleted_count
+            template_service.delete(template_id)
+
+        single_rate = options['single_count'] / single_elapsed if single_elapsed > 0 else 0
+        bulk_rate = report['created'] / bulk_elapsed if bulk_elapsed > 0 else 0
+        self.stdout.write(f"insert_one:  {options['single_count']} madlibs in {single_elapsed:.2f}s "
+                          f"({single_rate:.0f}/s)")
+        self.stdout.write(f"bulk:        {report['created']} madlibs in {bulk_elapsed:.2f}s "
+                          f"({bulk_rate:.0f}/s, chunk size {creator.chunk_size}, {report['failed']} failed)")
+        if single_rate:
+            self.stdout.write(self.style.SUCCESS(f"speedup:     {bulk_rate / single_rate:.1f}x"))
+        self.stdout.write(f"cleaned up {deleted} benchmark madlibs")
@@ -0,0 +1,73 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from madlibs.bulk import BulkCreator, iter_ndjson, iter_json_items
+from madlibs.models import MadLibTemplate, UserFilledMadlibs
+
+
+class Command(BaseCommand):
+    """
+    Import templates or filled madlibs from a file.
+
+    NDJSON files are streamed a chunk at a time, so their size is not limited
+    by memory; .json files must hold one JSON array and are read whole.
+    Items that fail validation or insertion are reported by their position
+    in the file and do not stop the import.
+
+    python manage.py bulk_import templates content_pack.ndjson
+    python manage.py bulk_import madlibs partner_export.json --chunk-size 1000
+    cat madlibs.ndjson | python manage.py bulk_import madlibs -
+    """
+    help = "Bulk create templates or filled madlibs from an NDJSON or JSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=['templates', 'madlibs'])
+        parser.add_argument('path', help="File to import, or - for stdin")
+        parser.add_argument('--format', choices=['ndjson', 'json'],
+                            help="Input format (default: json for .json files, otherwise ndjson)")
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help="Documents per insert_many (default: BULK_CREATE_CHUNK_SIZE)")
+        parser.add_argument('--max-errors', type=int, default=20,
+                            help="Number of item errors to print")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('json' if path.endswith('.json') else 'ndjson')
+
+        try:
+            stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f"Cannot open {path}: {e}")
+
+        creator = BulkCreator(MadLibTemplate(), UserFilledMadlibs(),
+                              chunk_size=options['chunk_size'], record_ids=False)
+        started = time.monotonic()
+        try:
+            if fmt == 'ndjson':
+                items = iter_ndjson(stream)
+            else:
+                try:
+                    items = iter_json_items(json.load(stream))
+                except ValueError as e:
+                    raise CommandError(f"Invalid JSON input: {e}")
+
+            if options['kind'] == 'templates':
+                report = creator.create_templates(items)
+            else:
+                report = creator.create_filled(items)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.monotonic() - started
+
+        for result in report['results'][:options['max_errors']]:
+            self.stderr.write(f"item {result['index']}: {result['error']}")
+        if report['failed'] > options['max_errors']:
+            self.stderr.write(f"... {report['failed'] - options['max_errors']} more errors")
+
+        rate = report['created'] / elapsed if elapsed > 0 else 0
+        summary = (f"{report['created']} {options['kind']} created, {report['failed']} failed "
+                   f"in {elapsed:.2f}s ({rate:.0f}/s)")
+        self.stdout.write(self.style.SUCCESS(summary) if not report['failed'] else self.style.WARNING(summary))
@@ -1,8 +1,16 @@
 from bson import ObjectId
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime, timezone
 from core.db_connect import get_collection
+from core.projection import build_projection
+from core.pagination import encode_cursor, build_cursor_filter
+from core.read_routing import for_read
+from core.user_stats import increment_user_stats, get_user_stats
+from core.fanout import fan_out_posts
+from .cache import template_cache
+from .search import template_search_index
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +21,12 @@ class MadLibTemplate:
         
     def create_indexs(self):
         self.collection.create_index([('title', 1)])
+        # Ranked full-text search; a title match counts for more than a story match
+        self.collection.create_index(
+            [('title', 'text'), ('description', 'text'), ('story', 'text')],
+            weights={'title': 10, 'description': 3, 'story': 1},
+            name='idx_template_text'
+        )
 
 
     def get_by_id(self, madlib_id: str) -> Optional[Dict]:
@@ -26,19 +40,53 @@ class MadLibTemplate:
             Dictionary containing the madlib or None if not found
         """
         try:
-            logger.debug(f"Retrieving madlib by ID: {madlib_id}")
-            result = self.collection.find_one({'_id': ObjectId(madlib_id)})
+            cached = template_cache.get(madlib_id, self.collection)
+            if cached is not None:
+                return cached
+
+            logger.debug("Retrieving madlib by ID: %s", madlib_id)
+            result = for_read(self.collection, 'templates').find_one({'_id': ObjectId(madlib_id)})
             if result:
                 result['_id'] = str(result['_id'])  # Convert ObjectId to string
-                logger.info(f"Madlib found: {madlib_id}")
+                template_cache.put(madlib_id, result)
+                logger.info("Madlib found: %s", madlib_id)
             else:
-                logger.info(f"Madlib not found: {madlib_id}")
+                logger.info("Madlib not found: %s", madlib_id)
             return result
         except Exception as e:
-            logger.error(f"Error retrieving madlib by ID {madlib_id}: {e}")
+            logger.error("Error retrieving madlib by ID %s: %s", madlib_id, e)
             return None
 
 
+    def get_many(self, madlib_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Retrieve several madlibs by ID, from the template cache where possible
+        and with one $in query for the rest
+
+        Args:
+            madlib_ids: String representations of MongoDB ObjectIds
+
+        Returns:
+            Dictionary mapping ID to madlib, for the IDs that exist
+        """
+        found = {}
+        missing = []
+        for madlib_id in dict.fromkeys(madlib_ids):
+            cached = template_cache.get(madlib_id, self.collection)
+            if cached is not None:
+                found[madlib_id] = cached
+            else:
+                missing.append(madlib_id)
+
+        if missing:
+            logger.debug("Retrieving %s madlibs by ID", len(missing))
+            for result in for_read(self.collection, 'templates').find({'_id': {'$in': [ObjectId(m) for m in missing]}}):
+                result['_id'] = str(result['_id'])
+                template_cache.put(result['_id'], result)
+                found[result['_id']] = result
+
+        return found
+
     def search_by_title(self, title: str, exact: bool = False) -> List[Dict]:
         """
         Search for madlibs by title
@@ -51,48 +99,96 @@ class MadLibTemplate:
             List of matching madlibs
         """
         try:
-            logger.debug(f"Searching madlibs by title: '{title}' (exact={exact})")
+            logger.debug("Searching madlibs by title: '%s' (exact=%s)", title, exact)
             if exact:
                 query = {'title': title}
             else:
-                # Case-insensitive regex search
-                query = {'title': {'$regex': title, '$options': 'i'}}
+                # Case-insensitive substring match; the input is literal text, not a pattern
+                query = {'title': {'$regex': re.escape(title), '$options': 'i'}}
 
-            results = list(self.collection.find(query))
+            results = list(for_read(self.collection, 'templates').find(query))
 
             # Convert ObjectId to string for JSON serialization
             for result in results:
                 if isinstance(result.get('_id'), ObjectId):
                     result['_id'] = str(result['_id'])
 
-            logger.info(f"Search found {len(results)} madlibs matching '{title}'")
+            logger.info("Search found %s madlibs matching '%s'", len(results), title)
             return results
         except Exception as e:
-            logger.error(f"Error searching madlibs by title '{title}': {e}")
+            logger.error("Error searching madlibs by title '%s': %s", title, e)
             return []
 
-    def get_all(self, limit: int = 100) -> List[Dict]:
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[List[Dict], int]:
+        """
+        Ranked full-text search over title, description and story
+
+        Args:
+            query: Search terms
+            limit: Maximum number of results to return
+            offset: Number of results to skip
+
+        Returns:
+            Tuple of (results ordered by relevance, total number of matches)
+        """
+        try:
+            logger.debug("Text search for templates: '%s' (limit=%s, offset=%s)", query, limit, offset)
+            text_filter = {'$text': {'$search': query}}
+            cursor = for_read(self.collection, 'templates').find(
+                text_filter,
+                {'score': {'$meta': 'textScore'}}
+            ).sort([('score', {'$meta': 'textScore'})]).skip(offset).limit(limit)
+            results = list(cursor)
+            for result in results:
+                result['_id'] = str(result['_id'])
+            total = for_read(self.collection, 'templates').count_documents(text_filter)
+
+            logger.info("Text search found %s templates matching '%s'", total, query)
+            return results, total
+        except Exception as e:
+            logger.error("Error in text search for '%s': %s", query, e)
+            return [], 0
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """
+        Suggest template titles for a partially typed query
+
+        Args:
+            prefix: What the user has typed so far
+            limit: Maximum number of suggestions
+
+        Returns:
+            List of {'_id', 'title'} dictionaries
+        """
+        try:
+            return template_search_index.suggest(prefix, self.collection, limit=limit)
+        except Exception as e:
+            logger.error("Error autocompleting '%s': %s", prefix, e)
+            return []
+
+    def get_all(self, limit: int = 100, fields: Optional[List[str]] = None) -> List[Dict]:
         """
         Retrieve all madlibs with optional limit
 
         Args:
             limit: Maximum number of madlibs to retrieve
+            fields: Optional list of fields to return (defaults to whole document)
 
         Returns:
             List of all madlibs
         """
         try:
-            logger.debug(f"Retrieving all madlibs (limit={limit})")
-            results = list(self.collection.find().limit(limit))
+            logger.debug("Retrieving all madlibs (limit=%s, fields=%s)", limit, fields)
+            results = list(for_read(self.collection, 'templates').find({}, build_projection(fields)).limit(limit))
 
             for result in results:
                 if isinstance(result.get('_id'), ObjectId):
                     result['_id'] = str(result['_id'])
 
-            logger.info(f"Retrieved {len(results)} madlibs")
+            logger.info("Retrieved %s madlibs", len(results))
             return results
         except Exception as e:
-            logger.error(f"Error retrieving all madlibs: {e}")
+            logger.error("Error retrieving all madlibs: %s", e)
             return []
 
     def create(self, madlib_data: Dict) -> Optional[str]:
@@ -106,17 +202,19 @@ class MadLibTemplate:
             String ID of created madlib or None if failed
         """
         try:
-            logger.debug(f"Creating new madlib with title: '{madlib_data.get('title', 'N/A')}'")
+            logger.debug("Creating new madlib with title: '%s'", madlib_data.get('title', 'N/A'))
+            madlib_data.setdefault('version', 1)
             result = self.collection.insert_one(madlib_data)
-            logger.info(f"Madlib created: {result.inserted_id}")
+            template_search_index.add(str(result.inserted_id), madlib_data.get('title'))
+            logger.info("Madlib created: %s", result.inserted_id)
             return str(result.inserted_id)
         except Exception as e:
-            logger.error(f"Error creating madlib: {e}")
+            logger.error("Error creating madlib: %s", e)
             return None
 
     def update(self, madlib_id: str, update_data: Dict) -> bool:
         """
-        Update an existing madlib
+        Update an existing madlib and bump its version (invalidates cached copies)
 
         Args:
             madlib_id: String representation of MongoDB ObjectId
@@ -126,18 +224,29 @@ class MadLibTemplate:
             True if update was successful, False otherwise
         """
         try:
-            logger.debug(f"Updating madlib {madlib_id} with fields: {list(update_data.keys())}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Updating madlib %s with fields: %s", madlib_id, list(update_data))
+            # The version is managed here and _id is immutable
+            update_data = {key: value for key, value in update_data.items() if key not in ('_id', 'version')}
+            if not update_data:
+                logger.info("No changes made to madlib: %s", madlib_id)
+                return False
+            # Matches only if some field actually changes, so a no-op update
+            # neither bumps the version nor evicts cached copies
             result = self.collection.update_one(
-                {'_id': ObjectId(madlib_id)},
-                {'$set': update_data}
+                {'_id': ObjectId(madlib_id), '$or': [{key: {'$ne': value}} for key, value in update_data.items()]},
+                {'$set': update_data, '$inc': {'version': 1}}
             )
             if result.modified_count > 0:
-                logger.info(f"Madlib updated: {madlib_id}")
+                template_cache.invalidate(madlib_id)
+                if 'title' in update_data:
+                    template_search_index.add(madlib_id, update_data['title'])
+                logger.info("Madlib updated: %s", madlib_id)
             else:
-                logger.info(f"No changes made to madlib: {madlib_id}")
+                logger.info("No changes made to madlib: %s", madlib_id)
             return result.modified_count > 0
         except Exception as e:
-            logger.error(f"Error updating madlib {madlib_id}: {e}")
+            logger.error("Error updating madlib %s: %s", madlib_id, e)
             return False
 
     def delete(self, madlib_id: str) -> bool:
@@ -151,20 +260,26 @@ class MadLibTemplate:
             True if deletion was successful, False otherwise
         """
         try:
-            logger.debug(f"Deleting madlib: {madlib_id}")
+            logger.debug("Deleting madlib: %s", madlib_id)
             result = self.collection.delete_one({'_id': ObjectId(madlib_id)})
+            template_cache.invalidate(madlib_id)
+            template_search_index.remove(madlib_id)
             if result.deleted_count > 0:
-                logger.info(f"Madlib deleted: {madlib_id}")
+                logger.info("Madlib deleted: %s", madlib_id)
             else:
-                logger.info(f"Madlib not found: {madlib_id}")
+                logger.info("Madlib not found: %s", madlib_id)
             return result.deleted_count > 0
         except Exception as e:
-            logger.error(f"Error deleting madlib {madlib_id}: {e}")
+            logger.error("Error deleting madlib %s: %s", madlib_id, e)
             return False
 
 class UserFilledMadlibs:
     def __init__(self):
         self.collection = get_collection('filled_madlibs')
+        self.users_collection = get_collection('users')
+        self.image_events = get_collection('image_events')
+        self.follows_collection = get_collection('follows')
+        self.inbox_collection = get_collection('feed_inbox')
         self._create_indexes()
 
     def _create_indexes(self):
@@ -178,9 +293,19 @@ class UserFilledMadlibs:
             # MEDIUM: Template lookups (used in aggregations)
             self.collection.create_index([("template_id", 1)], name="idx_template_id")
 
+            # Per-creator pages, newest first (by_creator), and cascade deletes of a user.
+            # Supersedes the single-field idx_creator_id (and creator_id_1).
+            self.collection.create_index(
+                [("creator_id", 1), ("created_at", -1), ("_id", -1)],
+                name="idx_creator_created_at"
+            )
+
+            # Cascade deletes remove a madlib's image events
+            self.image_events.create_index([("madlib_id", 1)], name="idx_madlib_id")
+
             logger.info("Filled madlib indexes created successfully")
         except Exception as e:
-            logger.error(f"Error creating filled madlib indexes: {e}")
+            logger.error("Error creating filled madlib indexes: %s", e)
 
     def new_filled_madlib(self, template_id: str, creator_id: str, inputted_blanks: List[Dict]) -> Optional[str]:
         """
@@ -202,7 +327,8 @@ class UserFilledMadlibs:
             String ID of the new filled madlib or None if failed
         """
         try:
-            logger.debug(f"Creating filled madlib: template_id={template_id}, creator_id={creator_id}, blanks_count={len(inputted_blanks)}")
+            logger.debug("Creating filled madlib: template_id=%s, creator_id=%s, blanks_count=%s",
+                         template_id, creator_id, len(inputted_blanks))
             now = datetime.now(timezone.utc)
 
             madlib_data = {
@@ -215,12 +341,29 @@ class UserFilledMadlibs:
             }
 
             result = self.collection.insert_one(madlib_data)
-            logger.info(f"Filled madlib created: {result.inserted_id}")
+            increment_user_stats(self.users_collection, madlib_data['creator_id'], madlibs=1)
+            logger.info("Filled madlib created: %s", result.inserted_id)
+            self.fan_out(madlib_data)
             return str(result.inserted_id)
         except Exception as e:
-            logger.error(f"Error creating filled madlib: template_id={template_id}, creator_id={creator_id}, error={e}")
+            logger.error("Error creating filled madlib: template_id=%s, creator_id=%s, error=%s", template_id, creator_id, e)
             return None
 
+    def fan_out(self, *madlibs: Dict) -> int:
+        """
+        Copy newly created madlibs into their creators' followers' feed inboxes.
+        A failure is logged and not raised: the madlibs already exist, and
+        followers still see them on the creator's page.
+
+        Returns:
+            Number of inbox entries written
+        """
+        try:
+            return fan_out_posts(self.users_collection, self.follows_collection, self.inbox_collection, madlibs)
+        except Exception as e:
+            logger.error("Error fanning out %s madlibs to followers: %s", len(madlibs), e)
+            return 0
+
     def update_filled_madlib(self, filled_madlib_id: str, inputted_blanks: List[Dict]) -> bool:
         """
         Update the filled blanks and modified time for a madlib
@@ -239,7 +382,7 @@ class UserFilledMadlibs:
             True if update was successful, False otherwise
         """
         try:
-            logger.debug(f"Updating filled madlib {filled_madlib_id} with {len(inputted_blanks)} blanks")
+            logger.debug("Updating filled madlib %s with %s blanks", filled_madlib_id, len(inputted_blanks))
             result = self.collection.update_one(
                 {'_id': ObjectId(filled_madlib_id)},
                 {'$set': {
@@ -248,12 +391,12 @@ class UserFilledMadlibs:
                 }}
             )
             if result.modified_count > 0:
-                logger.info(f"Filled madlib updated: {filled_madlib_id}")
+                logger.info("Filled madlib updated: %s", filled_madlib_id)
             else:
-                logger.info(f"No changes made to filled madlib: {filled_madlib_id}")
+                logger.info("No changes made to filled madlib: %s", filled_madlib_id)
             return result.modified_count > 0
         except Exception as e:
-            logger.error(f"Error updating filled madlib {filled_madlib_id}: {e}")
+            logger.error("Error updating filled madlib %s: %s", filled_madlib_id, e)
             return False
 
     def update_image_url(self, filled_madlib_id: str, image_url: str) -> bool:
@@ -268,7 +411,7 @@ class UserFilledMadlibs:
             True if update was successful, False otherwise
         """
         try:
-            logger.debug(f"Updating image URL for madlib {filled_madlib_id}")
+            logger.debug("Updating image URL for madlib %s", filled_madlib_id)
             result = self.collection.update_one(
                 {'_id': ObjectId(filled_madlib_id)},
                 {'$set': {
@@ -277,38 +420,18 @@ class UserFilledMadlibs:
                 }}
             )
             if result.matched_count == 0:
-                logger.warning(f"Madlib not found: {filled_madlib_id}")
+                logger.warning("Madlib not found: %s", filled_madlib_id)
                 return False
 
             if result.modified_count > 0:
-                logger.info(f"Image URL updated for madlib: {filled_madlib_id}")
+                # Counted as an image for the madlib by the engagement rollups
+                self.image_events.insert_one({'madlib_id': ObjectId(filled_madlib_id)})
+                logger.info("Image URL updated for madlib: %s", filled_madlib_id)
             else:
-                logger.info(f"No changes made to madlib (same URL): {filled_madlib_id}")
+                logger.info("No changes made to madlib (same URL): %s", filled_madlib_id)
             return True
         except Exception as e:
-            logger.error(f"Error updating image URL for madlib {filled_madlib_id}: {e}")
-            return False
-
-    def delete_filled_madlib(self, filled_madlib_id: str) -> bool:
-        """
-        Delete a filled madlib
-
-        Args:
-            filled_madlib_id: String representation of MongoDB ObjectId
-
-        Returns:
-            True if deletion was successful, False otherwise
-        """
-        try:
-            logger.debug(f"Deleting filled madlib: {filled_madlib_id}")
-            result = self.collection.delete_one({'_id': ObjectId(filled_madlib_id)})
-            if result.deleted_count > 0:
-                logger.info(f"Filled madlib deleted: {filled_madlib_id}")
-            else:
-                logger.info(f"Filled madlib not found: {filled_madlib_id}")
-            return result.deleted_count > 0
-        except Exception as e:
-            logger.error(f"Error deleting filled madlib {filled_madlib_id}: {e}")
+            logger.error("Error updating image URL for madlib %s: %s", filled_madlib_id, e)
             return False
 
     def get_by_id(self, filled_madlib_id: str) -> Optional[Dict]:
@@ -322,59 +445,121 @@ class UserFilledMadlibs:
             Dictionary containing the filled madlib or None if not found
         """
         try:
-            logger.debug(f"Retrieving filled madlib by ID: {filled_madlib_id}")
+            logger.debug("Retrieving filled madlib by ID: %s", filled_madlib_id)
             result = self.collection.find_one({'_id': ObjectId(filled_madlib_id)})
             if result:
                 result['_id'] = str(result['_id'])
                 result['template_id'] = str(result['template_id'])
                 result['creator_id'] = str(result['creator_id'])
-                logger.info(f"Filled madlib found: {filled_madlib_id}")
+                logger.info("Filled madlib found: %s", filled_madlib_id)
             else:
-                logger.info(f"Filled madlib not found: {filled_madlib_id}")
+                logger.info("Filled madlib not found: %s", filled_madlib_id)
             return result
         except Exception as e:
-            logger.error(f"Error retrieving filled madlib {filled_madlib_id}: {e}")
+            logger.error("Error retrieving filled madlib %s: %s", filled_madlib_id, e)
             return None
 
-    def get_by_creator(self, creator_id: str) -> List[Dict]:
+    def get_many(self, filled_madlib_ids: List[str], fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Retrieve several filled madlibs with one $in query
+
+        Args:
+            filled_madlib_ids: String representations of MongoDB ObjectIds
+            fields: Optional list of fields to return (defaults to whole document)
+
+        Returns:
+            List of the filled madlibs that exist (in no particular order)
+        """
+        logger.debug("Retrieving %s filled madlibs by ID", len(filled_madlib_ids))
+        results = list(self.collection.find(
+            {'_id': {'$in': [ObjectId(i) for i in filled_madlib_ids]}},
+            build_projection(fields)
+        ))
+        for result in results:
+            for key in ('_id', 'template_id', 'creator_id'):
+                if isinstance(result.get(key), ObjectId):
+                    result[key] = str(result[key])
+        return results
+
+    def get_by_creator(self, creator_id: str, fields: Optional[List[str]] = None, limit: int = 20,
+                       cursor: Optional[str] = None, public: Optional[bool] = None) -> Tuple[List[Dict], Optional[str]]:
         """
-        Retrieve all filled madlibs created by a user
+        Retrieve one page of a user's filled madlibs, newest first
 
         Args:
             creator_id: String representation of MongoDB ObjectId
+            fields: Optional list of fields to return (defaults to whole document)
+            limit: Maximum number of madlibs on the page
+            cursor: Cursor returned with the previous page, or None for the first page
+            public: If set, only return madlibs whose public flag matches
 
         Returns:
-            List of filled madlibs created by the user
+            Tuple of (madlibs, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
         """
-        try:
-            logger.debug(f"Retrieving filled madlibs by creator: {creator_id}")
-            results = list(self.collection.find({'creator_id': ObjectId(creator_id)}))
-            for result in results:
-                result['_id'] = str(result['_id'])
-                result['template_id'] = str(result['template_id'])
-                result['creator_id'] = str(result['creator_id'])
-            logger.info(f"Retrieved {len(results)} filled madlibs for creator {creator_id}")
-            return results
-        except Exception as e:
-            logger.error(f"Error retrieving madlibs by creator {creator_id}: {e}")
-            return []
-        
-    def get_all(self, limit: int = 100) -> List[Dict]:
+        logger.debug("Retrieving filled madlibs by creator: %s (limit=%s)", creator_id, limit)
+        query = {'creator_id': ObjectId(creator_id)}
+        if public is not None:
+            query['public'] = public
+        query.update(build_cursor_filter(cursor))
+
+        projection = build_projection(fields)
+        if projection is not None:
+            # The cursor is built from these even when the caller did not ask for them
+            projection.setdefault('created_at', 1)
+
+        # Fetch one extra document to know whether another page exists
+        results = self.collection.find(
+            query,
+            projection,
+            sort=[('created_at', -1), ('_id', -1)],
+            limit=limit + 1
+        )
+
+        madlibs = []
+        next_cursor = None
+        for doc in results:
+            if len(madlibs) == limit:
+                last = madlibs[-1]
+                next_cursor = encode_cursor(last['created_at'], last['_id'])
+                break
+            madlibs.append(doc)
+
+        for madlib in madlibs:
+            for key in ('_id', 'template_id', 'creator_id'):
+                if isinstance(madlib.get(key), ObjectId):
+                    madlib[key] = str(madlib[key])
+        logger.info("Retrieved %s filled madlibs for creator %s", len(madlibs), creator_id)
+        return madlibs, next_cursor
+
+    def get_creator_stats(self, creator_id: str) -> Dict[str, int]:
+        """
+        Summary counters for a creator, read from the user document
+
+        Returns:
+            Dictionary with madlibs_count and likes_received
+        """
+        return get_user_stats(self.users_collection, creator_id)
+
+    def get_all(self, limit: int = 100, fields: Optional[List[str]] = None) -> List[Dict]:
         """
         Retrieve all user-filled madlibs with optional limit.
 
         Args:
             limit: Maximum number of filled madlibs to retrieve.
+            fields: Optional list of fields to return (defaults to whole document).
 
         Returns:
             List[Dict]: All filled madlibs up to the limit.
         """
         try:
-            logger.debug(f"Retrieving all user-filled madlibs (limit={limit})")
+            logger.debug("Retrieving all user-filled madlibs (limit=%s, fields=%s)", limit, fields)
 
             results = list(
                 self.collection
-                .find({})
+                .find({}, build_projection(fields))
                 .sort("created_at", -1) 
                 .limit(limit)
             )
@@ -387,9 +572,9 @@ class UserFilledMadlibs:
                 if isinstance(result.get('creator_id'), ObjectId):
                     result['creator_id'] = str(result['creator_id'])
 
-            logger.info(f"Retrieved {len(results)} user-filled madlibs")
+            logger.info("Retrieved %s user-filled madlibs", len(results))
             return results
 
         except Exception as e:
-            logger.error(f"Error retrieving user-filled madlibs: {e}")
+            logger.error("Error retrieving user-filled madlibs: %s", e)
             return []
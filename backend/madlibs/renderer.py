@@ -0,0 +1,160 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional, List, Dict, Tuple
+
+from django.conf import settings
+from core.metrics import cache_counters
+
+# "[1]" refers to a blank by id, "{adjective}" by placeholder/type
+PLACEHOLDER_RE = re.compile(r'\[(\w+)\]|\{(\w+)\}')
+
+# A compiled story: literal text (False, text) and blanks (True, blank_id)
+Tokens = List[Tuple[bool, str]]
+
+
+def compile_template(template: Dict) -> Tokens:
+    """
+    Compile a template's story into a token list.
+
+    Templates either carry a pre-split 'template' list of
+    {"type": "text", "content": ...} / {"type": "blank", "id": ...} parts,
+    or a 'story' string with [id] or {placeholder} markers. Named markers
+    are matched to blanks by placeholder, then by type; repeated names take
+    the matching blanks in order.
+
+    Args:
+        template: Template document
+
+    Returns:
+        List of (is_blank, value) tokens
+    """
+    parts = template.get('template')
+    if isinstance(parts, list):
+        tokens = []
+        for part in parts:
+            if part.get('type') == 'blank':
+                tokens.append((True, str(part.get('id'))))
+            elif part.get('content'):
+                tokens.append((False, part['content']))
+        return tokens
+
+    by_name: Dict[str, List[str]] = {}
+    for blank in template.get('blanks') or []:
+        blank_id = str(blank.get('id'))
+        for key in ('placeholder', 'type'):
+            name = blank.get(key)
+            if name:
+                by_name.setdefault(str(name), []).append(blank_id)
+
+    tokens = []
+    seen: Dict[str, int] = {}
+    story = template.get('story') or ''
+    position = 0
+    for match in PLACEHOLDER_RE.finditer(story):
+        if match.start() > position:
+            tokens.append((False, story[position:match.start()]))
+        blank_id, name = match.group(1), match.group(2)
+        if name is not None:
+            candidates = by_name.get(name)
+            if candidates:
+                index = seen.get(name, 0)
+                seen[name] = index + 1
+                blank_id = candidates[min(index, len(candidates) - 1)]
+            else:
+                blank_id = name
+        tokens.append((True, blank_id))
+        position = match.end()
+    if position < len(story):
+        tokens.append((False, story[position:]))
+    return tokens
+
+
+def render_tokens(tokens: Tokens, content: List[Dict]) -> str:
+    """
+    Fill a compiled story with a madlib's blanks, in one pass.
+
+    Args:
+        tokens: Output of compile_template
+        content: List of {"id", "input"} dicts from a filled madlib
+
+    Returns:
+        Final story text; unfilled blanks render as "[id]"
+    """
+    values = {str(blank.get('id')): blank.get('input', '') for blank in content or []}
+    return ''.join(
+        values.get(value, f"[{value}]") if is_blank else value
+        for is_blank, value in tokens
+    )
+
+
+class _CompiledCache:
+    """LRU of compiled token lists keyed by (template_id, version)"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, int], Tokens]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hit_counter, self._miss_counter = cache_counters('compiled_template')
+
+    def get_or_compile(self, template: Dict) -> Tokens:
+        key = (str(template.get('_id')), template.get('version', 0))
+        with self._lock:
+            tokens = self._entries.get(key)
+            if tokens is not None:
+                self._entries.move_to_end(key)
+                self._hit_counter.inc()
+                return tokens
+
+        self._miss_counter.inc()
+        tokens = compile_template(template)
+        if self.max_size > 0:
+            with self._lock:
+                self._entries[key] = tokens
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return tokens
+
+
+_compiled = _CompiledCache(settings.TEMPLATE_CACHE_SIZE)
+
+
+class StoryRenderer:
+    """Render filled madlibs server side from their (cached) templates"""
+
+    def __init__(self, template_service):
+        """
+        Args:
+            template_service: MadLibTemplate instance used to load templates
+        """
+        self.template_service = template_service
+
+    def render(self, template: Dict, madlib: Dict) -> str:
+        """Render a filled madlib against an already loaded template"""
+        return render_tokens(_compiled.get_or_compile(template), madlib.get('content'))
+
+    def render_madlib(self, madlib: Dict) -> Optional[str]:
+        """
+        Render one filled madlib.
+
+        Returns:
+            Story text, or None if the madlib's template no longer exists
+        """
+        template = self.template_service.get_by_id(str(madlib['template_id']))
+        if not template:
+            return None
+        return self.render(template, madlib)
+
+    def render_many(self, madlibs: List[Dict]) -> Dict[str, Optional[str]]:
+        """
+        Render several filled madlibs, loading each distinct template once.
+
+        Returns:
+            Dictionary mapping madlib ID to story text (None if its template is gone)
+        """
+        templates = self.template_service.get_many([str(m['template_id']) for m in madlibs])
+        rendered = {}
+        for madlib in madlibs:
+            template = templates.get(str(madlib['template_id']))
+            rendered[str(madlib['_id'])] = self.render(template, madlib) if template else None
+        return rendered
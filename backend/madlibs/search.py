@@ -0,0 +1,221 @@
+import logging
+import re
+import threading
+import time
+from typing import Optional, List, Dict, Set
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a title or query"""
+    return WORD_RE.findall((text or '').lower())
+
+
+class _TrieNode:
+    __slots__ = ('children', 'ids')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.ids: Set[str] = set()
+
+
+class PrefixTrie:
+    """Maps words to the IDs of the templates whose titles contain them"""
+
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def insert(self, word: str, template_id: str):
+        node = self.root
+        for char in word:
+            node = node.children.setdefault(char, _TrieNode())
+        node.ids.add(template_id)
+
+    def remove(self, word: str, template_id: str):
+        path = [self.root]
+        for char in word:
+            node = path[-1].children.get(char)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].ids.discard(template_id)
+
+        # Prune branches that no longer lead to any template
+        for depth in range(len(word), 0, -1):
+            node = path[depth]
+            if node.ids or node.children:
+                break
+            del path[depth - 1].children[word[depth - 1]]
+
+    def find_prefix(self, prefix: str) -> Set[str]:
+        """IDs of templates with a word starting with prefix"""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+
+        found: Set[str] = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            found.update(node.ids)
+            stack.extend(node.children.values())
+        return found
+
+
+class TemplateSearchIndex:
+    """
+    In-memory autocomplete index over template titles.
+
+    Built lazily from story_templates on first use and kept current by
+    MadLibTemplate.create/update/delete in this process. Changes made by
+    other processes are picked up by a full rebuild every refresh_interval
+    seconds (a projected scan of _id and title only), run in a background
+    thread while the current index keeps serving. Only one rebuild runs at
+    a time, and add()/remove() calls made during its scan are replayed on
+    the rebuilt index so they are not lost.
+    """
+
+    def __init__(self, refresh_interval: float = 300.0):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        # Serializes the first build; later rebuilds happen in the background
+        self._build_lock = threading.Lock()
+        self._trie = PrefixTrie()
+        self._titles: Dict[str, str] = {}
+        self._built_at: Optional[float] = None
+        self._rebuilding = False
+        # template_id -> title (None when removed) changed while a rebuild scans
+        self._pending: Dict[str, Optional[str]] = {}
+
+    def _add(self, template_id: str, title: str):
+        self._titles[template_id] = title
+        for word in set(tokenize(title)):
+            self._trie.insert(word, template_id)
+
+    def _remove(self, template_id: str):
+        title = self._titles.pop(template_id, None)
+        if title is not None:
+            for word in set(tokenize(title)):
+                self._trie.remove(word, template_id)
+
+    def add(self, template_id: str, title: str):
+        """Index a new template, or re-index one whose title changed"""
+        with self._lock:
+            if self._rebuilding:
+                self._pending[template_id] = title or ''
+            if self._built_at is None:
+                return  # picked up by the initial build
+            self._remove(template_id)
+            self._add(template_id, title or '')
+
+    def remove(self, template_id: str):
+        with self._lock:
+            if self._rebuilding:
+                self._pending[template_id] = None
+            self._remove(template_id)
+
+    def _claim_rebuild(self) -> bool:
+        """Mark a rebuild as running unless one already is; call with _lock held"""
+        if self._rebuilding:
+            return False
+        self._rebuilding = True
+        self._pending = {}
+        return True
+
+    def _run_rebuild(self, collection):
+        """Scan the collection and swap in the new index; the caller claimed the rebuild"""
+        try:
+            titles = {str(doc['_id']): doc.get('title') or '' for doc in collection.find({}, {'title': 1})}
+            with self._lock:
+                self._trie = PrefixTrie()
+                self._titles = {}
+                for template_id, title in titles.items():
+                    self._add(template_id, title)
+                # Changes made while scanning are newer than what the scan read
+                for template_id, title in self._pending.items():
+                    self._remove(template_id)
+                    if title is not None:
+                        self._add(template_id, title)
+                self._built_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._rebuilding = False
+                self._pending = {}
+        logger.debug("Template search index rebuilt with %s templates", len(titles))
+
+    def _run_rebuild_logged(self, collection):
+        try:
+            self._run_rebuild(collection)
+        except Exception as e:
+            logger.error("Template search index rebuild failed: %s", e)
+
+    def rebuild(self, collection) -> bool:
+        """
+        Rebuild the whole index from the templates collection.
+
+        Returns:
+            False if another rebuild was already running (nothing is done)
+        """
+        with self._lock:
+            if not self._claim_rebuild():
+                return False
+        self._run_rebuild(collection)
+        return True
+
+    def _ensure_fresh(self, collection):
+        with self._lock:
+            if self._built_at is not None:
+                if time.monotonic() - self._built_at < self.refresh_interval or not self._claim_rebuild():
+                    return
+                # Refresh in the background; the current index keeps serving meanwhile
+                threading.Thread(target=self._run_rebuild_logged, args=(collection,),
+                                 name='template-search-rebuild', daemon=True).start()
+                return
+        # Nothing to serve yet: concurrent first requests wait for one build
+        with self._build_lock:
+            if self._built_at is None:
+                self.rebuild(collection)
+
+    def suggest(self, query: str, collection, limit: int = 10) -> List[Dict]:
+        """
+        Suggest templates whose titles contain every word of the query, the
+        last word matching as a prefix.
+
+        Args:
+            query: Partial query typed by the user
+            collection: story_templates collection (for building the index)
+            limit: Maximum number of suggestions
+
+        Returns:
+            List of {'_id', 'title'} dicts, titles starting with the query first
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        self._ensure_fresh(collection)
+
+        with self._lock:
+            *complete, prefix = words
+            ids = self._trie.find_prefix(prefix)
+            for word in complete:
+                if not ids:
+                    break
+                ids &= self._trie.find_prefix(word)
+            titles = {template_id: self._titles[template_id] for template_id in ids}
+
+        normalized = ' '.join(words)
+        ranked = sorted(
+            titles.items(),
+            key=lambda item: (not item[1].lower().startswith(normalized), item[1].lower())
+        )
+        return [{'_id': template_id, 'title': title} for template_id, title in ranked[:limit]]
+
+
+template_search_index = TemplateSearchIndex(refresh_interval=settings.TEMPLATE_SEARCH_REFRESH_INTERVAL)
@@ -4,6 +4,7 @@ from rest_framework.test import APIClient
 from rest_framework import status
 from users.models import UserOperations
 from madlibs.models import MadLibTemplate, UserFilledMadlibs
+from core.cascade import CascadeDeleteService
 
 
 class MadLibsIntegrationTest(TestCase):
@@ -26,6 +27,7 @@ class MadLibsIntegrationTest(TestCase):
         # real DB services
         self.template_service = MadLibTemplate()
         self.madlib_service = UserFilledMadlibs()
+        self.cascade_service = CascadeDeleteService()
         self.user_service = UserOperations()
 
         # create real user in MongoDB
@@ -42,7 +44,7 @@ class MadLibsIntegrationTest(TestCase):
         self.auth_user = User.objects.create_user(
             username="auth_api_user",
             password="pass123",
-            email="auth@test.com"
+            email="int@test.com"  # same as the Mongo user, so it owns the madlibs it creates
         )
 
         # authenticate API calls
@@ -62,7 +64,7 @@ class MadLibsIntegrationTest(TestCase):
     def tearDown(self):
         if not self.skip_integration:
             if hasattr(self, "madlib_id"):
-                self.madlib_service.delete_filled_madlib(self.madlib_id)
+                self.cascade_service.delete_madlib(self.madlib_id)
 
             if hasattr(self, "template_id"):
                 self.template_service.delete(self.template_id)
@@ -134,7 +136,22 @@ class MadLibsIntegrationTest(TestCase):
         self.test_create_filled_madlib()
 
         resp = self.client.delete(f"/api/madlibs/{self.madlib_id}/")
-        self.assertIn(resp.status_code, [status.HTTP_204_NO_CONTENT, status.HTTP_200_OK])
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_retrieve_rendered_madlib(self):
+        self.test_create_filled_madlib()
+
+        resp = self.client.get(f"/api/madlibs/{self.madlib_id}/?render=1")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["rendered_text"], "The brave dragon went to Disneyland")
+
+    def test_render_batch(self):
+        self.test_create_filled_madlib()
+
+        resp = self.client.get(f"/api/madlibs/render/?ids={self.madlib_id},000000000000000000000000")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["results"][0]["rendered_text"], "The brave dragon went to Disneyland")
+        self.assertEqual(resp.data["missing"], ["000000000000000000000000"])
 
     def test_get_by_creator(self):
         self.test_create_filled_madlib()
@@ -142,3 +159,498 @@ class MadLibsIntegrationTest(TestCase):
         resp = self.client.get(f"/api/madlibs/by_creator/?creator_id={self.mongo_user_id}")
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
         self.assertGreaterEqual(len(resp.data), 1)
+
+    def test_list_expanded(self):
+        self.test_create_filled_madlib()
+
+        resp = self.client.get("/api/madlibs/?expand=template,creator&fields=content")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        mine = [m for m in resp.data["results"] if m["_id"] == self.madlib_id][0]
+        self.assertEqual(mine["template"]["title"], "Test Adventure")
+        self.assertEqual(mine["creator"]["username"], "int_test_user")
+        self.assertNotIn("email", mine["creator"])
+
+        bad = self.client.get("/api/madlibs/?expand=password")
+        self.assertEqual(bad.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_madlibs(self):
+        import json
+        blanks = [{"id": "1", "input": "brave"}, {"id": "2", "input": "dragon"}, {"id": "3", "input": "Oz"}]
+        body = "\n".join(json.dumps(item) for item in [
+            {"template_id": self.template_id, "creator_id": self.mongo_user_id, "inputted_blanks": blanks},
+            {"template_id": self.template_id, "creator_id": self.mongo_user_id, "inputted_blanks": blanks[:1]},
+        ])
+
+        resp = self.client.post("/api/madlibs/bulk/", body, content_type="application/x-ndjson")
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.auth_user.is_staff = True
+        self.auth_user.save()
+        resp = self.client.post("/api/madlibs/bulk/", body, content_type="application/x-ndjson")
+        self.assertEqual(resp.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(resp.data["created"], 1)
+        self.assertEqual(resp.data["results"][1]["error"], "Missing blanks: ['2', '3']")
+        self.cascade_service.delete_madlib(resp.data["results"][0]["id"])
+
+    def test_get_by_creator_pages(self):
+        ids = [
+            self.madlib_service.new_filled_madlib(self.template_id, self.mongo_user_id, [{"id": "1", "input": "x"}])
+            for _ in range(3)
+        ]
+        self.addCleanup(lambda: [self.cascade_service.delete_madlib(i) for i in ids])
+
+        url = f"/api/madlibs/by_creator/?creator_id={self.mongo_user_id}&limit=2"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data["count"], 2)
+        self.assertIsNotNone(first.data["next_cursor"])
+        self.assertGreaterEqual(first.data["stats"]["madlibs_count"], 3)
+
+        second = self.client.get(f"{url}&cursor={first.data['next_cursor']}")
+        first_ids = {m["_id"] for m in first.data["results"]}
+        self.assertTrue(first_ids.isdisjoint(m["_id"] for m in second.data["results"]))
+
+        private = self.client.get(f"/api/madlibs/by_creator/?creator_id={self.mongo_user_id}&public=false")
+        self.assertEqual(private.data["results"], [])
+
+
+class TemplateCacheTest(TestCase):
+    """Unit tests for the process-local template cache"""
+
+    def setUp(self):
+        from unittest.mock import Mock
+        from madlibs.cache import TemplateCache
+        self.cache = TemplateCache(max_size=2, poll_interval=0)
+        self.collection = Mock()
+
+    def test_lru_eviction(self):
+        self.cache.put('a', {'_id': 'a'})
+        self.cache.put('b', {'_id': 'b'})
+        self.cache.get('a')
+        self.cache.put('c', {'_id': 'c'})
+
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_returns_copies(self):
+        self.cache.put('a', {'_id': 'a', 'blanks': [1]})
+        self.cache.get('a')['blanks'].append(2)
+        self.assertEqual(self.cache.get('a')['blanks'], [1])
+
+    def test_version_poll_evicts_changed_and_deleted(self):
+        from bson import ObjectId
+        same, changed, deleted = str(ObjectId()), str(ObjectId()), str(ObjectId())
+        self.cache.max_size = 10
+        self.cache.put(same, {'_id': same, 'version': 1})
+        self.cache.put(changed, {'_id': changed, 'version': 1})
+        self.cache.put(deleted, {'_id': deleted, 'version': 1})
+        self.collection.find.return_value = [
+            {'_id': ObjectId(same), 'version': 1},
+            {'_id': ObjectId(changed), 'version': 2},
+        ]
+
+        self.assertIsNotNone(self.cache.get(same, self.collection))
+        self.assertIsNone(self.cache.get(changed))
+        self.assertIsNone(self.cache.get(deleted))
+        self.collection.find.assert_called_once()
+
+    def test_model_reads_through_cache(self):
+        from unittest.mock import patch
+        from bson import ObjectId
+        from madlibs.cache import TemplateCache
+        template_id = ObjectId()
+        cache = TemplateCache(max_size=10, poll_interval=3600)
+        with patch('madlibs.models.get_collection'), patch('madlibs.models.template_cache', cache):
+            service = MadLibTemplate()
+            service.collection.find_one.return_value = {'_id': template_id, 'title': 'T', 'version': 1}
+
+            first = service.get_by_id(str(template_id))
+            second = service.get_by_id(str(template_id))
+            self.assertEqual(first, second)
+            service.collection.find_one.assert_called_once()
+
+            service.collection.update_one.return_value.modified_count = 1
+            service.update(str(template_id), {'title': 'New', 'version': 99})
+            update = service.collection.update_one.call_args[0][1]
+            self.assertEqual(update, {'$set': {'title': 'New'}, '$inc': {'version': 1}})
+
+            service.get_by_id(str(template_id))
+            self.assertEqual(service.collection.find_one.call_count, 2)
+
+    def test_noop_update_keeps_version_and_cache(self):
+        from unittest.mock import patch
+        from bson import ObjectId
+        from madlibs.cache import TemplateCache
+        template_id = ObjectId()
+        cache = TemplateCache(max_size=10, poll_interval=3600)
+        with patch('madlibs.models.get_collection'), patch('madlibs.models.template_cache', cache):
+            service = MadLibTemplate()
+            service.collection.find_one.return_value = {'_id': template_id, 'title': 'T', 'version': 1}
+            service.get_by_id(str(template_id))
+
+            self.assertFalse(service.update(str(template_id), {'_id': 'x', 'version': 5}))
+            service.collection.update_one.assert_not_called()
+
+            service.collection.update_one.return_value.modified_count = 0
+            self.assertFalse(service.update(str(template_id), {'title': 'T'}))
+            query = service.collection.update_one.call_args[0][0]
+            self.assertEqual(query['$or'], [{'title': {'$ne': 'T'}}])
+
+            service.get_by_id(str(template_id))
+            service.collection.find_one.assert_called_once()
+
+
+class StoryRendererTest(TestCase):
+    """Unit tests for compiling and rendering stories"""
+
+    def test_bracket_ids(self):
+        from madlibs.renderer import compile_template, render_tokens
+        tokens = compile_template({"story": "A [1] [2]!", "blanks": []})
+        text = render_tokens(tokens, [{"id": "1", "input": "big"}, {"id": "2", "input": "dog"}])
+        self.assertEqual(text, "A big dog!")
+
+    def test_named_placeholders_in_order(self):
+        from madlibs.renderer import compile_template, render_tokens
+        tokens = compile_template({
+            "story": "{noun} met {noun} in {place}",
+            "blanks": [
+                {"id": "1", "type": "noun"},
+                {"id": "2", "type": "noun"},
+                {"id": "3", "placeholder": "place", "type": "location"},
+            ]
+        })
+        content = [{"id": "1", "input": "cat"}, {"id": "2", "input": "dog"}, {"id": "3", "input": "Rome"}]
+        self.assertEqual(render_tokens(tokens, content), "cat met dog in Rome")
+
+    def test_template_parts_and_missing_blanks(self):
+        from madlibs.renderer import compile_template, render_tokens
+        tokens = compile_template({"template": [
+            {"type": "text", "content": "Hello "},
+            {"type": "blank", "id": 7},
+        ]})
+        self.assertEqual(render_tokens(tokens, []), "Hello [7]")
+
+    def test_render_many_loads_templates_once(self):
+        from unittest.mock import Mock
+        from madlibs.renderer import StoryRenderer
+        template_service = Mock()
+        template_service.get_many.return_value = {"t1": {"_id": "t1", "story": "[1]!", "version": 1}}
+        renderer = StoryRenderer(template_service)
+
+        rendered = renderer.render_many([
+            {"_id": "a", "template_id": "t1", "content": [{"id": "1", "input": "x"}]},
+            {"_id": "b", "template_id": "t1", "content": [{"id": "1", "input": "y"}]},
+            {"_id": "c", "template_id": "gone", "content": []},
+        ])
+
+        self.assertEqual(rendered, {"a": "x!", "b": "y!", "c": None})
+        template_service.get_many.assert_called_once_with(["t1", "t1", "gone"])
+
+
+class TemplateSearchTest(TestCase):
+    """Unit tests for template text search and title autocomplete"""
+
+    def setUp(self):
+        from unittest.mock import Mock
+        from bson import ObjectId
+        from madlibs.search import TemplateSearchIndex
+        self.ids = [str(ObjectId()) for _ in range(3)]
+        self.collection = Mock()
+        self.collection.find.return_value = [
+            {'_id': ObjectId(self.ids[0]), 'title': 'Space Adventure'},
+            {'_id': ObjectId(self.ids[1]), 'title': 'The Spooky Space Station'},
+            {'_id': ObjectId(self.ids[2]), 'title': 'Beach Day'},
+        ]
+        self.index = TemplateSearchIndex(refresh_interval=3600)
+
+    def titles(self, query, **kwargs):
+        return [s['title'] for s in self.index.suggest(query, self.collection, **kwargs)]
+
+    def test_prefix_suggestions(self):
+        self.assertEqual(self.titles('spa'), ['Space Adventure', 'The Spooky Space Station'])
+        self.assertEqual(self.titles('sp', limit=1), ['Space Adventure'])
+        self.assertEqual(self.titles('space sta'), ['The Spooky Space Station'])
+        self.assertEqual(self.titles('zebra'), [])
+        self.assertEqual(self.titles('  '), [])
+        # Built once, then served from memory
+        self.collection.find.assert_called_once_with({}, {'title': 1})
+
+    def test_incremental_updates(self):
+        self.titles('beach')
+        self.index.add(self.ids[2], 'Mountain Day')
+        self.index.remove(self.ids[0])
+
+        self.assertEqual(self.titles('beach'), [])
+        self.assertEqual(self.titles('mount'), ['Mountain Day'])
+        self.assertEqual(self.titles('space'), ['The Spooky Space Station'])
+
+    def test_changes_during_rebuild_are_kept(self):
+        from bson import ObjectId
+        self.titles('space')
+        docs = self.collection.find.return_value
+        new_id = str(ObjectId())
+
+        def scan(*args):
+            yield docs[0]
+            # Another request creates and deletes templates while the scan runs
+            self.index.add(new_id, 'Moon Base')
+            self.index.remove(self.ids[1])
+            yield from docs[1:]
+        self.collection.find.side_effect = scan
+
+        self.assertTrue(self.index.rebuild(self.collection))
+
+        self.assertEqual(self.titles('moon'), ['Moon Base'])
+        self.assertEqual(self.titles('space'), ['Space Adventure'])
+
+    def test_stale_index_refreshes_once_in_background(self):
+        from unittest.mock import patch
+        self.titles('space')
+        self.index.refresh_interval = 0
+        with patch('madlibs.search.threading.Thread') as MockThread:
+            self.assertEqual(len(self.titles('space')), 2)
+            self.titles('beach')
+
+        MockThread.assert_called_once()
+        self.collection.find.assert_called_once()
+
+    def test_trie_prunes_removed_words(self):
+        from madlibs.search import PrefixTrie
+        trie = PrefixTrie()
+        trie.insert('space', 'a')
+        trie.insert('spa', 'b')
+        trie.remove('space', 'a')
+        self.assertEqual(trie.find_prefix('sp'), {'b'})
+        self.assertNotIn('c', trie.root.children['s'].children['p'].children['a'].children)
+
+    def test_text_search_ranked_and_paged(self):
+        from unittest.mock import patch
+        from bson import ObjectId
+        with patch('madlibs.models.get_collection'):
+            service = MadLibTemplate()
+            cursor = service.collection.find.return_value.sort.return_value.skip.return_value.limit.return_value
+            cursor.__iter__.return_value = iter([{'_id': ObjectId(), 'title': 'Space', 'score': 2.5}])
+            service.collection.count_documents.return_value = 7
+
+            results, total = service.search('space', limit=5, offset=10)
+
+            self.assertEqual(total, 7)
+            self.assertIsInstance(results[0]['_id'], str)
+            service.collection.find.assert_called_once_with(
+                {'$text': {'$search': 'space'}}, {'score': {'$meta': 'textScore'}}
+            )
+            service.collection.find.return_value.sort.assert_called_once_with([('score', {'$meta': 'textScore'})])
+            service.collection.find.return_value.sort.return_value.skip.assert_called_once_with(10)
+
+    def test_title_search_escapes_regex(self):
+        from unittest.mock import patch
+        with patch('madlibs.models.get_collection'):
+            service = MadLibTemplate()
+            service.collection.find.return_value = []
+            service.search_by_title('(.*)+')
+            service.collection.find.assert_called_once_with(
+                {'title': {'$regex': r'\(\.\*\)\+', '$options': 'i'}}
+            )
+
+
+class CreatorPagingTest(TestCase):
+    """Unit tests for per-creator pages and counters"""
+
+    def setUp(self):
+        from unittest.mock import patch
+        patcher = patch('madlibs.models.get_collection')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = UserFilledMadlibs()
+
+    def test_page_uses_cursor_and_public_filter(self):
+        from datetime import datetime, timezone
+        from bson import ObjectId
+        creator = ObjectId()
+        now = datetime.now(timezone.utc)
+        docs = [{'_id': ObjectId(), 'creator_id': creator, 'created_at': now} for _ in range(3)]
+        self.service.collection.find.return_value = iter(docs)
+
+        page, next_cursor = self.service.get_by_creator(str(creator), fields=['title'], limit=2, public=True)
+
+        self.assertEqual([m['_id'] for m in page], [str(d['_id']) for d in docs[:2]])
+        self.assertIsNotNone(next_cursor)
+        query, projection = self.service.collection.find.call_args[0]
+        self.assertEqual(query, {'creator_id': creator, 'public': True})
+        self.assertEqual(projection, {'title': 1, 'created_at': 1})
+        self.assertEqual(self.service.collection.find.call_args[1],
+                         {'sort': [('created_at', -1), ('_id', -1)], 'limit': 3})
+
+        self.service.collection.find.return_value = iter([])
+        self.service.get_by_creator(str(creator), cursor=next_cursor)
+        self.assertIn('$or', self.service.collection.find.call_args[0][0])
+
+    def test_counter_follows_create(self):
+        # Deletes go through CascadeDeleteService (core/tests.py)
+        from bson import ObjectId
+        creator = ObjectId()
+        self.service.new_filled_madlib(str(ObjectId()), str(creator), [])
+        self.service.users_collection.update_one.assert_called_with(
+            {'_id': creator}, {'$inc': {'madlibs_count': 1}}
+        )
+
+
+class FilledMadlibDeleteTest(TestCase):
+    """DELETE /api/madlibs/{id}/ cascades only for the madlib's creator"""
+
+    def _delete(self, creator_id, caller_id, authenticated=True):
+        from contextlib import ExitStack
+        from unittest.mock import Mock
+        from bson import ObjectId
+        from django.contrib.auth import get_user_model
+        from core.services import services
+        madlib_id = str(ObjectId())
+        madlibs, users, cascade = Mock(), Mock(), Mock()
+        madlibs.get_by_id.return_value = {'_id': madlib_id, 'creator_id': creator_id}
+        users.get_by_email.return_value = {'_id': ObjectId(caller_id)}
+        cascade.delete_madlib.return_value = {'madlibs': 1}
+        client = APIClient()
+        if authenticated:
+            client.force_authenticate(get_user_model().objects.create_user(
+                username='deleter', password='pass123', email='deleter@test.com'))
+        with ExitStack() as stack:
+            for cls, fake in ((UserFilledMadlibs, madlibs), (UserOperations, users),
+                              (CascadeDeleteService, cascade), (MadLibTemplate, Mock())):
+                stack.enter_context(services.override(cls, fake))
+            response = client.delete(f"/api/madlibs/{madlib_id}/")
+        return response, cascade
+
+    def test_creator_can_delete(self):
+        from bson import ObjectId
+        creator = str(ObjectId())
+        response, cascade = self._delete(creator, creator)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        cascade.delete_madlib.assert_called_once()
+
+    def test_other_user_is_forbidden(self):
+        from bson import ObjectId
+        response, cascade = self._delete(str(ObjectId()), str(ObjectId()))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        cascade.delete_madlib.assert_not_called()
+
+    def test_unauthenticated_is_rejected(self):
+        from bson import ObjectId
+        response, cascade = self._delete(str(ObjectId()), str(ObjectId()), authenticated=False)
+        self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
+        cascade.delete_madlib.assert_not_called()
+
+
+class MadlibExpanderTest(TestCase):
+    """Unit tests for ?expand= hydration of madlib listings"""
+
+    def test_one_lookup_per_relation(self):
+        from unittest.mock import Mock
+        from madlibs.expand import MadlibExpander, CREATOR_FIELDS
+        templates, users = Mock(), Mock()
+        templates.get_many.return_value = {'t1': {'_id': 't1', 'title': 'T'}}
+        users.get_many.return_value = {'u1': {'_id': 'u1', 'username': 'ann'}}
+        madlibs = [
+            {'_id': 'm1', 'template_id': 't1', 'creator_id': 'u1'},
+            {'_id': 'm2', 'template_id': 't1', 'creator_id': 'u1'},
+            {'_id': 'm3', 'template_id': 'gone', 'creator_id': 'u1'},
+        ]
+
+        MadlibExpander(templates, users).expand(madlibs, ['template', 'creator'])
+
+        templates.get_many.assert_called_once_with(['t1', 't1', 'gone'])
+        users.get_many.assert_called_once_with(['u1', 'u1', 'u1'], fields=CREATOR_FIELDS)
+        self.assertEqual(madlibs[1]['template']['title'], 'T')
+        self.assertIsNone(madlibs[2]['template'])
+        self.assertEqual(madlibs[0]['creator'], {'_id': 'u1', 'username': 'ann'})
+
+    def test_nothing_requested(self):
+        from unittest.mock import Mock
+        from madlibs.expand import MadlibExpander
+        templates, users = Mock(), Mock()
+        madlibs = [{'_id': 'm1', 'template_id': 't1'}]
+
+        MadlibExpander(templates, users).expand(madlibs, [])
+
+        templates.get_many.assert_not_called()
+        self.assertNotIn('template', madlibs[0])
+
+
+class BulkCreateTest(TestCase):
+    """Unit tests for bulk template and filled madlib creation"""
+
+    def setUp(self):
+        from unittest.mock import Mock
+        from bson import ObjectId
+        from madlibs.bulk import BulkCreator
+        self.template_id = str(ObjectId())
+        self.creator_id = str(ObjectId())
+        self.templates = Mock()
+        self.templates.get_many.return_value = {self.template_id: {
+            '_id': self.template_id, 'story': 'The [1] {noun}', 'blanks': [{'id': '1'}, {'id': '2', 'type': 'noun'}]
+        }}
+        self.madlibs = Mock()
+        self.creator = BulkCreator(self.templates, self.madlibs, chunk_size=2)
+
+    def item(self, **overrides):
+        item = {'template_id': self.template_id, 'creator_id': self.creator_id,
+                'inputted_blanks': [{'id': '1', 'input': 'big'}, {'id': '2', 'input': 'cat'}]}
+        item.update(overrides)
+        return item
+
+    def test_ndjson_parse_errors_are_per_item(self):
+        from madlibs.bulk import iter_ndjson
+        items = list(iter_ndjson([b'{"a": 1}\n', b'\n', b'{oops\n', b'[1]\n']))
+        self.assertEqual([i[0] for i in items], [0, 1, 2])
+        self.assertEqual(items[0][1], {'a': 1})
+        self.assertIn('Invalid JSON', items[1][2])
+        self.assertEqual(items[2][2], 'Item must be a JSON object')
+
+    def test_filled_validated_against_template_and_chunked(self):
+        from madlibs.bulk import iter_json_items
+        items = iter_json_items([
+            self.item(),
+            self.item(inputted_blanks=[{'id': '1', 'input': 'big'}]),
+            self.item(template_id='nope'),
+            self.item(),
+        ])
+
+        report = self.creator.create_filled(items)
+
+        self.assertEqual((report['created'], report['failed']), (2, 2))
+        errors = {r['index']: r['error'] for r in report['results'] if 'error' in r}
+        self.assertEqual(errors, {1: "Missing blanks: ['2']", 2: 'Invalid template_id or creator_id format'})
+        # Two chunks of two: one template lookup and one insert_many each
+        self.assertEqual(self.templates.get_many.call_count, 2)
+        self.assertEqual(self.madlibs.collection.insert_many.call_count, 2)
+        self.assertFalse(self.madlibs.collection.insert_many.call_args[1].get('ordered', True))
+
+    def test_write_errors_reported_by_input_position(self):
+        from pymongo.errors import BulkWriteError
+        from madlibs.bulk import iter_json_items
+
+        self.madlibs.collection.insert_many.side_effect = BulkWriteError(
+            {'writeErrors': [{'index': 1, 'errmsg': 'duplicate key'}]})
+
+        report = self.creator.create_filled(iter_json_items([self.item(public=False), self.item()]))
+
+        inserted = self.madlibs.collection.insert_many.call_args[0][0]
+        self.assertFalse(inserted[0]['public'])
+        self.assertEqual(report['results'], [
+            {'index': 0, 'id': str(inserted[0]['_id'])}, {'index': 1, 'error': 'duplicate key'}
+        ])
+        self.madlibs.users_collection.bulk_write.assert_called_once()
+
+    def test_templates_validated(self):
+        from madlibs.bulk import iter_json_items
+        with self.assertRaises(ValueError):
+            list(iter_json_items({'not': 'a list'}))
+
+        report = self.creator.create_templates(iter_json_items([
+            {'title': 'Ok', 'story': 'A [1]', 'blanks': [{'id': '1'}]},
+            {'title': '', 'story': 'x'},
+            {'title': 'Dup', 'story': 'x', 'blanks': [{'id': '1'}, {'id': '1'}]},
+        ]))
+        self.assertEqual((report['created'], report['failed']), (1, 2))
+        inserted = self.templates.collection.insert_many.call_args[0][0]
+        self.assertEqual(inserted[0]['version'], 1)
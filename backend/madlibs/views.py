@@ -3,6 +3,16 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 from .models import MadLibTemplate, UserFilledMadlibs
+from .renderer import StoryRenderer
+from .expand import MadlibExpander, EXPANDABLE, REFERENCE_FIELDS
+from .bulk import BulkCreator, iter_ndjson, iter_json_items
+from itertools import islice
+from django.conf import settings
+from users.models import UserOperations
+from core.cascade import CascadeDeleteService
+from core.projection import parse_fields_param, parse_expand_param
+from core.pagination import parse_limit_param
+from core.services import services
 import logging
 
 from bson.errors import InvalidId
@@ -10,6 +20,32 @@ from bson.errors import InvalidId
 logger = logging.getLogger(__name__)
 
 
+def _read_bulk_items(request):
+    """
+    Read the items of a bulk create request: NDJSON when sent as
+    application/x-ndjson, otherwise a JSON array (or {"items": [...]}).
+
+    Raises:
+        ValueError: If the body is not a list of items or has too many
+    """
+    if request.content_type.startswith('application/x-ndjson'):
+        items = iter_ndjson(request.body.splitlines())
+    else:
+        items = iter_json_items(request.data)
+
+    limit = settings.BULK_CREATE_MAX_ITEMS
+    items = list(islice(items, limit + 1))
+    if len(items) > limit:
+        raise ValueError(f"At most {limit} items per request; use the bulk_import command for more")
+    return items
+
+
+def _bulk_response(report):
+    """201 when every item was created, 207 when only some were"""
+    code = status.HTTP_201_CREATED if not report['failed'] else status.HTTP_207_MULTI_STATUS
+    return Response(report, status=code)
+
+
 
 class MadLibTemplateViewSet(viewsets.ViewSet):
     """
@@ -20,7 +56,9 @@ class MadLibTemplateViewSet(viewsets.ViewSet):
     - GET /api/templates/{id}/ : Retrieve a template by ID
     - PUT /api/templates/{id}/ : Update a template
     - DELETE /api/templates/{id}/ : Delete a template
-    - GET /api/templates/search/ : Search templates by title
+    - GET /api/templates/search/ : Ranked full-text search over templates
+    - GET /api/templates/autocomplete/ : Title suggestions while typing
+    - POST /api/templates/bulk/ : Create many templates (admin only)
     """
     def get_permissions(self):
         """
@@ -33,6 +71,8 @@ class MadLibTemplateViewSet(viewsets.ViewSet):
             'update': [permissions.IsAuthenticated],
             'destroy': [permissions.IsAuthenticated],
             'search' : [permissions.AllowAny],
+            'autocomplete': [permissions.AllowAny],
+            'bulk_create': [permissions.IsAdminUser],
             'admin_stats': [permissions.IsAdminUser],
         }
 
@@ -44,7 +84,7 @@ class MadLibTemplateViewSet(viewsets.ViewSet):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.template_service = MadLibTemplate()
+        self.template_service = services.get(MadLibTemplate)
 
     def list(self, request):
         """
@@ -52,8 +92,10 @@ class MadLibTemplateViewSet(viewsets.ViewSet):
 
         Query Parameters:
         - limit: Maximum number of templates to retrieve (default: 100)
+        - fields: Comma separated fields to return (default: whole document)
 
         GET /api/templates/?limit=50
+        GET /api/templates/?fields=title,description
         """
         try:
             logger.debug("Listing madlib templates")
@@ -67,16 +109,24 @@ class MadLibTemplateViewSet(viewsets.ViewSet):
             except ValueError:
                 limit = 100
 
-            templates = self.template_service.get_all(limit=limit)
-            logger.info(f"Listed {len(templates)} madlib templates")
+            fields = parse_fields_param(request.query_params.get('fields'))
+
+            templates = self.template_service.get_all(limit=limit, fields=fields)
+            logger.info("Listed %s madlib templates", len(templates))
 
             return Response(
                 {'count': len(templates), 'results': templates},
                 status=status.HTTP_200_OK
             )
 
+        except ValueError as e:
+            logger.warning("Invalid fields parameter when listing templates: %s", e)
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
-            logger.error(f"Error listing madlib templates: {e}")
+            logger.error("Error listing madlib templates: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -107,12 +157,12 @@ class MadLibTemplateViewSet(viewsets.ViewSet):
         """
         try:
             data = request.data
-            logger.debug(f"Creating madlib template: {data.get('title', 'N/A')}")
+            logger.debug("Creating madlib template: %s", data.get('title', 'N/A'))
 
             # Validate required fields
             required_fields = ['title', 'story']
             if not all(field in data for field in required_fields):
-                logger.warning(f"Missing required fields in create request")
+                logger.warning("Missing required fields in create request")
                 return Response(
                     {'error': f'Missing required fields: {required_fields}'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -135,14 +185,14 @@ class MadLibTemplateViewSet(viewsets.ViewSet):
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
 
-            logger.info(f"Madlib template created: {template_id}")
+            logger.info("Madlib template created: %s", template_id)
             return Response(
                 {'id': template_id, 'message': 'Template created successfully'},
                 status=status.HTTP_201_CREATED
             )
 
         except Exception as e:
-            logger.error(f"Error creating madlib template: {e}")
+            logger.error("Error creating madlib template: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -161,27 +211,27 @@ class MadLibTemplateViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         try:
-            logger.debug(f"Retrieving madlib template: {pk}")
+            logger.debug("Retrieving madlib template: %s", pk)
             template = self.template_service.get_by_id(str(pk))
 
             if not template:
-                logger.info(f"Madlib template not found: {pk}")
+                logger.info("Madlib template not found: %s", pk)
                 return Response(
                     {'error': 'Template not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            logger.info(f"Madlib template retrieved: {pk}")
+            logger.info("Madlib template retrieved: %s", pk)
             return Response(template, status=status.HTTP_200_OK)
 
         except InvalidId:
-            logger.warning(f"Invalid madlib template ID format: {pk}")
+            logger.warning("Invalid madlib template ID format: %s", pk)
             return Response(
                 {'error': 'Invalid template ID format'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
-            logger.error(f"Error retrieving madlib template {pk}: {e}")
+            logger.error("Error retrieving madlib template %s: %s", pk, e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -201,9 +251,9 @@ class MadLibTemplateViewSet(viewsets.ViewSet):
         """
         try:
             data = request.data
-            logger.debug(f"Updating madlib template: {pk}")
+            logger.debug("Updating madlib template: %s", pk)
 
-            if not data or pk:
+            if not data or not pk:
                 logger.warning("Update template called without data or ID")
                 return Response(
                     {'error': 'No data provided for update'},
@@ -212,26 +262,26 @@ class MadLibTemplateViewSet(viewsets.ViewSet):
             success = self.template_service.update(str(pk), data)
 
             if not success:
-                logger.info(f"Template not found or update failed: {pk}")
+                logger.info("Template not found or update failed: %s", pk)
                 return Response(
                     {'error': 'Template not found or update failed'},
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            logger.info(f"Madlib template updated: {pk}")
+            logger.info("Madlib template updated: %s", pk)
             return Response(
                 {'message': 'Template updated successfully'},
                 status=status.HTTP_200_OK
             )
 
         except InvalidId:
-            logger.warning(f"Invalid madlib template ID format: {pk}")
+            logger.warning("Invalid madlib template ID format: %s", pk)
             return Response(
                 {'error': 'Invalid template ID format'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
-            logger.error(f"Error updating madlib template {pk}: {e}")
+            logger.error("Error updating madlib template %s: %s", pk, e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -250,30 +300,30 @@ class MadLibTemplateViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         try:
-            logger.debug(f"Deleting madlib template: {pk}")
+            logger.debug("Deleting madlib template: %s", pk)
             success = self.template_service.delete(str(pk))
 
             if not success:
-                logger.info(f"Madlib template not found: {pk}")
+                logger.info("Madlib template not found: %s", pk)
                 return Response(
                     {'error': 'Template not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            logger.info(f"Madlib template deleted: {pk}")
+            logger.info("Madlib template deleted: %s", pk)
             return Response(
                 {'message': 'Template deleted successfully'},
                 status=status.HTTP_204_NO_CONTENT
             )
 
         except InvalidId:
-            logger.warning(f"Invalid madlib template ID format: {pk}")
+            logger.warning("Invalid madlib template ID format: %s", pk)
             return Response(
                 {'error': 'Invalid template ID format'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
-            logger.error(f"Error deleting madlib template {pk}: {e}")
+            logger.error("Error deleting madlib template %s: %s", pk, e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -282,43 +332,116 @@ class MadLibTemplateViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def search(self, request):
         """
-        Search for templates by title.
+        Search templates, best matches first.
 
         Query Parameters:
-        - title: Title to search for (required)
-        - exact: Whether to search for exact match (default: false)
-
-        GET /api/templates/search/?title=Adventure
-        GET /api/templates/search/?title=Adventure&exact=true
+        - q: Search terms, matched against title, description and story (required)
+        - title: Older name for q, still accepted
+        - exact: Only return templates whose title equals q exactly (default: false)
+        - limit: Maximum number of results (default: 20, max: 100)
+        - offset: Number of results to skip (default: 0)
+
+        GET /api/templates/search/?q=space+adventure
+        GET /api/templates/search/?q=Adventure&exact=true
         """
         try:
-            title = request.query_params.get('title', '').strip()
+            query = (request.query_params.get('q') or request.query_params.get('title') or '').strip()
 
-            if not title:
-                logger.warning("Search templates called without title parameter")
+            if not query:
+                logger.warning("Search templates called without q parameter")
                 return Response(
-                    {'error': 'title query parameter is required'},
+                    {'error': 'q query parameter is required'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
             exact = request.query_params.get('exact', 'false').lower() == 'true'
-            logger.debug(f"Searching madlib templates: title='{title}', exact={exact}")
+            limit = parse_limit_param(request.query_params.get('limit'), default=20, maximum=100)
+            try:
+                offset = max(int(request.query_params.get('offset', 0)), 0)
+            except ValueError:
+                offset = 0
+            logger.debug("Searching madlib templates: q='%s', exact=%s", query, exact)
 
-            templates = self.template_service.search_by_title(title, exact=exact)
-            logger.info(f"Search found {len(templates)} madlib templates matching '{title}'")
+            if exact:
+                templates = self.template_service.search_by_title(query, exact=True)
+                total = len(templates)
+                templates = templates[offset:offset + limit]
+            else:
+                templates, total = self.template_service.search(query, limit=limit, offset=offset)
+            logger.info("Search found %s madlib templates matching '%s'", total, query)
 
             return Response(
                 {
-                    'query': title,
+                    'query': query,
                     'exact': exact,
                     'count': len(templates),
+                    'total': total,
+                    'limit': limit,
+                    'offset': offset,
                     'results': templates
                 },
                 status=status.HTTP_200_OK
             )
 
         except Exception as e:
-            logger.error(f"Error searching madlib templates: {e}")
+            logger.error("Error searching madlib templates: %s", e)
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """
+        Create many templates in one request.
+
+        Body: a JSON array of templates (same shape as create), {"items": [...]},
+        or one template per line with Content-Type: application/x-ndjson.
+
+        Returns 201 if every template was created, 207 otherwise, with
+        {"created", "failed", "results": [{"index", "id"} | {"index", "error"}]}
+
+        POST /api/templates/bulk/
+        """
+        try:
+            items = _read_bulk_items(request)
+            report = BulkCreator(self.template_service, None).create_templates(items)
+            return _bulk_response(report)
+
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error("Error bulk creating madlib templates: %s", e)
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Suggest template titles for a partially typed query, served from an
+        in-memory prefix index.
+
+        Query Parameters:
+        - q: What the user has typed so far
+        - limit: Maximum number of suggestions (default: 10, max: 25)
+
+        GET /api/templates/autocomplete/?q=spa
+        """
+        try:
+            query = request.query_params.get('q', '').strip()
+            limit = parse_limit_param(request.query_params.get('limit'), default=10, maximum=25)
+
+            suggestions = self.template_service.autocomplete(query, limit=limit) if query else []
+
+            return Response(
+                {'query': query, 'results': suggestions},
+                status=status.HTTP_200_OK
+            )
+
+        except Exception as e:
+            logger.error("Error autocompleting madlib templates: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -329,15 +452,38 @@ class UserFilledMadlibsViewSet(viewsets.ViewSet):
     API endpoints for managing user-filled madlibs.
 
     - POST /api/madlibs/create/ : Create a new filled madlib
-    - GET /api/madlibs/{id}/ : Retrieve a filled madlib by ID
+    - GET /api/madlibs/{id}/ : Retrieve a filled madlib by ID (?render=1 adds the story text)
+    - GET /api/madlibs/render/?ids= : Render several filled madlibs to story text
     - GET /api/madlibs/creator/{creator_id}/ : Get all madlibs by creator
     - PUT /api/madlibs/{id}/ : Update a filled madlib
     - DELETE /api/madlibs/{id}/ : Delete a filled madlib
+    - POST /api/madlibs/bulk/ : Create many filled madlibs (admin only)
     """
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.madlibs_service = UserFilledMadlibs()
+        self.madlibs_service = services.get(UserFilledMadlibs)
+        self.cascade_service = services.get(CascadeDeleteService)
+        self.user_service = services.get(UserOperations)
+        template_service = services.get(MadLibTemplate)
+        self.renderer = StoryRenderer(template_service)
+        self.expander = MadlibExpander(template_service, self.user_service)
+
+    def _parse_shape_params(self, request):
+        """
+        Parse ?fields= and ?expand= for madlib listings. Expanded relations
+        need their reference fields, so those are added to a sparse fieldset.
+
+        Raises:
+            ValueError: If either parameter is invalid
+        """
+        fields = parse_fields_param(request.query_params.get('fields'))
+        expand = parse_expand_param(request.query_params.get('expand'), EXPANDABLE)
+        if fields:
+            for relation in expand:
+                if REFERENCE_FIELDS[relation] not in fields:
+                    fields.append(REFERENCE_FIELDS[relation])
+        return fields, expand
         
     def get_permissions(self):
         """
@@ -351,6 +497,8 @@ class UserFilledMadlibsViewSet(viewsets.ViewSet):
             'destroy': [permissions.IsAuthenticated],
             'profile': [permissions.IsAuthenticated],
             'by_creator': [permissions.AllowAny],
+            'render_batch': [permissions.AllowAny],
+            'bulk_create': [permissions.IsAdminUser],
             'admin_stats': [permissions.IsAdminUser],
         }
 
@@ -364,7 +512,11 @@ class UserFilledMadlibsViewSet(viewsets.ViewSet):
         List all user-filled madlibs with optional limit.
         Query Parameters:
         - limit: Maximum number of madlibs to retrieve (default: 100)
+        - fields: Comma separated fields to return (default: whole document)
+        - expand: Comma separated relations to embed: template, creator
         GET /api/madlibs/?limit=50
+        GET /api/madlibs/?fields=template_id,creator_id,image_url
+        GET /api/madlibs/?expand=template,creator
         """
         try:
             logger.debug("Listing user-filled madlibs")
@@ -377,16 +529,22 @@ class UserFilledMadlibsViewSet(viewsets.ViewSet):
             except ValueError:
                 limit = 100
 
-            madlibs = self.madlibs_service.get_all(limit=limit)
-            logger.info(f"Listed {len(madlibs)} user-filled madlibs")
+            fields, expand = self._parse_shape_params(request)
+
+            madlibs = self.madlibs_service.get_all(limit=limit, fields=fields)
+            self.expander.expand(madlibs, expand)
+            logger.info("Listed %s user-filled madlibs", len(madlibs))
 
             return Response(
                 {"count": len(madlibs), "results": madlibs},
                 status=status.HTTP_200_OK,
             )
 
+        except ValueError as e:
+            logger.warning("Invalid fields/expand parameter when listing madlibs: %s", e)
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error listing user-filled madlibs: {e}")
+            logger.error("Error listing user-filled madlibs: %s", e)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     def create(self, request):
@@ -408,7 +566,7 @@ class UserFilledMadlibsViewSet(viewsets.ViewSet):
             return Response({'error': 'Not authenticated'})
         try:
             data = request.data
-            logger.debug(f"Creating filled madlib for user: {request.user.id}")
+            logger.debug("Creating filled madlib for user: %s", request.user.id)
 
             # Validate required fields
             required_fields = ['template_id', 'creator_id', 'inputted_blanks']
@@ -440,7 +598,7 @@ class UserFilledMadlibsViewSet(viewsets.ViewSet):
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
 
-            logger.info(f"Filled madlib created: {madlib_id}")
+            logger.info("Filled madlib created: %s", madlib_id)
             return Response(
                 {'id': madlib_id, 'message': 'Madlib created successfully'},
                 status=status.HTTP_201_CREATED
@@ -453,7 +611,7 @@ class UserFilledMadlibsViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
-            logger.error(f"Error creating filled madlib: {e}")
+            logger.error("Error creating filled madlib: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -463,7 +621,11 @@ class UserFilledMadlibsViewSet(viewsets.ViewSet):
         """
         Retrieve a filled madlib by ID.
 
+        Query Parameters:
+        - render: If 1/true, include the finished story as 'rendered_text'
+
         GET /api/madlibs/{id}/
+        GET /api/madlibs/{id}/?render=1
         """
         if not request.user.is_authenticated:
             return Response({'error': 'Not authenticated'})
@@ -481,6 +643,9 @@ class UserFilledMadlibsViewSet(viewsets.ViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
+            if request.query_params.get('render', '').lower() in ('1', 'true'):
+                madlib['rendered_text'] = self.renderer.render_madlib(madlib)
+
             return Response(madlib, status=status.HTTP_200_OK)
 
         except InvalidId:
@@ -552,21 +717,36 @@ class UserFilledMadlibsViewSet(viewsets.ViewSet):
 
     def destroy(self, request, pk=None):
         """
-        Delete a filled madlib.
+        Delete a filled madlib together with its likes, comments and images.
+        Only the madlib's creator can delete it.
 
         DELETE /api/madlibs/{id}/
         """
         if not request.user.is_authenticated:
-            return Response({'error': 'Not authenticated'})
+            return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
         if not pk:
             return Response(
                 {'error': 'No data provided for update'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         try:
-            success = self.madlibs_service.delete_filled_madlib(str(pk))
+            madlib = self.madlibs_service.get_by_id(str(pk))
+            if madlib is None:
+                return Response(
+                    {'error': 'Madlib not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
 
-            if not success:
+            current_user = self.user_service.get_by_email(request.user.email)
+            if not current_user or str(current_user['_id']) != madlib['creator_id']:
+                return Response(
+                    {'error': 'You can only delete your own madlibs'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
+            deleted = self.cascade_service.delete_madlib(str(pk))
+
+            if deleted is None:
                 return Response(
                     {'error': 'Madlib not found'},
                     status=status.HTTP_404_NOT_FOUND
@@ -588,12 +768,104 @@ class UserFilledMadlibsViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """
+        Create many filled madlibs in one request. Each item's inputted_blanks
+        must fill exactly the blanks its template's story uses.
+
+        Body: a JSON array of {"template_id", "creator_id", "inputted_blanks"},
+        {"items": [...]}, or one item per line with Content-Type: application/x-ndjson.
+
+        Returns 201 if every madlib was created, 207 otherwise, with
+        {"created", "failed", "results": [{"index", "id"} | {"index", "error"}]}
+
+        POST /api/madlibs/bulk/
+        """
+        try:
+            items = _read_bulk_items(request)
+            report = BulkCreator(self.renderer.template_service, self.madlibs_service).create_filled(items)
+            return _bulk_response(report)
+
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error("Error bulk creating filled madlibs: %s", e)
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['get'], url_path='render')
+    def render_batch(self, request):
+        """
+        Render several filled madlibs to their final story text.
+
+        Query Parameters:
+        - ids: Comma separated filled madlib IDs (at most 100)
+
+        GET /api/madlibs/render/?ids={id1},{id2}
+        """
+        ids = [i.strip() for i in request.query_params.get('ids', '').split(',') if i.strip()]
+        if not ids:
+            return Response(
+                {'error': 'ids query parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(ids) > 100:
+            return Response(
+                {'error': 'At most 100 ids can be rendered at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            madlibs = self.madlibs_service.get_many(ids, fields=['template_id', 'content'])
+            rendered = self.renderer.render_many(madlibs)
+            found = {m['_id']: m for m in madlibs}
+
+            return Response(
+                {
+                    'results': [
+                        {
+                            '_id': madlib_id,
+                            'template_id': found[madlib_id]['template_id'],
+                            'rendered_text': rendered[madlib_id]
+                        }
+                        for madlib_id in dict.fromkeys(ids) if madlib_id in found
+                    ],
+                    'missing': [madlib_id for madlib_id in dict.fromkeys(ids) if madlib_id not in found]
+                },
+                status=status.HTTP_200_OK
+            )
+
+        except InvalidId:
+            return Response(
+                {'error': 'Invalid madlib ID format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.error("Error rendering madlibs: %s", e)
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
     @action(detail=False, methods=['get'])
     def by_creator(self, request):
         """
-        Get all madlibs created by a specific user.
+        Get a page of the madlibs created by a specific user, newest first,
+        with the user's totals.
+
+        Query Parameters:
+        - creator_id: ObjectId of the creator (required)
+        - fields: Comma separated fields to return (default: whole document)
+        - limit: Page size (default: 20, max: 100)
+        - cursor: next_cursor from the previous page
+        - public: true/false to only return public/private madlibs (default: both)
+        - expand: Comma separated relations to embed: template, creator
 
         GET /api/madlibs/by_creator/?creator_id={creator_id}
+        GET /api/madlibs/by_creator/?creator_id={creator_id}&public=true&cursor={next_cursor}
         """
         if not request.user.is_authenticated:
             return Response({'error': 'Not authenticated'})
@@ -606,15 +878,40 @@ class UserFilledMadlibsViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            madlibs = self.madlibs_service.get_by_creator(creator_id)
+            fields, expand = self._parse_shape_params(request)
+            limit = parse_limit_param(request.query_params.get('limit'), default=20, maximum=100)
+            cursor = request.query_params.get('cursor')
+            public = request.query_params.get('public')
+            if public is not None:
+                public = public.lower() == 'true'
 
-            return Response(madlibs, status=status.HTTP_200_OK)
+            madlibs, next_cursor = self.madlibs_service.get_by_creator(
+                creator_id, fields=fields, limit=limit, cursor=cursor, public=public
+            )
+            self.expander.expand(madlibs, expand)
+            stats = self.madlibs_service.get_creator_stats(creator_id)
+
+            return Response(
+                {
+                    'creator_id': creator_id,
+                    'stats': stats,
+                    'count': len(madlibs),
+                    'results': madlibs,
+                    'next_cursor': next_cursor
+                },
+                status=status.HTTP_200_OK
+            )
 
         except InvalidId:
             return Response(
                 {'error': 'Invalid creator_id format'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             return Response(
                 {'error': str(e)},
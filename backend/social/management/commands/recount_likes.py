@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+from core.db_connect import get_collection
+
+# The unique index LikeModel relies on; it cannot be built while duplicates exist
+LIKE_KEY = ('user_id', 'post_id', 'comment_id')
+UNIQUE_INDEX = 'idx_user_post_comment_unique'
+
+
+class Command(BaseCommand):
+    """
+    Remove duplicate likes, build the unique like index, and recompute the
+    denormalized likes_count on filled madlibs and comments from the likes
+    collection.
+
+    Run once after deploying atomic like counters (likes created before
+    them may be duplicated, which keeps the unique index from being built),
+    or any time the counters are suspected to have drifted. Counters read
+    as 0 while a target collection is being recounted, so prefer a quiet
+    period.
+
+    python manage.py recount_likes
+    """
+    help = "Remove duplicate likes and recompute likes_count on filled_madlibs and comments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of counter updates sent per bulk_write')
+
+    def _remove_duplicates(self, likes, batch_size: int) -> int:
+        """Keep the oldest like of each (user, post, comment) and delete the rest"""
+        pipeline = [
+            {'$sort': {'_id': 1}},
+            {'$group': {'_id': {field: f'${field}' for field in LIKE_KEY},
+                        'ids': {'$push': '$_id'}, 'count': {'$sum': 1}}},
+            {'$match': {'count': {'$gt': 1}}},
+        ]
+        removed = 0
+        extra = []
+        for row in likes.aggregate(pipeline, allowDiskUse=True):
+            extra.extend(row['ids'][1:])
+            if len(extra) >= batch_size:
+                removed += likes.delete_many({'_id': {'$in': extra}}).deleted_count
+                extra = []
+        if extra:
+            removed += likes.delete_many({'_id': {'$in': extra}}).deleted_count
+        return removed
+
+    def handle(self, *args, **options):
+        likes = get_collection('likes')
+        batch_size = options['batch_size']
+
+        removed = self._remove_duplicates(likes, batch_size)
+        self.stdout.write(f"likes: removed {removed} duplicates")
+        likes.create_index([(field, 1) for field in LIKE_KEY], unique=True, name=UNIQUE_INDEX)
+
+        targets = [
+            ('post_id', get_collection('filled_madlibs')),
+            ('comment_id', get_collection('comments')),
+        ]
+
+        for key, target in targets:
+            # Reset first so documents that lost all their likes end up at 0
+            target.update_many({'likes_count': {'$ne': 0}}, {'$set': {'likes_count': 0}})
+
+            pipeline = [
+                {'$match': {key: {'$ne': None}}},
+                {'$group': {'_id': f'${key}', 'count': {'$sum': 1}}},
+            ]
+
+            updated = 0
+            batch = []
+            for row in likes.aggregate(pipeline, allowDiskUse=True):
+                batch.append(UpdateOne({'_id': row['_id']}, {'$set': {'likes_count': row['count']}}))
+                if len(batch) >= batch_size:
+                    updated += target.bulk_write(batch, ordered=False).modified_count
+                    batch = []
+            if batch:
+                updated += target.bulk_write(batch, ordered=False).modified_count
+
+            self.stdout.write(f"{target.name}: set likes_count on {updated} documents")
+
+        self.stdout.write(self.style.SUCCESS("Like counters recomputed"))
@@ -1,72 +1,201 @@
 from bson.objectid import ObjectId
 from datetime import datetime
+from typing import Optional, List, Set, Tuple, Dict
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from core.db_connect import get_collection
+from core.pagination import encode_cursor, build_cursor_filter
+from core.read_routing import for_read
+from core.user_stats import increment_user_stats, FOLLOWERS_COUNT, FOLLOWING_COUNT
+from core.fanout import (PULL_AUTHOR, create_inbox_indexes, is_pull_author, backfill_inbox,
+                         remove_author_from_inbox)
+from social.write_buffer import get_like_write_buffer
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class LikeModel:
     """Handle likes and comments operations"""
     def __init__(self):
         self.collection = get_collection('likes')
+        self.comments_collection = get_collection('comments')
+        self.madlibs_collection = get_collection('filled_madlibs')
+        self.users_collection = get_collection('users')
+        # Coalesces like/unlike writes when LIKE_WRITE_BUFFER_ENABLED is set
+        self.write_buffer = get_like_write_buffer()
         self._create_index()
         
     def _create_index(self):
-        self.collection.create_index([("user_id", 1)])
-        self.collection.create_index([("post_id", 1)])
-        self.collection.create_index([("comment_id", 1)])
-        
-    def like_post(self, user_id, post_id):
-        """Add a like to a post"""
-        like_doc = {
-            "user_id": ObjectId(user_id),
-            "post_id": ObjectId(post_id),
-            "comment_id": None,
-            "created_at": datetime.now()
-        }
-        return self.collection.insert_one(like_doc).inserted_id
+        try:
+            self.collection.create_index([("user_id", 1)])
+            self.collection.create_index([("post_id", 1)])
+            self.collection.create_index([("comment_id", 1)])
+            # One like per (user, target); the upserts below rely on it
+            self.collection.create_index([
+                ("user_id", 1),
+                ("post_id", 1),
+                ("comment_id", 1)
+            ], unique=True, name="idx_user_post_comment_unique")
+        except Exception as e:
+            # Likes from before the atomic upserts may be duplicated; recount_likes removes them
+            logger.error("Error creating like indexes (run recount_likes to remove duplicate likes): %s", e)
+
+    def _upsert_like(self, like_key: Dict):
+        """
+        Insert a like if it does not exist yet, as a single atomic upsert.
+
+        Returns the new like's ObjectId, or None if the like already existed.
+        """
+        try:
+            result = self.collection.update_one(
+                like_key,
+                {"$setOnInsert": {"created_at": datetime.now()}},
+                upsert=True
+            )
+            return result.upserted_id
+        except DuplicateKeyError:
+            # A concurrent upsert for the same key won the race
+            return None
+
+    def _apply_counter(self, target_collection, target_id: ObjectId, delta: int) -> int:
+        """
+        Apply a delta to the denormalized likes_count of a post or comment
+        and return the resulting value. Changes to a post's count are also
+        applied to its creator's likes_received.
+        """
+        projection = {"likes_count": 1, "creator_id": 1}
+        if delta > 0:
+            doc = target_collection.find_one_and_update(
+                {"_id": target_id},
+                {"$inc": {"likes_count": delta}},
+                projection=projection,
+                return_document=ReturnDocument.AFTER
+            )
+        elif delta < 0:
+            doc = target_collection.find_one_and_update(
+                {"_id": target_id, "likes_count": {"$gt": 0}},
+                {"$inc": {"likes_count": delta}},
+                projection=projection,
+                return_document=ReturnDocument.AFTER
+            )
+        else:
+            doc = None
+
+        if doc is None:
+            doc = target_collection.find_one({"_id": target_id}, {"likes_count": 1})
+        elif doc.get("creator_id") is not None:
+            increment_user_stats(self.users_collection, doc["creator_id"], likes=delta)
+        return (doc or {}).get("likes_count", 0)
+
+    def like_post(self, user_id, post_id) -> Dict:
+        """
+        Idempotently like a post.
+
+        Returns:
+            Dict with 'liked' (always True), 'created' (False if the like already
+            existed), 'like_id' (new like ObjectId, or None if nothing was inserted
+            or the write is buffered) and 'likes_count'
+        """
+        post_oid = ObjectId(post_id)
+        like_key = {"user_id": ObjectId(user_id), "post_id": post_oid, "comment_id": None}
+        if self.write_buffer:
+            return self.write_buffer.set_state(like_key, True)
+
+        like_id = self._upsert_like(like_key)
+        likes_count = self._apply_counter(self.madlibs_collection, post_oid, 1 if like_id else 0)
+        return {"liked": True, "created": like_id is not None, "like_id": like_id, "likes_count": likes_count}
     
-    def unlike_post(self, user_id, post_id):
-        """Remove a like from a post"""
-        result = self.collection.delete_one({
-            "user_id": ObjectId(user_id),
-            "post_id": ObjectId(post_id),
-            "comment_id": None
-        })
-        return result.deleted_count > 0 
+    def unlike_post(self, user_id, post_id) -> Dict:
+        """
+        Idempotently remove a like from a post.
 
-    def like_comment(self, user_id, comment_id):
-        """Add a like to a comment"""
-        like_doc = {
-            "user_id": ObjectId(user_id),
-            "post_id": None,
-            "comment_id": ObjectId(comment_id),
-            "created_at": datetime.now()
-        }
-        return self.collection.insert_one(like_doc).inserted_id
+        Returns:
+            Dict with 'liked' (always False), 'removed' (False if there was no
+            like to remove) and 'likes_count'
+        """
+        post_oid = ObjectId(post_id)
+        like_key = {"user_id": ObjectId(user_id), "post_id": post_oid, "comment_id": None}
+        if self.write_buffer:
+            return self.write_buffer.set_state(like_key, False)
+
+        result = self.collection.delete_one(like_key)
+        removed = result.deleted_count > 0
+        likes_count = self._apply_counter(self.madlibs_collection, post_oid, -1 if removed else 0)
+        return {"liked": False, "removed": removed, "likes_count": likes_count}
+
+    def like_comment(self, user_id, comment_id) -> Dict:
+        """Idempotently like a comment. Same return shape as like_post."""
+        comment_oid = ObjectId(comment_id)
+        like_key = {"user_id": ObjectId(user_id), "post_id": None, "comment_id": comment_oid}
+        if self.write_buffer:
+            return self.write_buffer.set_state(like_key, True)
+
+        like_id = self._upsert_like(like_key)
+        likes_count = self._apply_counter(self.comments_collection, comment_oid, 1 if like_id else 0)
+        return {"liked": True, "created": like_id is not None, "like_id": like_id, "likes_count": likes_count}
     
-    def unlike_comment(self, user_id, comment_id):
-        """Remove a like from a comment"""
-        result = self.collection.delete_one({
-            "user_id": ObjectId(user_id),
-            "post_id": None,
-            "comment_id": ObjectId(comment_id)
-        })
-        return result.deleted_count > 0
+    def unlike_comment(self, user_id, comment_id) -> Dict:
+        """Idempotently remove a like from a comment. Same return shape as unlike_post."""
+        comment_oid = ObjectId(comment_id)
+        like_key = {"user_id": ObjectId(user_id), "post_id": None, "comment_id": comment_oid}
+        if self.write_buffer:
+            return self.write_buffer.set_state(like_key, False)
+
+        result = self.collection.delete_one(like_key)
+        removed = result.deleted_count > 0
+        likes_count = self._apply_counter(self.comments_collection, comment_oid, -1 if removed else 0)
+        return {"liked": False, "removed": removed, "likes_count": likes_count}
 
     def get_post_likes_count(self, post_id):
-        """Count likes on a post"""
-        return self.collection.count_documents({
-            "post_id": ObjectId(post_id),
+        """Count likes on a post, including buffered likes not yet written"""
+        post_oid = ObjectId(post_id)
+        count = for_read(self.collection, 'counts').count_documents({
+            "post_id": post_oid,
             "comment_id": None
         })
+        if self.write_buffer:
+            count = max(0, count + self.write_buffer.pending_delta("post_id", post_oid))
+        return count
 
     def user_liked_post(self, user_id, post_id):
         """Check if user already liked a post"""
+        user_oid, post_oid = ObjectId(user_id), ObjectId(post_id)
+        if self.write_buffer:
+            pending = self.write_buffer.pending_state((user_oid, post_oid, None))
+            if pending is not None:
+                return pending
         return self.collection.find_one({
-            "user_id": ObjectId(user_id),
-            "post_id": ObjectId(post_id),
+            "user_id": user_oid,
+            "post_id": post_oid,
             "comment_id": None
         }) is not None
 
+    def user_liked_comments(self, user_id, comment_ids: List) -> Set[str]:
+        """Return the subset of comment_ids the user has liked, in one $in query"""
+        if not comment_ids:
+            return set()
+        user_oid = ObjectId(user_id)
+        comment_oids = [ObjectId(c) for c in comment_ids]
+        cursor = self.collection.find(
+            {
+                "user_id": user_oid,
+                "post_id": None,
+                "comment_id": {"$in": comment_oids}
+            },
+            {"comment_id": 1, "_id": 0}
+        )
+        liked = {str(doc["comment_id"]) for doc in cursor}
+
+        if self.write_buffer:
+            for comment_oid in comment_oids:
+                pending = self.write_buffer.pending_state((user_oid, None, comment_oid))
+                if pending is True:
+                    liked.add(str(comment_oid))
+                elif pending is False:
+                    liked.discard(str(comment_oid))
+        return liked
+
 class CommentModel:
     def __init__(self):
         self.collection = get_collection('comments')
@@ -74,7 +203,9 @@ class CommentModel:
         
     def _create_index(self):
         self.collection.create_index([("post_id", 1)])
-        self.collection.create_index([("user_id", 1)])    
+        self.collection.create_index([("user_id", 1)])
+        # Keyset pagination of a post's comments, newest first
+        self.collection.create_index([("post_id", 1), ("created_at", -1), ("_id", -1)])
         
     def add_comment(self, user_id, post_id, text):
         """Add a comment to a post"""
@@ -89,7 +220,214 @@ class CommentModel:
 
     def get_post_comments(self, post_id):
         """Retrieve all comments for a post"""
-        return list(self.collection.find(
+        return list(for_read(self.collection, 'comments').find(
             {"post_id": ObjectId(post_id)},
             sort=[("created_at", -1)]
         ))
+
+    def get_post_comments_page(self, post_id, limit: int = 20,
+                               cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        Retrieve one page of comments for a post, newest first.
+
+        Args:
+            post_id: String representation of the post ObjectId
+            limit: Maximum number of comments on the page
+            cursor: Cursor returned with the previous page, or None for the first page
+
+        Returns:
+            Tuple of (comments, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = {"post_id": ObjectId(post_id)}
+        query.update(build_cursor_filter(cursor))
+
+        # Fetch one extra document to know whether another page exists
+        results = for_read(self.collection, 'comments').find(
+            query,
+            sort=[("created_at", -1), ("_id", -1)],
+            limit=limit + 1
+        )
+
+        comments = []
+        next_cursor = None
+        for doc in results:
+            if len(comments) == limit:
+                last = comments[-1]
+                next_cursor = encode_cursor(last["created_at"], last["_id"])
+                break
+            comments.append(doc)
+
+        return comments, next_cursor
+
+
+class FollowModel:
+    """
+    The follow graph: one document per (follower, followee) pair, with
+    followers_count and following_count kept on both user documents.
+
+    A follow also decides how the followee's posts reach the follower's
+    following feed. For most authors they are copied into the follower's
+    feed_inbox when posted (core/fanout.py). Once an author has more than
+    FEED_FANOUT_MAX_FOLLOWERS followers, every follow of them is marked
+    pull and FeedService.get_following reads their posts directly. An
+    author stays in pull mode if they lose followers again.
+    """
+    def __init__(self):
+        self.collection = get_collection('follows')
+        self.users_collection = get_collection('users')
+        self.madlibs_collection = get_collection('filled_madlibs')
+        self.inbox_collection = get_collection('feed_inbox')
+        self._create_index()
+
+    def _create_index(self):
+        # One follow per pair; the upsert in follow() relies on it
+        self.collection.create_index([
+            ("follower_id", 1),
+            ("followee_id", 1)
+        ], unique=True, name="idx_follower_followee_unique")
+        # Followers pages newest first, and fan-out over an author's followers
+        self.collection.create_index([("followee_id", 1), ("created_at", -1), ("_id", -1)])
+        # Following pages newest first
+        self.collection.create_index([("follower_id", 1), ("created_at", -1), ("_id", -1)])
+        # Followed authors whose posts are pulled when the feed is read
+        self.collection.create_index([("follower_id", 1), ("pull", 1)])
+        create_inbox_indexes(self.inbox_collection)
+
+    def _followers_count(self, user_oid: ObjectId) -> int:
+        return (self.users_collection.find_one({"_id": user_oid}, {FOLLOWERS_COUNT: 1}) or {}).get(FOLLOWERS_COUNT, 0)
+
+    def _switch_to_pull(self, followee_oid: ObjectId, followee: Dict, follower_oid: ObjectId):
+        """Mark follows of an author past the fan-out threshold as pull"""
+        if followee.get(PULL_AUTHOR) is True:
+            # Already switched; a follow inserted while switching may have missed the update_many
+            self.collection.update_one(
+                {"follower_id": follower_oid, "followee_id": followee_oid},
+                {"$set": {"pull": True}}
+            )
+            return
+        self.users_collection.update_one({"_id": followee_oid}, {"$set": {PULL_AUTHOR: True}})
+        self.collection.update_many({"followee_id": followee_oid, "pull": False}, {"$set": {"pull": True}})
+
+    def follow(self, follower_id, followee_id) -> Dict:
+        """
+        Idempotently follow a user, copying their recent posts into the
+        follower's inbox unless their posts are pulled.
+
+        Returns:
+            Dict with 'following' (always True), 'created' (False if the follow
+            already existed) and the followee's 'followers_count'
+
+        Raises:
+            ValueError: If a user tries to follow themselves
+        """
+        follower_oid, followee_oid = ObjectId(follower_id), ObjectId(followee_id)
+        if follower_oid == followee_oid:
+            raise ValueError("Users cannot follow themselves")
+
+        try:
+            result = self.collection.update_one(
+                {"follower_id": follower_oid, "followee_id": followee_oid},
+                {"$setOnInsert": {"created_at": datetime.now(), "pull": False}},
+                upsert=True
+            )
+            created = result.upserted_id is not None
+        except DuplicateKeyError:
+            # A concurrent upsert for the same pair won the race
+            created = False
+        if not created:
+            return {"following": True, "created": False, "followers_count": self._followers_count(followee_oid)}
+
+        self.users_collection.update_one({"_id": follower_oid}, {"$inc": {FOLLOWING_COUNT: 1}})
+        followee = self.users_collection.find_one_and_update(
+            {"_id": followee_oid},
+            {"$inc": {FOLLOWERS_COUNT: 1}},
+            projection={FOLLOWERS_COUNT: 1, PULL_AUTHOR: 1},
+            return_document=ReturnDocument.AFTER
+        ) or {}
+        if is_pull_author(followee):
+            self._switch_to_pull(followee_oid, followee, follower_oid)
+        else:
+            backfill_inbox(self.madlibs_collection, self.inbox_collection, follower_oid, followee_oid)
+        return {"following": True, "created": True, "followers_count": followee.get(FOLLOWERS_COUNT, 0)}
+
+    def unfollow(self, follower_id, followee_id) -> Dict:
+        """
+        Idempotently unfollow a user and drop their posts from the follower's inbox.
+
+        Returns:
+            Dict with 'following' (always False), 'removed' (False if there was
+            no follow to remove) and the followee's 'followers_count'
+        """
+        follower_oid, followee_oid = ObjectId(follower_id), ObjectId(followee_id)
+        result = self.collection.delete_one({"follower_id": follower_oid, "followee_id": followee_oid})
+        if not result.deleted_count:
+            return {"following": False, "removed": False, "followers_count": self._followers_count(followee_oid)}
+
+        self.users_collection.update_one(
+            {"_id": follower_oid, FOLLOWING_COUNT: {"$gt": 0}},
+            {"$inc": {FOLLOWING_COUNT: -1}}
+        )
+        followee = self.users_collection.find_one_and_update(
+            {"_id": followee_oid, FOLLOWERS_COUNT: {"$gt": 0}},
+            {"$inc": {FOLLOWERS_COUNT: -1}},
+            projection={FOLLOWERS_COUNT: 1},
+            return_document=ReturnDocument.AFTER
+        )
+        remove_author_from_inbox(self.inbox_collection, follower_oid, followee_oid)
+        followers_count = followee[FOLLOWERS_COUNT] if followee else self._followers_count(followee_oid)
+        return {"following": False, "removed": True, "followers_count": followers_count}
+
+    def is_following(self, follower_id, followee_id) -> bool:
+        return self.collection.find_one(
+            {"follower_id": ObjectId(follower_id), "followee_id": ObjectId(followee_id)}, {"_id": 1}
+        ) is not None
+
+    def _page(self, key: str, user_id, other: str, limit: int,
+              cursor: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+        """Follows matching {key: user_id} newest first, as the user on the `other` side"""
+        query = {key: ObjectId(user_id)}
+        query.update(build_cursor_filter(cursor))
+
+        # Fetch one extra document to know whether another page exists
+        follows = list(self.collection.find(
+            query,
+            {other: 1, "created_at": 1},
+            sort=[("created_at", -1), ("_id", -1)],
+            limit=limit + 1
+        ))
+        next_cursor = None
+        if len(follows) > limit:
+            follows = follows[:limit]
+            next_cursor = encode_cursor(follows[-1]["created_at"], follows[-1]["_id"])
+
+        usernames = {
+            doc["_id"]: doc.get("username")
+            for doc in self.users_collection.find({"_id": {"$in": [f[other] for f in follows]}}, {"username": 1})
+        } if follows else {}
+        users = [
+            {"user_id": str(f[other]), "username": usernames.get(f[other]), "followed_at": f["created_at"]}
+            for f in follows
+        ]
+        return users, next_cursor
+
+    def get_followers_page(self, user_id, limit: int = 20,
+                           cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Users following user_id, most recent follow first.
+
+        Returns:
+            Tuple of ([{'user_id', 'username', 'followed_at'}], next_cursor);
+            next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        return self._page("followee_id", user_id, "follower_id", limit, cursor)
+
+    def get_following_page(self, user_id, limit: int = 20,
+                           cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """Users that user_id follows, most recent follow first. Same shape as get_followers_page."""
+        return self._page("follower_id", user_id, "followee_id", limit, cursor)
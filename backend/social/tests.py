@@ -51,8 +51,9 @@ class LikeViewSetAPITest(APITestCase):
         """Authenticated user can like a post (first time)"""
         # Arrange: mock user lookup and like service
         svc_like = MockLikeModel.return_value
-        svc_like.user_liked_post.return_value = False
-        svc_like.like_post.return_value = "mock-like-id"
+        svc_like.like_post.return_value = {
+            'liked': True, 'created': True, 'like_id': "mock-like-id", 'likes_count': 1
+        }
 
         user_ops = MockUserOps.return_value
         user_ops.get_by_email.return_value = {'_id': self.mongo_user_id}
@@ -65,7 +66,10 @@ class LikeViewSetAPITest(APITestCase):
         self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
         self.assertIn('like_id', resp.data)
         self.assertEqual(resp.data['message'], 'Post liked successfully.')
-        svc_like.user_liked_post.assert_called_once_with(self.mongo_user_id, 'post-abc')
+        self.assertTrue(resp.data['liked'])
+        self.assertEqual(resp.data['likes_count'], 1)
+        # No separate existence check: the like is a single upsert
+        svc_like.user_liked_post.assert_not_called()
         svc_like.like_post.assert_called_once_with(self.mongo_user_id, 'post-abc')
 
     # ---------------------------------------------------------------------
@@ -74,7 +78,9 @@ class LikeViewSetAPITest(APITestCase):
     def test_like_post_already_liked(self, MockUserOps, MockLikeModel):
         """If user already liked the post, return 200 with message"""
         svc_like = MockLikeModel.return_value
-        svc_like.user_liked_post.return_value = True
+        svc_like.like_post.return_value = {
+            'liked': True, 'created': False, 'like_id': None, 'likes_count': 4
+        }
 
         user_ops = MockUserOps.return_value
         user_ops.get_by_email.return_value = {'_id': self.mongo_user_id}
@@ -86,7 +92,8 @@ class LikeViewSetAPITest(APITestCase):
 
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
         self.assertEqual(resp.data['message'], 'Post already liked.')
-        svc_like.user_liked_post.assert_called_once_with(self.mongo_user_id, 'post-abc')
+        self.assertEqual(resp.data['likes_count'], 4)
+        svc_like.like_post.assert_called_once_with(self.mongo_user_id, 'post-abc')
 
     # ---------------------------------------------------------------------
     @patch('social.views.LikeModel')
@@ -94,7 +101,7 @@ class LikeViewSetAPITest(APITestCase):
     def test_unlike_post_success(self, MockUserOps, MockLikeModel):
         """Authenticated user can unlike a previously liked post"""
         svc_like = MockLikeModel.return_value
-        svc_like.unlike_post.return_value = True
+        svc_like.unlike_post.return_value = {'liked': False, 'removed': True, 'likes_count': 0}
 
         user_ops = MockUserOps.return_value
         user_ops.get_by_email.return_value = {'_id': self.mongo_user_id}
@@ -107,6 +114,24 @@ class LikeViewSetAPITest(APITestCase):
         self.assertEqual(resp.data['message'], 'Post unliked successfully.')
         svc_like.unlike_post.assert_called_once_with(self.mongo_user_id, 'post-abc')
 
+    # ---------------------------------------------------------------------
+    @patch('social.views.LikeModel')
+    @patch('social.views.UserOperations')
+    def test_unlike_post_not_liked_is_idempotent(self, MockUserOps, MockLikeModel):
+        """Unliking a post that was not liked returns the current state, not an error"""
+        svc_like = MockLikeModel.return_value
+        svc_like.unlike_post.return_value = {'liked': False, 'removed': False, 'likes_count': 2}
+
+        user_ops = MockUserOps.return_value
+        user_ops.get_by_email.return_value = {'_id': self.mongo_user_id}
+
+        self.client.force_authenticate(user=self.user)
+        resp = self.client.post(self._unlike_post_url("post-abc"))
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertFalse(resp.data['liked'])
+        self.assertEqual(resp.data['likes_count'], 2)
+
     # ---------------------------------------------------------------------
     @patch('social.views.LikeModel')
     def test_get_post_likes_count_public(self, MockLikeModel):
@@ -127,8 +152,10 @@ class LikeViewSetAPITest(APITestCase):
     def test_like_comment_and_unlike_comment(self, MockUserOps, MockLikeModel):
         """Test liking and unliking a comment endpoints"""
         svc_like = MockLikeModel.return_value
-        svc_like.like_comment.return_value = "mock-like-comment-id"
-        svc_like.unlike_comment.return_value = True
+        svc_like.like_comment.return_value = {
+            'liked': True, 'created': True, 'like_id': "mock-like-comment-id", 'likes_count': 1
+        }
+        svc_like.unlike_comment.return_value = {'liked': False, 'removed': True, 'likes_count': 0}
 
         user_ops = MockUserOps.return_value
         user_ops.get_by_email.return_value = {'_id': self.mongo_user_id}
@@ -156,6 +183,10 @@ class CommentViewSetAPITest(APITestCase):
         self.user = User.objects.create_user(username="commenter", password="pass", email="commenter@example.com")
         self.mongo_user_id = str(ObjectId())
 
+        cascade_patcher = patch('social.views.CascadeDeleteService')
+        self.mock_cascade = cascade_patcher.start().return_value
+        self.addCleanup(cascade_patcher.stop)
+
     def _create_comment_url(self, post_id):
         return f"/api/comments/{post_id}/comment/"
 
@@ -166,9 +197,10 @@ class CommentViewSetAPITest(APITestCase):
         return f"/api/comments/{comment_id}/"
 
     # ---------------------------------------------------------------------
+    @patch('social.views.LikeModel')
     @patch('social.views.CommentModel')
     @patch('social.views.UserOperations')
-    def test_create_comment_success(self, MockUserOps, MockCommentModel):
+    def test_create_comment_success(self, MockUserOps, MockCommentModel, MockLikeModel):
         svc_comment = MockCommentModel.return_value
         svc_comment.add_comment.return_value = "mock-comment-id"
 
@@ -192,20 +224,53 @@ class CommentViewSetAPITest(APITestCase):
         self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
 
     # ---------------------------------------------------------------------
+    @patch('social.views.LikeModel')
     @patch('social.views.CommentModel')
-    def test_list_post_comments_public(self, MockCommentModel):
+    @patch('social.views.UserOperations')
+    def test_list_post_comments_public(self, MockUserOps, MockCommentModel, MockLikeModel):
         svc_comment = MockCommentModel.return_value
-        svc_comment.get_post_comments.return_value = [
-            {"_id": str(ObjectId()), "user_id": str(ObjectId()), "post_id": "POST123", "text": "A", "created_at": "t"},
-            {"_id": str(ObjectId()), "user_id": str(ObjectId()), "post_id": "POST123", "text": "B", "created_at": "t"}
-        ]
+        svc_comment.get_post_comments_page.return_value = ([
+            {"_id": ObjectId(), "user_id": ObjectId(), "post_id": "POST123", "text": "A", "created_at": "t", "likes_count": 3},
+            {"_id": ObjectId(), "user_id": ObjectId(), "post_id": "POST123", "text": "B", "created_at": "t"}
+        ], "next-page")
 
         url = self._list_comments_url("POST123")
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
         self.assertIn('comments', resp.data)
         self.assertEqual(len(resp.data['comments']), 2)
-        svc_comment.get_post_comments.assert_called_once_with('POST123')
+        self.assertEqual(resp.data['next_cursor'], "next-page")
+        self.assertEqual(resp.data['comments'][0]['likes_count'], 3)
+        self.assertEqual(resp.data['comments'][1]['likes_count'], 0)
+        self.assertFalse(resp.data['comments'][0]['liked_by_me'])
+        svc_comment.get_post_comments_page.assert_called_once_with('POST123', limit=20, cursor=None)
+        # Anonymous viewers never trigger the liked lookup
+        MockLikeModel.return_value.user_liked_comments.assert_not_called()
+
+    # ---------------------------------------------------------------------
+    @patch('social.views.LikeModel')
+    @patch('social.views.CommentModel')
+    @patch('social.views.UserOperations')
+    def test_list_post_comments_liked_by_me(self, MockUserOps, MockCommentModel, MockLikeModel):
+        liked_id, other_id = ObjectId(), ObjectId()
+        svc_comment = MockCommentModel.return_value
+        svc_comment.get_post_comments_page.return_value = ([
+            {"_id": liked_id, "user_id": ObjectId(), "post_id": "POST123", "text": "A", "created_at": "t"},
+            {"_id": other_id, "user_id": ObjectId(), "post_id": "POST123", "text": "B", "created_at": "t"}
+        ], None)
+        svc_like = MockLikeModel.return_value
+        svc_like.user_liked_comments.return_value = {str(liked_id)}
+        MockUserOps.return_value.get_by_email.return_value = {'_id': self.mongo_user_id}
+
+        self.client.force_authenticate(user=self.user)
+        resp = self.client.get(self._list_comments_url("POST123") + "?limit=5&cursor=abc")
+
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.data['comments'][0]['liked_by_me'])
+        self.assertFalse(resp.data['comments'][1]['liked_by_me'])
+        self.assertIsNone(resp.data['next_cursor'])
+        svc_comment.get_post_comments_page.assert_called_once_with('POST123', limit=5, cursor='abc')
+        svc_like.user_liked_comments.assert_called_once_with(self.mongo_user_id, [liked_id, other_id])
 
     # ---------------------------------------------------------------------
     @patch('social.views.CommentModel')
@@ -227,9 +292,10 @@ class CommentViewSetAPITest(APITestCase):
         self.assertEqual(resp.data['text'], 'Hello')
 
     # ---------------------------------------------------------------------
+    @patch('social.views.LikeModel')
     @patch('social.views.CommentModel')
     @patch('social.views.UserOperations')
-    def test_update_and_delete_comment_with_ownership(self, MockUserOps, MockCommentModel):
+    def test_update_and_delete_comment_with_ownership(self, MockUserOps, MockCommentModel, MockLikeModel):
         svc_comment = MockCommentModel.return_value
         user_ops = MockUserOps.return_value
         user_ops.get_by_email.return_value = {'_id': self.mongo_user_id}
@@ -255,5 +321,425 @@ class CommentViewSetAPITest(APITestCase):
         # Delete comment
         resp_delete = self.client.delete(update_url)
         self.assertIn(resp_delete.status_code, [status.HTTP_204_NO_CONTENT, status.HTTP_200_OK])
-        svc_comment.collection.delete_one.assert_called()
+        self.mock_cascade.delete_comment.assert_called_once_with(fake_comment_id)
+
+
+# -------------------------
+# LikeModel atomic like tests
+# -------------------------
+class LikeModelAtomicTest(TestCase):
+    def setUp(self):
+        from social.models import LikeModel
+        with patch('social.models.get_collection'):
+            self.service = LikeModel()
+        self.user_id = str(ObjectId())
+        self.post_id = str(ObjectId())
+
+    def test_like_post_is_single_upsert(self):
+        """A new like is one upsert followed by one counter update"""
+        new_id = ObjectId()
+        self.service.collection.update_one.return_value = Mock(upserted_id=new_id)
+        self.service.madlibs_collection.find_one_and_update.return_value = {'likes_count': 3}
+
+        result = self.service.like_post(self.user_id, self.post_id)
+
+        self.assertEqual(result, {'liked': True, 'created': True, 'like_id': new_id, 'likes_count': 3})
+        args, kwargs = self.service.collection.update_one.call_args
+        self.assertEqual(args[0], {
+            'user_id': ObjectId(self.user_id), 'post_id': ObjectId(self.post_id), 'comment_id': None
+        })
+        self.assertIn('$setOnInsert', args[1])
+        self.assertTrue(kwargs['upsert'])
+        self.service.collection.insert_one.assert_not_called()
+        self.service.collection.find_one.assert_not_called()
 
+    def test_like_post_credits_creator(self):
+        """A new like on a post is added to its creator's likes_received"""
+        creator_id = ObjectId()
+        self.service.collection.update_one.return_value = Mock(upserted_id=ObjectId())
+        self.service.madlibs_collection.find_one_and_update.return_value = {'likes_count': 1, 'creator_id': creator_id}
+
+        self.service.like_post(self.user_id, self.post_id)
+
+        self.service.users_collection.update_one.assert_called_with(
+            {'_id': creator_id}, {'$inc': {'likes_received': 1}}
+        )
+
+    def test_like_post_already_liked_leaves_counter(self):
+        """Repeating a like does not touch the counter"""
+        self.service.collection.update_one.return_value = Mock(upserted_id=None)
+        self.service.madlibs_collection.find_one.return_value = {'likes_count': 3}
+
+        result = self.service.like_post(self.user_id, self.post_id)
+
+        self.assertFalse(result['created'])
+        self.assertEqual(result['likes_count'], 3)
+        self.service.madlibs_collection.find_one_and_update.assert_not_called()
+
+    def test_like_post_duplicate_key_race(self):
+        """A concurrent upsert losing the race is reported as already liked"""
+        from pymongo.errors import DuplicateKeyError
+        self.service.collection.update_one.side_effect = DuplicateKeyError("E11000")
+        self.service.madlibs_collection.find_one.return_value = {'likes_count': 1}
+
+        result = self.service.like_post(self.user_id, self.post_id)
+
+        self.assertFalse(result['created'])
+        self.assertEqual(result['likes_count'], 1)
+
+    def test_unlike_comment_decrements_counter(self):
+        comment_id = str(ObjectId())
+        self.service.collection.delete_one.return_value = Mock(deleted_count=1)
+        self.service.comments_collection.find_one_and_update.return_value = {'likes_count': 0}
+
+        result = self.service.unlike_comment(self.user_id, comment_id)
+
+        self.assertEqual(result, {'liked': False, 'removed': True, 'likes_count': 0})
+        query, update = self.service.comments_collection.find_one_and_update.call_args[0]
+        self.assertEqual(query, {'_id': ObjectId(comment_id), 'likes_count': {'$gt': 0}})
+        self.assertEqual(update, {'$inc': {'likes_count': -1}})
+
+
+class LikeConcurrencyIntegrationTest(TestCase):
+    """Fires parallel likes against a real MongoDB to check the upsert is race free"""
+
+    PARALLEL_LIKES = 100
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        import os
+        cls.skip_integration = os.getenv('SKIP_INTEGRATION_TESTS', 'true').lower() == 'true'
+
+    def setUp(self):
+        if self.skip_integration:
+            self.skipTest("Integration tests disabled. Set SKIP_INTEGRATION_TESTS=false to enable.")
+
+        from social.models import LikeModel
+        from core.db_connect import get_collection
+        self.like_service = LikeModel()
+        self.madlibs = get_collection('filled_madlibs')
+        self.post_id = self.madlibs.insert_one({'public': True, 'content': [], 'likes_count': 0}).inserted_id
+
+    def tearDown(self):
+        if not self.skip_integration:
+            self.like_service.collection.delete_many({'post_id': self.post_id})
+            self.madlibs.delete_one({'_id': self.post_id})
+
+    def _fire(self, user_ids):
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            return list(pool.map(lambda uid: self.like_service.like_post(uid, self.post_id), user_ids))
+
+    def test_parallel_likes_same_user(self):
+        """100 parallel likes from one user create exactly one like"""
+        user_id = ObjectId()
+        results = self._fire([user_id] * self.PARALLEL_LIKES)
+
+        self.assertEqual(sum(r['created'] for r in results), 1)
+        self.assertEqual(self.like_service.get_post_likes_count(self.post_id), 1)
+        self.assertEqual(self.madlibs.find_one({'_id': self.post_id})['likes_count'], 1)
+
+    def test_parallel_likes_distinct_users(self):
+        """100 parallel likes from different users are all counted"""
+        results = self._fire([ObjectId() for _ in range(self.PARALLEL_LIKES)])
+
+        self.assertTrue(all(r['created'] for r in results))
+        self.assertEqual(self.like_service.get_post_likes_count(self.post_id), self.PARALLEL_LIKES)
+        self.assertEqual(self.madlibs.find_one({'_id': self.post_id})['likes_count'], self.PARALLEL_LIKES)
+
+
+class RecountLikesCommandTest(TestCase):
+    @patch('social.management.commands.recount_likes.get_collection')
+    def test_duplicates_removed_before_unique_index(self, mock_get_collection):
+        """Duplicate likes are deleted (keeping the oldest) before the unique index is built"""
+        from io import StringIO
+        from django.core.management import call_command
+        likes = Mock(name='likes')
+        mock_get_collection.side_effect = lambda name: likes if name == 'likes' else Mock(name=name)
+        keep, extra = ObjectId(), ObjectId()
+        likes.aggregate.side_effect = [[{'ids': [keep, extra], 'count': 2}], [], []]
+        calls = []
+        likes.delete_many.side_effect = lambda *a: calls.append('delete') or Mock(deleted_count=1)
+        likes.create_index.side_effect = lambda *a, **kw: calls.append('index')
+
+        call_command('recount_likes', stdout=StringIO())
+
+        likes.delete_many.assert_called_once_with({'_id': {'$in': [extra]}})
+        self.assertTrue(likes.create_index.call_args[1]['unique'])
+        self.assertEqual(calls, ['delete', 'index'])
+
+
+# -------------------------
+# CommentModel pagination tests
+# -------------------------
+class CommentModelPaginationTest(TestCase):
+    def setUp(self):
+        from social.models import CommentModel
+        with patch('social.models.get_collection'):
+            self.service = CommentModel()
+
+    def _docs(self, n):
+        from datetime import datetime, timedelta
+        base = datetime(2025, 1, 1)
+        return [
+            {"_id": ObjectId(), "post_id": ObjectId(), "created_at": base - timedelta(minutes=i)}
+            for i in range(n)
+        ]
+
+    def test_page_with_more_results_returns_cursor(self):
+        """A page fetches limit + 1 documents and returns a cursor for the next page"""
+        docs = self._docs(3)
+        self.service.collection.find.return_value = iter(docs)
+
+        comments, next_cursor = self.service.get_post_comments_page(str(ObjectId()), limit=2)
+
+        self.assertEqual(comments, docs[:2])
+        self.assertIsNotNone(next_cursor)
+        self.assertEqual(self.service.collection.find.call_args.kwargs['limit'], 3)
+
+        from core.pagination import decode_cursor
+        self.assertEqual(decode_cursor(next_cursor), (docs[1]['created_at'], docs[1]['_id']))
+
+    def test_last_page_has_no_cursor(self):
+        docs = self._docs(2)
+        self.service.collection.find.return_value = iter(docs)
+
+        comments, next_cursor = self.service.get_post_comments_page(str(ObjectId()), limit=2)
+
+        self.assertEqual(len(comments), 2)
+        self.assertIsNone(next_cursor)
+
+    def test_cursor_narrows_query(self):
+        from core.pagination import encode_cursor
+        docs = self._docs(1)
+        self.service.collection.find.return_value = iter([])
+
+        cursor = encode_cursor(docs[0]['created_at'], docs[0]['_id'])
+        self.service.get_post_comments_page(str(ObjectId()), limit=2, cursor=cursor)
+
+        query = self.service.collection.find.call_args[0][0]
+        self.assertIn('$or', query)
+        self.assertEqual(query['$or'][1]['_id'], {'$lt': docs[0]['_id']})
+
+
+class LikeWriteBufferTest(TestCase):
+    def setUp(self):
+        from social.write_buffer import LikeWriteBuffer
+        self.likes = Mock()
+        self.posts = Mock()
+        self.comments = Mock()
+        self.buffer = LikeWriteBuffer(self.likes, {'post_id': self.posts, 'comment_id': self.comments})
+        self.likes.find_one.return_value = None
+        self.posts.find_one.return_value = {'likes_count': 5}
+        self.user_id = ObjectId()
+        self.post_id = ObjectId()
+
+    def _key(self, user_id=None):
+        return {'user_id': user_id or self.user_id, 'post_id': self.post_id, 'comment_id': None}
+
+    def test_toggles_collapse_to_net_effect(self):
+        """like/unlike/like inside one window flushes as a single upsert"""
+        self.buffer.set_state(self._key(), True)
+        self.buffer.set_state(self._key(), False)
+        result = self.buffer.set_state(self._key(), True)
+
+        self.assertEqual(result['likes_count'], 6)
+        self.likes.find_one.assert_called_once()
+        self.likes.bulk_write.return_value = Mock(upserted_ids={0: ObjectId()}, deleted_count=0)
+
+        self.assertEqual(self.buffer.flush(), 1)
+        ops = self.likes.bulk_write.call_args[0][0]
+        self.assertEqual(len(ops), 1)
+        self.assertFalse(self.likes.bulk_write.call_args.kwargs['ordered'])
+        counter_ops = self.posts.bulk_write.call_args[0][0]
+        self.assertEqual(counter_ops[0]._doc, {'$inc': {'likes_count': 1}})
+
+    def test_cancelled_toggles_write_nothing(self):
+        self.buffer.set_state(self._key(), True)
+        self.buffer.set_state(self._key(), False)
+
+        self.assertEqual(self.buffer.flush(), 0)
+        self.likes.bulk_write.assert_not_called()
+        self.posts.bulk_write.assert_not_called()
+
+    def test_read_your_writes(self):
+        self.buffer.set_state(self._key(), True)
+
+        key = (self.user_id, self.post_id, None)
+        self.assertTrue(self.buffer.pending_state(key))
+        self.assertEqual(self.buffer.pending_delta('post_id', self.post_id), 1)
+        self.assertIsNone(self.buffer.pending_state((ObjectId(), self.post_id, None)))
+
+    def test_counter_deltas_summed_per_target(self):
+        other_user = ObjectId()
+        self.buffer.set_state(self._key(), True)
+        self.buffer.set_state(self._key(other_user), True)
+        self.likes.bulk_write.return_value = Mock(upserted_ids={0: ObjectId(), 1: ObjectId()}, deleted_count=0)
+
+        self.buffer.flush()
+
+        counter_ops = self.posts.bulk_write.call_args[0][0]
+        self.assertEqual(len(counter_ops), 1)
+        self.assertEqual(counter_ops[0]._doc, {'$inc': {'likes_count': 2}})
+
+    def test_missing_deletes_trigger_recount(self):
+        """If a delete matched nothing the target is recounted instead of decremented"""
+        self.likes.find_one.return_value = {'_id': ObjectId()}
+        self.buffer.set_state(self._key(), False)
+        self.likes.bulk_write.return_value = Mock(upserted_ids={}, deleted_count=0)
+        self.likes.aggregate.return_value = [{'_id': self.post_id, 'count': 4}]
+
+        self.buffer.flush()
+
+        counter_ops = self.posts.bulk_write.call_args[0][0]
+        self.assertEqual(counter_ops[0]._doc, {'$set': {'likes_count': 4}})
+
+    def test_failed_flush_requeues(self):
+        self.buffer.set_state(self._key(), True)
+        self.likes.bulk_write.side_effect = Exception("network error")
+
+        with self.assertRaises(Exception):
+            self.buffer.flush()
+
+        self.assertTrue(self.buffer.pending_state((self.user_id, self.post_id, None)))
+        self.assertEqual(self.buffer.pending_delta('post_id', self.post_id), 1)
+        self.likes.bulk_write.side_effect = None
+        self.likes.bulk_write.return_value = Mock(upserted_ids={0: ObjectId()}, deleted_count=0)
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.buffer.pending_delta('post_id', self.post_id), 0)
+
+    def test_flush_finishing_between_lock_sections(self):
+        """If the in-flight entry is written before set_state relocks, the stored state is read back"""
+        from social.write_buffer import _PendingLike
+        key = (self.user_id, self.post_id, None)
+        self.buffer._in_flight = {key: _PendingLike(False)}
+        self.buffer._in_flight[key].desired = True
+        pending_state = self.buffer.pending_state
+
+        def flush_finishes(k):
+            state = pending_state(k)
+            self.buffer._in_flight = {}
+            return state
+        self.likes.find_one.return_value = {'_id': ObjectId()}
+
+        with patch.object(self.buffer, 'pending_state', side_effect=flush_finishes):
+            result = self.buffer.set_state(self._key(), False)
+
+        self.assertTrue(result['removed'])
+        self.likes.find_one.assert_called_once()
+        self.assertFalse(self.buffer._pending[key].desired)
+        self.assertTrue(self.buffer._pending[key].persisted)
+        self.assertEqual(self.buffer.pending_delta('post_id', self.post_id), -1)
+
+    def test_pending_delta_tracks_toggles_during_flush(self):
+        """A toggle made while its like is in flight is counted on top of it"""
+        other_user = ObjectId()
+        self.buffer.set_state(self._key(), True)
+        self.buffer.set_state(self._key(other_user), True)
+        self.assertEqual(self.buffer.pending_delta('post_id', self.post_id), 2)
+
+        def unlike_mid_flush(ops, ordered):
+            self.buffer.set_state(self._key(), False)
+            self.assertEqual(self.buffer.pending_delta('post_id', self.post_id), 1)
+            raise Exception("network error")
+        self.likes.bulk_write.side_effect = unlike_mid_flush
+
+        with self.assertRaises(Exception):
+            self.buffer.flush()
+        self.assertEqual(self.buffer.pending_delta('post_id', self.post_id), 1)
+
+        self.likes.bulk_write.side_effect = None
+        self.likes.bulk_write.return_value = Mock(upserted_ids={0: ObjectId()}, deleted_count=0)
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(len(self.likes.bulk_write.call_args[0][0]), 1)
+        self.assertEqual(self.buffer.pending_delta('post_id', self.post_id), 0)
+
+    @patch('social.models.get_collection')
+    @patch('social.models.get_like_write_buffer')
+    def test_like_model_routes_through_buffer(self, mock_get_buffer, mock_get_collection):
+        from social.models import LikeModel
+        mock_get_buffer.return_value = self.buffer
+        service = LikeModel()
+
+        result = service.like_post(str(self.user_id), str(self.post_id))
+
+        self.assertTrue(result['created'])
+        self.assertIsNone(result['like_id'])
+        service.collection.update_one.assert_not_called()
+        self.assertTrue(service.user_liked_post(str(self.user_id), str(self.post_id)))
+
+
+# -------------------------
+# FollowModel tests
+# -------------------------
+class FollowModelTest(TestCase):
+    def setUp(self):
+        from social.models import FollowModel
+        with patch('social.models.get_collection', side_effect=lambda name: Mock(name=name)):
+            self.service = FollowModel()
+        self.follower_id = ObjectId()
+        self.followee_id = ObjectId()
+
+    def test_follow_updates_both_counters_and_backfills(self):
+        """A new follow is one upsert, an $inc on each user and a backfill of recent posts"""
+        post = {'_id': ObjectId(), 'creator_id': self.followee_id, 'created_at': ObjectId().generation_time}
+        self.service.collection.update_one.return_value = Mock(upserted_id=ObjectId())
+        self.service.users_collection.find_one_and_update.return_value = {'followers_count': 4}
+        self.service.madlibs_collection.find.return_value = [post]
+        self.service.inbox_collection.insert_many.return_value = Mock(inserted_ids=[ObjectId()])
+
+        result = self.service.follow(str(self.follower_id), str(self.followee_id))
+
+        self.assertEqual(result, {'following': True, 'created': True, 'followers_count': 4})
+        self.service.users_collection.update_one.assert_called_once_with(
+            {'_id': self.follower_id}, {'$inc': {'following_count': 1}}
+        )
+        query, update = self.service.users_collection.find_one_and_update.call_args[0]
+        self.assertEqual((query, update), ({'_id': self.followee_id}, {'$inc': {'followers_count': 1}}))
+        entries = self.service.inbox_collection.insert_many.call_args[0][0]
+        self.assertEqual(entries, [{'owner_id': self.follower_id, 'madlib_id': post['_id'],
+                                    'author_id': self.followee_id, 'created_at': post['created_at']}])
+
+    def test_follow_past_threshold_switches_author_to_pull(self):
+        """The follow that takes an author past the fan-out threshold marks all their follows pull"""
+        from django.test import override_settings
+        self.service.collection.update_one.return_value = Mock(upserted_id=ObjectId())
+        self.service.users_collection.find_one_and_update.return_value = {'followers_count': 3}
+
+        with override_settings(FEED_FANOUT_MAX_FOLLOWERS=2):
+            self.service.follow(self.follower_id, self.followee_id)
+
+        self.service.users_collection.update_one.assert_called_with(
+            {'_id': self.followee_id}, {'$set': {'fanout_on_read': True}}
+        )
+        self.service.collection.update_many.assert_called_once_with(
+            {'followee_id': self.followee_id, 'pull': False}, {'$set': {'pull': True}}
+        )
+        self.service.inbox_collection.insert_many.assert_not_called()
+
+    def test_repeated_follow_and_self_follow(self):
+        """Following twice leaves the counters alone; following yourself is rejected"""
+        self.service.collection.update_one.return_value = Mock(upserted_id=None)
+        self.service.users_collection.find_one.return_value = {'followers_count': 4}
+
+        result = self.service.follow(self.follower_id, self.followee_id)
+
+        self.assertFalse(result['created'])
+        self.service.users_collection.find_one_and_update.assert_not_called()
+        with self.assertRaises(ValueError):
+            self.service.follow(self.follower_id, self.follower_id)
+
+    def test_unfollow_decrements_and_clears_inbox(self):
+        self.service.collection.delete_one.return_value = Mock(deleted_count=1)
+        self.service.users_collection.find_one_and_update.return_value = {'followers_count': 0}
+
+        result = self.service.unfollow(self.follower_id, self.followee_id)
+
+        self.assertEqual(result, {'following': False, 'removed': True, 'followers_count': 0})
+        query, update = self.service.users_collection.find_one_and_update.call_args[0]
+        self.assertEqual(query, {'_id': self.followee_id, 'followers_count': {'$gt': 0}})
+        self.assertEqual(update, {'$inc': {'followers_count': -1}})
+        self.service.inbox_collection.delete_many.assert_called_once_with(
+            {'owner_id': self.follower_id, 'author_id': self.followee_id}
+        )
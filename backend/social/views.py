@@ -2,7 +2,10 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from users.models import UserOperations
-from .models import LikeModel, CommentModel
+from .models import LikeModel, CommentModel, FollowModel
+from core.cascade import CascadeDeleteService
+from core.pagination import parse_limit_param
+from core.services import services
 import logging
 from bson import ObjectId
 from bson.errors import InvalidId
@@ -12,13 +15,16 @@ logger = logging.getLogger(__name__)
 class LikeViewSet(viewsets.ViewSet):
     """
     API endpoints for liking/unliking posts and comments.
+
+    Like and unlike are idempotent: repeating either returns 200 with the
+    current state ('liked') and counter ('likes_count') instead of an error.
     """
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.like_service = LikeModel()
-        self.comment_service = CommentModel()
-        self.user_service = UserOperations()
+        self.like_service = services.get(LikeModel)
+        self.comment_service = services.get(CommentModel)
+        self.user_service = services.get(UserOperations)
 
     def get_permissions(self):
         """
@@ -57,21 +63,29 @@ class LikeViewSet(viewsets.ViewSet):
             user_id = mongo_user['_id']
             post_id = pk
 
-            if self.like_service.user_liked_post(user_id, post_id):
-                return Response({'message': 'Post already liked.'}, status=status.HTTP_200_OK)
+            result = self.like_service.like_post(user_id, post_id)
 
-            like_id = self.like_service.like_post(user_id, post_id)
-            logger.info(f"User {user_id} liked post {post_id}")
+            if not result['created']:
+                return Response(
+                    {'message': 'Post already liked.', 'liked': True, 'likes_count': result['likes_count']},
+                    status=status.HTTP_200_OK
+                )
 
+            logger.info("User %s liked post %s", user_id, post_id)
             return Response(
-                {'like_id': str(like_id), 'message': 'Post liked successfully.'},
+                {
+                    'like_id': str(result['like_id']) if result['like_id'] else None,
+                    'message': 'Post liked successfully.',
+                    'liked': True,
+                    'likes_count': result['likes_count'],
+                },
                 status=status.HTTP_201_CREATED
             )
 
         except InvalidId:
             return Response({'error': 'Invalid post ID.'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error liking post: {e}")
+            logger.error("Error liking post: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     # -------------------------------------------------------------------------
@@ -91,17 +105,23 @@ class LikeViewSet(viewsets.ViewSet):
             user_id = mongo_user['_id']
             post_id = pk
 
-            success = self.like_service.unlike_post(user_id, post_id)
-            if not success:
-                return Response({'message': 'Like not found.'}, status=status.HTTP_404_NOT_FOUND)
+            result = self.like_service.unlike_post(user_id, post_id)
+            if not result['removed']:
+                return Response(
+                    {'message': 'Post was not liked.', 'liked': False, 'likes_count': result['likes_count']},
+                    status=status.HTTP_200_OK
+                )
 
-            logger.info(f"User {user_id} unliked post {post_id}")
-            return Response({'message': 'Post unliked successfully.'}, status=status.HTTP_200_OK)
+            logger.info("User %s unliked post %s", user_id, post_id)
+            return Response(
+                {'message': 'Post unliked successfully.', 'liked': False, 'likes_count': result['likes_count']},
+                status=status.HTTP_200_OK
+            )
 
         except InvalidId:
             return Response({'error': 'Invalid post ID.'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error unliking post: {e}")
+            logger.error("Error unliking post: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     # -------------------------------------------------------------------------
@@ -120,7 +140,7 @@ class LikeViewSet(viewsets.ViewSet):
         except InvalidId:
             return Response({'error': 'Invalid post ID.'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error getting like count: {e}")
+            logger.error("Error getting like count: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     # -------------------------------------------------------------------------
@@ -145,7 +165,7 @@ class LikeViewSet(viewsets.ViewSet):
         except InvalidId:
             return Response({'error': 'Invalid post ID.'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error checking liked status: {e}")
+            logger.error("Error checking liked status: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     # -------------------------------------------------------------------------
@@ -164,18 +184,29 @@ class LikeViewSet(viewsets.ViewSet):
 
             user_id = mongo_user['_id']
 
-            like_id = self.like_service.like_comment(user_id, comment_id)
-            logger.info(f"User {user_id} liked comment {comment_id}")
+            result = self.like_service.like_comment(user_id, comment_id)
 
+            if not result['created']:
+                return Response(
+                    {'message': 'Comment already liked.', 'liked': True, 'likes_count': result['likes_count']},
+                    status=status.HTTP_200_OK
+                )
+
+            logger.info("User %s liked comment %s", user_id, comment_id)
             return Response(
-                {'like_id': str(like_id), 'message': 'Comment liked successfully.'},
+                {
+                    'like_id': str(result['like_id']) if result['like_id'] else None,
+                    'message': 'Comment liked successfully.',
+                    'liked': True,
+                    'likes_count': result['likes_count'],
+                },
                 status=status.HTTP_201_CREATED
             )
 
         except InvalidId:
             return Response({'error': 'Invalid comment ID.'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error liking comment: {e}")
+            logger.error("Error liking comment: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     # -------------------------------------------------------------------------
@@ -194,17 +225,23 @@ class LikeViewSet(viewsets.ViewSet):
 
             user_id = mongo_user['_id']
 
-            success = self.like_service.unlike_comment(user_id, comment_id)
-            if not success:
-                return Response({'message': 'Like not found.'}, status=status.HTTP_404_NOT_FOUND)
+            result = self.like_service.unlike_comment(user_id, comment_id)
+            if not result['removed']:
+                return Response(
+                    {'message': 'Comment was not liked.', 'liked': False, 'likes_count': result['likes_count']},
+                    status=status.HTTP_200_OK
+                )
 
-            logger.info(f"User {user_id} unliked comment {comment_id}")
-            return Response({'message': 'Comment unliked successfully.'}, status=status.HTTP_200_OK)
+            logger.info("User %s unliked comment %s", user_id, comment_id)
+            return Response(
+                {'message': 'Comment unliked successfully.', 'liked': False, 'likes_count': result['likes_count']},
+                status=status.HTTP_200_OK
+            )
 
         except InvalidId:
             return Response({'error': 'Invalid comment ID.'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error unliking comment: {e}")
+            logger.error("Error unliking comment: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # comments 
@@ -215,8 +252,10 @@ class CommentViewSet(viewsets.ViewSet):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.comment_service = CommentModel()
-        self.user_service = UserOperations()
+        self.comment_service = services.get(CommentModel)
+        self.like_service = services.get(LikeModel)
+        self.user_service = services.get(UserOperations)
+        self.cascade_service = services.get(CascadeDeleteService)
 
     def get_permissions(self):
         permission_classes = {
@@ -262,25 +301,52 @@ class CommentViewSet(viewsets.ViewSet):
         except InvalidId:
             return Response({'error': 'Invalid post ID'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error creating comment: {e}")
+            logger.error("Error creating comment: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    # GET ALL COMMENTS FOR A POST
-    # GET /api/posts/{post_id}/comments/
+    # GET A PAGE OF COMMENTS FOR A POST
+    # GET /api/comments/{post_id}/comments/?limit=20&cursor=...
     @action(detail=True, methods=['get'], url_path='comments')
     def list_post_comments(self, request, pk=None):
+        """
+        Comments are returned newest first, each with its likes_count and a
+        liked_by_me flag for the authenticated user (False for anonymous users).
+        Pass next_cursor from the response as ?cursor= to fetch the next page.
+        """
         try:
-            comments = self.comment_service.get_post_comments(pk)
+            limit = parse_limit_param(request.query_params.get('limit'), default=20, maximum=100)
+            cursor = request.query_params.get('cursor')
+
+            comments, next_cursor = self.comment_service.get_post_comments_page(
+                pk, limit=limit, cursor=cursor
+            )
+
+            liked_ids = set()
+            if request.user.is_authenticated and comments:
+                mongo_user = self.user_service.get_by_email(request.user.email)
+                if mongo_user:
+                    liked_ids = self.like_service.user_liked_comments(
+                        mongo_user['_id'], [c['_id'] for c in comments]
+                    )
+
             for c in comments:
                 c['_id'] = str(c['_id'])
                 c['user_id'] = str(c['user_id'])
                 c['post_id'] = str(c['post_id'])
-            return Response({'post_id': pk, 'comments': comments}, status=status.HTTP_200_OK)
+                c['likes_count'] = c.get('likes_count', 0)
+                c['liked_by_me'] = c['_id'] in liked_ids
+
+            return Response(
+                {'post_id': pk, 'comments': comments, 'next_cursor': next_cursor},
+                status=status.HTTP_200_OK
+            )
 
         except InvalidId:
             return Response({'error': 'Invalid post ID'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error retrieving comments: {e}")
+            logger.error("Error retrieving comments: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     # RETRIEVE A SINGLE COMMENT
@@ -301,7 +367,7 @@ class CommentViewSet(viewsets.ViewSet):
         except InvalidId:
             return Response({'error': 'Invalid comment ID'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error retrieving comment: {e}")
+            logger.error("Error retrieving comment: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     # UPDATE COMMENT
@@ -339,7 +405,7 @@ class CommentViewSet(viewsets.ViewSet):
         except InvalidId:
             return Response({'error': 'Invalid comment ID'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error updating comment: {e}")
+            logger.error("Error updating comment: %s", e)
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     # DELETE COMMENT
@@ -363,12 +429,154 @@ class CommentViewSet(viewsets.ViewSet):
                     status=status.HTTP_403_FORBIDDEN
                 )
 
-            self.comment_service.collection.delete_one({"_id": ObjectId(pk)})
+            # Removes the likes on the comment along with it
+            self.cascade_service.delete_comment(pk)
 
             return Response({'message': 'Comment deleted successfully'}, status=status.HTTP_204_NO_CONTENT)
 
         except InvalidId:
             return Response({'error': 'Invalid comment ID'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"Error deleting comment: {e}")
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            logger.error("Error deleting comment: %s", e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class FollowViewSet(viewsets.ViewSet):
+    """
+    API endpoints for following users; {id} is the followed user's id.
+
+    Follow and unfollow are idempotent like likes: repeating either returns
+    200 with the current state ('following') and 'followers_count'.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.follow_service = services.get(FollowModel)
+        self.user_service = services.get(UserOperations)
+
+    def get_permissions(self):
+        """
+        Permission mapping per action
+        """
+        permission_classes = {
+            'follow': [permissions.IsAuthenticated],
+            'unfollow': [permissions.IsAuthenticated],
+
+            # Public
+            'followers': [permissions.AllowAny],
+            'following': [permissions.AllowAny],
+        }
+
+        return [
+            permission()
+            for permission in permission_classes.get(self.action, [permissions.IsAdminUser])
+        ]
+
+    # -------------------------------------------------------------------------
+    # FOLLOW A USER
+    # -------------------------------------------------------------------------
+    @action(detail=True, methods=['post'], url_path='follow')
+    def follow(self, request, pk=None):
+        """
+        Follow a user.
+        POST /api/follows/{id}/follow/
+        """
+        try:
+            if not ObjectId.is_valid(pk):
+                return Response({'error': 'Invalid user ID.'}, status=status.HTTP_400_BAD_REQUEST)
+            mongo_user = self.user_service.get_by_email(request.user.email)
+            if not mongo_user:
+                return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
+            if not self.user_service.get_by_id(pk):
+                return Response({'error': 'User to follow not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+            result = self.follow_service.follow(mongo_user['_id'], pk)
+
+            if not result['created']:
+                return Response(
+                    {'message': 'User already followed.', 'following': True,
+                     'followers_count': result['followers_count']},
+                    status=status.HTTP_200_OK
+                )
+
+            logger.info("User %s followed user %s", mongo_user['_id'], pk)
+            return Response(
+                {'message': 'User followed successfully.', 'following': True,
+                 'followers_count': result['followers_count']},
+                status=status.HTTP_201_CREATED
+            )
+
+        except InvalidId:
+            return Response({'error': 'Invalid user ID.'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error("Error following user: %s", e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    # -------------------------------------------------------------------------
+    # UNFOLLOW A USER
+    # -------------------------------------------------------------------------
+    @action(detail=True, methods=['post'], url_path='unfollow')
+    def unfollow(self, request, pk=None):
+        """
+        Unfollow a user.
+        POST /api/follows/{id}/unfollow/
+        """
+        try:
+            mongo_user = self.user_service.get_by_email(request.user.email)
+            if not mongo_user:
+                return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+            result = self.follow_service.unfollow(mongo_user['_id'], pk)
+
+            if not result['removed']:
+                return Response(
+                    {'message': 'User was not followed.', 'following': False,
+                     'followers_count': result['followers_count']},
+                    status=status.HTTP_200_OK
+                )
+
+            logger.info("User %s unfollowed user %s", mongo_user['_id'], pk)
+            return Response(
+                {'message': 'User unfollowed successfully.', 'following': False,
+                 'followers_count': result['followers_count']},
+                status=status.HTTP_200_OK
+            )
+
+        except InvalidId:
+            return Response({'error': 'Invalid user ID.'}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error("Error unfollowing user: %s", e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    # -------------------------------------------------------------------------
+    # LIST FOLLOWERS / FOLLOWING
+    # -------------------------------------------------------------------------
+    def _list(self, request, pk, page, key):
+        try:
+            limit = parse_limit_param(request.query_params.get('limit'), default=20, maximum=100)
+            users, next_cursor = page(pk, limit=limit, cursor=request.query_params.get('cursor'))
+            return Response({'user_id': pk, key: users, 'next_cursor': next_cursor}, status=status.HTTP_200_OK)
+        except InvalidId:
+            return Response({'error': 'Invalid user ID.'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error("Error retrieving %s: %s", key, e)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=True, methods=['get'], url_path='followers')
+    def followers(self, request, pk=None):
+        """
+        Users following {id}, most recent first.
+        GET /api/follows/{id}/followers/?limit=20&cursor=<next_cursor>
+        """
+        return self._list(request, pk, self.follow_service.get_followers_page, 'followers')
+
+    @action(detail=True, methods=['get'], url_path='following')
+    def following(self, request, pk=None):
+        """
+        Users {id} follows, most recent first.
+        GET /api/follows/{id}/following/?limit=20&cursor=<next_cursor>
+        """
+        return self._list(request, pk, self.follow_service.get_following_page, 'following')
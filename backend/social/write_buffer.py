@@ -0,0 +1,380 @@
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional, Dict, Tuple
+
+from bson.objectid import ObjectId
+from django.conf import settings
+from pymongo import UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
+from core.db_connect import get_collection
+from core.user_stats import bulk_increment_user_stats
+
+logger = logging.getLogger(__name__)
+
+# (user_id, post_id, comment_id) -- same shape as the unique like index
+LikeKey = Tuple[ObjectId, Optional[ObjectId], Optional[ObjectId]]
+
+
+class _PendingLike:
+    """Desired state of one (user, target) like, relative to what is stored"""
+    __slots__ = ('persisted', 'desired', 'changed_at')
+
+    def __init__(self, persisted: bool):
+        self.persisted = persisted
+        self.desired = persisted
+        self.changed_at = datetime.now()
+
+    @property
+    def delta(self) -> int:
+        """likes_count change this entry makes once written (-1, 0 or 1)"""
+        return int(self.desired) - int(self.persisted)
+
+
+class LikeWriteBuffer:
+    """
+    Coalesces like/unlike toggles in memory and writes only their net effect.
+
+    Every (user, target) pair keeps a single pending entry, so a burst of
+    like/unlike/like within one flush window becomes at most one upsert or
+    delete. A background thread flushes the buffer every flush_interval
+    seconds (or sooner once max_pending entries are waiting) using
+    bulk_write(ordered=False), then applies the net likes_count deltas to the
+    liked posts and comments (and to the likes_received of the posts' creators).
+
+    Reads made through LikeModel consult the buffer first, so users see their
+    own toggles before they reach MongoDB. Toggles acknowledged but not yet
+    flushed are lost if the process is killed; the window is bounded by
+    flush_interval and max_pending, and the buffer is flushed at exit.
+    """
+
+    def __init__(self, likes_collection, target_collections: Dict[str, object],
+                 flush_interval: float = 0.5, max_pending: int = 5000,
+                 write_concern: Optional[WriteConcern] = None, users_collection=None):
+        """
+        Args:
+            likes_collection: The likes collection
+            target_collections: Maps 'post_id' / 'comment_id' to the collection
+                holding that target's likes_count counter
+            users_collection: Users collection for the post creators' likes_received
+                counters (not maintained when omitted)
+            flush_interval: Seconds between background flushes
+            max_pending: Number of pending entries that triggers an early flush
+            write_concern: Write concern used for flushed writes
+        """
+        if write_concern is not None:
+            likes_collection = likes_collection.with_options(write_concern=write_concern)
+            target_collections = {
+                field: coll.with_options(write_concern=write_concern)
+                for field, coll in target_collections.items()
+            }
+            if users_collection is not None:
+                users_collection = users_collection.with_options(write_concern=write_concern)
+        self.likes = likes_collection
+        self.targets = target_collections
+        self.users = users_collection
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[LikeKey, _PendingLike] = {}
+        self._in_flight: Dict[LikeKey, _PendingLike] = {}
+        # Net likes_count change of all pending and in-flight entries per
+        # target, so count reads do not scan the buffer
+        self._deltas: Dict[Tuple[str, ObjectId], int] = defaultdict(int)
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Keys and targets
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _key(like_filter: Dict) -> LikeKey:
+        return like_filter['user_id'], like_filter['post_id'], like_filter['comment_id']
+
+    @staticmethod
+    def _filter(key: LikeKey) -> Dict:
+        return {'user_id': key[0], 'post_id': key[1], 'comment_id': key[2]}
+
+    @staticmethod
+    def _target(key: LikeKey) -> Tuple[str, ObjectId]:
+        if key[1] is not None:
+            return 'post_id', key[1]
+        return 'comment_id', key[2]
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def set_state(self, like_filter: Dict, liked: bool) -> Dict:
+        """
+        Record that a user likes (or no longer likes) a target.
+
+        Args:
+            like_filter: {'user_id', 'post_id', 'comment_id'} with ObjectIds/None
+            liked: Desired state
+
+        Returns:
+            Same shape as LikeModel.like_*/unlike_*: 'liked', 'created' or
+            'removed', 'like_id' (always None, the like is not written yet)
+            and 'likes_count' including pending changes
+        """
+        key = self._key(like_filter)
+
+        persisted = None
+        if self.pending_state(key) is None:
+            # First toggle for this pair in the window: learn what is stored
+            persisted = self.likes.find_one(like_filter, {'_id': 1}) is not None
+
+        while True:
+            with self._lock:
+                entry = self._pending.get(key)
+                if entry is None:
+                    # Not pending: continue from the state being written, or
+                    # from what is stored if nothing is in flight either
+                    in_flight = self._in_flight.get(key)
+                    if in_flight is not None:
+                        entry = _PendingLike(in_flight.desired)
+                    elif persisted is not None:
+                        entry = _PendingLike(persisted)
+                    if entry is not None:
+                        self._pending[key] = entry
+                if entry is not None:
+                    changed = entry.desired != liked
+                    if changed:
+                        self._add_delta(self._target(key), -entry.delta)
+                        entry.desired = liked
+                        self._add_delta(self._target(key), entry.delta)
+                    entry.changed_at = datetime.now()
+                    backlog = len(self._pending)
+                    break
+            # The in-flight entry was written between the lock sections;
+            # read back what the flush stored
+            persisted = self.likes.find_one(like_filter, {'_id': 1}) is not None
+
+        if backlog >= self.max_pending:
+            self._wake.set()
+
+        field, target_id = self._target(key)
+        result = {'liked': liked, 'like_id': None, 'likes_count': self._buffered_count(field, target_id)}
+        result['created' if liked else 'removed'] = changed
+        return result
+
+    def flush(self) -> int:
+        """
+        Write the net effect of all pending toggles to MongoDB.
+
+        Returns:
+            Number of like documents inserted or deleted
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._in_flight, self._pending = self._pending, {}
+                batch = self._in_flight
+
+            ops, changes = [], []
+            for key, entry in batch.items():
+                if entry.desired == entry.persisted:
+                    continue  # toggles cancelled out inside the window
+                if entry.desired:
+                    ops.append(UpdateOne(self._filter(key),
+                                         {'$setOnInsert': {'created_at': entry.changed_at}},
+                                         upsert=True))
+                else:
+                    ops.append(DeleteOne(self._filter(key)))
+                changes.append((key, entry.desired))
+
+            try:
+                written = self._write(ops, changes) if ops else 0
+            except Exception as e:
+                logger.error("Like buffer flush failed, re-queueing %s entries: %s", len(batch), e)
+                with self._lock:
+                    for key, entry in batch.items():
+                        # Newer toggles made during the flush take precedence
+                        # (the net delta of the pair is unchanged either way)
+                        newer = self._pending.get(key)
+                        if newer is None:
+                            self._pending[key] = entry
+                        else:
+                            newer.persisted = entry.persisted
+                    self._in_flight = {}
+                raise
+
+            with self._lock:
+                for key, entry in batch.items():
+                    self._add_delta(self._target(key), -entry.delta)
+                self._in_flight = {}
+            logger.debug("Like buffer flushed: %s pending, %s written", len(batch), written)
+            return written
+
+    def _write(self, ops, changes) -> int:
+        """Run the bulk write and apply counter deltas for what actually changed."""
+        try:
+            result = self.likes.bulk_write(ops, ordered=False)
+            upserted = set(result.upserted_ids or {})
+            deleted_count = result.deleted_count
+        except BulkWriteError as e:
+            # Duplicate key errors from concurrent upserts in other processes
+            # mean the like already existed; anything else is a real failure
+            errors = e.details.get('writeErrors', [])
+            if any(err.get('code') != 11000 for err in errors):
+                raise
+            upserted = {u['index'] for u in e.details.get('upserted', [])}
+            deleted_count = e.details.get('nRemoved', 0)
+
+        deltas = defaultdict(int)
+        delete_targets = set()
+        for index, (key, liked) in enumerate(changes):
+            target = self._target(key)
+            if liked:
+                if index in upserted:
+                    deltas[target] += 1
+            else:
+                deltas[target] -= 1
+                delete_targets.add(target)
+
+        expected_deletes = sum(1 for _, liked in changes if not liked)
+        recount = set()
+        if deleted_count != expected_deletes:
+            # Some likes were already gone; we cannot tell which, so recount
+            recount = delete_targets
+            for target in recount:
+                deltas.pop(target, None)
+
+        self._apply_deltas(deltas)
+        self._recount(recount)
+        return len(upserted) + deleted_count
+
+    def _apply_deltas(self, deltas: Dict[Tuple[str, ObjectId], int]):
+        by_field = defaultdict(list)
+        for (field, target_id), delta in deltas.items():
+            if delta:
+                by_field[field].append(UpdateOne({'_id': target_id}, {'$inc': {'likes_count': delta}}))
+        for field, ops in by_field.items():
+            self.targets[field].bulk_write(ops, ordered=False)
+
+        post_deltas = {target_id: delta for (field, target_id), delta in deltas.items()
+                       if field == 'post_id' and delta}
+        self._apply_creator_deltas(post_deltas)
+
+    def _apply_creator_deltas(self, post_deltas: Dict[ObjectId, int]):
+        """Add per-post likes_count changes to the likes_received of each post's creator"""
+        if self.users is None or not post_deltas:
+            return
+        posts = self.targets['post_id'].find({'_id': {'$in': list(post_deltas)}}, {'creator_id': 1})
+        bulk_increment_user_stats(self.users, [
+            (post.get('creator_id'), 0, post_deltas[post['_id']]) for post in posts
+        ])
+
+    def _recount(self, targets):
+        by_field = defaultdict(list)
+        for field, target_id in targets:
+            by_field[field].append(target_id)
+        for field, ids in by_field.items():
+            counts = {row['_id']: row['count'] for row in self.likes.aggregate([
+                {'$match': {field: {'$in': ids}}},
+                {'$group': {'_id': f'${field}', 'count': {'$sum': 1}}},
+            ])}
+            if field == 'post_id' and self.users is not None:
+                before = {doc['_id']: doc.get('likes_count', 0)
+                          for doc in self.targets[field].find({'_id': {'$in': ids}}, {'likes_count': 1})}
+                self._apply_creator_deltas({target_id: counts.get(target_id, 0) - count
+                                            for target_id, count in before.items()})
+            self.targets[field].bulk_write([
+                UpdateOne({'_id': target_id}, {'$set': {'likes_count': counts.get(target_id, 0)}})
+                for target_id in ids
+            ], ordered=False)
+
+    # ------------------------------------------------------------------
+    # Reads (read-your-writes)
+    # ------------------------------------------------------------------
+    def pending_state(self, key: LikeKey) -> Optional[bool]:
+        """Buffered like state for a (user, post, comment) key, or None if not buffered."""
+        with self._lock:
+            entry = self._pending.get(key) or self._in_flight.get(key)
+            return entry.desired if entry else None
+
+    def pending_delta(self, field: str, target_id: ObjectId) -> int:
+        """Net likes_count change for a target that has not been written yet."""
+        with self._lock:
+            return self._deltas.get((field, target_id), 0)
+
+    def _add_delta(self, target: Tuple[str, ObjectId], delta: int):
+        """Adjust a target's net pending delta; caller holds self._lock."""
+        if delta:
+            self._deltas[target] += delta
+            if not self._deltas[target]:
+                del self._deltas[target]
+
+    def _buffered_count(self, field: str, target_id: ObjectId) -> int:
+        doc = self.targets[field].find_one({'_id': target_id}, {'likes_count': 1})
+        return max(0, (doc or {}).get('likes_count', 0) + self.pending_delta(field, target_id))
+
+    # ------------------------------------------------------------------
+    # Background flusher
+    # ------------------------------------------------------------------
+    def start(self):
+        """Start the background flusher thread and flush again at interpreter exit."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='like-write-buffer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the flusher and write anything still pending."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(5.0, self.flush_interval * 4))
+            self._thread = None
+        try:
+            self.flush()
+        except Exception:
+            pass  # already logged; nothing more can be done at shutdown
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass  # already logged and re-queued; retry next interval
+
+
+_buffer: Optional[LikeWriteBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def get_like_write_buffer() -> Optional[LikeWriteBuffer]:
+    """
+    Return the process-wide like write buffer, or None when it is disabled
+    (settings.LIKE_WRITE_BUFFER_ENABLED, off by default).
+    """
+    global _buffer
+    if not getattr(settings, 'LIKE_WRITE_BUFFER_ENABLED', False):
+        return None
+
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                write_concern = settings.LIKE_WRITE_BUFFER_WRITE_CONCERN
+                w = int(write_concern) if str(write_concern).isdigit() else write_concern
+                buffer = LikeWriteBuffer(
+                    get_collection('likes'),
+                    {'post_id': get_collection('filled_madlibs'), 'comment_id': get_collection('comments')},
+                    flush_interval=settings.LIKE_WRITE_BUFFER_FLUSH_INTERVAL,
+                    max_pending=settings.LIKE_WRITE_BUFFER_MAX_PENDING,
+                    write_concern=WriteConcern(w=w),
+                    users_collection=get_collection('users'),
+                )
+                buffer.start()
+                _buffer = buffer
+    return _buffer
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+from core.db_connect import get_collection
+
+
+class Command(BaseCommand):
+    """
+    Recompute the denormalized madlibs_count and likes_received counters on
+    users from their filled madlibs.
+
+    Run once after deploying the per-user counters, and after recount_likes
+    (likes_received is the sum of the creator's posts' likes_count).
+
+    python manage.py recount_user_stats
+    """
+    help = "Recompute madlibs_count and likes_received on users from filled_madlibs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of counter updates sent per bulk_write')
+
+    def handle(self, *args, **options):
+        users = get_collection('users')
+        madlibs = get_collection('filled_madlibs')
+        batch_size = options['batch_size']
+
+        # Reset first so users without madlibs end up at 0
+        users.update_many({}, {'$set': {'madlibs_count': 0, 'likes_received': 0}})
+
+        pipeline = [
+            {'$group': {
+                '_id': '$creator_id',
+                'madlibs_count': {'$sum': 1},
+                'likes_received': {'$sum': {'$ifNull': ['$likes_count', 0]}},
+            }},
+        ]
+
+        updated = 0
+        batch = []
+        for row in madlibs.aggregate(pipeline, allowDiskUse=True):
+            batch.append(UpdateOne({'_id': row['_id']}, {'$set': {
+                'madlibs_count': row['madlibs_count'],
+                'likes_received': row['likes_received'],
+            }}))
+            if len(batch) >= batch_size:
+                updated += users.bulk_write(batch, ordered=False).modified_count
+                batch = []
+        if batch:
+            updated += users.bulk_write(batch, ordered=False).modified_count
+
+        self.stdout.write(self.style.SUCCESS(f"User counters recomputed on {updated} users"))
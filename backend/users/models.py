@@ -1,4 +1,5 @@
 from core.db_connect import get_collection
+from core.projection import build_projection
 from datetime import datetime, timezone
 from bson.objectid import ObjectId
 from bson.errors import InvalidId
@@ -33,7 +34,7 @@ class UserOperations:
 
             logger.info("User indexes created successfully")
         except Exception as e:
-            logger.error(f"Error creating user indexes: {e}")
+            logger.error("Error creating user indexes: %s", e)
 
     def create(self, username: str, email: str, oauth_provider: str, oauth_id: str,
                profile_picture = None, bio = None) -> str:
@@ -54,11 +55,11 @@ class UserOperations:
         Raises:
             ValueError: If username or email already exists
         """
-        logger.debug(f"Creating new user: username={username}, email={email}, provider={oauth_provider}")
+        logger.debug("Creating new user: username=%s, email=%s, provider=%s", username, email, oauth_provider)
 
         # Check if user already exists
         if self.collection.find_one({'$or': [{'username': username}, {'email': email}]}):
-            logger.warning(f"User creation failed - username or email already exists: {username}, {email}")
+            logger.warning("User creation failed - username or email already exists: %s, %s", username, email)
             raise ValueError("Username or email already exists")
 
         now = datetime.now(timezone.utc)
@@ -75,16 +76,18 @@ class UserOperations:
             'public': True,
             'banned': False,
             'followers_count': 0,
-            'following_count': 0
+            'following_count': 0,
+            'madlibs_count': 0,
+            'likes_received': 0
         }
 
         try:
             result = self.collection.insert_one(user_data)
-            logger.info(f"User created: {result.inserted_id} ({username})")
+            logger.info("User created: %s (%s)", result.inserted_id, username)
             return str(result.inserted_id)
         except DuplicateKeyError as e:
             # Handle race condition where user was created between check and insert
-            logger.warning(f"User creation failed - duplicate key error: {username}, {email}")
+            logger.warning("User creation failed - duplicate key error: %s, %s", username, email)
             # Determine which field caused the duplicate
             error_msg = str(e)
             if 'username' in error_msg:
@@ -107,18 +110,45 @@ class UserOperations:
             Dictionary containing user data or None if not found
         """
         try:
-            logger.debug(f"Retrieving user by ID: {user_id}")
+            logger.debug("Retrieving user by ID: %s", user_id)
             user = self.collection.find_one({'_id': ObjectId(user_id)})
             if user:
                 user['_id'] = str(user['_id'])
-                logger.info(f"User found: {user_id} ({user.get('username', 'N/A')})")
+                logger.info("User found: %s (%s)", user_id, user.get('username', 'N/A'))
             else:
-                logger.info(f"User not found: {user_id}")
+                logger.info("User not found: %s", user_id)
             return user
         except InvalidId:
-            logger.warning(f"Invalid user ID format: {user_id}")
+            logger.warning("Invalid user ID format: %s", user_id)
             return None
 
+    def get_many(self, user_ids: list, fields: list = None) -> dict:
+        """
+        Get several users by ObjectId with one $in query
+
+        Args:
+            user_ids: User ObjectIds (as strings or ObjectIds)
+            fields: Optional list of fields to return (defaults to whole document)
+
+        Returns:
+            Dictionary mapping user ID string to user data, for the users that exist
+        """
+        oids = []
+        for user_id in dict.fromkeys(str(u) for u in user_ids):
+            try:
+                oids.append(ObjectId(user_id))
+            except InvalidId:
+                logger.warning("Invalid user ID format: %s", user_id)
+        if not oids:
+            return {}
+
+        logger.debug("Retrieving %s users by ID", len(oids))
+        users = {}
+        for user in self.collection.find({'_id': {'$in': oids}}, build_projection(fields)):
+            user['_id'] = str(user['_id'])
+            users[user['_id']] = user
+        return users
+
     def get_by_username(self, username: str):
         """
         Get user by username
@@ -130,16 +160,16 @@ class UserOperations:
             Dictionary containing user data or None if not found
         """
         try:
-            logger.debug(f"Retrieving user by username: {username}")
+            logger.debug("Retrieving user by username: %s", username)
             user = self.collection.find_one({'username': username})
             if user:
                 user['_id'] = str(user['_id'])
-                logger.info(f"User found by username: {username}")
+                logger.info("User found by username: %s", username)
             else:
-                logger.info(f"User not found by username: {username}")
+                logger.info("User not found by username: %s", username)
             return user
         except Exception as e:
-            logger.error(f"Error retrieving user by username {username}: {e}")
+            logger.error("Error retrieving user by username %s: %s", username, e)
             return None
 
     def get_by_email(self, email: str):
@@ -153,16 +183,16 @@ class UserOperations:
             Dictionary containing user data or None if not found
         """
         try:
-            logger.debug(f"Retrieving user by email: {email}")
+            logger.debug("Retrieving user by email: %s", email)
             user = self.collection.find_one({'email': email})
             if user:
                 user['_id'] = str(user['_id'])
-                logger.info(f"User found by email: {email}")
+                logger.info("User found by email: %s", email)
             else:
-                logger.info(f"User not found by email: {email}")
+                logger.info("User not found by email: %s", email)
             return user
         except Exception as e:
-            logger.error(f"Error retrieving user by email {email}: {e}")
+            logger.error("Error retrieving user by email %s: %s", email, e)
             return None
 
     def update_profile(self, user_id: str, **kwargs) -> bool:
@@ -177,13 +207,14 @@ class UserOperations:
             bool: True if update was successful, False otherwise
         """
         try:
-            logger.debug(f"Updating user profile: {user_id}, fields={list(kwargs.keys())}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Updating user profile: %s, fields=%s", user_id, list(kwargs))
             # Fields that can be updated
             allowed_fields = {'bio', 'profile_picture', 'username', 'email'}
             update_data = {key: value for key, value in kwargs.items() if key in allowed_fields}
 
             if not update_data:
-                logger.info(f"No valid fields to update for user: {user_id}")
+                logger.info("No valid fields to update for user: %s", user_id)
                 return False
 
             # Always update the updated_at timestamp
@@ -194,15 +225,15 @@ class UserOperations:
                 {'$set': update_data}
             )
             if result.modified_count > 0:
-                logger.info(f"User profile updated: {user_id}")
+                logger.info("User profile updated: %s", user_id)
             else:
-                logger.info(f"No changes made to user profile: {user_id}")
+                logger.info("No changes made to user profile: %s", user_id)
             return result.modified_count > 0
         except InvalidId:
-            logger.warning(f"Invalid user ID format: {user_id}")
+            logger.warning("Invalid user ID format: %s", user_id)
             return False
         except Exception as e:
-            logger.error(f"Error updating user profile {user_id}: {e}")
+            logger.error("Error updating user profile %s: %s", user_id, e)
             return False
 
     def delete(self, user_id: str) -> bool:
@@ -216,18 +247,18 @@ class UserOperations:
             bool: True if deletion was successful, False otherwise
         """
         try:
-            logger.debug(f"Deleting user: {user_id}")
+            logger.debug("Deleting user: %s", user_id)
             result = self.collection.delete_one({'_id': ObjectId(user_id)})
             if result.deleted_count > 0:
-                logger.info(f"User deleted: {user_id}")
+                logger.info("User deleted: %s", user_id)
             else:
-                logger.info(f"User not found: {user_id}")
+                logger.info("User not found: %s", user_id)
             return result.deleted_count > 0
         except InvalidId:
-            logger.warning(f"Invalid user ID format: {user_id}")
+            logger.warning("Invalid user ID format: %s", user_id)
             return False
         except Exception as e:
-            logger.error(f"Error deleting user {user_id}: {e}")
+            logger.error("Error deleting user %s: %s", user_id, e)
             return False
 
     def delete_by_username(self, username: str) -> bool:
@@ -241,34 +272,35 @@ class UserOperations:
             bool: True if user existed and was deleted, False otherwise
         """
         try:
-            logger.debug(f"Deleting user by username: {username}")
+            logger.debug("Deleting user by username: %s", username)
             result = self.collection.delete_one({'username': username})
             if result.deleted_count > 0:
-                logger.info(f"User deleted by username: {username}")
+                logger.info("User deleted by username: %s", username)
             else:
-                logger.info(f"User not found by username: {username}")
+                logger.info("User not found by username: %s", username)
             return result.deleted_count > 0
         except Exception as e:
-            logger.error(f"Error deleting user by username {username}: {e}")
+            logger.error("Error deleting user by username %s: %s", username, e)
             return False
 
-    def get_all(self, limit: int = 100) -> list:
+    def get_all(self, limit: int = 100, fields: list = None) -> list:
         """
         Get all users
 
         Args:
             limit: Maximum number of users to retrieve (default: 100)
+            fields: Optional list of fields to return (defaults to whole document)
 
         Returns:
             List of users
         """
         try:
-            logger.debug(f"Retrieving all users (limit={limit})")
-            users = list(self.collection.find().limit(limit))
+            logger.debug("Retrieving all users (limit=%s, fields=%s)", limit, fields)
+            users = list(self.collection.find({}, build_projection(fields)).limit(limit))
             for user in users:
                 user['_id'] = str(user['_id'])
-            logger.info(f"Retrieved {len(users)} users")
+            logger.info("Retrieved %s users", len(users))
             return users
         except Exception as e:
-            logger.error(f"Error retrieving all users: {e}")
+            logger.error("Error retrieving all users: %s", e)
             return []
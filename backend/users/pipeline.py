@@ -1,8 +1,9 @@
 # users/pipeline.py
 from .models import UserOperations
+from core.services import services
 
 def create_mongodb_user(strategy, details, backend, response, *args, **kwargs):
-    user_operator = UserOperations()
+    user_operator = services.get(UserOperations)
     """Create MongoDB user BEFORE Django user is created"""
     if backend.name == 'google-oauth2':
         # Get data directly from Google response
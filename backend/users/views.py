@@ -4,24 +4,28 @@ from django.views.decorators.csrf import ensure_csrf_cookie
 from rest_framework.decorators import api_view, action
 from rest_framework.response import Response
 from rest_framework import status, permissions, viewsets
+from django.conf import settings
 from .models import UserOperations
+from core.cascade import CascadeDeleteService
 from core.sessions import SessionStore
+from core.projection import parse_fields_param
+from core.services import services
 import logging
 
 logger = logging.getLogger(__name__)
 
 def dashboard(request):
-    logger.debug(f"Dashboard accessed by user: {request.user.email if request.user.is_authenticated else 'Anonymous'}")
+    logger.debug("Dashboard accessed by user: %s", request.user.email if request.user.is_authenticated else 'Anonymous')
     if request.user.is_authenticated:
         # Check MongoDB for this user
-        user_operator = UserOperations()
+        user_operator = services.get(UserOperations)
         mongodb_user = user_operator.get_by_email(request.user.email)
 
         if mongodb_user:
-            logger.info(f"Dashboard loaded for authenticated user: {request.user.email}")
+            logger.info("Dashboard loaded for authenticated user: %s", request.user.email)
             return HttpResponse(f"Welcome {request.user.email}! MongoDB User ID: {mongodb_user['_id']}")
         else:
-            logger.info(f"User authenticated but not in MongoDB: {request.user.email}")
+            logger.info("User authenticated but not in MongoDB: %s", request.user.email)
             return HttpResponse(f"Welcome {request.user.email}! (Not yet in MongoDB)")
     else:
         logger.debug("Dashboard accessed by anonymous user")
@@ -30,8 +34,8 @@ def dashboard(request):
 # Debug endpoint to see OAuth data
 @api_view(['GET'])
 def debug_oauth_data(request):
-    user_operator = UserOperations()
-    logger.debug(f"Debug OAuth data requested by user: {request.user.email if request.user.is_authenticated else 'Anonymous'}")
+    user_operator = services.get(UserOperations)
+    logger.debug("Debug OAuth data requested by user: %s", request.user.email if request.user.is_authenticated else 'Anonymous')
 
     if request.user.is_authenticated:
         user_data = {
@@ -54,11 +58,11 @@ def debug_oauth_data(request):
                 'uid': social.uid,
                 'extra_data': social.extra_data
             })
-            logger.info(f"OAuth data retrieved for user {request.user.email}: {social.provider}")
+            logger.info("OAuth data retrieved for user %s: %s", request.user.email, social.provider)
 
         # Get MongoDB user data
         user_data['mongodb_user'] = user_operator.get_by_email(request.user.email)
-        logger.info(f"Debug OAuth data returned for user: {request.user.email}")
+        logger.info("Debug OAuth data returned for user: %s", request.user.email)
 
         return Response(user_data)
     logger.warning("Debug OAuth data requested by unauthenticated user")
@@ -73,7 +77,8 @@ class UserViewSet(viewsets.ViewSet):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.user_service = UserOperations()
+        self.user_service = services.get(UserOperations)
+        self.cascade_service = services.get(CascadeDeleteService)
 
 
     def get_permissions(self):
@@ -86,6 +91,7 @@ class UserViewSet(viewsets.ViewSet):
             'retrieve': [permissions.AllowAny],
             'update': [permissions.IsAuthenticated],
             'destroy': [permissions.IsAuthenticated],
+            'deletion_status': [permissions.IsAuthenticated],
             'profile': [permissions.IsAuthenticated],
             'logout': [permissions.AllowAny],
             'admin_stats': [permissions.IsAdminUser],
@@ -103,8 +109,10 @@ class UserViewSet(viewsets.ViewSet):
 
         Query Parameters:
         - limit: Maximum number of users to retrieve (default: 100)
+        - fields: Comma separated fields to return (default: whole document)
 
         GET /api/users/?limit=50
+        GET /api/users/?fields=username,profile_picture
         """
         try:
             logger.debug("Listing users")
@@ -117,15 +125,23 @@ class UserViewSet(viewsets.ViewSet):
             except ValueError:
                 limit = 100
 
-            users = self.user_service.get_all()
-            logger.info(f"Listed {len(users)} users")
+            fields = parse_fields_param(request.query_params.get('fields'))
+
+            users = self.user_service.get_all(limit=limit, fields=fields)
+            logger.info("Listed %s users", len(users))
 
             return Response(
                 {'count': len(users), 'results': users},
                 status=status.HTTP_200_OK
             )
+        except ValueError as e:
+            logger.warning("Invalid fields parameter when listing users: %s", e)
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
-            logger.error(f"Error listing users: {e}")
+            logger.error("Error listing users: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -147,7 +163,7 @@ class UserViewSet(viewsets.ViewSet):
         """
         try:
             data = request.data
-            logger.debug(f"Creating user: username={data.get('username')}, email={data.get('email')}")
+            logger.debug("Creating user: username=%s, email=%s", data.get('username'), data.get('email'))
 
             required_fields = ['username', 'email', 'oauth_provider', 'oauth_id']
             if not all(field in data for field in required_fields):
@@ -166,20 +182,20 @@ class UserViewSet(viewsets.ViewSet):
                 bio=data.get('bio')
             )
 
-            logger.info(f"User created: {user_id}")
+            logger.info("User created: %s", user_id)
             return Response(
                 {'user_id': user_id, 'message': 'User created successfully'},
                 status=status.HTTP_201_CREATED
             )
 
         except ValueError as e:
-            logger.warning(f"User creation validation error: {e}")
+            logger.warning("User creation validation error: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
-            logger.error(f"Error creating user: {e}")
+            logger.error("Error creating user: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -199,20 +215,20 @@ class UserViewSet(viewsets.ViewSet):
             )
 
         try:
-            logger.debug(f"Retrieving user: {pk}")
+            logger.debug("Retrieving user: %s", pk)
             user = self.user_service.get_by_id(str(pk))
 
             if not user:
-                logger.info(f"User not found: {pk}")
+                logger.info("User not found: %s", pk)
                 return Response(
                     {'error': 'User not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            logger.info(f"User retrieved: {pk}")
+            logger.info("User retrieved: %s", pk)
             return Response(user, status=status.HTTP_200_OK)
         except Exception as e:
-            logger.error(f"Error retrieving user {pk}: {e}")
+            logger.error("Error retrieving user %s: %s", pk, e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -282,9 +298,11 @@ class UserViewSet(viewsets.ViewSet):
 
     def destroy(self, request, pk=None):
         """
-        Delete a user (authenticated only).
+        Delete a user and all of their content (authenticated only).
 
-        Users can only delete their own account.
+        Users can only delete their own account. Accounts with more madlibs
+        than CASCADE_DELETE_BACKGROUND_THRESHOLD are deleted by a background
+        job: the response is 202 with a job_id to poll on deletion_status.
 
         DELETE /api/users/{id}/
         """
@@ -303,9 +321,25 @@ class UserViewSet(viewsets.ViewSet):
             )
 
         try:
-            success = self.user_service.delete(str(pk))
+            if self.cascade_service.count_user_madlibs(str(pk)) > settings.CASCADE_DELETE_BACKGROUND_THRESHOLD:
+                job_id = self.cascade_service.start_user_deletion(str(pk), request.user.email)
+                if job_id is None:
+                    return Response(
+                        {'error': 'A deletion of this account is already in progress'},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                return Response(
+                    {
+                        'message': 'User deletion started',
+                        'job_id': job_id,
+                        'status_url': f'/api/users/deletion_status/?job_id={job_id}'
+                    },
+                    status=status.HTTP_202_ACCEPTED
+                )
 
-            if not success:
+            deleted = self.cascade_service.delete_user(str(pk))
+
+            if deleted is None:
                 return Response(
                     {'error': 'User not found'},
                     status=status.HTTP_404_NOT_FOUND
@@ -321,6 +355,38 @@ class UserViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['get'])
+    def deletion_status(self, request):
+        """
+        Progress of a background account deletion started by destroy.
+
+        GET /api/users/deletion_status/?job_id={job_id}
+        """
+        job_id = request.query_params.get('job_id', '').strip()
+        if not job_id:
+            return Response(
+                {'error': 'job_id query parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            job = self.cascade_service.get_job(job_id)
+            if not job or job.get('requested_by') != request.user.email:
+                return Response(
+                    {'error': 'Deletion job not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+            job['job_id'] = job.pop('_id')
+            job.pop('requested_by', None)
+            return Response(job, status=status.HTTP_200_OK)
+        except Exception as e:
+            logger.error("Error retrieving deletion job %s: %s", job_id, e)
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
     @action(detail=False, methods=['get'])
     def by_username(self, request):
         """
@@ -338,20 +404,20 @@ class UserViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            logger.debug(f"Retrieving user by username: {username}")
+            logger.debug("Retrieving user by username: %s", username)
             user = self.user_service.get_by_username(username)
 
             if not user:
-                logger.info(f"User not found by username: {username}")
+                logger.info("User not found by username: %s", username)
                 return Response(
                     {'error': 'User not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            logger.info(f"User retrieved by username: {username}")
+            logger.info("User retrieved by username: %s", username)
             return Response(user, status=status.HTTP_200_OK)
         except Exception as e:
-            logger.error(f"Error retrieving user by username: {e}")
+            logger.error("Error retrieving user by username: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -374,20 +440,20 @@ class UserViewSet(viewsets.ViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            logger.debug(f"Retrieving user by email: {email}")
+            logger.debug("Retrieving user by email: %s", email)
             user = self.user_service.get_by_email(email)
 
             if not user:
-                logger.info(f"User not found by email: {email}")
+                logger.info("User not found by email: %s", email)
                 return Response(
                     {'error': 'User not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            logger.info(f"User retrieved by email: {email}")
+            logger.info("User retrieved by email: %s", email)
             return Response(user, status=status.HTTP_200_OK)
         except Exception as e:
-            logger.error(f"Error retrieving user by email: {e}")
+            logger.error("Error retrieving user by email: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -402,24 +468,24 @@ class UserViewSet(viewsets.ViewSet):
         GET /api/users/profile/
         """
         try:
-            logger.debug(f"Getting profile for user: {request.user.email}")
+            logger.debug("Getting profile for user: %s", request.user.email)
             user = self.user_service.get_by_email(request.user.email)
 
             if not user:
-                logger.warning(f"User profile not found for email: {request.user.email}")
+                logger.warning("User profile not found for email: %s", request.user.email)
                 return Response(
                     {'error': 'User profile not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            logger.info(f"Profile retrieved for user: {request.user.email}")
+            logger.info("Profile retrieved for user: %s", request.user.email)
             # Ensure CSRF cookie is set for frontend
             response = Response(user, status=status.HTTP_200_OK)
             # This will trigger Django to set the CSRF cookie
             request.META["CSRF_COOKIE_USED"] = True
             return response
         except Exception as e:
-            logger.error(f"Error retrieving user profile: {e}")
+            logger.error("Error retrieving user profile: %s", e)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -433,7 +499,7 @@ class UserViewSet(viewsets.ViewSet):
         POST /api/users/logout/
         """
         try:
-            logger.debug(f"Logging out user: {request.user.email if request.user.is_authenticated else 'Anonymous'}")
+            logger.debug("Logging out user: %s", request.user.email if request.user.is_authenticated else 'Anonymous')
 
             # Access the session to ensure it's loaded
             # This triggers session creation if it doesn't exist
@@ -443,7 +509,7 @@ class UserViewSet(viewsets.ViewSet):
             session_key = request.session.session_key
 
             if not session_key:
-                logger.warning(f"No session key found, flushing session anyway")
+                logger.warning("No session key found, flushing session anyway")
                 # Flush the session even if there's no key
                 request.session.flush()
                 return Response(
@@ -451,7 +517,7 @@ class UserViewSet(viewsets.ViewSet):
                     status=status.HTTP_200_OK
                 )
 
-            logger.debug(f"Deleting session with key: {session_key}")
+            logger.debug("Deleting session with key: %s", session_key)
 
             # Delete the session using SessionStore
             session_store = SessionStore(session_key)
@@ -460,13 +526,13 @@ class UserViewSet(viewsets.ViewSet):
             # Also flush the request session to clear any in-memory data
             request.session.flush()
 
-            logger.info(f"User logged out successfully: {request.user.email if request.user.is_authenticated else 'N/A'}")
+            logger.info("User logged out successfully: %s", request.user.email if request.user.is_authenticated else 'N/A')
             return Response(
                 {'message': 'Logged out successfully'},
                 status=status.HTTP_200_OK
             )
         except Exception as e:
-            logger.error(f"Error logging out user: {e}", exc_info=True)
+            logger.error("Error logging out user: %s", e, exc_info=True)
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
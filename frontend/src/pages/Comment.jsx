@@ -111,36 +111,13 @@ export default function Comment() {
           const loadedComments = data.comments || [];
           setComments(loadedComments);
           
-          // Load like data for each comment using POST endpoints
+          // Like counts and liked state are embedded in each comment
           const likesData = {};
           for (const comment of loadedComments) {
-            try {
-              // Use the COMMENT ID (not post ID) for likes
-              const commentId = comment._id;
-              
-              // CORRECTED: Use /api/likes/{comment_id}/count/
-              const countRes = await fetch(
-                `${API_ROOT}/likes/${commentId}/count/`,
-                { credentials: "include" }
-              );
-              
-              // CORRECTED: Use /api/likes/{comment_id}/liked/
-              const likedRes = await fetch(
-                `${API_ROOT}/likes/${commentId}/liked/`,
-                { credentials: "include" }
-              );
-              
-              const countData = countRes.ok ? await countRes.json() : {};
-              const likedData = likedRes.ok ? await likedRes.json() : {};
-              
-              likesData[commentId] = {
-                count: countData.likes_count || 0,
-                liked: likedData.liked || false
-              };
-            } catch (err) {
-              console.error(`Failed to load likes for comment ${comment._id}:`, err);
-              likesData[comment._id] = { count: 0, liked: false };
-            }
+            likesData[comment._id] = {
+              count: comment.likes_count || 0,
+              liked: comment.liked_by_me || false
+            };
           }
           
           setCommentLikes(likesData);
@@ -187,10 +164,10 @@ export default function Comment() {
     const currentLikeState = commentLikes[commentId];
     const alreadyLiked = currentLikeState?.liked || false;
     
-    // CORRECTED: Use /api/likes/{comment_id}/like/ or /unlike/
+    // Use /api/likes/comments/{comment_id}/like/ or /unlike/
     const url = alreadyLiked
-      ? `${API_ROOT}/likes/${commentId}/unlike/`
-      : `${API_ROOT}/likes/${commentId}/like/`;
+      ? `${API_ROOT}/likes/comments/${commentId}/unlike/`
+      : `${API_ROOT}/likes/comments/${commentId}/like/`;
 
     try {
       const res = await fetch(url, {
@@ -207,30 +184,15 @@ export default function Comment() {
         return;
       }
 
-      // Refresh like data for this specific comment
-      const countRes = await fetch(
-        `${API_ROOT}/likes/${commentId}/count/`,
-        { credentials: "include" }
-      );
-      
-      const likedRes = await fetch(
-        `${API_ROOT}/likes/${commentId}/liked/`,
-        { credentials: "include" }
-      );
-      
-      if (countRes.ok && likedRes.ok) {
-        const countData = await countRes.json();
-        const likedData = await likedRes.json();
-        
-        // Update only this comment's like data
-        setCommentLikes(prev => ({
-          ...prev,
-          [commentId]: {
-            count: countData.likes_count || 0,
-            liked: likedData.liked || false
-          }
-        }));
-      }
+      // Like/unlike responses carry the new state and counter
+      const data = await res.json();
+      setCommentLikes(prev => ({
+        ...prev,
+        [commentId]: {
+          count: data.likes_count || 0,
+          liked: data.liked || false
+        }
+      }));
     } catch (err) {
       console.error("Error toggling comment like:", err);
     }
@@ -280,29 +242,13 @@ export default function Comment() {
         const loadedComments = data.comments || [];
         setComments(loadedComments);
         
-        // Reload like data for all comments
+        // Like counts and liked state are embedded in each comment
         const likesData = {};
         for (const c of loadedComments) {
-          try {
-            const countRes = await fetch(
-              `${API_ROOT}/likes/${c._id}/count/`,
-              { credentials: "include" }
-            );
-            const likedRes = await fetch(
-              `${API_ROOT}/likes/${c._id}/liked/`,
-              { credentials: "include" }
-            );
-            
-            const countData = countRes.ok ? await countRes.json() : {};
-            const likedData = likedRes.ok ? await likedRes.json() : {};
-            
-            likesData[c._id] = {
-              count: countData.likes_count || 0,
-              liked: likedData.liked || false
-            };
-          } catch (err) {
-            likesData[c._id] = { count: 0, liked: false };
-          }
+          likesData[c._id] = {
+            count: c.likes_count || 0,
+            liked: c.liked_by_me || false
+          };
         }
         
         setCommentLikes(likesData);
@@ -27,7 +27,7 @@ async function fetchMadlibs(q = "") {
 
   if (q) {
     // When user hits Search button
-    url = `${API_ROOT}/templates/search/?title=${encodeURIComponent(q)}`;
+    url = `${API_ROOT}/templates/search/?q=${encodeURIComponent(q)}`;
   } else {
     // Load all templates on page load
     url = `${API_ROOT}/templates/`;
@@ -238,23 +238,10 @@ if (!id || likeLoading) return;
       return;
     }
 
-    // Refresh like state from backend
-    const countRes = await fetch(`${API_ROOT}/likes/${id}/count/`, {
-      credentials: "include",
-    });
-    if (countRes.ok) {
-      const json = await countRes.json();
-      setLikeCount(json.likes_count ?? 0);
-    }
-
-    // Refresh "liked" state from backend
-    const likedRes = await fetch(`${API_ROOT}/likes/${id}/liked/`, {
-      credentials: "include",
-    });
-    if (likedRes.ok) {
-      const json = await likedRes.json();
-      setLiked(!!json.liked);
-    }
+    // Like/unlike responses carry the new state and counter
+    const json = await res.json();
+    setLikeCount(json.likes_count ?? 0);
+    setLiked(!!json.liked);
 
   } catch (err) {
     console.error("Error toggling like:", err);
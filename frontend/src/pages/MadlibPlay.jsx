@@ -137,8 +137,7 @@ async function onSubmit(e) {
         "X-CSRFToken": csrftoken,
       },
       body: JSON.stringify({
-        madlib_id: realMadlibId,  // Use the real ID now
-        madlib_text: filled,
+        madlib_id: realMadlibId,  // Use the real ID now; the server renders the story
         extra_prompt_args: {
           style: "watercolor painting",
           aspect_ratio: "1:1",
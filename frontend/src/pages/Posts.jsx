@@ -87,8 +87,8 @@ export default function Posts() {
       setError("");
 
       try {
-        // Get ALL filled madlibs
-        const res = await fetch(`${API_ROOT}/madlibs/?limit=100`, {
+        // Get filled madlibs with their templates and creators embedded
+        const res = await fetch(`${API_ROOT}/madlibs/?limit=100&expand=template,creator`, {
           credentials: "include",
         });
 
@@ -103,71 +103,36 @@ export default function Posts() {
           ? data
           : [];
 
-        // For each filled madlib, fill with template and user info
-        const hydrated = await Promise.all(
-          madlibsArray.map(async (m) => {
-            let templateTitle = "";
-            let templatePreview = "(No preview available)";
-            let createdLabel = "";
-            let creatorName = "";
-            const creatorId = m.creator_id ? String(m.creator_id) : "";
-
-            // Template fetch
-            try {
-              if (m.template_id) {
-                const tRes = await fetch(
-                  `${API_ROOT}/templates/${m.template_id}/`,
-                  { credentials: "include" }
-                );
-                if (tRes.ok) {
-                  const tData = await tRes.json();
-                  templateTitle = tData.title || "";
-                  templatePreview = buildTemplatePreview(tData.template);
-                }
-              }
-            } catch (err) {
-              console.error("Failed to load template for madlib:", err);
+        const hydrated = madlibsArray.map((m) => {
+          const creatorId = m.creator_id ? String(m.creator_id) : "";
+          const templateTitle = m.template?.title || "";
+          const templatePreview = m.template
+            ? buildTemplatePreview(m.template.template)
+            : "(No preview available)";
+          const creatorName = creatorId
+            ? m.creator?.username || `User ${creatorId.slice(0, 6)}…`
+            : "";
+
+          // Date label
+          let createdLabel = "";
+          const createdRaw =
+            m.created_at || m.createdAt || m.timestamp || null;
+          if (createdRaw) {
+            const d = new Date(createdRaw);
+            if (!isNaN(d.getTime())) {
+              createdLabel = d.toLocaleDateString();
             }
-
-            // Creator fetch (for username / email)
-            try {
-              if (creatorId) {
-                const uRes = await fetch(
-                  `${API_ROOT}/users/${creatorId}/`,
-                  { credentials: "include" }
-                );
-                if (uRes.ok) {
-                  const uData = await uRes.json();
-                  creatorName =
-                    uData.username ||
-                    uData.email ||
-                    `User ${creatorId.slice(0, 6)}…`;
-                }
-              }
-            } catch (err) {
-              console.error("Failed to load creator info:", err);
-            }
-
-            // Date label
-            const createdRaw =
-              m.created_at || m.createdAt || m.timestamp || null;
-            if (createdRaw) {
-              const d = new Date(createdRaw);
-              if (!isNaN(d.getTime())) {
-                createdLabel = d.toLocaleDateString();
-              }
-            }
-
-            return {
-              ...m,
-              templateTitle,
-              previewText: templatePreview,
-              creatorName,
-              creatorId,
-              createdLabel,
-            };
-          })
-        );
+          }
+
+          return {
+            ...m,
+            templateTitle,
+            previewText: templatePreview,
+            creatorName,
+            creatorId,
+            createdLabel,
+          };
+        });
 
         setPosts(hydrated);
       } catch (err) {
@@ -19,6 +19,8 @@ export default function Profile() {
   const [templates, setTemplates] = useState({});
   const [expandedMadlibs, setExpandedMadlibs] = useState({});
   const [likeCounts, setLikeCounts] = useState({});
+  const [stats, setStats] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
 
   {/* fetch profile */}
   useEffect(() => {
@@ -47,65 +49,49 @@ export default function Profile() {
     loadProfile();
   }, []);
 
-  {/* fetch user's madlibs */}
+  {/* fetch one page of the user's madlibs, with their templates embedded */}
+  async function loadMadlibsPage(cursor = null) {
+    const params = new URLSearchParams({ creator_id: data._id, expand: "template" });
+    if (cursor) params.set("cursor", cursor);
+
+    const res = await fetch(`${BACKEND}/api/madlibs/by_creator/?${params}`, {
+      method: "GET",
+      credentials: "include",
+    });
+
+    if (!res.ok) {
+      console.error("Failed to load madlibs:", await res.text());
+      return;
+    }
+
+    const page = await res.json();
+    const pageMadlibs = page.results || [];
+    setStats(page.stats || null);
+    setNextCursor(page.next_cursor || null);
+    setMadlibs(prev => (cursor ? [...prev, ...pageMadlibs] : pageMadlibs));
+
+    const templateData = {};
+    for (const madlib of pageMadlibs) {
+      if (madlib.template) templateData[madlib.template_id] = madlib.template;
+    }
+
+    setTemplates(prev => ({ ...prev, ...templateData }));
+
+    // Like counts come with each madlib
+    const likeData = {};
+    for (const madlib of pageMadlibs) {
+      likeData[madlib._id] = madlib.likes_count || 0;
+    }
+    setLikeCounts(prev => ({ ...prev, ...likeData }));
+  }
+
   useEffect(() => {
     async function loadMadlibs() {
       if (!data?._id) return;
 
       try {
         setMadlibsLoading(true);
-        const res = await fetch(`${BACKEND}/api/madlibs/by_creator/?creator_id=${data._id}`, {
-          method: "GET",
-          credentials: "include",
-        });
-
-        if (!res.ok) {
-          console.error("Failed to load madlibs:", await res.text());
-          setMadlibsLoading(false);
-          return;
-        }
-
-        const userMadlibs = await res.json();
-        setMadlibs(userMadlibs);
-
-        // Fetch templates for each madlib
-        const templateIds = [...new Set(userMadlibs.map(m => m.template_id))];
-        const templateData = {};
-        
-        for (const templateId of templateIds) {
-          try {
-            const templateRes = await fetch(`${BACKEND}/api/templates/${templateId}/`, {
-              credentials: "include",
-            });
-            if (templateRes.ok) {
-              const template = await templateRes.json();
-              templateData[templateId] = template;
-            }
-          } catch (err) {
-            console.error(`Failed to load template ${templateId}:`, err);
-          }
-        }
-        
-        setTemplates(templateData);
-
-        // Fetch like counts for each madlib
-        const likeData = {};
-        for (const madlib of userMadlibs) {
-          try {
-            const likeRes = await fetch(`${BACKEND}/api/likes/${madlib._id}/count/`, {
-              credentials: "include",
-            });
-            if (likeRes.ok) {
-              const likeJson = await likeRes.json();
-              likeData[madlib._id] = likeJson.likes_count || 0;
-            }
-          } catch (err) {
-            console.error(`Failed to load likes for madlib ${madlib._id}:`, err);
-            likeData[madlib._id] = 0;
-          }
-        }
-        
-        setLikeCounts(likeData);
+        await loadMadlibsPage();
       } catch (err) {
         console.error("Error fetching madlibs:", err);
       } finally {
@@ -176,6 +162,7 @@ export default function Profile() {
 
       // Remove from local state
       setMadlibs(madlibs.filter(m => m._id !== madlibId));
+      setStats(prev => prev && { ...prev, madlibs_count: Math.max(0, prev.madlibs_count - 1) });
       alert("Madlib deleted successfully!");
     } catch (err) {
       console.error("Delete madlib error:", err);
@@ -419,7 +406,12 @@ export default function Profile() {
 
       {/* MY MADLIBS SECTION */}
       <div style={{ marginTop: "40px", maxWidth: "800px" }}>
-        <h2>All My Madlibs ({madlibs.length})</h2>
+        <h2>All My Madlibs ({stats?.madlibs_count ?? madlibs.length})</h2>
+        {stats && (
+          <p style={{ color: "#666", marginTop: 0 }}>
+            {stats.likes_received} {stats.likes_received === 1 ? "like" : "likes"} received
+          </p>
+        )}
 
         {madlibsLoading ? (
           <p>Loading your madlibs...</p>
@@ -558,6 +550,23 @@ export default function Profile() {
             })}
           </div>
         )}
+
+        {nextCursor && !madlibsLoading && (
+          <button
+            onClick={() => loadMadlibsPage(nextCursor)}
+            style={{
+              marginTop: "20px",
+              padding: "8px 14px",
+              background: "#444",
+              color: "white",
+              border: "none",
+              borderRadius: "6px",
+              cursor: "pointer",
+            }}
+          >
+            Load more
+          </button>
+        )}
       </div>
     </div>
   );